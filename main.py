@@ -1,14 +1,45 @@
+import argparse
 import sys
 
-from PyQt5.QtWidgets import QApplication
-
-from src.ui.main_window import DataCollectorApp
-
 
 def main():
     """Main entry point."""
-    app = QApplication(sys.argv)
-    window = DataCollectorApp()
+    if "--headless" in sys.argv[1:]:
+        # Capture without the GUI; QtWidgets is never imported
+        from src.cli.headless import main as headless_main
+
+        argv = [arg for arg in sys.argv[1:] if arg != "--headless"]
+        sys.exit(headless_main(argv))
+
+    parser = argparse.ArgumentParser(description="Jetson data collector.")
+    parser.add_argument(
+        "--multi-camera", action="store_true",
+        help="tiled preview and synchronized capture of every camera in "
+             "multi_camera.cameras",
+    )
+    parser.add_argument("--source", default=None,
+                        help="frame source type (overrides source.type)")
+    parser.add_argument(
+        "--remote", action="store_true", default=None,
+        help="serve the remote-control API and MJPEG preview "
+             "(see the remote config section)",
+    )
+    # Anything else is left for Qt (e.g. -platform)
+    args, qt_args = parser.parse_known_args()
+
+    from PyQt5.QtWidgets import QApplication
+
+    app = QApplication(sys.argv[:1] + qt_args)
+    if args.multi_camera:
+        from src.ui.multi_camera_window import MultiCameraWindow
+
+        window = MultiCameraWindow(source_type=args.source)
+    else:
+        from src.ui.main_window import DataCollectorApp
+
+        window = DataCollectorApp(
+            source_type=args.source, remote=args.remote
+        )
     window.show()
     sys.exit(app.exec_())
 
@@ -0,0 +1,369 @@
+"""
+Headless capture: drive the camera and save frames without the GUI.
+
+Run with:  python3 main.py --headless --count 100 --roi-size 448x448
+      or:  python3 -m src.cli.headless --duration 60 --interval 2
+      or:  python3 main.py --headless --record --codec ffv1 --duration 600
+
+Defaults come from the "headless" section of config.json; command-line
+flags override them. Only QtCore is loaded (for VideoThread and the
+writer signals), so no display server or widget toolkit is needed.
+"""
+import argparse
+import os
+import signal
+import sys
+import time
+
+from PyQt5.QtCore import QCoreApplication, QTimer
+
+from src.config import (
+    APP_CONF,
+    BUS_CONF,
+    CAM_CONF,
+    DEDUPE_CONF,
+    HEADLESS_CONF,
+    REC_CONF,
+)
+from src.core.burst import BurstCapture
+from src.core.catalog import CaptureCatalog
+from src.core.dedupe import DuplicateIndex
+from src.core.imaging import centered_roi, clamp_roi, parse_roi_size
+from src.core.metrics import METRICS
+from src.core.recorder import CODECS, VideoRecorder
+from src.core.shards import NPY_FORMAT, ShardSink
+from src.core.tar_shards import TarShardSink
+from src.core.video_thread import VideoThread
+
+FORMATS = ("jpg", "png", "tiff", "bmp", NPY_FORMAT)
+
+
+def parse_rect(text):
+    """Parse "x,y,w,h" into a tuple of ints."""
+    try:
+        x, y, w, h = (int(v) for v in text.split(","))
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"expected x,y,w,h, got {text!r}")
+    return (x, y, w, h)
+
+
+def parse_size(text):
+    size = parse_roi_size(text)
+    if size is None:
+        raise argparse.ArgumentTypeError(f"expected WxH, got {text!r}")
+    return size
+
+
+def build_parser():
+    """Command-line options; defaults are filled in from HEADLESS_CONF."""
+    parser = argparse.ArgumentParser(
+        description="Capture frames without the GUI."
+    )
+    out = parser.add_argument_group("output")
+    out.add_argument(
+        "--output-dir", default=APP_CONF["save_directory"],
+        help="save directory (default: %(default)s)",
+    )
+    out.add_argument("--format", choices=FORMATS,
+                     default=HEADLESS_CONF["format"])
+    out.add_argument("--prefix", default=HEADLESS_CONF["prefix"])
+    out.add_argument(
+        "--tar", action="store_true", default=HEADLESS_CONF["tar"],
+        help="stream encoded captures into rolling tar shards",
+    )
+    roi = out.add_mutually_exclusive_group()
+    roi.add_argument(
+        "--roi", type=parse_rect, metavar="X,Y,W,H",
+        help="crop region in sensor pixels",
+    )
+    roi.add_argument(
+        "--roi-size", type=parse_size, metavar="WxH",
+        help="crop a centred region of this size",
+    )
+    out.add_argument(
+        "--dedupe", choices=("off", "flag", "skip"),
+        default=DEDUPE_CONF["mode"],
+        help="skip or flag near-duplicates of captures already saved",
+    )
+    out.add_argument(
+        "--sensor-roi", action="store_true", default=CAM_CONF["sensor_roi"],
+        help="crop the ROI in the camera pipeline (Argus dual-stream)",
+    )
+
+    run = parser.add_argument_group("capture")
+    run.add_argument("--source", default=None,
+                     help="frame source type (overrides source.type)")
+    run.add_argument("--count", type=int, default=HEADLESS_CONF["count"],
+                     help="stop after this many frames (0: no limit)")
+    run.add_argument("--duration", type=float,
+                     default=HEADLESS_CONF["duration"],
+                     help="stop after this many seconds (0: no limit)")
+    run.add_argument("--interval", type=float,
+                     default=HEADLESS_CONF["interval"],
+                     help="minimum seconds between saved frames")
+    run.add_argument("--stride", type=int, default=HEADLESS_CONF["stride"],
+                     help="keep every Kth frame")
+    run.add_argument(
+        "--frame-bus", action="store_true", default=BUS_CONF["enabled"],
+        help="also publish frames to the shared-memory frame bus",
+    )
+
+    rec = parser.add_argument_group("video recording")
+    rec.add_argument(
+        "--record", action="store_true",
+        help="record video segments instead of saving frames "
+             "(uses --duration; --count, --interval and --stride are ignored)",
+    )
+    rec.add_argument("--codec", choices=tuple(CODECS),
+                     default=REC_CONF["codec"])
+    rec.add_argument("--segment-seconds", type=float,
+                     default=REC_CONF["segment_seconds"],
+                     help="start a new file every this many seconds")
+
+    isp = parser.add_argument_group("ISP settings")
+    isp.add_argument("--exposure", type=int, nargs=2, metavar=("MIN", "MAX"),
+                     help="exposure time range in ns")
+    isp.add_argument("--gain", type=float, nargs=2, metavar=("MIN", "MAX"),
+                     help="analog gain range")
+    isp.add_argument("--ae-lock", action="store_true", default=None)
+    isp.add_argument("--awb-lock", action="store_true", default=None)
+    isp.add_argument("--saturation", type=float)
+    isp.add_argument("--wb-mode", type=int)
+    isp.add_argument("--tnr-mode", type=int)
+    isp.add_argument("--tnr-strength", type=float)
+    isp.add_argument("--ee-mode", type=int)
+    isp.add_argument("--ee-strength", type=float)
+    isp.add_argument("--h-flip", action="store_true", default=None)
+    isp.add_argument("--v-flip", action="store_true", default=None)
+    return parser
+
+
+def isp_settings(args):
+    """Merge the ISP settings from the config and the command line."""
+    settings = dict(HEADLESS_CONF["isp"])
+    flags = {
+        "exposure_range": args.exposure,
+        "gain_range": args.gain,
+        "ae_lock": args.ae_lock,
+        "awb_lock": args.awb_lock,
+        "saturation": args.saturation,
+        "wb_mode": args.wb_mode,
+        "tnr_mode": args.tnr_mode,
+        "tnr_strength": args.tnr_strength,
+        "ee_mode": args.ee_mode,
+        "ee_strength": args.ee_strength,
+        "h_flip": args.h_flip,
+        "v_flip": args.v_flip,
+    }
+    settings.update({k: v for k, v in flags.items() if v is not None})
+    return settings
+
+
+def resolve_roi(args):
+    """The sensor-space crop rectangle, or None for full frames."""
+    if args.roi:
+        return clamp_roi(args.roi)
+    size = args.roi_size
+    if size is None and HEADLESS_CONF["roi"]:
+        return clamp_roi(tuple(HEADLESS_CONF["roi"]))
+    if size is None and HEADLESS_CONF["roi_size"]:
+        size = parse_roi_size(HEADLESS_CONF["roi_size"])
+    return centered_roi(size) if size else None
+
+
+class HeadlessCapture:
+    """
+    Runs a VideoThread and a BurstCapture (or, with --record, a
+    VideoRecorder) inside a QCoreApplication.
+    """
+
+    def __init__(self, app, args):
+        self.app = app
+        self.args = args
+        self.interrupted = False
+        self.failed = False
+        self.stats = None
+
+        save_dir = os.path.abspath(args.output_dir)
+        os.makedirs(save_dir, exist_ok=True)
+        self.catalog = CaptureCatalog(save_dir)
+        self.sink = None
+        # Recordings write their own files
+        if args.format == NPY_FORMAT and not args.record:
+            self.sink = ShardSink(save_dir, args.prefix)
+        elif args.tar and not args.record:
+            self.sink = TarShardSink(save_dir, args.prefix)
+
+        self.thread = VideoThread(source_type=args.source)
+        self.thread.seed_settings(isp_settings(args))
+        self.thread.finished.connect(self._on_thread_finished)
+        if args.frame_bus:
+            self.thread.enable_frame_bus(True)
+
+        if args.record:
+            self.burst = VideoRecorder(self.thread)
+        else:
+            self.burst = BurstCapture(self.thread)
+        self.burst.stats_updated.connect(self._print_progress)
+        self.burst.finished.connect(self._on_finished)
+        self._last_progress = 0.0
+
+        self.dedupe = None
+        if (args.dedupe != "off" and args.format != NPY_FORMAT
+                and not args.record):
+            self.dedupe = DuplicateIndex(save_dir)
+            self.burst.writer.dedupe = self.dedupe
+            self.burst.writer.keep_duplicates = args.dedupe == "flag"
+
+    def start(self):
+        """Start the camera and the capture."""
+        args = self.args
+        self.rect = resolve_roi(args)
+        if args.sensor_roi:
+            self.thread.capture_roi = self.rect
+        self._start_time = time.monotonic()
+        self.thread.start()
+        if args.record:
+            self.burst.start(
+                self.catalog.directory,
+                args.prefix,
+                args.codec,
+                self.rect,
+                segment_seconds=args.segment_seconds,
+                duration=args.duration,
+            )
+            print(
+                f"Recording to {self.catalog.directory} "
+                f"({args.codec}, ROI {self.rect or 'full frame'})"
+            )
+            return
+        self.burst.start(
+            self.catalog,
+            args.prefix,
+            args.format,
+            self.rect,
+            count=args.count,
+            stride=args.stride,
+            duration=args.duration,
+            interval=args.interval,
+            sink=self.sink,
+        )
+        print(
+            f"Capturing to {self.catalog.directory} "
+            f"({args.format}, ROI {self.rect or 'full frame'})"
+        )
+
+    def stop(self):
+        """Stop capturing; queued frames are still written."""
+        self.interrupted = True
+        self.burst.stop()
+
+    def _print_progress(self, stats):
+        now = time.monotonic()
+        if now - self._last_progress < 2.0:
+            return
+        self._last_progress = now
+        if self.args.record:
+            print(
+                f"  {stats['elapsed']:.0f} s: {stats['frames_encoded']} "
+                f"encoded, {stats['encode_fps']:.1f} fps, "
+                f"{stats['disk_mb_s']:.1f} MB/s, segment {stats['segments']}"
+            )
+            return
+        print(
+            f"  {stats['elapsed']:.0f} s: {stats['frames_written']} written, "
+            f"{stats['capture_fps']:.1f} fps, queue {stats['queue_depth']}"
+        )
+
+    def _on_thread_finished(self):
+        # Only expected after the burst has finished
+        if self.burst.is_running:
+            print("Frame source stopped unexpectedly.")
+            self.failed = True
+            self.burst.stop()
+
+    def _on_finished(self, stats):
+        self.stats = stats
+        if stats.get("error"):
+            self.failed = True
+        self.app.quit()
+
+    def shutdown(self):
+        """Stop the camera and wait for every write to finish."""
+        camera_elapsed = time.monotonic() - self._start_time
+        frames = self.thread.frame_count
+        self.burst.shutdown()
+        self.thread.stop()
+        self.thread.enable_frame_bus(False)
+        self.catalog.close()
+        if self.sink is not None:
+            self.sink.close()
+        if self.dedupe is not None:
+            self.dedupe.close()
+        return camera_elapsed, frames
+
+
+def report(stats, camera_elapsed, camera_frames):
+    """Print the throughput summary at exit."""
+    dropped = stats["dropped"]
+    camera = (
+        f"  camera:  {camera_frames} frames, "
+        f"{camera_frames / max(camera_elapsed, 1e-6):.1f} fps\n"
+    )
+    if "frames_encoded" in stats:
+        print(
+            f"Recorded {stats['frames_encoded']} frames in "
+            f"{stats['segments']} segments in {stats['elapsed']:.1f} s\n"
+            + camera +
+            f"  capture: {stats['capture_fps']:.1f} fps, "
+            f"encode: {stats['encode_fps']:.1f} fps "
+            f"({stats['encode_ms']:.1f} ms/frame)\n"
+            f"  disk:    {stats['bytes_written'] / 1e6:.1f} MB, "
+            f"{stats['disk_mb_s']:.1f} MB/s\n"
+            f"  dropped: camera {dropped['camera']}, "
+            f"queue {dropped['queue']}, write {dropped['write']}"
+        )
+    else:
+        print(
+            f"Wrote {stats['frames_written']} frames in "
+            f"{stats['elapsed']:.1f} s\n"
+            + camera +
+            f"  capture: {stats['capture_fps']:.1f} fps, "
+            f"write: {stats['write_fps']:.1f} fps\n"
+            f"  dropped: {dropped['total']} (camera {dropped['camera']}, "
+            f"queue {dropped['queue']}, write {dropped['write']}, "
+            f"duplicate {dropped['duplicate']})"
+        )
+    if METRICS.enabled:
+        snap = METRICS.snapshot("summary")
+        for stage, s in sorted(snap["stages"].items()):
+            print(
+                f"  {stage:<18} mean {s['mean'] * 1000:.2f} ms, "
+                f"p95 {s['p95'] * 1000:.2f} ms"
+            )
+
+
+def main(argv=None):
+    """Entry point; returns the process exit code."""
+    args = build_parser().parse_args(argv)
+    app = QCoreApplication.instance() or QCoreApplication(sys.argv[:1])
+    capture = HeadlessCapture(app, args)
+
+    signal.signal(signal.SIGINT, lambda *_: capture.stop())
+    signal.signal(signal.SIGTERM, lambda *_: capture.stop())
+    # Let the Python signal handlers run while Qt's event loop is idle
+    wakeup = QTimer()
+    wakeup.timeout.connect(lambda: None)
+    wakeup.start(200)
+
+    capture.start()
+    app.exec_()
+    wakeup.stop()
+    camera_elapsed, camera_frames = capture.shutdown()
+    if capture.stats is not None:
+        report(capture.stats, camera_elapsed, camera_frames)
+    return 1 if capture.failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
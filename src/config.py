@@ -2,36 +2,195 @@ import json
 import os
 
 
+DEFAULT_CONFIG = {
+    "camera": {
+        "default_width": 1640,
+        "default_height": 1232,
+        "display_width": 960,
+        "display_height": 540,
+        "framerate": "30/1",
+        "pipeline_mode": "dual",
+        "sensor_roi": False,
+        "preview_slots": 1,
+        "buffer_pool_size": 6,
+        "exposure_min": 13000,
+        "exposure_multiplier": 3000000,
+        "gain_min": 1.0,
+        "gain_max": 1.0,
+    },
+    "app": {
+        "window_title": "Jetson Data Collector Pro",
+        "window_geometry": [50, 50, 1100, 800],
+        "save_directory": "captured_data",
+    },
+    "source": {
+        "type": "auto",
+        "device": 0,
+        "backend_cache": "~/.cache/jetson_data_collector/backends.json",
+        "backend_cache_max_age": 86400,
+        "synthetic": {
+            "width": None,
+            "height": None,
+            "fps": 30,
+            "pattern": "noise",
+        },
+        "replay": {
+            "path": "",
+            "loop": True,
+            "fps": None,
+        },
+    },
+    "writer": {
+        "workers": 2,
+        "queue_size": 16,
+        "fsync_batch_size": 0,
+    },
+    "burst": {
+        "workers": 4,
+        "queue_size": 64,
+        "stats_interval_ms": 500,
+    },
+    "ring_buffer": {
+        "seconds": 3.0,
+        "post_seconds": 1.0,
+        "max_bytes": 268435456,
+    },
+    "settings": {
+        "debounce_ms": 400,
+        "software_saturation": False,
+    },
+    "shards": {
+        "initial_capacity": 256,
+        "max_samples": 4096,
+        "max_bytes": 2147483648,
+    },
+    "tar_shards": {
+        "max_samples": 10000,
+        "max_bytes": 1073741824,
+    },
+    "headless": {
+        "format": "png",
+        "tar": False,
+        "prefix": "",
+        "roi": None,
+        "roi_size": None,
+        "count": 0,
+        "interval": 0.0,
+        "stride": 1,
+        "duration": 0.0,
+        "isp": {},
+    },
+    "metrics": {
+        "enabled": False,
+        "hud": False,
+        "export_path": "",
+        "export_format": "prometheus",
+        "export_interval_s": 10,
+    },
+    "auto_capture": {
+        "analysis_width": 320,
+        "min_focus": 100.0,
+        "max_motion": 3.0,
+        "max_clipped": 0.05,
+        "min_change": 6.0,
+        "min_interval": 1.0,
+        "clip_dark": 4,
+        "clip_bright": 251,
+        "stats_interval_ms": 500,
+    },
+    "scopes": {
+        "enabled": False,
+        "rate_hz": 10.0,
+        "analysis_width": 320,
+        "bins": 64,
+        "clip_dark": 4,
+        "clip_bright": 251,
+        "peaking_threshold": 40,
+    },
+    "dedupe": {
+        "mode": "off",
+        "max_distance": 7,
+    },
+    "recording": {
+        "codec": "mjpg",
+        "quality": 95,
+        "bitrate": 20000000,
+        "segment_seconds": 60,
+        "queue_frames": 30,
+        "stats_interval_ms": 500,
+    },
+    "frame_bus": {
+        "enabled": False,
+        "name": "jetson_data_collector",
+        "stream": "full",
+        "slots": 4,
+        "max_frame_bytes": 0,
+        "max_readers": 8,
+        "reader_timeout_s": 2.0,
+    },
+    "remote": {
+        "enabled": False,
+        "host": "127.0.0.1",
+        "port": 8080,
+        "token": "",
+        "preview_width": 480,
+        "preview_quality": 70,
+        "max_fps": 10,
+        "max_kbps": 4000,
+        "call_timeout_s": 5.0,
+    },
+    "multi_camera": {
+        "cameras": [
+            {"name": "cam0", "sensor_id": 0},
+            {"name": "cam1", "sensor_id": 1},
+        ],
+        "sync_window": 3,
+        "sync_timeout_ms": 1000,
+        "max_skew_ms": 20.0,
+        "tile_width": 480,
+    },
+}
+
+
 # --- CONFIGURATION LOADING ---
 def load_config(config_path="config.json"):
-    """Load configuration from a JSON file."""
+    """Load configuration from a JSON file, filling in missing defaults."""
+    config = {
+        section: dict(values) for section, values in DEFAULT_CONFIG.items()
+    }
     try:
         with open(config_path, "r") as f:
-            return json.load(f)
+            user_config = json.load(f)
     except FileNotFoundError:
         print(f"Config file {config_path} not found. Using defaults.")
-        return {
-            "camera": {
-                "default_width": 1640,
-                "default_height": 1232,
-                "display_width": 960,
-                "display_height": 540,
-                "framerate": "30/1",
-                "exposure_min": 13000,
-                "exposure_multiplier": 3000000,
-                "gain_min": 1.0,
-                "gain_max": 1.0,
-            },
-            "app": {
-                "window_title": "Jetson Data Collector Pro",
-                "window_geometry": [50, 50, 1100, 800],
-                "save_directory": "captured_data",
-            },
-        }
+        return config
+
+    for section, values in user_config.items():
+        if isinstance(values, dict):
+            config.setdefault(section, {}).update(values)
+        else:
+            config[section] = values
+    return config
 
 CONFIG = load_config()
 CAM_CONF = CONFIG["camera"]
 APP_CONF = CONFIG["app"]
+SOURCE_CONF = CONFIG["source"]
+WRITER_CONF = CONFIG["writer"]
+BURST_CONF = CONFIG["burst"]
+RING_CONF = CONFIG["ring_buffer"]
+SETTINGS_CONF = CONFIG["settings"]
+METRICS_CONF = CONFIG["metrics"]
+HEADLESS_CONF = CONFIG["headless"]
+SHARD_CONF = CONFIG["shards"]
+TAR_CONF = CONFIG["tar_shards"]
+MULTI_CONF = CONFIG["multi_camera"]
+AUTO_CONF = CONFIG["auto_capture"]
+DEDUPE_CONF = CONFIG["dedupe"]
+SCOPES_CONF = CONFIG["scopes"]
+REMOTE_CONF = CONFIG["remote"]
+BUS_CONF = CONFIG["frame_bus"]
+REC_CONF = CONFIG["recording"]
 
 DEFAULT_WIDTH = CAM_CONF["default_width"]
 DEFAULT_HEIGHT = CAM_CONF["default_height"]
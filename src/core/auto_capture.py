@@ -0,0 +1,260 @@
+import threading
+import time
+
+import cv2
+from PyQt5.QtCore import QTimer, pyqtSignal
+
+from src.config import AUTO_CONF
+from src.core.frame_worker import FrameWorker
+from src.core.imaging import sensor_rect_on_frame
+from src.core.metrics import METRICS
+
+
+class FrameAnalyzer:
+    """
+    Cheap quality metrics on a decimated grey copy of each frame.
+
+    Frames are shrunk with nearest-neighbour sampling to `width` pixels
+    across (optionally after cropping to a region) and converted to grey,
+    reusing the same buffers every call. On that thumbnail:
+
+    * focus: variance of the Laplacian (higher is sharper)
+    * motion: mean absolute grey-level difference to the previous frame
+    * clipped: fraction of pixels at or beyond the dark/bright limits
+    """
+
+    def __init__(
+        self,
+        width=AUTO_CONF["analysis_width"],
+        clip_dark=AUTO_CONF["clip_dark"],
+        clip_bright=AUTO_CONF["clip_bright"],
+    ):
+        """Initialize the analyzer for thumbnails `width` pixels wide."""
+        self.width = width
+        self.clip_dark = clip_dark
+        self.clip_bright = clip_bright
+        self._small = None
+        self._gray = None
+        self._prev = None
+        self._diff = None
+        self._lap = None
+
+    def thumbnail(self, frame, rect=None):
+        """Decimated grey copy of frame (cropped to rect), reused buffer."""
+        if rect is not None:
+            x, y, w, h = rect
+            frame = frame[y : y + h, x : x + w]
+        h, w = frame.shape[:2]
+        tw = max(1, min(self.width, w))
+        th = max(1, int(round(h * tw / w)))
+        if self._small is None or self._small.shape[:2] != (th, tw):
+            self._small = self._gray = self._diff = self._lap = None
+            self._prev = None
+        small = cv2.resize(
+            frame, (tw, th), dst=self._small, interpolation=cv2.INTER_NEAREST
+        )
+        self._small = small
+        if small.ndim == 2:
+            return small
+        gray = cv2.cvtColor(small, cv2.COLOR_BGR2GRAY, dst=self._gray)
+        self._gray = gray
+        return gray
+
+    def difference(self, gray, other):
+        """Mean absolute grey-level difference between two thumbnails."""
+        if other is None or other.shape != gray.shape:
+            return None
+        self._diff = cv2.absdiff(gray, other, dst=self._diff)
+        return cv2.mean(self._diff)[0]
+
+    def analyze(self, frame, rect=None):
+        """Return (metrics dict, thumbnail) for one frame."""
+        gray = self.thumbnail(frame, rect)
+        self._lap = cv2.Laplacian(gray, cv2.CV_32F, dst=self._lap)
+        focus = float(cv2.meanStdDev(self._lap)[1][0, 0] ** 2)
+        motion = self.difference(gray, self._prev)
+        exposed = cv2.countNonZero(
+            cv2.inRange(gray, self.clip_dark + 1, self.clip_bright - 1)
+        )
+        metrics = {
+            "focus": focus,
+            "motion": motion,
+            "clipped": 1.0 - exposed / gray.size,
+        }
+        # Keep this frame's thumbnail for the next motion estimate
+        if self._prev is None or self._prev.shape != gray.shape:
+            self._prev = gray.copy()
+        else:
+            self._prev[...] = gray
+        return metrics, gray
+
+
+class AutoCapture(FrameWorker):
+    """
+    Trigger captures when the preview is sharp, still and well exposed.
+
+    Preview frames passed to submit() are scored in a worker thread (see
+    FrameWorker); frames it could not keep up with are counted as skipped.
+    A frame triggers a capture when its focus is at least min_focus, its
+    motion at most max_motion, its clipped fraction at most max_clipped,
+    it differs from the last triggered frame by at least min_change, and
+    min_interval seconds have passed. `triggered` carries a copy of the
+    frame that passed and its metrics; the receiver saves exactly that
+    frame. When `video_thread` is set and runs a dual-stream pipeline the
+    scored frame is only the preview, so the next full-resolution frame
+    is scored again and only emitted if it passes the focus and exposure
+    limits too (otherwise it is counted in `rejected`).
+    """
+
+    triggered = pyqtSignal(object, dict)
+    stats_updated = pyqtSignal(dict)
+
+    def __init__(
+        self,
+        min_focus=AUTO_CONF["min_focus"],
+        max_motion=AUTO_CONF["max_motion"],
+        max_clipped=AUTO_CONF["max_clipped"],
+        min_change=AUTO_CONF["min_change"],
+        min_interval=AUTO_CONF["min_interval"],
+    ):
+        """Initialize the auto-capture gate with its thresholds."""
+        super().__init__()
+        self.min_focus = min_focus
+        self.max_motion = max_motion
+        self.max_clipped = max_clipped
+        self.min_change = min_change
+        self.min_interval = min_interval
+        self.region = None
+        self.analyzer = None
+        self.video_thread = None
+        self._full_analyzer = None
+        self._lock = threading.Lock()
+
+        self._timer = QTimer(self)
+        self._timer.setInterval(AUTO_CONF["stats_interval_ms"])
+        self._timer.timeout.connect(self._report)
+        self._reset_counters()
+
+    def _reset_counters(self):
+        self.frames_scored = 0
+        self.captures = 0
+        self.rejected = 0
+        self.last_metrics = None
+        self._cost_total = 0.0
+        self._cost_max = 0.0
+        self._start_time = time.monotonic()
+        self._last_capture = None
+        self._last_thumb = None
+
+    def set_region(self, rect):
+        """Score only a sensor-space rect (x, y, w, h), or None for all."""
+        self.region = rect
+
+    def start(self):
+        """Start scoring frames passed to submit()."""
+        if self.is_running:
+            return
+        self._reset_counters()
+        self.analyzer = FrameAnalyzer()
+        self._full_analyzer = FrameAnalyzer()
+        super().start()
+        self._timer.start()
+
+    def stop(self):
+        """Stop scoring and wait for the worker to finish its frame."""
+        if not self.is_running:
+            return
+        super().stop()
+        self._timer.stop()
+        self._report()
+
+    def process(self, frame):
+        """Compute the metrics for a frame and decide whether to capture."""
+        start = time.perf_counter()
+        metrics, thumb = self.analyzer.analyze(
+            frame, sensor_rect_on_frame(self.region, frame.shape)
+        )
+        change = self.analyzer.difference(thumb, self._last_thumb)
+        metrics["change"] = change
+        now = time.monotonic()
+        fire = (
+            metrics["focus"] >= self.min_focus
+            and metrics["motion"] is not None
+            and metrics["motion"] <= self.max_motion
+            and metrics["clipped"] <= self.max_clipped
+            and (change is None or change >= self.min_change)
+            and (
+                self._last_capture is None
+                or now - self._last_capture >= self.min_interval
+            )
+        )
+        if fire:
+            self._last_capture = now
+            self._last_thumb = thumb.copy()
+        cost = time.perf_counter() - start
+
+        with self._lock:
+            self.frames_scored += 1
+            self._cost_total += cost
+            self._cost_max = max(self._cost_max, cost)
+            self.last_metrics = metrics
+            if fire:
+                self.captures += 1
+        if METRICS.enabled:
+            METRICS.observe("auto.metrics", cost)
+            if fire:
+                METRICS.inc("auto_captures")
+        if not fire:
+            return
+        metrics = dict(metrics, metric_ms=cost * 1000)
+        thread = self.video_thread
+        if thread is not None and thread.dual_stream:
+            thread.request_full_frame(
+                lambda full: self._check_full_frame(full, metrics)
+            )
+        else:
+            self.triggered.emit(frame.copy(), metrics)
+
+    def _check_full_frame(self, frame, metrics):
+        """Re-score a full-resolution frame (capture thread) before saving."""
+        if not self.is_running:
+            return
+        full, _ = self._full_analyzer.analyze(
+            frame, sensor_rect_on_frame(self.region, frame.shape)
+        )
+        if full["focus"] < self.min_focus or full["clipped"] > self.max_clipped:
+            with self._lock:
+                self.rejected += 1
+            return
+        metrics = dict(
+            metrics, full_focus=full["focus"], full_clipped=full["clipped"]
+        )
+        self.triggered.emit(frame.copy(), metrics)
+
+    def get_stats(self):
+        """Return scoring rate, per-frame metric cost and capture count."""
+        with self._lock:
+            scored = self.frames_scored
+            cost_total = self._cost_total
+            cost_max = self._cost_max
+            metrics = self.last_metrics
+            captures = self.captures
+            rejected = self.rejected
+        elapsed = max(time.monotonic() - self._start_time, 1e-6)
+        return {
+            "frames_scored": scored,
+            "frames_skipped": self.skipped,
+            "score_fps": scored / elapsed,
+            "cost_ms": cost_total / scored * 1000 if scored else 0.0,
+            "cost_max_ms": cost_max * 1000,
+            "captures": captures,
+            "rejected": rejected,
+            "metrics": metrics,
+        }
+
+    def _report(self):
+        self.stats_updated.emit(self.get_stats())
+
+    def shutdown(self):
+        """Stop the worker thread."""
+        self.stop()
@@ -0,0 +1,113 @@
+import glob
+import json
+import os
+import socket
+import threading
+import time
+
+from src.config import CAM_CONF, SOURCE_CONF
+from src.core.writer import write_atomic
+
+# Source types worth caching; the others never fall through a chain
+CACHED_TYPES = ("auto", "argus", "webcam")
+
+# Only real cameras are remembered. Synthetic frames are the fallback
+# when no camera opens, so caching them would hide a camera that comes
+# back on the next launch.
+CACHED_BACKENDS = ("argus-dual", "argus", "webcam")
+
+
+def device_fingerprint():
+    """Video device nodes present now; a change invalidates the cache."""
+    return sorted(glob.glob("/dev/video*"))
+
+
+class BackendCache:
+    """
+    Remembers which frame source works on this machine.
+
+    Entries are keyed by host, source type, webcam device and pipeline
+    mode, and stored as JSON so the next launch can open the known-good
+    backend directly instead of waiting for earlier ones to time out.
+    Only camera backends (CACHED_BACKENDS) are stored. An entry is ignored once it is older than `max_age` seconds or the
+    set of /dev/video* nodes has changed.
+    """
+
+    def __init__(
+        self,
+        path=SOURCE_CONF["backend_cache"],
+        max_age=SOURCE_CONF["backend_cache_max_age"],
+    ):
+        """Initialize the cache; path "" disables it."""
+        self.path = os.path.expanduser(path) if path else ""
+        self.max_age = max_age
+        self._lock = threading.Lock()
+        self._entries = None
+
+    def key(self, source_type):
+        return "|".join(
+            [
+                socket.gethostname(),
+                source_type,
+                str(SOURCE_CONF["device"]),
+                CAM_CONF["pipeline_mode"],
+            ]
+        )
+
+    def _load(self):
+        if self._entries is None:
+            try:
+                with open(self.path) as f:
+                    self._entries = json.load(f)
+            except (OSError, ValueError):
+                self._entries = {}
+        return self._entries
+
+    def _save(self):
+        try:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            write_atomic(
+                self.path, json.dumps(self._entries, indent=2).encode()
+            )
+        except OSError as e:
+            print(f"Could not save backend cache {self.path}: {e}")
+
+    def lookup(self, source_type):
+        """Return the cached entry for a source type, or None."""
+        if not self.path or source_type not in CACHED_TYPES:
+            return None
+        with self._lock:
+            entry = self._load().get(self.key(source_type))
+        if entry is None or entry.get("backend") not in CACHED_BACKENDS:
+            return None
+        if time.time() - entry.get("probed_at", 0) > self.max_age:
+            return None
+        if entry.get("devices") != device_fingerprint():
+            return None
+        return entry
+
+    def store(self, source_type, name, capabilities, open_time):
+        """Record a camera backend that worked, with its capabilities."""
+        if (
+            not self.path
+            or source_type not in CACHED_TYPES
+            or name not in CACHED_BACKENDS
+        ):
+            return
+        with self._lock:
+            self._load()[self.key(source_type)] = {
+                "backend": name,
+                "capabilities": capabilities,
+                "open_time": open_time,
+                "devices": device_fingerprint(),
+                "probed_at": time.time(),
+            }
+            self._save()
+
+    def forget(self, source_type):
+        """Drop a cached entry (e.g. the backend stopped working)."""
+        if not self.path:
+            return
+        with self._lock:
+            if self._load().pop(self.key(source_type), None) is not None:
+                self._save()
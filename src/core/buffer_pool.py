@@ -0,0 +1,110 @@
+import threading
+
+import numpy as np
+
+
+class FrameBuffer:
+    """A pooled array with a reference count."""
+
+    __slots__ = ("array", "_pool", "_refs")
+
+    def __init__(self, array, pool):
+        self.array = array
+        self._pool = pool
+        self._refs = 0
+
+    def acquire(self):
+        """Take an extra reference; pair every call with release()."""
+        with self._pool._lock:
+            self._refs += 1
+        return self
+
+    def release(self):
+        """Drop a reference, returning the buffer to the pool at zero."""
+        self._pool._release(self)
+
+
+class BufferPool:
+    """
+    Reusable frame arrays for the capture loop.
+
+    get() hands out a FrameBuffer holding one reference; every consumer
+    that keeps the array past the call that produced it (the preview
+    mailbox, the GUI) takes its own reference and releases it when done.
+    At most `max_buffers` arrays are kept; past that, buffers are still
+    handed out but freed instead of being returned to the pool.
+    """
+
+    def __init__(self, max_buffers=6):
+        """Initialize an empty pool."""
+        self.max_buffers = max_buffers
+        self._lock = threading.Lock()
+        self._free = []
+        self._owned = 0
+        self.hits = 0
+        self.misses = 0
+        self.overflow = 0
+
+    def get(self, shape, dtype=np.uint8):
+        """Return a FrameBuffer of the given shape with one reference."""
+        dtype = np.dtype(dtype)
+        with self._lock:
+            for i, buf in enumerate(self._free):
+                if buf.array.shape == shape and buf.array.dtype == dtype:
+                    del self._free[i]
+                    self.hits += 1
+                    buf._refs = 1
+                    return buf
+            self.misses += 1
+            if self._free and self._owned >= self.max_buffers:
+                # Wrong-sized leftovers (e.g. after a resolution change)
+                self._free.pop(0)
+                self._owned -= 1
+            buf = FrameBuffer(np.empty(shape, dtype), self)
+            if self._owned < self.max_buffers:
+                self._owned += 1
+            else:
+                buf._pool = _UNPOOLED
+                self.overflow += 1
+            buf._refs = 1
+            return buf
+
+    def _release(self, buf):
+        with self._lock:
+            buf._refs -= 1
+            if buf._refs == 0:
+                self._free.append(buf)
+
+    def clear(self):
+        """Forget the free buffers so their memory can be reclaimed."""
+        with self._lock:
+            self._owned -= len(self._free)
+            self._free = []
+
+    def stats(self):
+        """Return pool size, usage and hit/miss counters."""
+        with self._lock:
+            free_bytes = sum(buf.array.nbytes for buf in self._free)
+            return {
+                "max_buffers": self.max_buffers,
+                "owned": self._owned,
+                "free": len(self._free),
+                "in_use": self._owned - len(self._free),
+                "free_bytes": free_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "overflow": self.overflow,
+            }
+
+
+class _Unpooled:
+    """Stand-in pool for buffers allocated beyond max_buffers."""
+
+    _lock = threading.Lock()
+
+    def _release(self, buf):
+        with self._lock:
+            buf._refs -= 1
+
+
+_UNPOOLED = _Unpooled()
@@ -0,0 +1,232 @@
+import os
+import threading
+import time
+
+from PyQt5.QtCore import QObject, QTimer, pyqtSignal
+
+from src.config import BURST_CONF, WRITER_CONF
+from src.core.shards import NPY_FORMAT
+from src.core.writer import CaptureWriter
+
+
+class BurstCapture(QObject):
+    """
+    Continuous capture straight off a VideoThread.
+
+    Frames are taken in the capture thread through a frame listener, so
+    none are lost to the preview's signal queue, and streamed to a
+    dedicated multi-worker CaptureWriter. A burst ends after `count`
+    frames, after `duration` seconds, or when stop() is called; with both
+    limits at 0 it runs until stopped. Only every `stride`-th frame is kept,
+    and at most one frame per `interval` seconds (for time-lapses).
+    With the npy format, frames are appended to a ShardSink instead; with
+    an encoded sink (TarShardSink) the writer streams them into it.
+    """
+
+    stats_updated = pyqtSignal(dict)
+    finished = pyqtSignal(dict)
+    _limit_reached = pyqtSignal()
+
+    def __init__(
+        self,
+        thread,
+        workers=BURST_CONF["workers"],
+        queue_size=BURST_CONF["queue_size"],
+    ):
+        """Initialize the burst controller for a VideoThread."""
+        super().__init__()
+        self.thread = thread
+        self.writer = CaptureWriter(
+            workers, queue_size, WRITER_CONF["fsync_batch_size"]
+        )
+        self.writer.write_finished.connect(self._on_write_finished)
+        self.writer.write_failed.connect(self._on_write_failed)
+        self.writer.write_skipped.connect(self._on_write_skipped)
+        self.writer.start()
+        self._limit_reached.connect(self.stop)
+
+        self._timer = QTimer(self)
+        self._timer.setInterval(BURST_CONF["stats_interval_ms"])
+        self._timer.timeout.connect(self._report)
+
+        self._lock = threading.Lock()
+        self._active = False
+        self._listening = False
+        self._stopping = False
+        self._pending = {}
+        self._reset_counters()
+
+    def _reset_counters(self):
+        self.frames_seen = 0
+        self.frames_queued = 0
+        self.frames_written = 0
+        self.dropped_queue = 0
+        self.dropped_write = 0
+        self.dropped_duplicate = 0
+        self._start_time = time.monotonic()
+        self._end_time = None
+        self._drain_time = None
+        self._start_failures = self.thread.read_failures
+
+    @property
+    def is_running(self):
+        """True while frames are being taken or written."""
+        return self._listening or self._stopping
+
+    def start(self, catalog, prefix, fmt, rect=None, count=0, stride=1,
+              duration=0.0, interval=0.0, sink=None):
+        """Begin a burst into the catalog's directory (or the npy sink)."""
+        if self.is_running:
+            return
+        self.catalog = catalog
+        self.prefix = prefix
+        self.fmt = fmt
+        self.rect = rect
+        self.count = count
+        self.stride = max(1, stride)
+        self.duration = duration
+        self.interval = interval
+        self.sink = sink
+        self._next_capture = 0.0
+        self._reset_counters()
+        self._active = True
+        self._listening = True
+        self.thread.add_frame_listener(self._on_frame)
+        self._timer.start()
+
+    def stop(self):
+        """Stop taking frames; queued frames are still written."""
+        if not self._listening:
+            return
+        with self._lock:
+            self._active = False
+        self._listening = False
+        self.thread.remove_frame_listener(self._on_frame)
+        self._end_time = time.monotonic()
+        self._stopping = True
+        self._report()
+
+    def shutdown(self):
+        """Stop the burst and wait for all writes to finish."""
+        self.stop()
+        self.writer.stop()
+
+    def _on_frame(self, frame):
+        """Called from the capture thread for every frame."""
+        with self._lock:
+            if not self._active:
+                return
+            self.frames_seen += 1
+            elapsed = time.monotonic() - self._start_time
+            if (self.duration and elapsed >= self.duration) or (
+                self.count and self.frames_queued >= self.count
+            ):
+                self._active = False
+                self._limit_reached.emit()
+                return
+            if (self.frames_seen - 1) % self.stride:
+                return
+            if self.interval:
+                if elapsed < self._next_capture:
+                    return
+                # Stay on the interval grid even if a frame arrives late
+                self._next_capture = (
+                    elapsed // self.interval + 1
+                ) * self.interval
+
+            metadata = {
+                "timestamp": time.time(),
+                "roi": list(self.rect) if self.rect else None,
+                "settings": self.thread.get_settings(),
+                "burst_frame": self.frames_seen,
+            }
+            # Frames may already be cropped to a sensor ROI
+            rect = self.thread.frame_rect(self.rect)
+            if self.fmt == NPY_FORMAT:
+                self._append_to_shard(frame, rect, metadata)
+                return
+            if self.sink is not None:
+                key = self.sink.reserve_key()
+                if self.writer.submit(frame, rect, key, self.fmt,
+                                      sink=self.sink, metadata=metadata):
+                    self.frames_queued += 1
+                else:
+                    self.dropped_queue += 1
+                return
+
+            _, filename = self.catalog.reserve(self.prefix, self.fmt)
+            path = os.path.join(self.catalog.directory, filename)
+            # Registered before submitting so a fast write can't finish
+            # before its metadata is known
+            self._pending[path] = (self.catalog, metadata)
+            if self.writer.submit(frame, rect, path, self.fmt,
+                                  metadata=metadata):
+                self.frames_queued += 1
+            else:
+                del self._pending[path]
+                self.catalog.release(filename)
+                self.dropped_queue += 1
+
+    def _append_to_shard(self, frame, rect, metadata):
+        """Copy a frame into the npy shard; no encoding or queueing."""
+        try:
+            self.sink.append(frame, rect, metadata)
+        except OSError as e:
+            print(f"Failed to append to shard: {e}")
+            self.dropped_write += 1
+            return
+        self.frames_queued += 1
+        self.frames_written += 1
+
+    def _on_write_finished(self, path):
+        catalog, metadata = self._pending.pop(path, (None, None))
+        if catalog is not None:
+            catalog.commit(os.path.basename(path), metadata)
+        self.frames_written += 1
+
+    def _on_write_failed(self, path, error):
+        catalog, _ = self._pending.pop(path, (None, None))
+        if catalog is not None:
+            catalog.release(os.path.basename(path))
+        self.dropped_write += 1
+
+    def _on_write_skipped(self, path, duplicate):
+        catalog, _ = self._pending.pop(path, (None, None))
+        if catalog is not None:
+            catalog.release(os.path.basename(path))
+        self.dropped_duplicate += 1
+
+    def get_stats(self):
+        """Return live throughput, drop and queue-depth figures."""
+        now = time.monotonic()
+        elapsed = max((self._end_time or now) - self._start_time, 1e-6)
+        write_elapsed = max((self._drain_time or now) - self._start_time, 1e-6)
+        dropped = {
+            "camera": self.thread.read_failures - self._start_failures,
+            "queue": self.dropped_queue,
+            "write": self.dropped_write,
+            "duplicate": self.dropped_duplicate,
+        }
+        # Frames lost at any stage, including those refused by a full
+        # writer queue
+        dropped["total"] = sum(dropped.values())
+        return {
+            "elapsed": elapsed,
+            "frames_seen": self.frames_seen,
+            "frames_queued": self.frames_queued,
+            "frames_written": self.frames_written,
+            "capture_fps": self.frames_queued / elapsed,
+            "write_fps": self.frames_written / write_elapsed,
+            "dropped": dropped,
+            "queue_depth": self.writer.pending,
+        }
+
+    def _report(self):
+        if self._stopping and self.writer.pending == 0:
+            self._drain_time = time.monotonic()
+        stats = self.get_stats()
+        self.stats_updated.emit(stats)
+        if self._drain_time is not None and self._stopping:
+            self._stopping = False
+            self._timer.stop()
+            self.finished.emit(stats)
@@ -0,0 +1,394 @@
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+from urllib.parse import quote
+
+CATALOG_NAME = ".capture_catalog.db"
+
+# Reservations older than this are assumed to belong to a crashed writer
+STALE_RESERVATION_SECONDS = 600
+
+# Image formats the writer produces; other numbered files in a save
+# directory (recordings and their sidecars, npy and tar shards) are not
+# captures
+CAPTURE_FORMATS = ("jpg", "jpeg", "png", "tiff", "tif", "bmp")
+
+# "<base><digits>.<fmt>", e.g. "data_0012.png" -> ("data_", "0012", "png")
+_NAME_RE = re.compile(
+    r"^(.*?)(\d+)\.(" + "|".join(CAPTURE_FORMATS) + r")$"
+)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS files (
+    name TEXT PRIMARY KEY,
+    base TEXT NOT NULL,
+    idx INTEGER NOT NULL,
+    fmt TEXT NOT NULL,
+    timestamp REAL,
+    metadata TEXT
+);
+CREATE INDEX IF NOT EXISTS files_key ON files (fmt, base, idx);
+CREATE TABLE IF NOT EXISTS counters (
+    prefix TEXT NOT NULL,
+    fmt TEXT NOT NULL,
+    next_index INTEGER NOT NULL,
+    PRIMARY KEY (prefix, fmt)
+);
+CREATE TABLE IF NOT EXISTS reservations (
+    name TEXT PRIMARY KEY,
+    prefix TEXT NOT NULL,
+    fmt TEXT NOT NULL,
+    idx INTEGER NOT NULL,
+    created REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT
+);
+"""
+
+
+def parse_capture_name(name):
+    """Split a capture filename into (base, index, fmt), or None."""
+    # Dotfiles include the catalog and the pHash index with their
+    # -wal/-shm files
+    if name.startswith("."):
+        return None
+    match = _NAME_RE.match(name)
+    if not match:
+        return None
+    base, digits, fmt = match.groups()
+    return base, int(digits), fmt
+
+
+def matches_prefix(name, prefix, fmt):
+    """Return the index if name is "<prefix><digits>.<fmt>", else None."""
+    suffix = f".{fmt}"
+    if not name.endswith(suffix) or not name.startswith(prefix):
+        return None
+    digits = name[len(prefix) : -len(suffix)]
+    if digits.isdigit():
+        return int(digits)
+    return None
+
+
+def read_metadata(directory):
+    """
+    Metadata of every capture in a directory's catalog, by filename.
+
+    Only reads: the catalog is opened read-only, and as immutable when no
+    app has it open (no -wal file) so SQLite creates no files next to it.
+    Returns {} if the directory has no readable catalog.
+    """
+    path = os.path.join(directory, CATALOG_NAME)
+    if not os.path.exists(path):
+        return {}
+    mode = "mode=ro" if os.path.exists(path + "-wal") else "immutable=1"
+    try:
+        conn = sqlite3.connect(
+            f"file:{quote(os.path.abspath(path))}?{mode}", uri=True
+        )
+        try:
+            rows = conn.execute(
+                "SELECT name, metadata FROM files WHERE metadata IS NOT NULL"
+            ).fetchall()
+        finally:
+            conn.close()
+    except sqlite3.Error as e:
+        print(f"Could not read catalog {path}: {e}")
+        return {}
+    return {name: json.loads(metadata) for name, metadata in rows}
+
+
+class CaptureCatalog:
+    """
+    Persistent index of the captures in a save directory.
+
+    The catalog lives in an SQLite file inside the directory. Next indices
+    are kept per (prefix, format) so looking one up does not list the
+    directory, and reservations are taken inside a write transaction so
+    several writers (threads or processes) never hand out the same name.
+    Files added or removed outside the app are picked up by reconcile(),
+    which only rescans when the directory modification time changes.
+    """
+
+    def __init__(self, directory):
+        """Open (or create) the catalog for a directory."""
+        self.directory = directory
+        if not os.path.exists(directory):
+            os.makedirs(directory)
+        self._lock = threading.RLock()
+        # name -> directory mtime when it was reserved (see commit)
+        self._reserved_mtime = {}
+        self._conn = sqlite3.connect(
+            os.path.join(directory, CATALOG_NAME),
+            timeout=10,
+            isolation_level=None,
+            check_same_thread=False,
+        )
+        # WAL keeps its -wal/-shm files for as long as the catalog is
+        # open, so transactions don't create and delete files in the
+        # directory (which would bump its mtime and force a rescan after
+        # every one); SQLite removes them when the last connection closes.
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        # The images themselves are the source of truth and reconcile()
+        # can rebuild the index, so skip the per-transaction fsync.
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(_SCHEMA)
+        with self._transaction() as cur:
+            cur.execute(
+                "DELETE FROM reservations WHERE created < ?",
+                (time.time() - STALE_RESERVATION_SECONDS,),
+            )
+        self.reconcile()
+
+    def close(self):
+        """Close the database connection."""
+        with self._lock:
+            self._conn.close()
+
+    def _transaction(self):
+        return _Transaction(self._conn, self._lock)
+
+    # --- Index allocation ---
+    def next_index(self, prefix, fmt):
+        """Return the next free index without reserving it."""
+        self.reconcile()
+        with self._transaction() as cur:
+            return self._get_counter(cur, prefix, fmt)
+
+    def reserve(self, prefix, fmt):
+        """
+        Atomically reserve the next index for (prefix, fmt).
+
+        Returns (index, filename). The reservation must be completed with
+        commit() once the file is written, or undone with release().
+        Safe to call from any thread; it does not rescan the directory.
+        """
+        with self._transaction() as cur:
+            mtime = self._dir_mtime()
+            idx = self._get_counter(cur, prefix, fmt)
+            name = f"{prefix}{idx:04d}.{fmt}"
+            # Guard against files that appeared since the last reconcile
+            while os.path.exists(os.path.join(self.directory, name)):
+                idx += 1
+                name = f"{prefix}{idx:04d}.{fmt}"
+            cur.execute(
+                "INSERT OR REPLACE INTO reservations VALUES (?, ?, ?, ?, ?)",
+                (name, prefix, fmt, idx, time.time()),
+            )
+            self._set_counter(cur, prefix, fmt, idx + 1)
+            self._reserved_mtime[name] = mtime
+        return idx, name
+
+    def reserve_shared(self, prefixes, fmt):
+        """
+        Reserve one index that is free under every prefix.
+
+        Returns (index, filenames), one filename per prefix, e.g. for
+        ["cam0_", "cam1_"]: (7, ["cam0_0007.png", "cam1_0007.png"]). Used
+        for captures that belong together (one file per camera).
+        """
+        with self._transaction() as cur:
+            mtime = self._dir_mtime()
+            idx = max(self._get_counter(cur, p, fmt) for p in prefixes)
+            while any(
+                os.path.exists(
+                    os.path.join(self.directory, f"{p}{idx:04d}.{fmt}")
+                )
+                for p in prefixes
+            ):
+                idx += 1
+            names = [f"{p}{idx:04d}.{fmt}" for p in prefixes]
+            now = time.time()
+            for prefix, name in zip(prefixes, names):
+                cur.execute(
+                    "INSERT OR REPLACE INTO reservations "
+                    "VALUES (?, ?, ?, ?, ?)",
+                    (name, prefix, fmt, idx, now),
+                )
+                self._set_counter(cur, prefix, fmt, idx + 1)
+                self._reserved_mtime[name] = mtime
+        return idx, names
+
+    def commit(self, name, metadata=None):
+        """Record a written capture and drop its reservation."""
+        parsed = parse_capture_name(name)
+        if parsed is None:
+            return
+        base, idx, fmt = parsed
+        timestamp = (metadata or {}).get("timestamp", time.time())
+        with self._transaction() as cur:
+            cur.execute("DELETE FROM reservations WHERE name = ?", (name,))
+            cur.execute(
+                "INSERT OR REPLACE INTO files VALUES (?, ?, ?, ?, ?, ?)",
+                (name, base, idx, fmt, timestamp,
+                 json.dumps(metadata) if metadata else None),
+            )
+            # Our own write changed the directory; don't rescan for it.
+            # If the directory had already changed outside the app by the
+            # time the name was reserved, leave that to reconcile().
+            before = self._reserved_mtime.pop(name, None)
+            if self._get_meta(cur, "mtime_ns") == str(before):
+                self._set_meta(cur, "mtime_ns", str(self._dir_mtime()))
+
+    def release(self, name):
+        """Drop a reservation whose file was never written."""
+        with self._transaction() as cur:
+            cur.execute("DELETE FROM reservations WHERE name = ?", (name,))
+            self._reserved_mtime.pop(name, None)
+
+    def get_metadata(self, name):
+        """Return the recorded metadata for a capture, or None."""
+        with self._transaction() as cur:
+            row = cur.execute(
+                "SELECT metadata FROM files WHERE name = ?", (name,)
+            ).fetchone()
+        if row and row[0]:
+            return json.loads(row[0])
+        return None
+
+    def _get_counter(self, cur, prefix, fmt):
+        row = cur.execute(
+            "SELECT next_index FROM counters WHERE prefix = ? AND fmt = ?",
+            (prefix, fmt),
+        ).fetchone()
+        if row:
+            return row[0]
+        idx = self._compute_next_index(cur, prefix, fmt)
+        self._set_counter(cur, prefix, fmt, idx)
+        return idx
+
+    def _set_counter(self, cur, prefix, fmt, idx):
+        cur.execute(
+            "INSERT OR REPLACE INTO counters VALUES (?, ?, ?)",
+            (prefix, fmt, idx),
+        )
+
+    def _compute_next_index(self, cur, prefix, fmt):
+        """Max index on disk or reserved for (prefix, fmt), plus one."""
+        if prefix and prefix[-1].isdigit():
+            # Digits at the end of the prefix blur into the index, so the
+            # (base, idx) split can't be used; scan names with this prefix.
+            max_idx = 0
+            rows = cur.execute(
+                "SELECT name FROM files WHERE fmt = ? AND name >= ? "
+                "AND name < ?",
+                (fmt, prefix, prefix + "\uffff"),
+            )
+            for (name,) in rows:
+                idx = matches_prefix(name, prefix, fmt)
+                if idx is not None:
+                    max_idx = max(max_idx, idx)
+        else:
+            row = cur.execute(
+                "SELECT MAX(idx) FROM files WHERE fmt = ? AND base = ?",
+                (fmt, prefix),
+            ).fetchone()
+            max_idx = row[0] or 0
+        row = cur.execute(
+            "SELECT MAX(idx) FROM reservations WHERE prefix = ? AND fmt = ?",
+            (prefix, fmt),
+        ).fetchone()
+        return max(max_idx, row[0] or 0) + 1
+
+    # --- Reconciliation with the file system ---
+    def _dir_mtime(self):
+        try:
+            return os.stat(self.directory).st_mtime_ns
+        except OSError:
+            return 0
+
+    def _get_meta(self, cur, key):
+        row = cur.execute(
+            "SELECT value FROM meta WHERE key = ?", (key,)
+        ).fetchone()
+        return row[0] if row else None
+
+    def _set_meta(self, cur, key, value):
+        cur.execute("INSERT OR REPLACE INTO meta VALUES (?, ?)", (key, value))
+
+    def reconcile(self, force=False):
+        """
+        Sync the catalog with files added or removed outside the app.
+
+        Costs a single stat() unless the directory has changed since the
+        last scan. Returns (added, removed) counts.
+        """
+        mtime = self._dir_mtime()
+        with self._transaction() as cur:
+            if not force and self._get_meta(cur, "mtime_ns") == str(mtime):
+                return 0, 0
+
+            on_disk = {}
+            with os.scandir(self.directory) as it:
+                for entry in it:
+                    parsed = parse_capture_name(entry.name)
+                    if parsed and entry.is_file():
+                        on_disk[entry.name] = parsed
+            known = {
+                name for (name,) in cur.execute("SELECT name FROM files")
+            }
+            added = [name for name in on_disk if name not in known]
+            removed = [name for name in known if name not in on_disk]
+
+            now = time.time()
+            cur.executemany(
+                "INSERT INTO files VALUES (?, ?, ?, ?, ?, NULL)",
+                [(name,) + on_disk[name] + (now,) for name in added],
+            )
+            cur.executemany(
+                "DELETE FROM files WHERE name = ?",
+                [(name,) for name in removed],
+            )
+            cur.executemany(
+                "DELETE FROM reservations WHERE name = ?",
+                [(name,) for name in added],
+            )
+
+            counters = cur.execute(
+                "SELECT prefix, fmt, next_index FROM counters"
+            ).fetchall()
+            for prefix, fmt, next_index in counters:
+                if any(matches_prefix(n, prefix, fmt) is not None
+                       for n in removed):
+                    # Let removed files free up their indices again
+                    next_index = self._compute_next_index(cur, prefix, fmt)
+                for name in added:
+                    idx = matches_prefix(name, prefix, fmt)
+                    if idx is not None:
+                        next_index = max(next_index, idx + 1)
+                self._set_counter(cur, prefix, fmt, next_index)
+
+            self._set_meta(cur, "mtime_ns", str(mtime))
+        return len(added), len(removed)
+
+
+class _Transaction:
+    """Context manager for an immediate (write-locked) transaction."""
+
+    def __init__(self, conn, lock):
+        self.conn = conn
+        self.lock = lock
+
+    def __enter__(self):
+        self.lock.acquire()
+        try:
+            self.conn.execute("BEGIN IMMEDIATE")
+        except BaseException:
+            self.lock.release()
+            raise
+        return self.conn.cursor()
+
+    def __exit__(self, exc_type, exc, tb):
+        try:
+            if exc_type is None:
+                self.conn.execute("COMMIT")
+            else:
+                self.conn.execute("ROLLBACK")
+        finally:
+            self.lock.release()
+        return False
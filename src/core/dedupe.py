@@ -0,0 +1,244 @@
+import itertools
+import os
+import sqlite3
+import threading
+
+import cv2
+import numpy as np
+
+from src.config import DEDUPE_CONF
+from src.core.catalog import _Transaction
+
+INDEX_NAME = ".phash_index.db"
+
+# Image files hashed when an existing directory is first indexed
+IMAGE_EXTENSIONS = (".jpg", ".jpeg", ".png", ".tiff", ".tif", ".bmp")
+
+HASH_BITS = 64
+# Multi-index hashing: the hash is split into CHUNKS substrings of
+# CHUNK_BITS bits, each indexed on its own
+CHUNKS = 4
+CHUNK_BITS = HASH_BITS // CHUNKS
+_CHUNK_MASK = (1 << CHUNK_BITS) - 1
+_HASH_MASK = (1 << HASH_BITS) - 1
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS hashes (
+    name TEXT PRIMARY KEY,
+    hash INTEGER NOT NULL,
+    is_file INTEGER NOT NULL,
+    c0 INTEGER NOT NULL,
+    c1 INTEGER NOT NULL,
+    c2 INTEGER NOT NULL,
+    c3 INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS hashes_c0 ON hashes (c0);
+CREATE INDEX IF NOT EXISTS hashes_c1 ON hashes (c1);
+CREATE INDEX IF NOT EXISTS hashes_c2 ON hashes (c2);
+CREATE INDEX IF NOT EXISTS hashes_c3 ON hashes (c3);
+"""
+
+
+def phash(image):
+    """
+    64-bit DCT perceptual hash of a BGR or grey image.
+
+    The image is shrunk to 32x32 grey, and the sign of each of the 8x8
+    lowest DCT frequencies (DC excluded) relative to their median gives
+    one bit. Small changes in noise, exposure or compression flip few
+    bits; different content flips about half.
+    """
+    small = cv2.resize(image, (32, 32), interpolation=cv2.INTER_AREA)
+    if small.ndim == 3:
+        small = cv2.cvtColor(small, cv2.COLOR_BGR2GRAY)
+    low = cv2.dct(np.float32(small))[:8, :8].flatten()
+    bits = low > np.median(low[1:])
+    bits[0] = False
+    return int.from_bytes(np.packbits(bits).tobytes(), "big")
+
+
+def hamming(a, b):
+    """Number of differing bits between two hashes."""
+    return bin((a ^ b) & _HASH_MASK).count("1")
+
+
+def _to_sql(h):
+    """Unsigned 64-bit hash -> SQLite's signed INTEGER."""
+    return h - (1 << HASH_BITS) if h >> (HASH_BITS - 1) else h
+
+
+def _chunks(h):
+    return [
+        (h >> (CHUNK_BITS * (CHUNKS - 1 - i))) & _CHUNK_MASK
+        for i in range(CHUNKS)
+    ]
+
+
+def _neighbours(chunk, radius):
+    """Every CHUNK_BITS-bit value within `radius` bits of chunk."""
+    values = [chunk]
+    for r in range(1, radius + 1):
+        for bits in itertools.combinations(range(CHUNK_BITS), r):
+            value = chunk
+            for bit in bits:
+                value ^= 1 << bit
+            values.append(value)
+    return values
+
+
+class DuplicateIndex:
+    """
+    Persistent perceptual-hash index of the captures in a save directory.
+
+    Hashes live in an SQLite file next to the data, so the index survives
+    restarts. Lookups use multi-index hashing: a hash within max_distance
+    bits of a query must match it within max_distance // CHUNKS bits in
+    at least one of its CHUNKS chunks (pigeonhole), so only the rows in a
+    few indexed buckets are compared instead of the whole table. On open,
+    images already in the directory but not yet indexed are hashed in a
+    background thread.
+    """
+
+    def __init__(self, directory, max_distance=DEDUPE_CONF["max_distance"]):
+        """Open (or create) the index for a directory."""
+        self.directory = directory
+        self.max_distance = max_distance
+        self._lock = threading.RLock()
+        self._conn = sqlite3.connect(
+            os.path.join(directory, INDEX_NAME),
+            timeout=10,
+            isolation_level=None,
+            check_same_thread=False,
+        )
+        # See CaptureCatalog: no journal file left in the capture directory
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.create_function("hamming", 2, hamming)
+        self._conn.executescript(_SCHEMA)
+        self._closed = False
+        self._backfill = threading.Thread(target=self._index_existing,
+                                          daemon=True)
+        self._backfill.start()
+
+    def close(self):
+        """Stop indexing existing images and close the database."""
+        with self._lock:
+            self._closed = True
+        self._backfill.join()
+        with self._lock:
+            self._conn.close()
+
+    def __len__(self):
+        with self._lock:
+            return self._conn.execute(
+                "SELECT COUNT(*) FROM hashes"
+            ).fetchone()[0]
+
+    def _transaction(self):
+        return _Transaction(self._conn, self._lock)
+
+    def find(self, h):
+        """
+        Return (name, distance) of an indexed capture near h, or None.
+
+        Entries for image files that no longer exist are dropped as they
+        are found.
+        """
+        with self._transaction() as cur:
+            return self._find(cur, h)
+
+    def _find(self, cur, h):
+        radius = self.max_distance // CHUNKS
+        clauses = []
+        params = []
+        for i, chunk in enumerate(_chunks(h)):
+            values = _neighbours(chunk, radius)
+            clauses.append(f"c{i} IN ({','.join('?' * len(values))})")
+            params.extend(values)
+        query = (
+            "SELECT name, is_file, hamming(hash, ?) AS d FROM hashes "
+            f"WHERE ({' OR '.join(clauses)}) AND d <= ? ORDER BY d"
+        )
+        rows = cur.execute(
+            query, [_to_sql(h)] + params + [self.max_distance]
+        )
+        stale = []
+        match = None
+        for name, is_file, distance in rows:
+            if is_file and not os.path.exists(
+                os.path.join(self.directory, name)
+            ):
+                stale.append((name,))
+                continue
+            match = (name, distance)
+            break
+        if stale:
+            cur.executemany("DELETE FROM hashes WHERE name = ?", stale)
+        return match
+
+    def admit(self, name, h, is_file=True, keep_duplicates=False):
+        """
+        Check h against the index and add it under name.
+
+        Returns (match_name, distance) of a near-duplicate, or None. The
+        check and insert are one transaction, so two near-identical
+        captures written at once can't both pass. A duplicate is only
+        added if keep_duplicates is set (it is being saved anyway).
+        """
+        with self._transaction() as cur:
+            match = self._find(cur, h)
+            if match is None or keep_duplicates:
+                self._insert(cur, name, h, is_file)
+        return match
+
+    def add(self, name, h, is_file=True):
+        """Index a capture without checking it."""
+        with self._transaction() as cur:
+            self._insert(cur, name, h, is_file)
+
+    def _insert(self, cur, name, h, is_file):
+        cur.execute(
+            "INSERT OR REPLACE INTO hashes VALUES (?, ?, ?, ?, ?, ?, ?)",
+            [name, _to_sql(h), int(is_file)] + _chunks(h),
+        )
+
+    def discard(self, name):
+        """Remove a capture, e.g. one whose write failed."""
+        with self._transaction() as cur:
+            cur.execute("DELETE FROM hashes WHERE name = ?", (name,))
+
+    def _index_existing(self):
+        """Hash images in the directory that are not indexed yet."""
+        with self._lock:
+            if self._closed:
+                return
+            known = {
+                name for (name,) in self._conn.execute(
+                    "SELECT name FROM hashes WHERE is_file = 1"
+                )
+            }
+        try:
+            with os.scandir(self.directory) as it:
+                names = [
+                    entry.name for entry in it
+                    if not entry.name.startswith(".")
+                    and entry.name.lower().endswith(IMAGE_EXTENSIONS)
+                    and entry.name not in known
+                ]
+        except OSError as e:
+            print(f"Duplicate index: cannot list {self.directory}: {e}")
+            return
+        if names:
+            print(f"Duplicate index: hashing {len(names)} existing images")
+        for name in names:
+            if self._closed:
+                return
+            image = cv2.imread(
+                os.path.join(self.directory, name), cv2.IMREAD_REDUCED_COLOR_4
+            )
+            if image is None:
+                continue
+            with self._lock:
+                if self._closed:
+                    return
+                self.add(name, phash(image))
@@ -0,0 +1,529 @@
+"""
+Shared-memory frame bus: publish camera frames to other processes.
+
+The collector (FrameBusPublisher) copies each frame into one slot of a
+fixed ring in a named shared-memory segment; any number of local
+processes (FrameBusReader) map the segment and read frames in place.
+The producer never waits for readers: a slot is simply overwritten
+`slots` frames later, and readers detect that with a per-slot sequence
+lock. Readers register in a small table so the producer can report the
+ones that stall or lose frames.
+
+Only numpy and the standard library are needed, so consumers can import
+this module without Qt:
+
+    from src.core.frame_bus import FrameBusReader
+
+    with FrameBusReader() as bus:
+        frame = bus.wait_latest(timeout=1.0)
+        if frame is not None:
+            run_model(frame.array)      # read-only view, no copy
+            if not frame.valid():
+                pass                    # overwritten meanwhile; discard
+"""
+
+import json
+import os
+import threading
+import time
+
+import numpy as np
+
+try:
+    from multiprocessing import resource_tracker, shared_memory
+except ImportError:
+    # Python < 3.8; the frame bus is unavailable
+    shared_memory = None
+
+DEFAULT_NAME = "jetson_data_collector"
+MAGIC = b"JDCFBUS1"
+VERSION = 1
+SETTINGS_BYTES = 2048
+_ALIGN = 4096
+
+_HEADER = np.dtype([
+    ("magic", "S8"),
+    ("version", "<u4"),
+    ("slot_count", "<u4"),
+    ("slot_bytes", "<u8"),
+    ("max_readers", "<u4"),
+    ("pad", "<u4"),
+    ("producer_pid", "<i8"),
+    ("write_seq", "<u8"),
+])
+_READER = np.dtype([
+    ("pid", "<i8"),
+    ("last_seq", "<u8"),
+    ("heartbeat", "<f8"),
+    ("frames_read", "<u8"),
+    ("lost", "<u8"),
+])
+_SLOT = np.dtype([
+    ("seq_begin", "<u8"),
+    ("seq_end", "<u8"),
+    ("timestamp", "<f8"),
+    ("wall_time", "<f8"),
+    ("height", "<u4"),
+    ("width", "<u4"),
+    ("channels", "<u4"),
+    ("settings_len", "<u4"),
+    ("dtype", "S8"),
+    ("nbytes", "<u8"),
+    ("settings", f"S{SETTINGS_BYTES}"),
+])
+
+
+def _aligned(n, align=64):
+    return (n + align - 1) // align * align
+
+
+class _Layout:
+    """Byte offsets of the header, reader table, slot headers and data."""
+
+    def __init__(self, slot_count, slot_bytes, max_readers):
+        self.slot_count = slot_count
+        self.slot_bytes = slot_bytes
+        self.max_readers = max_readers
+        self.readers = _aligned(_HEADER.itemsize)
+        self.slots = _aligned(self.readers + _READER.itemsize * max_readers)
+        self.data = _aligned(
+            self.slots + _SLOT.itemsize * slot_count, _ALIGN
+        )
+        self.stride = _aligned(slot_bytes, _ALIGN)
+        self.size = self.data + self.stride * slot_count
+
+    def views(self, buf):
+        """(header, readers, slots) structured views of a segment."""
+        header = np.ndarray((), _HEADER, buffer=buf)
+        readers = np.ndarray(
+            (self.max_readers,), _READER, buffer=buf, offset=self.readers
+        )
+        slots = np.ndarray(
+            (self.slot_count,), _SLOT, buffer=buf, offset=self.slots
+        )
+        return header, readers, slots
+
+
+def _pid_alive(pid):
+    if pid <= 0:
+        return False
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+
+def _require_shared_memory():
+    if shared_memory is None:
+        raise RuntimeError(
+            "the frame bus needs Python 3.8+ (multiprocessing.shared_memory)"
+        )
+
+
+def _attach(name):
+    """Map an existing segment without handing it to resource_tracker."""
+    try:
+        return shared_memory.SharedMemory(name=name, track=False)
+    except TypeError:
+        # Before Python 3.13 every attach is tracked, and the tracker
+        # unlinks the segment when this process exits
+        shm = shared_memory.SharedMemory(name=name)
+        resource_tracker.unregister(shm._name, "shared_memory")
+        return shm
+
+
+class FrameBusPublisher:
+    """
+    Producer side of the frame bus (owned by the VideoThread).
+
+    Creates the segment with `slots` slots of `slot_bytes` bytes each;
+    larger frames are counted in `frames_oversized` and not published.
+    A stale segment left by a crashed collector is replaced; one owned
+    by a running process raises FileExistsError.
+    """
+
+    def __init__(self, name=DEFAULT_NAME, slots=4, slot_bytes=0,
+                 max_readers=8, reader_timeout=2.0):
+        """Create the shared-memory segment."""
+        _require_shared_memory()
+        self.name = name
+        self.reader_timeout = reader_timeout
+        self.layout = _Layout(slots, slot_bytes, max_readers)
+        self._shm = self._create()
+        # Touch every page now rather than on the first frames
+        np.ndarray(
+            (self.layout.size,), np.uint8, buffer=self._shm.buf
+        )[::_ALIGN] = 0
+        self._header, self._readers, self._slots = self.layout.views(
+            self._shm.buf
+        )
+        self._header["magic"] = MAGIC
+        self._header["version"] = VERSION
+        self._header["slot_count"] = slots
+        self._header["slot_bytes"] = slot_bytes
+        self._header["max_readers"] = max_readers
+        self._header["producer_pid"] = os.getpid()
+        self.seq = 0
+        self.frames_oversized = 0
+        self._settings = None
+        self._settings_json = b""
+        self._next_check = 0.0
+        # pid -> (lost, stalled) at the last check, to report changes only
+        self._reported = {}
+        self._closed = False
+        # Held while publishing so close() can't unmap a slot mid-copy
+        self._lock = threading.Lock()
+
+    def _create(self):
+        try:
+            return shared_memory.SharedMemory(
+                name=self.name, create=True, size=self.layout.size
+            )
+        except FileExistsError:
+            old = _attach(self.name)
+            pid = 0
+            if old.size >= _HEADER.itemsize:
+                pid = int(np.ndarray((), _HEADER, buffer=old.buf)[
+                    "producer_pid"
+                ])
+            if pid != os.getpid() and _pid_alive(pid):
+                old.close()
+                raise FileExistsError(
+                    f"frame bus {self.name!r} is in use by process {pid}"
+                )
+            print(f"Frame bus: replacing stale segment {self.name!r}")
+            old.close()
+            old.unlink()
+            return shared_memory.SharedMemory(
+                name=self.name, create=True, size=self.layout.size
+            )
+
+    def publish(self, frame, timestamp, settings=None):
+        """
+        Copy a frame into the next slot; never waits for readers.
+
+        timestamp is time.monotonic() when the frame was read (the clock
+        is shared by every process on the machine).
+        """
+        if frame.nbytes > self.layout.slot_bytes:
+            self.frames_oversized += 1
+            return
+        with self._lock:
+            if self._closed:
+                return
+            self._write(frame, timestamp, settings)
+            now = time.monotonic()
+            if now >= self._next_check:
+                self._next_check = now + 1.0
+                self._check_readers()
+
+    def _write(self, frame, timestamp, settings):
+        seq = self.seq + 1
+        index = seq % self.layout.slot_count
+        slot = self._slots[index]
+        # Readers see seq_begin != seq_end while the slot is rewritten
+        slot["seq_begin"] = seq
+        dst = np.ndarray(
+            frame.shape, frame.dtype, buffer=self._shm.buf,
+            offset=self.layout.data + index * self.layout.stride,
+        )
+        np.copyto(dst, frame)
+        slot["timestamp"] = timestamp
+        slot["wall_time"] = time.time()
+        slot["height"] = frame.shape[0]
+        slot["width"] = frame.shape[1] if frame.ndim > 1 else 1
+        slot["channels"] = frame.shape[2] if frame.ndim > 2 else 1
+        slot["dtype"] = frame.dtype.str.encode()
+        slot["nbytes"] = frame.nbytes
+        if settings != self._settings:
+            self._settings = settings
+            data = json.dumps(settings).encode() if settings else b""
+            self._settings_json = data if len(data) <= SETTINGS_BYTES else b""
+        slot["settings_len"] = len(self._settings_json)
+        slot["settings"] = self._settings_json
+        slot["seq_end"] = seq
+        self._header["write_seq"] = seq
+        self.seq = seq
+
+    def readers(self):
+        """
+        Registered readers with their lag and health.
+
+        lag is how many frames were published after the reader's last
+        read; lost counts frames next_frame() had to skip (see
+        FrameBusReader). A reader that has not
+        read for reader_timeout seconds while frames were coming in is
+        stalled.
+        """
+        now = time.monotonic()
+        result = []
+        if self._closed:
+            return result
+        for entry in self._readers:
+            pid = int(entry["pid"])
+            if not pid:
+                continue
+            last_seq = int(entry["last_seq"])
+            result.append({
+                "pid": pid,
+                "alive": _pid_alive(pid),
+                "last_seq": last_seq,
+                "lag": self.seq - last_seq,
+                "frames_read": int(entry["frames_read"]),
+                "lost": int(entry["lost"]),
+                "stalled": bool(
+                    self.seq > last_seq
+                    and now - entry["heartbeat"] > self.reader_timeout
+                ),
+            })
+        return result
+
+    def _check_readers(self):
+        """Drop dead readers and report the ones falling behind."""
+        for reader in self.readers():
+            pid = reader["pid"]
+            if not reader["alive"]:
+                for entry in self._readers:
+                    if entry["pid"] == pid:
+                        entry["pid"] = 0
+                self._reported.pop(pid, None)
+                print(f"Frame bus: reader {pid} exited without closing")
+                continue
+            lost, stalled = reader["lost"], reader["stalled"]
+            last_lost, was_stalled = self._reported.get(pid, (0, False))
+            if stalled and not was_stalled:
+                print(
+                    f"Frame bus: reader {pid} stalled "
+                    f"{reader['lag']} frames behind"
+                )
+            elif lost > last_lost:
+                print(
+                    f"Frame bus: reader {pid} lost {lost - last_lost} "
+                    f"frames ({lost} in total)"
+                )
+            self._reported[pid] = (lost, stalled)
+
+    def close(self):
+        """Tell readers the producer is gone and remove the segment."""
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+            self._header["producer_pid"] = 0
+        del self._header, self._readers, self._slots
+        self._shm.close()
+        try:
+            self._shm.unlink()
+        except FileNotFoundError:
+            pass
+
+
+class BusFrame:
+    """
+    One frame read from the bus.
+
+    `array` is a read-only view into shared memory: no copy is made, and
+    the producer overwrites it `slots` frames after it was published.
+    Call valid() after using it (or copy() it) to be sure it was not
+    overwritten meanwhile.
+    """
+
+    def __init__(self, reader, seq, slot, array):
+        self._reader = reader
+        self.seq = seq
+        self.timestamp = float(slot["timestamp"])
+        self.wall_time = float(slot["wall_time"])
+        self.array = array
+        length = int(slot["settings_len"])
+        self._settings_raw = bytes(slot["settings"])[:length]
+        self._settings = None
+
+    @property
+    def settings(self):
+        """ISP settings the frame was captured with (dict or None)."""
+        if self._settings is None and self._settings_raw:
+            self._settings = json.loads(self._settings_raw)
+        return self._settings
+
+    @property
+    def age(self):
+        """Seconds since the frame was read from the camera."""
+        return time.monotonic() - self.timestamp
+
+    def valid(self):
+        """True while the slot still holds this frame."""
+        return self._reader._slot_holds(self.seq)
+
+    def copy(self):
+        """A private copy of the pixels, or None if already overwritten."""
+        data = self.array.copy()
+        return data if self.valid() else None
+
+
+class FrameBusReader:
+    """
+    Consumer side of the frame bus.
+
+    latest() returns the newest frame; next_frame() returns frames in order
+    (for readers that want every frame) and skips ahead when it has
+    fallen so far behind that the frame it wanted was overwritten.
+    Neither blocks the producer. Frames that next_frame() had to skip
+    are counted in `lost` and shown to the producer; latest() skipping
+    to the newest frame is not a loss.
+    """
+
+    def __init__(self, name=DEFAULT_NAME):
+        """Map the segment and register as a reader."""
+        _require_shared_memory()
+        self.name = name
+        self._shm = _attach(name)
+        header = np.ndarray((), _HEADER, buffer=self._shm.buf)
+        if bytes(header["magic"]) != MAGIC or header["version"] != VERSION:
+            del header
+            self._shm.close()
+            raise ValueError(f"{name!r} is not a frame bus segment")
+        self.layout = _Layout(
+            int(header["slot_count"]),
+            int(header["slot_bytes"]),
+            int(header["max_readers"]),
+        )
+        del header
+        self._header, self._readers, self._slots = self.layout.views(
+            self._shm.buf
+        )
+        self.last_seq = 0
+        self.frames_read = 0
+        self.lost = 0
+        self._entry = self._register()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def _register(self):
+        pid = os.getpid()
+        for entry in self._readers:
+            other = int(entry["pid"])
+            if other and other != pid and _pid_alive(other):
+                continue
+            entry["last_seq"] = self._header["write_seq"]
+            entry["heartbeat"] = time.monotonic()
+            entry["frames_read"] = 0
+            entry["lost"] = 0
+            entry["pid"] = pid
+            return entry
+        raise RuntimeError(
+            f"frame bus {self.name!r} already has "
+            f"{self.layout.max_readers} readers"
+        )
+
+    @property
+    def producer_alive(self):
+        return _pid_alive(int(self._header["producer_pid"]))
+
+    def _slot_holds(self, seq):
+        slot = self._slots[seq % self.layout.slot_count]
+        return slot["seq_begin"] == seq and slot["seq_end"] == seq
+
+    def _frame(self, seq):
+        """BusFrame for seq, or None if that slot no longer holds it."""
+        slot = self._slots[seq % self.layout.slot_count]
+        if not self._slot_holds(seq):
+            return None
+        shape = (int(slot["height"]), int(slot["width"]))
+        if slot["channels"] > 1:
+            shape += (int(slot["channels"]),)
+        array = np.ndarray(
+            shape, np.dtype(slot["dtype"].decode()), buffer=self._shm.buf,
+            offset=self.layout.data
+            + (seq % self.layout.slot_count) * self.layout.stride,
+        )
+        array.flags.writeable = False
+        frame = BusFrame(self, seq, slot, array)
+        # The producer may have started rewriting the slot meanwhile
+        return frame if self._slot_holds(seq) else None
+
+    def _accept(self, frame, skipped):
+        self.lost += skipped
+        self.last_seq = frame.seq
+        self.frames_read += 1
+        entry = self._entry
+        entry["last_seq"] = frame.seq
+        entry["heartbeat"] = time.monotonic()
+        entry["frames_read"] = self.frames_read
+        entry["lost"] = self.lost
+        return frame
+
+    def _newest(self):
+        """The newest frame if newer than the last one read, else None."""
+        for _ in range(3):
+            seq = int(self._header["write_seq"])
+            if seq == self.last_seq:
+                break
+            frame = self._frame(seq)
+            if frame is not None:
+                return frame
+        self._entry["heartbeat"] = time.monotonic()
+        return None
+
+    def latest(self):
+        """The newest frame if newer than the last one read, else None."""
+        frame = self._newest()
+        return self._accept(frame, 0) if frame is not None else None
+
+    def next_frame(self):
+        """
+        The frame after the last one read, or None if not published yet.
+
+        If it has been overwritten the reader skips to the newest frame,
+        counting the frames in between as lost.
+        """
+        newest = int(self._header["write_seq"])
+        if newest == self.last_seq:
+            self._entry["heartbeat"] = time.monotonic()
+            return None
+        seq = self.last_seq + 1 if self.last_seq else newest
+        frame = self._frame(seq)
+        if frame is not None:
+            return self._accept(frame, 0)
+        frame = self._newest()
+        if frame is None:
+            return None
+        # Frames seq .. frame.seq - 1 were overwritten before we got to them
+        return self._accept(frame, frame.seq - seq)
+
+    def _wait(self, read, timeout, poll):
+        deadline = time.monotonic() + timeout
+        while True:
+            frame = read()
+            if frame is not None or time.monotonic() >= deadline:
+                return frame
+            time.sleep(poll)
+
+    def wait_latest(self, timeout=1.0, poll=0.001):
+        """latest(), polling until a new frame or the timeout."""
+        return self._wait(self.latest, timeout, poll)
+
+    def wait_next(self, timeout=1.0, poll=0.001):
+        """next_frame(), polling until a frame or the timeout."""
+        return self._wait(self.next_frame, timeout, poll)
+
+    def close(self):
+        """Unregister and unmap; frames read earlier become invalid."""
+        if self._shm is None:
+            return
+        if int(self._entry["pid"]) == os.getpid():
+            self._entry["pid"] = 0
+        del self._entry, self._header, self._readers, self._slots
+        try:
+            self._shm.close()
+        except BufferError:
+            # A BusFrame still references the mapping; it is released
+            # when the process exits
+            pass
+        self._shm = None
@@ -0,0 +1,87 @@
+import threading
+
+from PyQt5.QtCore import QObject
+
+from src.core.mailbox import FrameMailbox
+
+
+class FrameWorker(QObject):
+    """
+    Process preview frames in a worker thread, newest frame first.
+
+    submit() hands FramePackets over through a one-slot FrameMailbox, so
+    the caller (the GUI thread) never waits and the worker always gets
+    the newest frame; frames it could not keep up with are counted in
+    `skipped`. Subclasses implement process(frame); an exception from
+    it is printed and the worker carries on with the next frame.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self._inbox = FrameMailbox(1)
+        self._wake = threading.Event()
+        self._worker = None
+        self._running = False
+        self._skipped_base = 0
+
+    @property
+    def is_running(self):
+        return self._running
+
+    @property
+    def skipped(self):
+        """Frames replaced by a newer one before the worker got to them."""
+        return self._inbox.dropped - self._skipped_base
+
+    def start(self):
+        """Start the worker thread."""
+        if self._running:
+            return
+        self._skipped_base = self._inbox.dropped
+        self._running = True
+        self._worker = threading.Thread(target=self._run, daemon=True)
+        self._worker.start()
+
+    def stop(self):
+        """Stop the worker once it has finished its current frame."""
+        if not self._running:
+            return
+        self._running = False
+        self._wake.set()
+        self._worker.join()
+        self._worker = None
+        # Drop a frame that arrived after the last one was processed
+        packet = self._inbox.take_latest()
+        if packet is not None:
+            packet.release()
+
+    def submit(self, packet):
+        """Offer a preview FramePacket; never blocks the caller."""
+        if not self._running:
+            return
+        # The mailbox takes its own reference to a pooled buffer
+        self._inbox.put(packet.frame, packet.timestamp, packet.buffer)
+        self._wake.set()
+
+    def _run(self):
+        while True:
+            self._wake.wait()
+            self._wake.clear()
+            if not self._running:
+                return
+            packet = self._inbox.take_latest()
+            if packet is None:
+                continue
+            try:
+                self.process(packet.frame)
+            except Exception as e:
+                # Keep the worker alive; a dead one would freeze its feature
+                print(
+                    f"{type(self).__name__}: failed to process frame: "
+                    f"{type(e).__name__}: {e}"
+                )
+            finally:
+                packet.release()
+
+    def process(self, frame):
+        raise NotImplementedError
@@ -0,0 +1,137 @@
+import numpy as np
+
+from src.core.sources import FrameSource
+
+try:
+    import gi
+
+    gi.require_version("Gst", "1.0")
+    from gi.repository import Gst
+except (ImportError, ValueError):
+    Gst = None  # PyGObject not installed; VideoThread uses OpenCV only
+
+
+def sample_to_array(sample, out=None):
+    """
+    Copy a BGR Gst.Sample into a (height, width, 3) uint8 array.
+
+    If out has the right shape the pixels are copied into it instead of a
+    newly allocated array.
+    """
+    structure = sample.get_caps().get_structure(0)
+    width = structure.get_value("width")
+    height = structure.get_value("height")
+    buf = sample.get_buffer()
+    ok, info = buf.map(Gst.MapFlags.READ)
+    if not ok:
+        return None
+    try:
+        # Rows may be padded, so derive the stride from the buffer size
+        stride = info.size // height
+        rows = np.frombuffer(info.data, np.uint8, count=stride * height)
+        rows = rows.reshape(height, stride)[:, : width * 3]
+        frame = rows.reshape(height, width, 3)
+        if out is not None and out.shape == frame.shape:
+            np.copyto(out, frame)
+            return out
+        return frame.copy()
+    finally:
+        buf.unmap(info)
+
+
+class DualStreamCapture(FrameSource):
+    """
+    Two-branch GStreamer pipeline driven through PyGObject.
+
+    The camera is teed into a display-sized "preview" appsink that always
+    runs and a full-resolution "full" appsink behind a valve. The valve
+    stays closed (so the full-size conversion and copy never happen) until
+    set_full_enabled(True) is called. With crop_rect (a pipeline from
+    VideoThread.build_roi_pipeline) the "full" branch carries only that
+    sensor region.
+    """
+
+    name = "argus-dual"
+    dual = True
+    applies_isp = True
+    crops = True
+
+    def __init__(self, pipeline_str, crop_rect=None):
+        """Parse the pipeline; call open() to start it."""
+        Gst.init(None)
+        self.crop_rect = crop_rect
+        self.pipeline = Gst.parse_launch(pipeline_str)
+        self.preview_sink = self.pipeline.get_by_name("preview")
+        self.full_sink = self.pipeline.get_by_name("full")
+        self.valve = self.pipeline.get_by_name("fullvalve")
+        self.full_enabled = False
+        self._opened = False
+
+    @staticmethod
+    def available():
+        """True if the GStreamer Python bindings can be imported."""
+        return Gst is not None
+
+    def open(self, timeout=5.0):
+        """Start the pipeline; returns True once it is playing."""
+        ret = self.pipeline.set_state(Gst.State.PLAYING)
+        if ret == Gst.StateChangeReturn.FAILURE:
+            self.release()
+            return False
+        ret, _, _ = self.pipeline.get_state(int(timeout * Gst.SECOND))
+        self._opened = ret in (
+            Gst.StateChangeReturn.SUCCESS,
+            Gst.StateChangeReturn.NO_PREROLL,
+        )
+        if not self._opened:
+            self.release()
+        return self._opened
+
+    def isOpened(self):
+        return self._opened
+
+    def capabilities(self):
+        caps = {"format": "BGR", "crop": self.crop_rect}
+        for key, sink in (("preview", self.preview_sink),
+                          ("full", self.full_sink)):
+            pad_caps = sink.get_static_pad("sink").get_current_caps()
+            if pad_caps is not None:
+                structure = pad_caps.get_structure(0)
+                caps[key] = [
+                    structure.get_value("width"),
+                    structure.get_value("height"),
+                ]
+        return caps
+
+    def _pull(self, sink, timeout, out):
+        sample = sink.emit("try-pull-sample", int(timeout * Gst.SECOND))
+        if sample is None:
+            return False, None
+        frame = sample_to_array(sample, out)
+        return frame is not None, frame
+
+    def read_preview(self, timeout=0.5, out=None):
+        """Return (ret, frame) for the next display-sized frame."""
+        return self._pull(self.preview_sink, timeout, out)
+
+    def read_full(self, timeout=0.0, out=None):
+        """Return (ret, frame) for a queued full-resolution frame, if any."""
+        if not self.full_enabled:
+            return False, None
+        return self._pull(self.full_sink, timeout, out)
+
+    def set_full_enabled(self, enabled):
+        """Open or close the valve in front of the full-resolution branch."""
+        if enabled == self.full_enabled:
+            return
+        self.full_enabled = enabled
+        self.valve.set_property("drop", not enabled)
+        if not enabled:
+            # Discard whatever was still queued in the full-res sink
+            while self.full_sink.emit("try-pull-sample", 0) is not None:
+                pass
+
+    def release(self):
+        """Stop the pipeline."""
+        self.pipeline.set_state(Gst.State.NULL)
+        self._opened = False
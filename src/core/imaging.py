@@ -0,0 +1,176 @@
+import cv2
+
+from src.config import (
+    DEFAULT_HEIGHT,
+    DEFAULT_WIDTH,
+    DISPLAY_HEIGHT,
+    DISPLAY_WIDTH,
+)
+
+
+def parse_roi_size(text):
+    """Parse an ROI preset such as "448x448" into (w, h), or None."""
+    try:
+        w, h = map(int, text.split("x"))
+    except (AttributeError, ValueError):
+        return None
+    return (w, h)
+
+
+def display_to_sensor_scale():
+    """(sx, sy) factors from preview pixels to sensor pixels."""
+    return DEFAULT_WIDTH / DISPLAY_WIDTH, DEFAULT_HEIGHT / DISPLAY_HEIGHT
+
+
+def sensor_size_to_display(w, h):
+    """Size in preview pixels of a w x h sensor-pixel region."""
+    scale_x, scale_y = display_to_sensor_scale()
+    return int(round(w / scale_x)), int(round(h / scale_y))
+
+
+def display_rois_to_sensor(rois):
+    """
+    Map display-space ROIs to sensor coordinates in one pass.
+
+    rois is a list of ((x, y, w, h), fixed_size) pairs. The captured
+    frame is DEFAULT_WIDTH x DEFAULT_HEIGHT while the preview is
+    DISPLAY_WIDTH x DISPLAY_HEIGHT. Where a fixed ROI size is given it is
+    enforced exactly (ignoring rounding drift) around the scaled centre.
+    Returns a list of clamped (x, y, w, h), with None for empty regions.
+    """
+    scale_x, scale_y = display_to_sensor_scale()
+    rects = []
+    for (x, y, w, h), fixed_size in rois:
+        real_x = int(round(x * scale_x))
+        real_y = int(round(y * scale_y))
+        real_w = int(round(w * scale_x))
+        real_h = int(round(h * scale_y))
+
+        if fixed_size:
+            # Calculate center of the current rounded ROI
+            center_x = real_x + (real_w / 2.0)
+            center_y = real_y + (real_h / 2.0)
+
+            real_w, real_h = fixed_size
+
+            # Recalculate top-left to keep centered
+            real_x = int(round(center_x - (real_w / 2.0)))
+            real_y = int(round(center_y - (real_h / 2.0)))
+
+        rects.append(clamp_roi((real_x, real_y, real_w, real_h)))
+    return rects
+
+
+def display_roi_to_sensor(roi, fixed_size=None):
+    """Map a single display-space ROI (x, y, w, h); see above."""
+    return display_rois_to_sensor([(roi, fixed_size)])[0]
+
+
+def sensor_roi_to_display(rect):
+    """Map a sensor-space (x, y, w, h) to preview pixels."""
+    scale_x, scale_y = display_to_sensor_scale()
+    x, y, w, h = rect
+    return (
+        int(round(x / scale_x)),
+        int(round(y / scale_y)),
+        max(1, int(round(w / scale_x))),
+        max(1, int(round(h / scale_y))),
+    )
+
+
+def centered_roi(size):
+    """A (w, h) ROI centred on the sensor, clamped to the frame."""
+    w = min(size[0], DEFAULT_WIDTH)
+    h = min(size[1], DEFAULT_HEIGHT)
+    return ((DEFAULT_WIDTH - w) // 2, (DEFAULT_HEIGHT - h) // 2, w, h)
+
+
+def clamp_roi(rect):
+    """Clamp a sensor-space (x, y, w, h) to the frame, or None if empty."""
+    x, y, w, h = rect
+    x = max(0, x)
+    y = max(0, y)
+    w = min(DEFAULT_WIDTH - x, w)
+    h = min(DEFAULT_HEIGHT - y, h)
+    if w > 0 and h > 0:
+        return (x, y, w, h)
+    return None
+
+
+def bounding_roi(rects):
+    """The smallest (x, y, w, h) containing every rect, or None."""
+    rects = [r for r in rects if r is not None]
+    if not rects:
+        return None
+    x0 = min(x for x, _, _, _ in rects)
+    y0 = min(y for _, y, _, _ in rects)
+    x1 = max(x + w for x, _, w, _ in rects)
+    y1 = max(y + h for _, y, _, h in rects)
+    return (x0, y0, x1 - x0, y1 - y0)
+
+
+def roi_within(rect, outer):
+    """
+    Express a sensor-space rect relative to an already cropped frame.
+
+    outer is the sensor region the frame covers. The result is clipped to
+    that frame (and empty if rect lies outside it); None (the whole
+    frame) stays None.
+    """
+    if rect is None or outer is None:
+        return rect
+    x, y, w, h = rect
+    ox, oy, ow, oh = outer
+    x0 = min(max(x - ox, 0), ow)
+    y0 = min(max(y - oy, 0), oh)
+    x1 = min(max(x - ox + w, x0), ow)
+    y1 = min(max(y - oy + h, y0), oh)
+    return (x0, y0, x1 - x0, y1 - y0)
+
+
+def sensor_rect_on_frame(rect, shape):
+    """
+    Scale a sensor-space rect onto a (possibly downscaled) frame.
+
+    shape is the frame's shape, e.g. that of a display-sized preview.
+    Returns the clipped (x, y, w, h), or None for None or empty rects.
+    """
+    if rect is None:
+        return None
+    height, width = shape[:2]
+    scale = width / DEFAULT_WIDTH
+    x, y, w, h = (int(round(v * scale)) for v in rect)
+    x, y = max(0, x), max(0, y)
+    w = min(w, width - x)
+    h = min(h, height - y)
+    if w < 1 or h < 1:
+        return None
+    return (x, y, w, h)
+
+
+def crop_frame(frame, rect):
+    """Return a view of frame cropped to rect (x, y, w, h), if any."""
+    if rect is None:
+        return frame
+    x, y, w, h = rect
+    return frame[y : y + h, x : x + w]
+
+
+def get_write_params(fmt):
+    """Return the cv2 encoder parameters used for a given image format."""
+    if fmt == "jpg":
+        # Quality 0-100 (Default is 95). We set 100 for AI Data.
+        return [cv2.IMWRITE_JPEG_QUALITY, 100]
+    elif fmt == "png":
+        # Compression 0-9 (Default is 3). 0 is faster/larger.
+        # PNG is lossless, so quality isn't lost, just size.
+        return [cv2.IMWRITE_PNG_COMPRESSION, 3]
+    return []
+
+
+def encode_image(img, fmt, params=None):
+    """Encode an image to bytes in the given format."""
+    ok, buf = cv2.imencode(f".{fmt}", img, params or [])
+    if not ok:
+        raise IOError(f"Failed to encode image as {fmt}")
+    return buf
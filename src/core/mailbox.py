@@ -0,0 +1,105 @@
+import collections
+import threading
+import time
+
+
+class FramePacket:
+    """A frame with its sequence number and monotonic capture time."""
+
+    __slots__ = ("seq", "timestamp", "frame", "buffer")
+
+    def __init__(self, seq, timestamp, frame, buffer=None):
+        self.seq = seq
+        self.timestamp = timestamp
+        self.frame = frame
+        self.buffer = buffer
+
+    def release(self):
+        """Return a pooled frame buffer once the frame is no longer used."""
+        if self.buffer is not None:
+            self.buffer.release()
+            self.buffer = None
+
+
+class FrameMailbox:
+    """
+    Bounded hand-off of the newest frames from a producer to a consumer.
+
+    The producer never blocks: when all slots are full the oldest frame is
+    overwritten and counted as dropped. put() reports when the mailbox
+    goes from empty to non-empty, so the producer only needs to notify the
+    consumer once per batch instead of queueing every frame. Consumers
+    must release() each FramePacket they take once done with the frame.
+    """
+
+    def __init__(self, slots=1):
+        """Initialize a mailbox holding at most `slots` frames."""
+        self.slots = max(1, slots)
+        self._items = collections.deque()
+        self._lock = threading.Lock()
+        self._seq = 0
+        self.published = 0
+        self.delivered = 0
+        self.dropped = 0
+        self.last_latency = None
+
+    def put(self, frame, timestamp=None, buffer=None):
+        """
+        Publish a frame; returns True if the consumer needs waking up.
+
+        timestamp is time.monotonic() at capture. If the frame lives in a
+        pooled FrameBuffer, the mailbox holds a reference to it until the
+        consumer releases the FramePacket (or the frame is dropped).
+        """
+        if timestamp is None:
+            timestamp = time.monotonic()
+        if buffer is not None:
+            buffer.acquire()
+        stale = None
+        with self._lock:
+            was_empty = not self._items
+            self._seq += 1
+            self.published += 1
+            if len(self._items) >= self.slots:
+                stale = self._items.popleft()
+                self.dropped += 1
+            self._items.append(
+                FramePacket(self._seq, timestamp, frame, buffer)
+            )
+        if stale is not None:
+            stale.release()
+        return was_empty
+
+    def take_latest(self):
+        """Return the newest FramePacket or None; older ones are dropped."""
+        with self._lock:
+            if not self._items:
+                return None
+            packet = self._items.pop()
+            stale = list(self._items)
+            self._items.clear()
+            self.dropped += len(stale)
+            self.delivered += 1
+        for item in stale:
+            item.release()
+        self.last_latency = time.monotonic() - packet.timestamp
+        return packet
+
+    def take_all(self):
+        """Return every waiting FramePacket, oldest first."""
+        with self._lock:
+            packets = list(self._items)
+            self._items.clear()
+            self.delivered += len(packets)
+        if packets:
+            self.last_latency = time.monotonic() - packets[-1].timestamp
+        return packets
+
+    def stats(self):
+        """Return published/delivered/dropped counts and the last latency."""
+        return {
+            "published": self.published,
+            "delivered": self.delivered,
+            "dropped": self.dropped,
+            "last_latency": self.last_latency,
+        }
@@ -0,0 +1,317 @@
+import collections
+import os
+import threading
+import time
+
+from src.config import METRICS_CONF
+
+# Histogram bucket upper bounds in seconds (Prometheus "le" labels)
+BUCKETS = (
+    0.0005, 0.001, 0.002, 0.005, 0.01, 0.02, 0.05, 0.1, 0.2, 0.5, 1.0
+)
+
+PROMETHEUS_PREFIX = "datacollector"
+
+
+class StageHistogram:
+    """Timing histogram for one pipeline stage."""
+
+    def __init__(self, recent=240):
+        self.buckets = [0] * (len(BUCKETS) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        # Last few samples, for percentiles on the HUD
+        self.recent = collections.deque(maxlen=recent)
+
+    def observe(self, seconds):
+        i = 0
+        while i < len(BUCKETS) and seconds > BUCKETS[i]:
+            i += 1
+        self.buckets[i] += 1
+        self.count += 1
+        self.total += seconds
+        if seconds > self.max:
+            self.max = seconds
+        self.recent.append(seconds)
+
+    def summary(self):
+        """Mean, p95 and max of the recent samples, in seconds."""
+        recent = sorted(self.recent)
+        if not recent:
+            return {"count": self.count, "mean": 0.0, "p95": 0.0, "max": 0.0}
+        return {
+            "count": self.count,
+            "mean": sum(recent) / len(recent),
+            "p95": recent[int(0.95 * (len(recent) - 1))],
+            "max": recent[-1],
+        }
+
+
+class Metrics:
+    """
+    Process-wide timing histograms, counters and gauges.
+
+    Hot paths check `enabled` before reading the clock, so with metrics
+    off each instrumented stage costs one attribute lookup. Gauges are
+    registered as callables and only evaluated when a snapshot is taken.
+    Rates are derived per consumer (e.g. the HUD and the exporter), each
+    against its own earlier snapshots, so consumers polling at different
+    intervals don't disturb each other's rates.
+    """
+
+    def __init__(self, enabled=False):
+        self.enabled = enabled
+        self._lock = threading.Lock()
+        self._stages = {}
+        self._counters = collections.defaultdict(int)
+        self._gauges = {}
+        # consumer -> (time, counters, cpu seconds) samples for rates
+        self._history = {}
+
+    def observe(self, stage, seconds):
+        """Record one duration for a stage."""
+        with self._lock:
+            hist = self._stages.get(stage)
+            if hist is None:
+                hist = self._stages[stage] = StageHistogram()
+            hist.observe(seconds)
+
+    def inc(self, name, n=1):
+        """Increase a counter."""
+        with self._lock:
+            self._counters[name] += n
+
+    def register_gauge(self, name, fn):
+        """Report fn() as gauge `name` in every snapshot."""
+        with self._lock:
+            self._gauges[name] = fn
+
+    def unregister_gauge(self, name):
+        with self._lock:
+            self._gauges.pop(name, None)
+
+    def reset(self):
+        """Forget all recorded timings and counts (gauges are kept)."""
+        with self._lock:
+            self._stages = {}
+            self._counters = collections.defaultdict(int)
+            self._history.clear()
+
+    def snapshot(self, consumer="hud"):
+        """
+        Return the current metrics as a dict.
+
+        Keys: "stages" (name -> summary and buckets), "counters", "rates"
+        (per second), "gauges" and "process" (rss_bytes, cpu_percent).
+        Rates and CPU are measured since `consumer`'s earlier snapshots:
+        over the last ~2 s if it polls often, otherwise since its previous
+        snapshot however old. A consumer's first snapshot has no rates.
+        """
+        now = time.monotonic()
+        cpu = _cpu_seconds()
+        with self._lock:
+            stages = {
+                name: dict(
+                    hist.summary(), total=hist.total,
+                    buckets=list(hist.buckets),
+                )
+                for name, hist in self._stages.items()
+            }
+            counters = dict(self._counters)
+            gauge_fns = list(self._gauges.items())
+            history = self._history.get(consumer)
+            if history is None:
+                history = self._history[consumer] = collections.deque(
+                    maxlen=16
+                )
+            # Oldest sample within the last ~2 s, else the newest one
+            base = history[-1] if history else (now, counters, cpu)
+            for sample in history:
+                if now - sample[0] <= 2.5:
+                    base = sample
+                    break
+            if not history or now - history[-1][0] >= 0.25:
+                history.append((now, counters, cpu))
+
+        elapsed = now - base[0]
+        rates = {}
+        cpu_percent = None
+        if elapsed > 0:
+            rates = {
+                name: (value - base[1].get(name, 0)) / elapsed
+                for name, value in counters.items()
+            }
+            cpu_percent = 100.0 * (cpu - base[2]) / elapsed
+
+        gauges = {}
+        for name, fn in gauge_fns:
+            try:
+                gauges[name] = fn()
+            except Exception:
+                continue  # The object behind the gauge may be gone
+        return {
+            "timestamp": time.time(),
+            "stages": stages,
+            "counters": counters,
+            "rates": rates,
+            "gauges": gauges,
+            "process": {
+                "rss_bytes": _rss_bytes(),
+                "cpu_percent": cpu_percent,
+            },
+        }
+
+
+def _cpu_seconds():
+    t = os.times()
+    return t.user + t.system
+
+
+def _rss_bytes():
+    """Resident set size of this process, or None if unknown."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        pass
+    try:
+        import resource
+
+        # Peak rather than current RSS; kilobytes on Linux, bytes on macOS
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+    except ImportError:
+        return None
+
+
+def _metric_name(name):
+    return "".join(c if c.isalnum() else "_" for c in name)
+
+
+def format_prometheus(snap):
+    """Render a snapshot in the Prometheus text exposition format."""
+    p = PROMETHEUS_PREFIX
+    lines = [
+        f"# TYPE {p}_stage_seconds histogram",
+    ]
+    for stage, s in sorted(snap["stages"].items()):
+        cumulative = 0
+        for bound, n in zip(BUCKETS + (float("inf"),), s["buckets"]):
+            cumulative += n
+            le = "+Inf" if bound == float("inf") else repr(bound)
+            lines.append(
+                f'{p}_stage_seconds_bucket{{stage="{stage}",le="{le}"}} '
+                f"{cumulative}"
+            )
+        lines.append(f'{p}_stage_seconds_sum{{stage="{stage}"}} {s["total"]}')
+        lines.append(f'{p}_stage_seconds_count{{stage="{stage}"}} {s["count"]}')
+    for name, value in sorted(snap["counters"].items()):
+        metric = f"{p}_{_metric_name(name)}_total"
+        lines.append(f"# TYPE {metric} counter")
+        lines.append(f"{metric} {value}")
+    for name, value in sorted(snap["rates"].items()):
+        metric = f"{p}_{_metric_name(name)}_per_second"
+        lines.append(f"# TYPE {metric} gauge")
+        lines.append(f"{metric} {value}")
+    gauges = dict(snap["gauges"])
+    for name, value in snap["process"].items():
+        gauges["process_" + name] = value
+    for name, value in sorted(gauges.items()):
+        if value is None:
+            continue
+        metric = f"{p}_{_metric_name(name)}"
+        lines.append(f"# TYPE {metric} gauge")
+        lines.append(f"{metric} {float(value)}")
+    return "\n".join(lines) + "\n"
+
+
+def csv_rows(snap):
+    """Flatten a snapshot into (timestamp, metric, value) rows."""
+    ts = f"{snap['timestamp']:.3f}"
+    rows = []
+    for stage, s in sorted(snap["stages"].items()):
+        for key in ("count", "mean", "p95", "max"):
+            rows.append((ts, f"stage.{stage}.{key}", s[key]))
+    for name, value in sorted(snap["counters"].items()):
+        rows.append((ts, f"counter.{name}", value))
+    for name, value in sorted(snap["rates"].items()):
+        rows.append((ts, f"rate.{name}", value))
+    for name, value in sorted(snap["gauges"].items()):
+        rows.append((ts, f"gauge.{name}", value))
+    for name, value in snap["process"].items():
+        rows.append((ts, f"process.{name}", value))
+    return [row for row in rows if row[2] is not None]
+
+
+class MetricsExporter:
+    """
+    Periodically write metrics to a file for node monitoring.
+
+    "prometheus" rewrites the file atomically each time (for the node
+    exporter's textfile collector); "csv" appends timestamp,metric,value
+    rows.
+    """
+
+    def __init__(
+        self,
+        metrics,
+        path=METRICS_CONF["export_path"],
+        fmt=METRICS_CONF["export_format"],
+        interval=METRICS_CONF["export_interval_s"],
+    ):
+        self.metrics = metrics
+        self.path = path
+        self.fmt = fmt
+        self.interval = interval
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        """Start exporting in a background thread."""
+        if self._thread is not None:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(
+            target=self._run, name="MetricsExporter", daemon=True
+        )
+        self._thread.start()
+
+    def stop(self):
+        """Write a final export and stop the thread."""
+        if self._thread is None:
+            return
+        self._stop.set()
+        self._thread.join()
+        self._thread = None
+
+    def export(self):
+        """Write the current snapshot now."""
+        snap = self.metrics.snapshot("export")
+        if self.fmt == "csv":
+            new_file = not os.path.exists(self.path)
+            with open(self.path, "a") as f:
+                if new_file:
+                    f.write("timestamp,metric,value\n")
+                for row in csv_rows(snap):
+                    f.write(",".join(str(v) for v in row) + "\n")
+        else:
+            # Imported here: the writer itself reports to METRICS
+            from src.core.writer import write_atomic
+
+            write_atomic(self.path, format_prometheus(snap).encode())
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self._export_safely()
+        self._export_safely()
+
+    def _export_safely(self):
+        try:
+            self.export()
+        except Exception as e:
+            print(f"Metrics export to {self.path} failed: {e}")
+
+
+METRICS = Metrics(
+    enabled=METRICS_CONF["enabled"] or bool(METRICS_CONF["export_path"])
+)
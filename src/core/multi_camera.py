@@ -0,0 +1,268 @@
+import os
+import threading
+import time
+
+from PyQt5.QtCore import QObject, QTimer, pyqtSignal
+
+from src.config import MULTI_CONF, WRITER_CONF
+from src.core.metrics import METRICS
+from src.core.video_thread import RANGE_SETTINGS, VideoThread
+from src.core.writer import CaptureWriter
+
+
+def align_frames(histories):
+    """
+    Pick the frame from each camera that lines up best in time.
+
+    histories is a list (one per camera) of [(timestamp, frame), ...].
+    Every frame of every camera is tried as the reference; each other
+    camera contributes its frame nearest to it. Returns (indices, skew)
+    for the set with the smallest spread between its earliest and latest
+    timestamps.
+    """
+    best = None
+    for ref in histories:
+        for ref_ts, _ in ref:
+            indices = [
+                min(range(len(h)), key=lambda i, h=h: abs(h[i][0] - ref_ts))
+                for h in histories
+            ]
+            stamps = [h[i][0] for h, i in zip(histories, indices)]
+            skew = max(stamps) - min(stamps)
+            if best is None or skew < best[1]:
+                best = (indices, skew)
+    return best
+
+
+class CameraRig:
+    """
+    One VideoThread per camera of a multi-camera rig.
+
+    cameras is a list of dicts as in multi_camera.cameras: "name" and
+    "sensor_id", plus optionally "source" (e.g. "synthetic"), "options"
+    (source options) and "isp" (ISP settings by name). Every camera runs
+    its own pipeline with its own settings; source_type overrides the
+    source of all of them.
+    """
+
+    def __init__(self, cameras=None, source_type=None):
+        """Create the camera threads; call start() to open them."""
+        if cameras is None:
+            cameras = MULTI_CONF["cameras"]
+        self.names = []
+        self.threads = []
+        for i, camera in enumerate(cameras):
+            name = camera.get("name") or f"cam{i}"
+            options = dict(camera.get("options") or {})
+            # Tell synthetic cameras apart in the preview
+            options.setdefault("label", f"{name.upper()} - DUMMY MODE")
+            thread = VideoThread(
+                source_type=source_type or camera.get("source"),
+                source_options=options,
+                sensor_id=camera.get("sensor_id", i),
+            )
+            for key, value in camera.get("isp", {}).items():
+                if key in RANGE_SETTINGS and value is not None:
+                    value = tuple(value)
+                setattr(thread, key, value)
+            self.names.append(name)
+            self.threads.append(thread)
+
+    def start(self):
+        for thread in self.threads:
+            thread.start()
+
+    def stop(self):
+        for thread in self.threads:
+            thread.stop()
+
+
+class SyncCapture(QObject):
+    """
+    Capture one frame per camera, matched by timestamp.
+
+    capture() collects the next `window` full-resolution frames from every
+    camera through frame listeners (so dual-stream pipelines only open
+    their full-res branch while a capture is pending), picks the set that
+    lines up best in time (see align_frames) and queues one file per
+    camera to a writer with a worker per camera. The files share an
+    index: "<prefix><camera>_NNNN.<fmt>". Timestamps are the time each
+    frame was read by its VideoThread; the spread of the chosen set is
+    reported as the capture's skew.
+    """
+
+    captured = pyqtSignal(dict)
+    failed = pyqtSignal(str)
+    _collected = pyqtSignal()
+
+    def __init__(
+        self,
+        rig,
+        window=MULTI_CONF["sync_window"],
+        timeout_ms=MULTI_CONF["sync_timeout_ms"],
+        max_skew_ms=MULTI_CONF["max_skew_ms"],
+    ):
+        """Initialize synchronized capture for a CameraRig."""
+        super().__init__()
+        self.rig = rig
+        self.window = max(1, window)
+        self.max_skew_ms = max_skew_ms
+        self.writer = CaptureWriter(
+            max(WRITER_CONF["workers"], len(rig.threads)),
+            WRITER_CONF["queue_size"],
+            WRITER_CONF["fsync_batch_size"],
+        )
+        self.writer.write_finished.connect(self._on_write_finished)
+        self.writer.write_failed.connect(self._on_write_failed)
+        self.writer.start()
+
+        self._timer = QTimer(self)
+        self._timer.setSingleShot(True)
+        self._timer.setInterval(timeout_ms)
+        self._timer.timeout.connect(self._finish)
+        self._collected.connect(self._finish)
+
+        self._lock = threading.Lock()
+        self._histories = None
+        self._listeners = []
+        self._request = None
+        self._pending = {}
+        self.captures = 0
+        self.last_skew = None
+
+    @property
+    def is_busy(self):
+        """True while frames are being collected for a capture."""
+        return self._histories is not None
+
+    def capture(self, catalog, prefix, fmt):
+        """Start collecting frames for one synchronized capture."""
+        if self.is_busy:
+            return False
+        self._request = (catalog, prefix, fmt)
+        with self._lock:
+            self._histories = [[] for _ in self.rig.threads]
+        self._listeners = []
+        for i, thread in enumerate(self.rig.threads):
+            def listener(frame, i=i, thread=thread):
+                self._on_frame(i, thread, frame)
+
+            self._listeners.append(listener)
+            thread.add_frame_listener(listener)
+        self._timer.start()
+        return True
+
+    def _on_frame(self, i, thread, frame):
+        """Called from camera i's capture thread."""
+        timestamp = thread.frame_time
+        with self._lock:
+            histories = self._histories
+            if histories is None or len(histories[i]) >= self.window:
+                return
+        # Copied outside the lock so the cameras don't wait on each other
+        frame = frame.copy()
+        with self._lock:
+            histories = self._histories
+            if histories is None or len(histories[i]) >= self.window:
+                return
+            histories[i].append((timestamp, frame))
+            done = all(len(h) >= self.window for h in histories)
+        if done:
+            self._collected.emit()
+
+    def _finish(self):
+        """All frames are in (or the timeout expired): save the best set."""
+        self._timer.stop()
+        with self._lock:
+            histories, self._histories = self._histories, None
+        if histories is None:
+            return
+        for thread, listener in zip(self.rig.threads, self._listeners):
+            thread.remove_frame_listener(listener)
+        self._listeners = []
+
+        missing = [
+            name for name, history in zip(self.rig.names, histories)
+            if not history
+        ]
+        if missing:
+            self.failed.emit(f"No frames from {', '.join(missing)}")
+            return
+        indices, skew = align_frames(histories)
+        frames = [h[i] for h, i in zip(histories, indices)]
+        self._save(frames, skew)
+
+    def _save(self, frames, skew):
+        catalog, prefix, fmt = self._request
+        prefixes = [f"{prefix}{name}_" for name in self.rig.names]
+        idx, filenames = catalog.reserve_shared(prefixes, fmt)
+        first = min(ts for ts, _ in frames)
+        # monotonic -> wall clock for the metadata timestamps
+        wall_offset = time.time() - time.monotonic()
+        dropped = 0
+        for name, thread, filename, (ts, frame) in zip(
+            self.rig.names, self.rig.threads, filenames, frames
+        ):
+            metadata = {
+                "timestamp": ts + wall_offset,
+                "roi": None,
+                "settings": thread.get_settings(),
+                "camera": name,
+                "sensor_id": thread.sensor_id,
+                "capture_index": idx,
+                "skew_ms": skew * 1000,
+                "offset_ms": (ts - first) * 1000,
+            }
+            path = os.path.join(catalog.directory, filename)
+            # Registered before submitting so a fast write can't finish
+            # before its metadata is known
+            self._pending[path] = (catalog, metadata)
+            # The frame is already our own copy; hand it over as is
+            if not self.writer.submit(frame, None, path, fmt, copy=False):
+                del self._pending[path]
+                catalog.release(filename)
+                dropped += 1
+
+        self.captures += 1
+        self.last_skew = skew
+        if METRICS.enabled:
+            METRICS.observe("multi.skew", skew)
+        skew_ms = skew * 1000
+        if skew_ms > self.max_skew_ms:
+            print(
+                f"Capture {idx}: camera skew {skew_ms:.1f} ms exceeds "
+                f"{self.max_skew_ms:g} ms"
+            )
+        self.captured.emit(
+            {
+                "index": idx,
+                "files": filenames,
+                "skew_ms": skew_ms,
+                "offsets_ms": {
+                    name: (ts - first) * 1000
+                    for name, (ts, _) in zip(self.rig.names, frames)
+                },
+                "over_limit": skew_ms > self.max_skew_ms,
+                "dropped": dropped,
+            }
+        )
+
+    def _on_write_finished(self, path):
+        catalog, metadata = self._pending.pop(path, (None, None))
+        if catalog is not None:
+            catalog.commit(os.path.basename(path), metadata)
+
+    def _on_write_failed(self, path, error):
+        catalog, _ = self._pending.pop(path, (None, None))
+        if catalog is not None:
+            catalog.release(os.path.basename(path))
+
+    def shutdown(self):
+        """Cancel a pending capture and wait for queued writes."""
+        self._timer.stop()
+        with self._lock:
+            self._histories = None
+        for thread, listener in zip(self.rig.threads, self._listeners):
+            thread.remove_frame_listener(listener)
+        self._listeners = []
+        self.writer.stop()
@@ -0,0 +1,195 @@
+"""
+GStreamer pipeline strings for the Argus camera.
+
+Everything here is a pure function of the ISP settings dict (see
+VideoThread.get_settings) so pipelines can be checked as plain strings,
+without a camera or GStreamer installed.
+"""
+from src.config import (
+    CAM_CONF,
+    DEFAULT_HEIGHT,
+    DEFAULT_WIDTH,
+    DISPLAY_HEIGHT,
+    DISPLAY_WIDTH,
+)
+
+# nvvidconv crops and scales in whole pixel pairs (NV12 chroma)
+CROP_ALIGN = 2
+
+
+def flip_method(h_flip, v_flip):
+    """
+    Calculate flip-method for nvvidconv.
+    0: identity
+    1: counterclockwise
+    2: rotate-180
+    3: clockwise
+    4: horizontal-flip
+    5: upper-right-diagonal
+    6: vertical-flip
+    7: upper-left-diagonal
+
+    We only care about H and V flips combined with 0 rotation.
+    H=False, V=False -> 0
+    H=True,  V=False -> 4
+    H=False, V=True  -> 6
+    H=True,  V=True  -> 2 (rotate-180 is equivalent to H+V flip)
+    """
+    if h_flip and v_flip:
+        return 2
+    elif h_flip:
+        return 4
+    elif v_flip:
+        return 6
+    return 0
+
+
+def source_element(settings, sensor_id=None):
+    """
+    Camera source element and caps shared by every pipeline.
+
+    sensor_id selects the CSI camera on multi-camera rigs; None leaves
+    it to nvarguscamerasrc (the first camera).
+    """
+    pipeline = "nvarguscamerasrc "
+    if sensor_id is not None:
+        pipeline += f"sensor-id={sensor_id} "
+    exposure_range = settings.get("exposure_range")
+    gain_range = settings.get("gain_range")
+    if exposure_range:
+        pipeline += (
+            f'exposuretimerange="{exposure_range[0]} '
+            f'{exposure_range[1]}" '
+        )
+    if gain_range:
+        pipeline += (
+            f'gainrange="{gain_range[0]} {gain_range[1]}" '
+            'ispdigitalgainrange="1 1" '
+        )
+    if settings.get("ae_lock"):
+        pipeline += "aelock=true "
+    if settings.get("awb_lock"):
+        pipeline += "awblock=true "
+
+    pipeline += (
+        f"saturation={settings['saturation']} "
+        f"wbmode={settings['wb_mode']} "
+        f"tnr-mode={settings['tnr_mode']} "
+        f"tnr-strength={settings['tnr_strength']} "
+        f"ee-mode={settings['ee_mode']} "
+        f"ee-strength={settings['ee_strength']} "
+    )
+
+    pipeline += (
+        f"! video/x-raw(memory:NVMM), width={DEFAULT_WIDTH}, "
+        f"height={DEFAULT_HEIGHT}, format=NV12, "
+        f"framerate={CAM_CONF['framerate']} ! "
+    )
+    return pipeline
+
+
+def _bgr_branch(flip, width, height, crop=""):
+    """nvvidconv (scale/crop/flip in hardware) down to BGR for appsink."""
+    return (
+        f"nvvidconv flip-method={flip}{crop} ! "
+        f"video/x-raw, width={width}, height={height}, format=BGRx ! "
+        "videoconvert ! video/x-raw, format=BGR ! "
+    )
+
+
+def single_pipeline(settings, sensor_id=None):
+    """One full-resolution BGR stream into a single appsink."""
+    flip = flip_method(settings["h_flip"], settings["v_flip"])
+    return (
+        source_element(settings, sensor_id)
+        + _bgr_branch(flip, DEFAULT_WIDTH, DEFAULT_HEIGHT)
+        + "appsink drop=1"
+    )
+
+
+def _teed(settings, full_branch, sensor_id):
+    flip = flip_method(settings["h_flip"], settings["v_flip"])
+    return source_element(settings, sensor_id) + (
+        "tee name=t "
+        "t. ! queue max-size-buffers=2 leaky=downstream ! "
+        + _bgr_branch(flip, DISPLAY_WIDTH, DISPLAY_HEIGHT)
+        + "appsink name=preview drop=true max-buffers=1 sync=false "
+        "t. ! queue max-size-buffers=4 leaky=downstream ! "
+        "valve name=fullvalve drop=true ! "
+        + full_branch
+        + "appsink name=full drop=true max-buffers=4 sync=false"
+    )
+
+
+def dual_pipeline(settings, sensor_id=None):
+    """
+    Build a pipeline with a preview branch and a gated full-res branch.
+
+    The display-sized branch is scaled by nvvidconv in hardware, so the
+    CPU only converts DISPLAY_WIDTH x DISPLAY_HEIGHT frames. The full
+    resolution branch sits behind a valve that starts closed.
+    """
+    flip = flip_method(settings["h_flip"], settings["v_flip"])
+    return _teed(
+        settings, _bgr_branch(flip, DEFAULT_WIDTH, DEFAULT_HEIGHT), sensor_id
+    )
+
+
+def align_crop(rect):
+    """Grow a sensor rect outwards to CROP_ALIGN pixel boundaries."""
+    x, y, w, h = rect
+    x0 = x - x % CROP_ALIGN
+    y0 = y - y % CROP_ALIGN
+    x1 = min(-(-(x + w) // CROP_ALIGN) * CROP_ALIGN, DEFAULT_WIDTH)
+    y1 = min(-(-(y + h) // CROP_ALIGN) * CROP_ALIGN, DEFAULT_HEIGHT)
+    return (x0, y0, x1 - x0, y1 - y0)
+
+
+def unflipped_crop(rect, h_flip, v_flip):
+    """
+    Map an ROI in the (flipped) output frame to camera coordinates.
+
+    nvvidconv crops the incoming frame before applying flip-method.
+    """
+    x, y, w, h = rect
+    if h_flip:
+        x = DEFAULT_WIDTH - x - w
+    if v_flip:
+        y = DEFAULT_HEIGHT - y - h
+    return (x, y, w, h)
+
+
+def roi_pipeline(settings, roi, sensor_id=None):
+    """
+    Like dual_pipeline, but the gated branch carries only a sensor ROI.
+
+    roi is (x, y, w, h) in output-frame pixels and should already be
+    aligned (see align_crop); nvvidconv crops it in hardware, so only the
+    region is converted to BGR and copied to the appsink. The preview
+    branch still shows the whole (display-sized) frame for framing.
+    """
+    h_flip, v_flip = settings["h_flip"], settings["v_flip"]
+    x, y, w, h = unflipped_crop(roi, h_flip, v_flip)
+    crop = f" left={x} top={y} right={x + w} bottom={y + h}"
+    return _teed(
+        settings,
+        _bgr_branch(flip_method(h_flip, v_flip), w, h, crop),
+        sensor_id,
+    )
+
+
+def h265_record_pipeline(path, bitrate):
+    """
+    appsrc pipeline for cv2.VideoWriter that encodes H.265 in hardware.
+
+    BGR frames are converted to NV12 by nvvidconv and encoded by the
+    Jetson's NVENC, so recording costs almost no CPU. Open it with
+    cv2.CAP_GSTREAMER and fourcc 0.
+    """
+    return (
+        "appsrc ! video/x-raw, format=BGR ! videoconvert ! "
+        "video/x-raw, format=BGRx ! nvvidconv ! "
+        "video/x-raw(memory:NVMM), format=NV12 ! "
+        f"nvv4l2h265enc bitrate={int(bitrate)} ! h265parse ! "
+        f'matroskamux ! filesink location="{path}"'
+    )
@@ -0,0 +1,141 @@
+import os
+import threading
+import time
+
+from PyQt5.QtCore import QObject, QTimer, pyqtSignal
+
+from src.config import RING_CONF, WRITER_CONF
+from src.core.ring_buffer import ring_window
+from src.core.shards import NPY_FORMAT
+from src.core.writer import CaptureWriter
+
+
+class PreTriggerCapture(QObject):
+    """
+    Save the frames around a trigger from the VideoThread ring buffer.
+
+    trigger() notes the time and holds the pre-trigger frames in the
+    ring, waits out the post-trigger window while the ring keeps filling
+    its other slots, then freezes the ring and writes every frame from
+    `seconds` before to `post_seconds` after the trigger (both shortened
+    if the ring's byte cap can't hold them). The ring skips new frames
+    while it is frozen for the dump.
+    """
+
+    finished = pyqtSignal(int)
+
+    def __init__(self, thread):
+        """Initialize the event capture for a VideoThread."""
+        super().__init__()
+        self.thread = thread
+        self.writer = CaptureWriter(
+            WRITER_CONF["workers"],
+            WRITER_CONF["queue_size"],
+            WRITER_CONF["fsync_batch_size"],
+        )
+        self.writer.write_finished.connect(self._on_write_finished)
+        self.writer.write_failed.connect(self._on_write_failed)
+        # Near-duplicates are dropped like failed writes
+        self.writer.write_skipped.connect(self._on_write_failed)
+        self.writer.start()
+        self._pending = {}
+        self._busy = False
+
+    @property
+    def is_busy(self):
+        """True while an event is waiting for its post window or dumping."""
+        return self._busy
+
+    def trigger(self, catalog, prefix, fmt, rect=None,
+                post_seconds=RING_CONF["post_seconds"], sink=None):
+        """
+        Capture the pre-trigger window plus post_seconds afterwards.
+
+        With the npy format the frames are appended to `sink`; with an
+        encoded sink (TarShardSink) they are streamed into it.
+        """
+        ring = self.thread.ring_buffer
+        if self._busy or ring is None:
+            return False
+        self._busy = True
+        trigger_time = time.monotonic()
+        pre_seconds, post_seconds = ring_window(
+            ring.capacity, ring.seconds, post_seconds, ring.fps
+        )
+        start = trigger_time - pre_seconds
+        end = trigger_time + post_seconds
+        # Post-trigger frames must not push the pre-trigger ones out
+        ring.hold(start)
+        args = (
+            ring, catalog, prefix, fmt, rect, trigger_time, start, end, sink
+        )
+        QTimer.singleShot(
+            int(post_seconds * 1000),
+            lambda: threading.Thread(
+                target=self._dump, args=args, daemon=True
+            ).start(),
+        )
+        return True
+
+    def _dump(self, ring, catalog, prefix, fmt, rect, trigger_time, start,
+              end, sink):
+        """Write the frozen window to disk (runs in a worker thread)."""
+        saved = 0
+        settings = self.thread.get_settings()
+        roi = list(rect) if rect else None
+        # The ring holds frames as delivered, possibly cropped on the sensor
+        rect = self.thread.frame_rect(rect)
+        # monotonic -> wall clock for the metadata timestamps
+        wall_offset = time.time() - time.monotonic()
+        ring.freeze()
+        try:
+            for frame, ts in ring.frames_between(start, end):
+                metadata = {
+                    "timestamp": ts + wall_offset,
+                    "roi": roi,
+                    "settings": settings,
+                    "trigger_offset": ts - trigger_time,
+                }
+                if fmt == NPY_FORMAT:
+                    try:
+                        sink.append(frame, rect, metadata)
+                    except OSError as e:
+                        print(f"Failed to append to shard: {e}")
+                        break
+                    saved += 1
+                    continue
+                if sink is not None:
+                    self.writer.submit(
+                        frame, rect, sink.reserve_key(), fmt, block=True,
+                        sink=sink, metadata=metadata,
+                    )
+                    saved += 1
+                    continue
+                _, filename = catalog.reserve(prefix, fmt)
+                path = os.path.join(catalog.directory, filename)
+                self._pending[path] = (catalog, metadata)
+                # Blocking submit: the writer copies the crop out of the
+                # ring, so nothing is dropped and the slot can be reused.
+                self.writer.submit(frame, rect, path, fmt, block=True,
+                                   metadata=metadata)
+                saved += 1
+        finally:
+            ring.release()
+            ring.unfreeze()
+            self._busy = False
+        print(f"Event capture: {saved} frames around trigger")
+        self.finished.emit(saved)
+
+    def _on_write_finished(self, path):
+        catalog, metadata = self._pending.pop(path, (None, None))
+        if catalog is not None:
+            catalog.commit(os.path.basename(path), metadata)
+
+    def _on_write_failed(self, path, error):
+        catalog, _ = self._pending.pop(path, (None, None))
+        if catalog is not None:
+            catalog.release(os.path.basename(path))
+
+    def shutdown(self):
+        """Wait for outstanding writes and stop the writer."""
+        self.writer.stop()
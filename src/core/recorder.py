@@ -0,0 +1,446 @@
+import json
+import os
+import queue
+import threading
+import time
+
+import cv2
+import numpy as np
+from PyQt5.QtCore import QObject, QTimer, pyqtSignal
+
+from src.config import CAM_CONF, REC_CONF
+from src.core.imaging import crop_frame
+from src.core.metrics import METRICS
+from src.core.pipelines import h265_record_pipeline
+from src.core.video_thread import parse_framerate
+
+# Codec name -> (fourcc, file extension, description)
+CODECS = {
+    "mjpg": ("MJPG", ".avi", "Motion JPEG, near-lossless at quality 95+"),
+    "ffv1": ("FFV1", ".mkv", "FFV1, lossless (CPU-heavy)"),
+    "huffyuv": ("HFYU", ".avi", "HuffYUV, lossless (fast, large files)"),
+    "mp4v": ("mp4v", ".mp4", "MPEG-4 Part 2, lossy, small files"),
+    "h265_nvenc": (None, ".mkv", "H.265 on the Jetson hardware encoder"),
+}
+SIDECAR_EXT = ".jsonl"
+# Segments being written carry this before their extension
+PARTIAL = ".partial"
+
+
+def open_video_writer(path, codec, fps, size, quality=REC_CONF["quality"],
+                      bitrate=REC_CONF["bitrate"]):
+    """Open a cv2.VideoWriter for (w, h) BGR frames, or raise OSError."""
+    fourcc = CODECS[codec][0]
+    if codec == "h265_nvenc":
+        writer = cv2.VideoWriter(
+            h265_record_pipeline(path, bitrate), cv2.CAP_GSTREAMER, 0, fps,
+            size,
+        )
+    elif codec == "mjpg":
+        # OpenCV's own MJPEG writer honours the quality and needs no FFmpeg
+        writer = cv2.VideoWriter(
+            path, cv2.CAP_OPENCV_MJPEG, cv2.VideoWriter_fourcc(*fourcc), fps,
+            size,
+        )
+        if writer.isOpened():
+            writer.set(cv2.VIDEOWRITER_PROP_QUALITY, quality)
+            writer.set(cv2.VIDEOWRITER_PROP_NSTRIPES, -1)
+    else:
+        writer = cv2.VideoWriter(
+            path, cv2.CAP_FFMPEG, cv2.VideoWriter_fourcc(*fourcc), fps, size
+        )
+    if not writer.isOpened():
+        raise OSError(f"cannot open a {codec} video writer for {path}")
+    return writer
+
+
+def sidecar_path(video_path):
+    """The per-frame JSONL sidecar of a recorded segment."""
+    return os.path.splitext(video_path)[0] + SIDECAR_EXT
+
+
+def read_sidecar(path):
+    """
+    Return (header, frames) from a segment sidecar.
+
+    frames has one dict per video frame, in order: "frame" (index in the
+    segment), "seq" (camera frame number), "timestamp" (monotonic),
+    "wall_time" and "settings", filled in from the last change.
+    """
+    with open(path) as f:
+        header = json.loads(f.readline())
+        frames = []
+        settings = None
+        for line in f:
+            if not line.strip():
+                continue
+            record = json.loads(line)
+            settings = record.setdefault("settings", settings)
+            frames.append(record)
+    return header, frames
+
+
+def iter_segment(video_path):
+    """Yield (record, frame) for every frame of a recorded segment."""
+    _, records = read_sidecar(sidecar_path(video_path))
+    cap = cv2.VideoCapture(video_path)
+    try:
+        for record in records:
+            ok, frame = cap.read()
+            if not ok:
+                return
+            yield record, frame
+    finally:
+        cap.release()
+
+
+class _Segment:
+    """One video file and its sidecar, written under PARTIAL names."""
+
+    def __init__(self, directory, name, codec, fps, size, header):
+        ext = CODECS[codec][1]
+        self.name = name + ext
+        self.path = os.path.join(directory, self.name)
+        self.partial_path = os.path.join(directory, name + PARTIAL + ext)
+        self.size = size
+        self.frames = 0
+        self.start_time = None
+        self._last_settings = None
+        self.writer = open_video_writer(self.partial_path, codec, fps, size)
+        self._sidecar = open(
+            os.path.join(directory, name + PARTIAL + SIDECAR_EXT), "w"
+        )
+        self._sidecar.write(json.dumps(dict(header, video=self.name)) + "\n")
+
+    def write(self, frame, record):
+        if self.start_time is None:
+            self.start_time = record["timestamp"]
+        self.writer.write(frame)
+        line = dict(record, frame=self.frames)
+        # Settings are only written when they change
+        if line["settings"] == self._last_settings:
+            del line["settings"]
+        else:
+            self._last_settings = line["settings"]
+        self._sidecar.write(json.dumps(line) + "\n")
+        self.frames += 1
+
+    def finish(self):
+        """Flush the encoder and move both files to their final names."""
+        self.writer.release()
+        sidecar = self._sidecar.name
+        self._sidecar.close()
+        os.replace(self.partial_path, self.path)
+        os.replace(sidecar, sidecar_path(self.path))
+        return os.path.getsize(self.path)
+
+
+class VideoRecorder(QObject):
+    """
+    Record the camera stream into rolling video segments.
+
+    Frames are taken in the capture thread through a frame listener,
+    cropped to the ROI, copied into one of `queue_frames` reusable
+    buffers and encoded by a writer thread with cv2.VideoWriter; when no
+    buffer is free the frame is dropped and counted. A new segment starts
+    every `segment_seconds` (or when the frame size changes); the old one
+    is flushed and renamed by a separate thread, so rollover does not
+    hold up encoding. Each segment has a JSONL sidecar with the capture
+    timestamp, camera frame number and ISP settings of every frame (see
+    read_sidecar / iter_segment).
+    """
+
+    stats_updated = pyqtSignal(dict)
+    finished = pyqtSignal(dict)
+    segment_finished = pyqtSignal(str)
+    _limit_reached = pyqtSignal()
+    _drained = pyqtSignal()
+
+    def __init__(self, thread, queue_frames=REC_CONF["queue_frames"]):
+        """Initialize the recorder for a VideoThread."""
+        super().__init__()
+        self.thread = thread
+        self.queue_frames = queue_frames
+        self._limit_reached.connect(self.stop)
+        self._drained.connect(self._on_drained)
+
+        self._timer = QTimer(self)
+        self._timer.setInterval(REC_CONF["stats_interval_ms"])
+        self._timer.timeout.connect(self._report)
+
+        self._lock = threading.Lock()
+        self._queue = queue.Queue()
+        self._free = []
+        self._allocated = 0
+        self._worker = None
+        self._closers = []
+        self._active = False
+        self._listening = False
+        self._stopping = False
+        self._reset_counters()
+
+    def _reset_counters(self):
+        self.frames_seen = 0
+        self.frames_queued = 0
+        self.frames_encoded = 0
+        self.dropped_queue = 0
+        self.dropped_write = 0
+        self.segments = 0
+        self.segment = None
+        self.error = None
+        self._bytes_finished = 0
+        self._encode_time = 0.0
+        self._current_path = None
+        self._start_time = time.monotonic()
+        self._end_time = None
+        self._drain_time = None
+        self._start_failures = self.thread.read_failures
+
+    @property
+    def is_running(self):
+        """True while frames are being taken or encoded."""
+        return self._listening or self._stopping
+
+    def start(self, directory, prefix="", codec=REC_CONF["codec"], rect=None,
+              segment_seconds=REC_CONF["segment_seconds"], duration=0.0,
+              fps=None):
+        """
+        Begin recording into directory.
+
+        rect is a sensor-space (x, y, w, h) to record, or None for the
+        full frame. Segments are named {prefix}{start time}_NNNN{ext}.
+        Recording stops after `duration` seconds (0: when stopped).
+        """
+        if self.is_running:
+            return
+        if codec not in CODECS:
+            raise ValueError(f"unknown codec {codec!r}")
+        self.directory = directory
+        self.codec = codec
+        self.rect = rect
+        self.segment_seconds = segment_seconds
+        self.duration = duration
+        self.fps = fps or parse_framerate(CAM_CONF["framerate"])
+        self._base = f"{prefix}{time.strftime('%Y%m%d-%H%M%S')}"
+        self._reset_counters()
+        self._closers = []
+        self._active = True
+        self._listening = True
+        self._worker = threading.Thread(target=self._run, daemon=True)
+        self._worker.start()
+        self.thread.add_frame_listener(self._on_frame)
+        self._timer.start()
+
+    def stop(self):
+        """Stop taking frames; queued frames are still encoded."""
+        if not self._listening:
+            return
+        with self._lock:
+            self._active = False
+        self._listening = False
+        self.thread.remove_frame_listener(self._on_frame)
+        self._end_time = time.monotonic()
+        self._stopping = True
+        self._queue.put(None)
+        self._report()
+
+    def shutdown(self):
+        """Stop recording and wait until every segment is finished."""
+        self.stop()
+        if self._worker is not None:
+            self._worker.join()
+            self._worker = None
+
+    # --- Capture thread ---
+    def _take_buffer(self, shape, dtype):
+        """A free buffer for a frame, or None if all are queued."""
+        with self._lock:
+            while self._free:
+                buffer = self._free.pop()
+                if buffer.shape == shape and buffer.dtype == dtype:
+                    return buffer
+                # Left over from before a size change
+                self._allocated -= 1
+            if self._allocated < self.queue_frames:
+                self._allocated += 1
+                return np.empty(shape, dtype)
+        return None
+
+    def _on_frame(self, frame):
+        """Called from the capture thread for every frame."""
+        with self._lock:
+            if not self._active:
+                return
+            self.frames_seen += 1
+            if self.duration and (
+                time.monotonic() - self._start_time >= self.duration
+            ):
+                self._active = False
+                self._limit_reached.emit()
+                return
+        # Frames may already be cropped to a sensor ROI; most codecs
+        # need even dimensions
+        view = crop_frame(frame, self.thread.frame_rect(self.rect))
+        h, w = view.shape[:2]
+        view = view[: h - h % 2, : w - w % 2]
+        if view.size == 0:
+            return
+        buffer = self._take_buffer(view.shape, view.dtype)
+        if buffer is None:
+            with self._lock:
+                self.dropped_queue += 1
+            return
+        np.copyto(buffer, view)
+        record = {
+            "seq": self.thread.frame_count,
+            "timestamp": self.thread.frame_time,
+            "wall_time": time.time(),
+            "settings": self.thread.get_settings(),
+        }
+        with self._lock:
+            self.frames_queued += 1
+        self._queue.put((buffer, record))
+
+    # --- Writer thread ---
+    def _open_segment(self, size):
+        name = f"{self._base}_{self.segments + 1:04d}"
+        header = {
+            "codec": self.codec,
+            "fps": self.fps,
+            "width": size[0],
+            "height": size[1],
+            "roi": (
+                [self.rect[0], self.rect[1], size[0], size[1]]
+                if self.rect else None
+            ),
+            "started": time.time(),
+        }
+        segment = _Segment(
+            self.directory, name, self.codec, self.fps, size, header
+        )
+        with self._lock:
+            self.segments += 1
+            self.segment = segment.name
+            self._current_path = segment.partial_path
+        return segment
+
+    def _run(self):
+        segment = None
+        failed = False
+        while True:
+            item = self._queue.get()
+            if item is None:
+                break
+            buffer, record = item
+            try:
+                if failed:
+                    raise OSError("recording failed")
+                size = (buffer.shape[1], buffer.shape[0])
+                if segment is not None and (
+                    segment.size != size
+                    or self.segment_seconds
+                    and record["timestamp"] - segment.start_time
+                    >= self.segment_seconds
+                ):
+                    self._finish_async(segment)
+                    segment = None
+                if segment is None:
+                    segment = self._open_segment(size)
+                start = time.perf_counter()
+                segment.write(buffer, record)
+                cost = time.perf_counter() - start
+                with self._lock:
+                    self.frames_encoded += 1
+                    self._encode_time += cost
+                if METRICS.enabled:
+                    METRICS.observe("record.encode", cost)
+            except (OSError, cv2.error) as e:
+                with self._lock:
+                    self.dropped_write += 1
+                if not failed:
+                    print(f"Recording failed: {e}")
+                    self.error = str(e)
+                    failed = True
+                    self._limit_reached.emit()
+            finally:
+                with self._lock:
+                    self._free.append(buffer)
+        if segment is not None:
+            self._finish_async(segment)
+        for closer in self._closers:
+            closer.join()
+        self._drain_time = time.monotonic()
+        self._drained.emit()
+
+    def _finish_async(self, segment):
+        closer = threading.Thread(
+            target=self._finish_segment, args=(segment,), daemon=True
+        )
+        closer.start()
+        self._closers.append(closer)
+
+    def _finish_segment(self, segment):
+        try:
+            size = segment.finish()
+        except (OSError, cv2.error) as e:
+            print(f"Failed to finish {segment.partial_path}: {e}")
+            return
+        with self._lock:
+            self._bytes_finished += size
+            if self._current_path == segment.partial_path:
+                self._current_path = None
+        print(f"Recorded: {segment.path} ({segment.frames} frames)")
+        self.segment_finished.emit(segment.path)
+
+    # --- Stats (GUI thread) ---
+    def get_stats(self):
+        """Return capture/encode rates, disk throughput and drops."""
+        now = time.monotonic()
+        with self._lock:
+            encoded = self.frames_encoded
+            encode_time = self._encode_time
+            written = self._bytes_finished
+            current = self._current_path
+            stats = {
+                "frames_seen": self.frames_seen,
+                "frames_queued": self.frames_queued,
+                "frames_encoded": encoded,
+                "segments": self.segments,
+                "segment": self.segment,
+                "error": self.error,
+                "dropped": {
+                    "camera": self.thread.read_failures
+                    - self._start_failures,
+                    "queue": self.dropped_queue,
+                    "write": self.dropped_write,
+                },
+            }
+        if current is not None:
+            try:
+                written += os.path.getsize(current)
+            except OSError:
+                pass
+        elapsed = max((self._end_time or now) - self._start_time, 1e-6)
+        encode_elapsed = max(
+            (self._drain_time or now) - self._start_time, 1e-6
+        )
+        stats.update({
+            "elapsed": elapsed,
+            "capture_fps": stats["frames_queued"] / elapsed,
+            "encode_fps": encoded / encode_elapsed,
+            "encode_ms": encode_time / encoded * 1000 if encoded else 0.0,
+            "bytes_written": written,
+            "disk_mb_s": written / encode_elapsed / 1e6,
+            "queue_depth": self._queue.qsize(),
+        })
+        return stats
+
+    def _report(self):
+        self.stats_updated.emit(self.get_stats())
+
+    def _on_drained(self):
+        self._stopping = False
+        self._timer.stop()
+        stats = self.get_stats()
+        self.stats_updated.emit(stats)
+        self.finished.emit(stats)
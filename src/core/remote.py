@@ -0,0 +1,443 @@
+import hmac
+import json
+import socketserver
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import cv2
+from PyQt5.QtCore import QObject, pyqtSignal
+
+from src.config import REMOTE_CONF
+from src.core.frame_worker import FrameWorker
+from src.core.metrics import METRICS
+
+BOUNDARY = "frame"
+
+# Page served at "/": the live stream, for a quick look from a browser
+INDEX_HTML = b"""<!doctype html>
+<html><head><title>Data Collector</title></head>
+<body style="background:#222;color:#eee;font-family:sans-serif">
+<img src="/stream.mjpg" style="max-width:100%">
+<p>Control API: <code>/api/status</code></p>
+</body></html>
+"""
+
+
+class PreviewEncoder(FrameWorker):
+    """
+    Downscaled JPEG preview for MJPEG clients.
+
+    Frames are only encoded while at least one client is connected, and
+    at most `max_fps` times per second; the newest JPEG is kept for every
+    client to pick up (see wait_frame), so a slow client skips frames
+    instead of queueing them.
+    """
+
+    def __init__(
+        self,
+        width=REMOTE_CONF["preview_width"],
+        quality=REMOTE_CONF["preview_quality"],
+        max_fps=REMOTE_CONF["max_fps"],
+    ):
+        """Initialize the encoder; call start() to begin."""
+        super().__init__()
+        self.width = width
+        self.params = [cv2.IMWRITE_JPEG_QUALITY, quality]
+        self.max_fps = max_fps
+        self.clients = 0
+        self.frames_encoded = 0
+        self._cond = threading.Condition()
+        self._seq = 0
+        self._jpeg = None
+        self._small = None
+        self._next_submit = 0.0
+
+    def add_client(self):
+        with self._cond:
+            self.clients += 1
+
+    def remove_client(self):
+        with self._cond:
+            self.clients -= 1
+            if not self.clients:
+                # Don't show a stale frame to the next client
+                self._jpeg = None
+
+    def submit(self, packet):
+        """Offer a preview FramePacket; ignored when nobody is watching."""
+        if not self.clients:
+            return
+        now = time.monotonic()
+        if now < self._next_submit:
+            return
+        # Step from the last due time, so the rate doesn't round down to
+        # a divisor of the camera rate
+        self._next_submit = max(
+            self._next_submit + 1.0 / max(self.max_fps, 0.1), now
+        )
+        super().submit(packet)
+
+    def process(self, frame):
+        start = time.perf_counter()
+        h, w = frame.shape[:2]
+        size = (self.width, max(1, int(round(h * self.width / w))))
+        if w > self.width:
+            frame = cv2.resize(
+                frame, size, dst=self._small, interpolation=cv2.INTER_AREA
+            )
+            self._small = frame
+        ok, buf = cv2.imencode(".jpg", frame, self.params)
+        if not ok:
+            return
+        with self._cond:
+            self._seq += 1
+            self._jpeg = buf.tobytes()
+            self.frames_encoded += 1
+            self._cond.notify_all()
+        if METRICS.enabled:
+            METRICS.observe("remote.encode", time.perf_counter() - start)
+
+    def wait_frame(self, last_seq, timeout=1.0):
+        """Return (seq, jpeg) newer than last_seq, or None on timeout."""
+        with self._cond:
+            self._cond.wait_for(
+                lambda: self._jpeg is not None and self._seq != last_seq,
+                timeout,
+            )
+            if self._jpeg is None or self._seq == last_seq:
+                return None
+            return self._seq, self._jpeg
+
+    def wake_all(self):
+        """Wake every waiting client, e.g. to let them exit."""
+        with self._cond:
+            self._cond.notify_all()
+
+
+class _Call:
+    """
+    A controller call to run on the GUI thread, with its result.
+
+    A call that times out before the GUI thread picks it up is cancelled
+    and never runs; one that has started is waited for.
+    """
+
+    def __init__(self, fn, args):
+        self.fn = fn
+        self.args = args
+        self.result = None
+        self.error = None
+        self.done = threading.Event()
+        self.lock = threading.Lock()
+        self.started = False
+        self.cancelled = False
+
+    def begin(self):
+        """Mark the call as running; False if it was cancelled."""
+        with self.lock:
+            if self.cancelled:
+                return False
+            self.started = True
+            return True
+
+    def cancel(self):
+        """Cancel the call unless it is running; False if it is."""
+        with self.lock:
+            if self.started:
+                return False
+            self.cancelled = True
+            return True
+
+
+class _ThreadingHTTPServer(socketserver.ThreadingMixIn, HTTPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+
+class _Handler(BaseHTTPRequestHandler):
+    server_version = "DataCollector/1.0"
+
+    def do_GET(self):
+        self.server.remote.handle(self, "GET")
+
+    def do_POST(self):
+        self.server.remote.handle(self, "POST")
+
+    def do_DELETE(self):
+        self.server.remote.handle(self, "DELETE")
+
+    def log_message(self, format, *args):
+        # One line per request would flood the console while streaming
+        pass
+
+
+class RemoteServer(QObject):
+    """
+    HTTP control API and MJPEG preview for running without a screen.
+
+    The controller (see WindowController) does the work; its methods
+    are called on the GUI thread through a queued signal, so they can
+    touch widgets and the VideoThread like the GUI itself does. Routes:
+
+        GET  /api/status            state, settings, ROIs, output, burst,
+                                    recording
+        GET  /api/settings          current ISP settings
+        POST /api/settings          {"gain_range": [2, 2], ...}
+        GET  /api/rois              ROIs in sensor pixels
+        POST /api/rois              [{"rect": [x, y, w, h], "label": ""}]
+        POST /api/output            {"format": "jpg", "prefix": "", ...}
+        POST /api/capture           capture one frame (every ROI)
+        POST /api/burst/start       {"mode": "count", "value": 30, ...}
+        POST /api/burst/stop
+        POST /api/record/start      {"codec": "ffv1", "segment_seconds": 60}
+        POST /api/record/stop
+        GET  /stream.mjpg           MJPEG preview
+        GET  /snapshot.jpg          one preview JPEG
+
+    With a token configured, requests must carry "Authorization: Bearer
+    <token>" or "?token=<token>".
+    """
+
+    _call = pyqtSignal(object)
+
+    ROUTES = {
+        ("GET", "/api/status"): "status",
+        ("GET", "/api/settings"): "settings",
+        ("POST", "/api/settings"): "set_settings",
+        ("GET", "/api/rois"): "rois",
+        ("POST", "/api/rois"): "set_rois",
+        ("DELETE", "/api/rois"): "clear_rois",
+        ("POST", "/api/output"): "set_output",
+        ("POST", "/api/capture"): "capture",
+        ("POST", "/api/burst/start"): "start_burst",
+        ("POST", "/api/burst/stop"): "stop_burst",
+        ("POST", "/api/record/start"): "start_recording",
+        ("POST", "/api/record/stop"): "stop_recording",
+    }
+
+    def __init__(
+        self,
+        controller,
+        host=REMOTE_CONF["host"],
+        port=REMOTE_CONF["port"],
+        token=REMOTE_CONF["token"],
+        max_kbps=REMOTE_CONF["max_kbps"],
+        call_timeout=REMOTE_CONF["call_timeout_s"],
+    ):
+        """Initialize the server; call start() to listen."""
+        super().__init__()
+        self.controller = controller
+        self.host = host
+        self.port = port
+        self.token = token
+        self.max_kbps = max_kbps
+        self.call_timeout = call_timeout
+        self.encoder = PreviewEncoder()
+        self.bytes_sent = 0
+        self.frames_sent = 0
+        self.frames_skipped = 0
+        self._stats_lock = threading.Lock()
+        self._httpd = None
+        self._thread = None
+        self._running = False
+        self._call.connect(self._run_call)
+
+    @property
+    def url(self):
+        return f"http://{self.host}:{self.port}/"
+
+    def start(self):
+        """Start listening (raises OSError if the port is taken)."""
+        if self._running:
+            return
+        self._httpd = _ThreadingHTTPServer((self.host, self.port), _Handler)
+        self._httpd.remote = self
+        # Port 0 picks a free port
+        self.port = self._httpd.server_address[1]
+        self._running = True
+        self.encoder.start()
+        self._thread = threading.Thread(
+            target=self._httpd.serve_forever, daemon=True
+        )
+        self._thread.start()
+        print(f"Remote control listening on {self.url}")
+
+    def stop(self):
+        """Stop the server and disconnect stream clients."""
+        if not self._running:
+            return
+        self._running = False
+        self.encoder.wake_all()
+        self._httpd.shutdown()
+        self._httpd.server_close()
+        self._thread.join()
+        self.encoder.stop()
+
+    def submit(self, packet):
+        """Offer a preview FramePacket to the MJPEG stream."""
+        self.encoder.submit(packet)
+
+    def stream_stats(self):
+        """Return client count and MJPEG throughput counters."""
+        with self._stats_lock:
+            return {
+                "clients": self.encoder.clients,
+                "frames_encoded": self.encoder.frames_encoded,
+                "frames_sent": self.frames_sent,
+                "frames_skipped": self.frames_skipped,
+                "bytes_sent": self.bytes_sent,
+            }
+
+    # --- Controller calls (GUI thread) ---
+    def _run_call(self, call):
+        if not call.begin():
+            return  # The client was already told it timed out
+        try:
+            call.result = call.fn(*call.args)
+        except Exception as e:
+            call.error = e
+        call.done.set()
+
+    def call(self, fn, *args):
+        """Run fn(*args) on the GUI thread and return its result."""
+        call = _Call(fn, args)
+        self._call.emit(call)
+        if not call.done.wait(self.call_timeout):
+            if call.cancel():
+                raise TimeoutError("GUI did not respond")
+            # Already running; report what it actually did
+            call.done.wait()
+        if call.error is not None:
+            raise call.error
+        return call.result
+
+    # --- Request handling (server threads) ---
+    def _authorized(self, handler, query):
+        if not self.token:
+            return True
+        expected = self.token.encode()
+        header = handler.headers.get("Authorization", "")
+        # Constant-time comparisons, so response timing doesn't leak it
+        return hmac.compare_digest(
+            header.encode(), b"Bearer " + expected
+        ) or hmac.compare_digest(
+            (query.get("token", [""])[0]).encode(), expected
+        )
+
+    def handle(self, handler, method):
+        """Serve one request."""
+        url = urlparse(handler.path)
+        path = url.path.rstrip("/") or "/"
+        if not self._authorized(handler, parse_qs(url.query)):
+            self._send_json(handler, 401, {"error": "unauthorized"})
+            return
+        if method == "GET" and path == "/stream.mjpg":
+            self._stream(handler)
+            return
+        if method == "GET" and path == "/snapshot.jpg":
+            self._snapshot(handler)
+            return
+        if method == "GET" and path == "/":
+            self._send(handler, 200, "text/html", INDEX_HTML)
+            return
+
+        name = self.ROUTES.get((method, path))
+        if name is None:
+            self._send_json(handler, 404, {"error": f"no route {path}"})
+            return
+        try:
+            args = []
+            if method == "POST":
+                body = self._read_json(handler)
+                if body is not None:
+                    args.append(body)
+            result = self.call(getattr(self.controller, name), *args)
+        except (ValueError, TypeError, KeyError) as e:
+            self._send_json(handler, 400, {"error": str(e)})
+            return
+        except TimeoutError as e:
+            self._send_json(handler, 503, {"error": str(e)})
+            return
+        if name == "status":
+            result["stream"] = self.stream_stats()
+        self._send_json(handler, 200, result)
+
+    def _read_json(self, handler):
+        length = int(handler.headers.get("Content-Length") or 0)
+        if not length:
+            return None
+        try:
+            return json.loads(handler.rfile.read(length))
+        except json.JSONDecodeError as e:
+            raise ValueError(f"invalid JSON: {e}")
+
+    def _send(self, handler, code, content_type, body):
+        handler.send_response(code)
+        handler.send_header("Content-Type", content_type)
+        handler.send_header("Content-Length", str(len(body)))
+        handler.end_headers()
+        handler.wfile.write(body)
+
+    def _send_json(self, handler, code, data):
+        body = json.dumps(data).encode()
+        self._send(handler, code, "application/json", body)
+
+    def _snapshot(self, handler):
+        self.encoder.add_client()
+        try:
+            frame = self.encoder.wait_frame(0, timeout=self.call_timeout)
+        finally:
+            self.encoder.remove_client()
+        if frame is None:
+            self._send_json(handler, 503, {"error": "no frame"})
+            return
+        self._send(handler, 200, "image/jpeg", frame[1])
+
+    def _stream(self, handler):
+        """
+        Send the newest preview JPEG until the client disconnects.
+
+        Each part waits for a newer frame than the last one sent, and for
+        long enough that the client stays under max_kbps.
+        """
+        handler.send_response(200)
+        handler.send_header(
+            "Content-Type", f"multipart/x-mixed-replace; boundary={BOUNDARY}"
+        )
+        handler.send_header("Cache-Control", "no-cache")
+        handler.end_headers()
+        self.encoder.add_client()
+        seq = 0
+        try:
+            while self._running:
+                frame = self.encoder.wait_frame(seq)
+                if frame is None:
+                    continue
+                if seq:
+                    # Frames encoded while this client was still sending
+                    skipped = frame[0] - seq - 1
+                else:
+                    skipped = 0
+                seq, jpeg = frame
+                start = time.monotonic()
+                handler.wfile.write(
+                    f"--{BOUNDARY}\r\nContent-Type: image/jpeg\r\n"
+                    f"Content-Length: {len(jpeg)}\r\n\r\n".encode()
+                )
+                handler.wfile.write(jpeg)
+                handler.wfile.write(b"\r\n")
+                with self._stats_lock:
+                    self.frames_sent += 1
+                    self.frames_skipped += skipped
+                    self.bytes_sent += len(jpeg)
+                if self.max_kbps:
+                    budget = len(jpeg) * 8 / (self.max_kbps * 1000.0)
+                    delay = start + budget - time.monotonic()
+                    if delay > 0:
+                        time.sleep(delay)
+        except (BrokenPipeError, ConnectionResetError):
+            pass
+        finally:
+            self.encoder.remove_client()
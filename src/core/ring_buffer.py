@@ -0,0 +1,158 @@
+import threading
+import time
+
+import numpy as np
+
+
+def ring_capacity(max_bytes, seconds, post_seconds, fps, frame_bytes):
+    """Slots for seconds + post_seconds of frames, within max_bytes."""
+    wanted = max(1, int(round((seconds + post_seconds) * fps)))
+    return max(0, min(wanted, max_bytes // max(1, frame_bytes)))
+
+
+def ring_window(capacity, seconds, post_seconds, fps):
+    """
+    (pre, post) seconds a ring of `capacity` frames keeps around a trigger.
+
+    When the byte cap leaves room for less than seconds + post_seconds,
+    both windows shrink in proportion.
+    """
+    wanted = seconds + post_seconds
+    if wanted <= 0:
+        return 0.0, 0.0
+    scale = min(1.0, capacity / fps / wanted)
+    return seconds * scale, post_seconds * scale
+
+
+class FrameRingBuffer:
+    """
+    Fixed-memory ring of the most recent frames.
+
+    Storage is a single preallocated array sized on the first frame, so
+    pushing a frame is a copy into an existing slot rather than a new
+    allocation. The number of slots is the smaller of `seconds` plus
+    `post_seconds` worth of frames at `fps` and what fits in `max_bytes`.
+    While a trigger holds the ring (see hold()), frames from the pre-
+    trigger window are never overwritten; new frames are skipped instead.
+    """
+
+    def __init__(self, max_bytes, seconds, fps, post_seconds=0.0):
+        """Initialize an empty ring; memory is allocated on first push."""
+        self.max_bytes = max_bytes
+        self.seconds = seconds
+        self.post_seconds = post_seconds
+        self.fps = fps
+        self.capacity = 0
+        self._hold = None
+        self._frames = None
+        self._timestamps = None
+        self._next = 0
+        self._count = 0
+        self._frozen = False
+        self.frames_skipped = 0
+        self._lock = threading.Lock()
+
+    @property
+    def nbytes(self):
+        """Bytes currently allocated for frame storage."""
+        return self._frames.nbytes if self._frames is not None else 0
+
+    def __len__(self):
+        return self._count
+
+    def window(self):
+        """(pre, post) seconds kept around a trigger with this capacity."""
+        return ring_window(
+            self.capacity, self.seconds, self.post_seconds, self.fps
+        )
+
+    def _allocate(self, frame):
+        self.capacity = ring_capacity(
+            self.max_bytes, self.seconds, self.post_seconds, self.fps,
+            frame.nbytes,
+        )
+        pre, post = self.window()
+        if pre < self.seconds:
+            print(
+                f"Pre-trigger buffer: {self.max_bytes / 2**20:.0f} MiB holds "
+                f"{self.capacity} frames of {frame.shape}; keeping "
+                f"{pre:.2f} s before and {post:.2f} s after a trigger"
+            )
+        self._frames = np.empty((self.capacity,) + frame.shape, frame.dtype)
+        self._timestamps = np.zeros(self.capacity, dtype=np.float64)
+        self._next = 0
+        self._count = 0
+
+    def push(self, frame, timestamp=None):
+        """Copy a frame into the ring, overwriting the oldest one."""
+        if timestamp is None:
+            timestamp = time.monotonic()
+        with self._lock:
+            if self._frozen:
+                self.frames_skipped += 1
+                return
+            if (
+                self._frames is None
+                or self._frames.shape[1:] != frame.shape
+                or self._frames.dtype != frame.dtype
+            ):
+                # Only happens on the first frame or a resolution change
+                self._allocate(frame)
+            if self.capacity == 0:
+                return
+            if (
+                self._hold is not None
+                and self._count == self.capacity
+                and self._timestamps[self._next] >= self._hold
+            ):
+                # The oldest frame is still needed by a trigger
+                self.frames_skipped += 1
+                return
+            np.copyto(self._frames[self._next], frame)
+            self._timestamps[self._next] = timestamp
+            self._next = (self._next + 1) % self.capacity
+            self._count = min(self._count + 1, self.capacity)
+
+    def hold(self, since):
+        """Keep every frame from `since` (monotonic) until release()."""
+        with self._lock:
+            self._hold = since
+
+    def release(self):
+        """Let the ring overwrite held frames again."""
+        with self._lock:
+            self._hold = None
+
+    def freeze(self):
+        """Stop accepting frames so the contents can be read safely."""
+        with self._lock:
+            self._frozen = True
+
+    def unfreeze(self):
+        """Resume accepting frames."""
+        with self._lock:
+            self._frozen = False
+
+    def frames_between(self, start, end):
+        """
+        Yield (frame, timestamp) for buffered frames in [start, end].
+
+        Frames are yielded oldest first as views into the ring, so the
+        buffer must be frozen while they are in use.
+        """
+        first = (self._next - self._count) % max(1, self.capacity)
+        for i in range(self._count):
+            slot = (first + i) % self.capacity
+            ts = self._timestamps[slot]
+            if start <= ts <= end:
+                yield self._frames[slot], float(ts)
+
+    def clear(self):
+        """Drop the buffered frames and release their memory."""
+        with self._lock:
+            self._frames = None
+            self._timestamps = None
+            self.capacity = 0
+            self._hold = None
+            self._next = 0
+            self._count = 0
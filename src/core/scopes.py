@@ -0,0 +1,153 @@
+import time
+
+import cv2
+import numpy as np
+from PyQt5.QtCore import pyqtSignal
+
+from src.config import SCOPES_CONF
+from src.core.auto_capture import FrameAnalyzer
+from src.core.frame_worker import FrameWorker
+from src.core.imaging import sensor_rect_on_frame
+from src.core.metrics import METRICS
+
+class ScopeAnalyzer:
+    """
+    Histogram, clipping and focus scopes of a subsampled frame.
+
+    The frame is shrunk with nearest-neighbour sampling to `width` pixels
+    across, reusing the same buffers every call. analyze() returns the
+    per-channel histogram, the clipped fractions, and optionally an RGBA
+    overlay (thumbnail-sized) marking clipped highlights in red, clipped
+    shadows in blue and strong edges (focus peaking) in green.
+    Sharpness is measured inside the ROI at its own thumbnail resolution.
+    """
+
+    def __init__(
+        self,
+        width=SCOPES_CONF["analysis_width"],
+        bins=SCOPES_CONF["bins"],
+        clip_dark=SCOPES_CONF["clip_dark"],
+        clip_bright=SCOPES_CONF["clip_bright"],
+        peaking_threshold=SCOPES_CONF["peaking_threshold"],
+    ):
+        """Initialize the analyzer for thumbnails `width` pixels wide."""
+        self.width = width
+        self.bins = bins
+        self.clip_dark = clip_dark
+        self.clip_bright = clip_bright
+        self.peaking_threshold = peaking_threshold
+        self.roi_analyzer = FrameAnalyzer(width, clip_dark, clip_bright)
+        self._small = None
+        self._gray = None
+        self._lap = None
+        self._masks = None
+
+    def analyze(self, frame, rect=None, clipping=False, peaking=False):
+        """Return the scopes of one frame as a dict."""
+        h, w = frame.shape[:2]
+        tw = max(1, min(self.width, w))
+        th = max(1, int(round(h * tw / w)))
+        if self._small is None or self._small.shape[:2] != (th, tw):
+            self._small = self._gray = self._lap = self._masks = None
+        small = cv2.resize(
+            frame, (tw, th), dst=self._small, interpolation=cv2.INTER_NEAREST
+        )
+        self._small = small
+
+        hist = np.stack([
+            cv2.calcHist([small], [c], None, [self.bins], [0, 256]).ravel()
+            for c in range(3)
+        ])
+        # Highlights are clipped if any channel is at the limit, shadows
+        # if every channel is
+        below = cv2.inRange(small, (0, 0, 0), (self.clip_bright - 1,) * 3)
+        dark = cv2.inRange(small, (0, 0, 0), (self.clip_dark,) * 3)
+        pixels = th * tw
+        scopes = {
+            "hist": hist / pixels,
+            "highlights": 1.0 - cv2.countNonZero(below) / pixels,
+            "shadows": cv2.countNonZero(dark) / pixels,
+        }
+
+        # Sharpness of the ROI (or the whole frame) at full thumbnail size
+        metrics, _ = self.roi_analyzer.analyze(frame, rect)
+        scopes["focus"] = metrics["focus"]
+        scopes["roi_clipped"] = metrics["clipped"]
+
+        if clipping or peaking:
+            if self._masks is None:
+                self._masks = np.zeros((4, th, tw), np.uint8)
+            red, green, blue, alpha = self._masks
+            red.fill(0)
+            green.fill(0)
+            blue.fill(0)
+            if peaking:
+                self._gray = cv2.cvtColor(
+                    small, cv2.COLOR_BGR2GRAY, dst=self._gray
+                )
+                self._lap = cv2.Laplacian(
+                    self._gray, cv2.CV_8U, dst=self._lap
+                )
+                cv2.compare(
+                    self._lap, self.peaking_threshold, cv2.CMP_GE, dst=green
+                )
+            if clipping:
+                cv2.bitwise_not(below, dst=red)
+                blue[...] = dark
+            cv2.bitwise_or(red, green, dst=alpha)
+            cv2.bitwise_or(alpha, blue, dst=alpha)
+            # A new array: the masks are reused for the next frame
+            scopes["overlay"] = cv2.merge((red, green, blue, alpha))
+        return scopes
+
+
+class ScopeWorker(FrameWorker):
+    """
+    Live scopes computed off the GUI thread at a limited rate.
+
+    submit() forwards at most `rate_hz` frames per second to the worker
+    (see FrameWorker), so the scopes cost a bounded share of the CPU
+    whatever the preview rate. Each result is emitted through `updated`
+    with the time it took in "cost_ms".
+    """
+
+    updated = pyqtSignal(dict)
+
+    def __init__(self, rate_hz=SCOPES_CONF["rate_hz"]):
+        """Initialize the scopes; call start() to begin."""
+        super().__init__()
+        self.analyzer = ScopeAnalyzer()
+        self.rate_hz = rate_hz
+        self.region = None
+        self.clipping = False
+        self.peaking = False
+        self._next_submit = 0.0
+
+    def set_region(self, rect):
+        """Measure sharpness in a sensor-space rect, or None for all."""
+        self.region = rect
+
+    def submit(self, packet):
+        """Offer a preview FramePacket; frames over the rate are ignored."""
+        if not self.is_running:
+            return
+        now = time.monotonic()
+        if now < self._next_submit:
+            return
+        self._next_submit = now + 1.0 / max(self.rate_hz, 0.1)
+        super().submit(packet)
+
+    def process(self, frame):
+        start = time.perf_counter()
+        scopes = self.analyzer.analyze(
+            frame,
+            sensor_rect_on_frame(self.region, frame.shape),
+            self.clipping,
+            self.peaking,
+        )
+        cost = time.perf_counter() - start
+        if METRICS.enabled:
+            METRICS.observe("scopes.update", cost)
+        scopes["cost_ms"] = cost * 1000
+        scopes["skipped"] = self.skipped
+        self.updated.emit(scopes)
@@ -0,0 +1,53 @@
+from PyQt5.QtCore import QObject, QTimer, pyqtSignal
+
+from src.config import SETTINGS_CONF
+
+
+class SettingsTransaction(QObject):
+    """
+    Debounce and merge camera setting changes into one apply.
+
+    Every control change calls request() with the full settings dict; only
+    the latest one is applied once the controls have been idle for
+    `debounce_ms`. VideoThread.apply_settings() then skips unchanged
+    settings and hot-applies the ones that don't need a pipeline rebuild.
+    """
+
+    applied = pyqtSignal(str)
+
+    def __init__(self, thread, debounce_ms=SETTINGS_CONF["debounce_ms"]):
+        """Initialize the transaction layer for a VideoThread."""
+        super().__init__()
+        self.thread = thread
+        self._pending = None
+        self.requests = 0
+        self.coalesced = 0
+        self._timer = QTimer(self)
+        self._timer.setSingleShot(True)
+        self._timer.setInterval(debounce_ms)
+        self._timer.timeout.connect(self.flush)
+
+    def request(self, settings):
+        """Queue a settings change, replacing any not yet applied."""
+        self.requests += 1
+        if self._pending is not None:
+            self.coalesced += 1
+        self._pending = settings
+        self._timer.start()
+
+    def flush(self):
+        """Apply the pending settings now."""
+        self._timer.stop()
+        if self._pending is None:
+            return
+        settings, self._pending = self._pending, None
+        self.applied.emit(self.thread.apply_settings(settings))
+
+    def get_stats(self):
+        """Return restart counters and the last restart latency."""
+        return {
+            "requests": self.requests,
+            "restarts": self.thread.restarts,
+            "restarts_avoided": self.thread.restarts_avoided + self.coalesced,
+            "last_restart_latency": self.thread.last_restart_latency,
+        }
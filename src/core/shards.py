@@ -0,0 +1,263 @@
+import ast
+import json
+import os
+import re
+import threading
+
+import numpy as np
+
+from src.config import SHARD_CONF
+from src.core.imaging import crop_frame
+
+# Save-format name used for shards in the format selectors
+NPY_FORMAT = "npy"
+
+# Fixed .npy header size: the shape is rewritten in place as samples are
+# appended, so the header must never need to grow
+HEADER_SIZE = 128
+MAGIC = b"\x93NUMPY\x01\x00"
+
+SHARD_RE = re.compile(r"^(.*)shard_(\d{4,})_(\d+)x(\d+)\.npy$")
+
+
+def _npy_header(shape, dtype):
+    header = repr(
+        {
+            "descr": np.lib.format.dtype_to_descr(np.dtype(dtype)),
+            "fortran_order": False,
+            "shape": tuple(shape),
+        }
+    )
+    pad = HEADER_SIZE - len(MAGIC) - 2 - len(header) - 1
+    header = header + " " * pad + "\n"
+    return MAGIC + len(header).to_bytes(2, "little") + header.encode("latin1")
+
+
+class NpyShard:
+    """
+    One growable .npy file of same-shaped samples plus its index.
+
+    The file is preallocated for `capacity` samples and memory-mapped;
+    append() copies a sample straight into the map, writes its index
+    line, then bumps the sample count in the .npy header. A reader
+    calling np.load(path, mmap_mode="r") at any time therefore sees only
+    complete samples, without copying. When full, the file is grown by
+    doubling up to `max_samples` samples or `max_bytes`, whichever is
+    smaller.
+    """
+
+    def __init__(self, path, sample_shape, dtype=np.uint8,
+                 capacity=SHARD_CONF["initial_capacity"],
+                 max_samples=SHARD_CONF["max_samples"],
+                 max_bytes=SHARD_CONF["max_bytes"]):
+        self.path = path
+        self.index_path = path[: -len(".npy")] + ".index.jsonl"
+        self.sample_shape = tuple(sample_shape)
+        self.dtype = np.dtype(dtype)
+        self.sample_bytes = (
+            int(np.prod(self.sample_shape)) * self.dtype.itemsize
+        )
+        self.max_samples = max(
+            1, min(max_samples, max_bytes // self.sample_bytes)
+        )
+        self.count = 0
+        self.capacity = 0
+        self._map = None
+        self._last_settings = None
+        self._fd = os.open(path, os.O_RDWR | os.O_CREAT | os.O_TRUNC, 0o644)
+        self._index = open(self.index_path, "w")
+        self._write_header()
+        self._grow(max(1, min(capacity, self.max_samples)))
+
+    @property
+    def full(self):
+        return self.count >= self.max_samples
+
+    def _write_header(self):
+        os.pwrite(
+            self._fd,
+            _npy_header((self.count,) + self.sample_shape, self.dtype),
+            0,
+        )
+
+    def _grow(self, capacity):
+        os.ftruncate(self._fd, HEADER_SIZE + capacity * self.sample_bytes)
+        if self._map is not None:
+            self._map.flush()
+            del self._map
+        self._map = np.memmap(
+            self.path, self.dtype, "r+", offset=HEADER_SIZE,
+            shape=(capacity,) + self.sample_shape,
+        )
+        self.capacity = capacity
+
+    def append(self, sample, metadata=None):
+        """Copy a sample into the shard and return its index."""
+        if self.count >= self.capacity:
+            self._grow(min(self.capacity * 2, self.max_samples))
+        i = self.count
+        np.copyto(self._map[i], sample)
+
+        entry = {"i": i}
+        if metadata:
+            entry.update(metadata)
+            # Settings rarely change between samples; store them only
+            # when they do
+            settings = entry.pop("settings", None)
+            if settings is not None and settings != self._last_settings:
+                entry["settings"] = settings
+                self._last_settings = settings
+        self._index.write(json.dumps(entry, separators=(",", ":")) + "\n")
+        self._index.flush()
+
+        self.count += 1
+        self._write_header()
+        return i
+
+    def flush(self):
+        """Push the mapped pages and index to disk."""
+        self._map.flush()
+        self._index.flush()
+        os.fsync(self._fd)
+
+    def close(self):
+        """Trim the preallocated tail and close the files."""
+        if self._fd is None:
+            return
+        self._map.flush()
+        del self._map
+        self._map = None
+        os.ftruncate(self._fd, HEADER_SIZE + self.count * self.sample_bytes)
+        os.close(self._fd)
+        self._fd = None
+        self._index.close()
+
+
+class ShardSink:
+    """
+    Appends fixed-size crops into NpyShards in a save directory.
+
+    Files are named {prefix}shard_NNNN_{H}x{W}.npy with a matching
+    .index.jsonl of per-sample metadata. One shard is kept open per crop
+    size, so captures with several differently sized regions fill their
+    own shards side by side; a new shard starts when one is full.
+    append() is thread-safe, so the GUI, bursts and event captures can
+    share a sink.
+    """
+
+    # Takes raw frames (see TarShardSink for encoded samples)
+    encoded = False
+
+    def __init__(self, directory, prefix=""):
+        """Initialize a sink; no file is created until the first sample."""
+        self.directory = directory
+        self.prefix = prefix
+        self._lock = threading.Lock()
+        # Open shards keyed by (sample shape, dtype); _shard is the most
+        # recently appended to
+        self._shards = {}
+        self._shard = None
+        self._next_number = self._scan_next_number()
+        self.samples = 0
+
+    def _scan_next_number(self):
+        numbers = [-1]
+        for name in os.listdir(self.directory):
+            m = SHARD_RE.match(name)
+            if m and m.group(1) == self.prefix:
+                numbers.append(int(m.group(2)))
+        return max(numbers) + 1
+
+    @property
+    def current_name(self):
+        """File name of the shard being filled, or None."""
+        shard = self._shard
+        return os.path.basename(shard.path) if shard else None
+
+    def append(self, frame, rect=None, metadata=None):
+        """Crop frame to rect and append it; returns (shard_path, index)."""
+        sample = crop_frame(frame, rect)
+        key = (sample.shape, sample.dtype)
+        with self._lock:
+            shard = self._shards.get(key)
+            if shard is None or shard.full:
+                if shard is not None:
+                    shard.close()
+                h, w = sample.shape[:2]
+                name = (
+                    f"{self.prefix}shard_{self._next_number:04d}_{h}x{w}.npy"
+                )
+                self._next_number += 1
+                shard = self._shards[key] = NpyShard(
+                    os.path.join(self.directory, name),
+                    sample.shape, sample.dtype,
+                )
+            self._shard = shard
+            index = shard.append(sample, metadata)
+            self.samples += 1
+            return shard.path, index
+
+    def describe_next(self):
+        """Where the next sample will go, e.g. "shard_0002_448x448.npy[17]"."""
+        shard = self._shard
+        if shard is None or shard.full:
+            return f"{self.prefix}shard_{self._next_number:04d} (new)"
+        return f"{os.path.basename(shard.path)}[{shard.count}]"
+
+    def flush(self):
+        with self._lock:
+            for shard in self._shards.values():
+                shard.flush()
+
+    def close(self):
+        """Finish the open shards."""
+        with self._lock:
+            for shard in self._shards.values():
+                shard.close()
+            self._shards = {}
+            self._shard = None
+
+
+def read_header_shape(path):
+    """The sample count and shape currently recorded in a shard header."""
+    with open(path, "rb") as f:
+        f.read(len(MAGIC))
+        header_len = int.from_bytes(f.read(2), "little")
+        header = ast.literal_eval(f.read(header_len).decode("latin1"))
+    return header["shape"]
+
+
+def open_shard(path):
+    """
+    Open a shard for reading without copying.
+
+    Returns (samples, index): a read-only memmap of the complete samples
+    and their metadata dicts (with settings filled in for every entry).
+    Safe to call while the shard is still being written.
+    """
+    shape = read_header_shape(path)
+    if shape[0] == 0:
+        return np.empty(shape, np.uint8), []
+    samples = np.load(path, mmap_mode="r")
+    index = []
+    settings = None
+    index_path = path[: -len(".npy")] + ".index.jsonl"
+    with open(index_path) as f:
+        for line in f:
+            if len(index) >= len(samples):
+                break  # Index line written, header not yet updated
+            entry = json.loads(line)
+            settings = entry.get("settings", settings)
+            entry["settings"] = settings
+            index.append(entry)
+    return samples, index
+
+
+def list_shards(directory, prefix=None):
+    """Shard paths in a directory, in creation order."""
+    shards = []
+    for name in os.listdir(directory):
+        m = SHARD_RE.match(name)
+        if m and (prefix is None or m.group(1) == prefix):
+            shards.append((m.group(1), int(m.group(2)), name))
+    return [os.path.join(directory, name) for _, _, name in sorted(shards)]
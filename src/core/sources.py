@@ -0,0 +1,447 @@
+import os
+import re
+import subprocess
+import time
+
+import cv2
+import numpy as np
+
+from src.config import (
+    CAM_CONF,
+    DEFAULT_HEIGHT,
+    DEFAULT_WIDTH,
+    SOURCE_CONF,
+)
+
+IMAGE_EXTENSIONS = (".jpg", ".jpeg", ".png", ".tiff", ".tif", ".bmp")
+
+# Rendered synthetic frames, shared across restarts of the same source
+_SYNTHETIC_CACHE = {}
+
+
+class FrameSource:
+    """
+    Interface for everything VideoThread can capture from.
+
+    open() returns True on success, read(out=None) returns (ret, frame)
+    and may fill `out` in place, and release() closes the source. Sources
+    with `dual = True` instead provide read_preview() and read_full().
+    `applies_isp` is True when the source honours the ISP flip and
+    saturation settings itself (the Argus pipeline). `crops` is True when
+    the source can crop to VideoThread.capture_roi itself, and
+    `crop_rect` is the sensor region its full-resolution frames cover
+    (None for the whole frame).
+    """
+
+    name = "source"
+    dual = False
+    applies_isp = False
+    crops = False
+    crop_rect = None
+
+    def open(self):
+        return True
+
+    def capabilities(self):
+        """Describe the opened source (resolution, fps, format...)."""
+        return {}
+
+    def isOpened(self):
+        return True
+
+    def read(self, out=None):
+        raise NotImplementedError
+
+    def release(self):
+        pass
+
+
+class _PacedSource(FrameSource):
+    """Helper for sources that must emit frames on their own clock."""
+
+    def __init__(self, fps):
+        self.fps = fps
+        self._next_time = None
+
+    def _pace(self, interval=None):
+        """Sleep until the next frame is due."""
+        if interval is None:
+            interval = 1.0 / self.fps if self.fps > 0 else 0.0
+        now = time.monotonic()
+        if self._next_time is None:
+            self._next_time = now
+        delay = self._next_time - now
+        if delay > 0:
+            time.sleep(delay)
+        else:
+            # Running late; don't try to catch up with a burst of frames
+            self._next_time = now
+        self._next_time += interval
+
+
+class OpenCVSource(FrameSource):
+    """A cv2.VideoCapture (GStreamer pipeline or V4L2 device)."""
+
+    def __init__(self, target, api=cv2.CAP_ANY, name="opencv",
+                 applies_isp=False):
+        self.target = target
+        self.api = api
+        self.name = name
+        self.applies_isp = applies_isp
+        self.cap = None
+
+    def open(self):
+        self.cap = cv2.VideoCapture(self.target, self.api)
+        return self.cap.isOpened()
+
+    def isOpened(self):
+        return self.cap is not None and self.cap.isOpened()
+
+    def read(self, out=None):
+        return self.cap.read(out)
+
+    def capabilities(self):
+        fourcc = int(self.cap.get(cv2.CAP_PROP_FOURCC))
+        caps = {
+            "backend": self.cap.getBackendName(),
+            "width": int(self.cap.get(cv2.CAP_PROP_FRAME_WIDTH)),
+            "height": int(self.cap.get(cv2.CAP_PROP_FRAME_HEIGHT)),
+            "fps": self.cap.get(cv2.CAP_PROP_FPS),
+            "format": "".join(
+                chr((fourcc >> 8 * i) & 0xFF) for i in range(4)
+            ).strip("\x00") or None,
+        }
+        if isinstance(self.target, int):
+            modes = list_v4l2_modes(f"/dev/video{self.target}")
+            if modes:
+                caps["modes"] = modes
+        return caps
+
+    def release(self):
+        if self.cap is not None:
+            self.cap.release()
+
+
+def list_v4l2_modes(device):
+    """
+    Formats, resolutions and frame rates a V4L2 device supports.
+
+    Uses v4l2-ctl when it is installed; returns [] otherwise.
+    """
+    try:
+        out = subprocess.run(
+            ["v4l2-ctl", "-d", device, "--list-formats-ext"],
+            capture_output=True, text=True, timeout=5,
+        ).stdout
+    except (OSError, subprocess.SubprocessError):
+        return []
+    modes = []
+    fmt = size = None
+    for line in out.splitlines():
+        line = line.strip()
+        m = re.match(r"\[\d+\]: '(\w+)'", line)
+        if m:
+            fmt = m.group(1)
+            continue
+        m = re.match(r"Size: \w+ (\d+)x(\d+)", line)
+        if m:
+            size = [int(m.group(1)), int(m.group(2))]
+            modes.append({"format": fmt, "size": size, "fps": []})
+            continue
+        m = re.search(r"\(([\d.]+) fps\)", line)
+        if m and modes:
+            modes[-1]["fps"].append(float(m.group(1)))
+    return modes
+
+
+def argus_source(pipeline):
+    """The single-stream nvarguscamerasrc pipeline."""
+    return OpenCVSource(
+        pipeline, cv2.CAP_GSTREAMER, name="argus", applies_isp=True
+    )
+
+
+def webcam_source(device=0):
+    """A V4L2 / default OpenCV camera."""
+    return OpenCVSource(device, name="webcam")
+
+
+class SyntheticSource(_PacedSource):
+    """
+    Deterministic generated frames at a fixed resolution and frame rate.
+
+    A handful of frames are rendered once at open(); read() only copies
+    one of them into the output buffer, so generating a frame costs a
+    memcpy rather than a random number generator call.
+    """
+
+    name = "synthetic"
+
+    def __init__(
+        self,
+        width=DEFAULT_WIDTH,
+        height=DEFAULT_HEIGHT,
+        fps=30.0,
+        pattern="noise",
+        frames=8,
+        label="NO CAMERA - DUMMY MODE",
+    ):
+        super().__init__(fps)
+        self.width = width
+        self.height = height
+        self.pattern = pattern
+        self.num_frames = max(1, frames)
+        self.label = label
+        self._frames = None
+        self._index = 0
+
+    def _render(self, i):
+        h, w = self.height, self.width
+        if self.pattern == "noise":
+            # Seeded so every run sees the same frames
+            rng = np.random.RandomState(i)
+            frame = rng.randint(0, 256, (h, w, 3), dtype=np.uint8)
+        elif self.pattern == "gradient":
+            x = np.linspace(0, 255, w, dtype=np.float32)
+            y = np.linspace(0, 255, h, dtype=np.float32)[:, None]
+            shift = 255.0 * i / self.num_frames
+            frame = np.empty((h, w, 3), np.uint8)
+            frame[..., 0] = (x + shift) % 256
+            frame[..., 1] = y
+            frame[..., 2] = (x[::-1] + y) / 2
+        else:  # "bars": SMPTE-like colour bars with a moving marker
+            colors = np.array(
+                [[255, 255, 255], [0, 255, 255], [255, 255, 0],
+                 [0, 255, 0], [255, 0, 255], [0, 0, 255], [255, 0, 0]],
+                dtype=np.uint8,
+            )
+            cols = (np.arange(w) * len(colors) // w)
+            frame = np.ascontiguousarray(
+                np.broadcast_to(colors[cols], (h, w, 3))
+            )
+            x = int(w * i / self.num_frames)
+            frame[:, x : x + max(2, w // 100)] = 0
+
+        if self.label:
+            scale = max(1.0, w / 960.0)
+            cv2.putText(
+                frame,
+                self.label,
+                (int(50 * scale), h // 2),
+                cv2.FONT_HERSHEY_SIMPLEX,
+                scale,
+                (255, 255, 255),
+                max(2, int(2 * scale)),
+            )
+        return frame
+
+    def open(self):
+        key = (
+            self.width, self.height, self.pattern, self.num_frames, self.label
+        )
+        if key not in _SYNTHETIC_CACHE:
+            _SYNTHETIC_CACHE.clear()
+            _SYNTHETIC_CACHE[key] = [
+                self._render(i) for i in range(self.num_frames)
+            ]
+        self._frames = _SYNTHETIC_CACHE[key]
+        self._index = 0
+        self._next_time = None
+        return True
+
+    def capabilities(self):
+        return {
+            "width": self.width,
+            "height": self.height,
+            "fps": self.fps,
+            "format": "BGR",
+            "pattern": self.pattern,
+        }
+
+    def read(self, out=None):
+        self._pace()
+        frame = self._frames[self._index]
+        self._index = (self._index + 1) % len(self._frames)
+        if out is None or out.shape != frame.shape:
+            out = np.empty_like(frame)
+        np.copyto(out, frame)
+        return True, out
+
+
+class ReplaySource(_PacedSource):
+    """
+    Play back a recorded video file or a folder of images.
+
+    Videos play at their own frame rate. Image folders are played in name
+    order, spaced by the files' modification times (so a burst replays as
+    a burst), with gaps capped at `max_gap` seconds. If neither gives a
+    usable interval, `fps` is used.
+    """
+
+    name = "replay"
+
+    def __init__(self, path, loop=True, fps=30.0, max_gap=1.0):
+        super().__init__(fps)
+        self.path = path
+        self.loop = loop
+        self.max_gap = max_gap
+        self._files = None
+        self._intervals = None
+        self._cap = None
+        self._index = 0
+
+    def open(self):
+        self._next_time = None
+        self._index = 0
+        if os.path.isdir(self.path):
+            entries = sorted(
+                (
+                    entry for entry in os.scandir(self.path)
+                    if entry.is_file()
+                    and entry.name.lower().endswith(IMAGE_EXTENSIONS)
+                    and not entry.name.startswith(".")
+                ),
+                key=lambda entry: entry.name,
+            )
+            if not entries:
+                return False
+            self._files = [entry.path for entry in entries]
+            mtimes = [entry.stat().st_mtime for entry in entries]
+            self._intervals = [
+                min(max(b - a, 0.0), self.max_gap) or 1.0 / self.fps
+                for a, b in zip(mtimes, mtimes[1:])
+            ] + [1.0 / self.fps]
+            return True
+
+        self._cap = cv2.VideoCapture(self.path)
+        if not self._cap.isOpened():
+            return False
+        video_fps = self._cap.get(cv2.CAP_PROP_FPS)
+        if video_fps and video_fps > 0:
+            self.fps = video_fps
+        return True
+
+    def capabilities(self):
+        if self._files is not None:
+            return {"path": self.path, "frames": len(self._files)}
+        return {
+            "path": self.path,
+            "width": int(self._cap.get(cv2.CAP_PROP_FRAME_WIDTH)),
+            "height": int(self._cap.get(cv2.CAP_PROP_FRAME_HEIGHT)),
+            "fps": self.fps,
+            "frames": int(self._cap.get(cv2.CAP_PROP_FRAME_COUNT)),
+        }
+
+    def isOpened(self):
+        return self._files is not None or (
+            self._cap is not None and self._cap.isOpened()
+        )
+
+    def read(self, out=None):
+        if self._files is not None:
+            if self._index >= len(self._files):
+                if not self.loop:
+                    return False, None
+                self._index = 0
+            self._pace(self._intervals[self._index])
+            frame = cv2.imread(self._files[self._index])
+            self._index += 1
+            if frame is None:
+                return False, None
+            if out is not None and out.shape == frame.shape:
+                np.copyto(out, frame)
+                return True, out
+            return True, frame
+
+        self._pace()
+        ret, frame = self._cap.read(out)
+        if not ret and self.loop:
+            self._cap.set(cv2.CAP_PROP_POS_FRAMES, 0)
+            ret, frame = self._cap.read(out)
+        return ret, frame
+
+    def release(self):
+        if self._cap is not None:
+            self._cap.release()
+
+
+def synthetic_source(options=None):
+    """A SyntheticSource configured from SOURCE_CONF["synthetic"]."""
+    options = dict(SOURCE_CONF["synthetic"], **(options or {}))
+    return SyntheticSource(
+        options.get("width") or DEFAULT_WIDTH,
+        options.get("height") or DEFAULT_HEIGHT,
+        30.0 if options.get("fps") is None else options["fps"],
+        options.get("pattern", "noise"),
+        label=options.get("label", "NO CAMERA - DUMMY MODE"),
+    )
+
+
+def replay_source(options=None):
+    """A ReplaySource configured from SOURCE_CONF["replay"]."""
+    options = dict(SOURCE_CONF["replay"], **(options or {}))
+    return ReplaySource(
+        options.get("path", ""),
+        options.get("loop", True),
+        options.get("fps") or 30.0,
+    )
+
+
+def source_candidates(thread, source_type=None, options=None):
+    """
+    Yield (name, factory) for the sources to try for a VideoThread, in order.
+
+    options override the config for the synthetic and replay sources,
+    and "device" the webcam to open.
+
+    "auto" keeps the original chain: the Argus pipeline (dual-stream if
+    configured, then single), the default webcam, then synthetic frames.
+    With a capture ROI set, the dual-stream pipeline crops to it in
+    hardware; every other source leaves the cropping to Python.
+    """
+    source_type = source_type or SOURCE_CONF["type"]
+    if source_type in ("auto", "argus"):
+        roi = thread.pipeline_roi()
+        if CAM_CONF["pipeline_mode"] == "dual" or roi is not None:
+            # Imported here so the PyGObject probe only runs when needed
+            from src.core.gst_dual import DualStreamCapture
+
+            if DualStreamCapture.available():
+                if roi is not None:
+                    yield "argus-dual", lambda: DualStreamCapture(
+                        thread.build_roi_pipeline(), roi
+                    )
+                else:
+                    yield "argus-dual", lambda: DualStreamCapture(
+                        thread.build_dual_pipeline()
+                    )
+        yield "argus", lambda: argus_source(thread.build_pipeline())
+    if source_type in ("auto", "webcam"):
+        device = (options or {}).get("device", SOURCE_CONF["device"])
+        yield "webcam", lambda: webcam_source(device)
+    if source_type == "replay":
+        yield "replay", lambda: replay_source(options)
+    if source_type in ("auto", "synthetic"):
+        yield "synthetic", lambda: synthetic_source(options)
+
+
+def open_source(thread, source_type=None, options=None, preferred=None):
+    """
+    Open the first source that works, or return None.
+
+    If `preferred` names a candidate (a backend known to work), it is
+    tried before the rest of the chain.
+    """
+    candidates = list(source_candidates(thread, source_type, options))
+    candidates.sort(key=lambda candidate: candidate[0] != preferred)
+    for _, factory in candidates:
+        try:
+            source = factory()
+            if source.open():
+                return source
+            source.release()
+        except Exception as e:
+            print(f"Frame source failed: {e}")
+            continue
+        print(f"{source.name} source failed to open. Trying next source...")
+    return None
@@ -0,0 +1,159 @@
+import hashlib
+import io
+import json
+import os
+import tarfile
+import threading
+import time
+
+from src.config import TAR_CONF
+from src.core.writer import fsync_directory, write_atomic
+
+
+class _HashingFile:
+    """File wrapper that hashes and counts everything written through it."""
+
+    def __init__(self, f):
+        self.f = f
+        self.sha256 = hashlib.sha256()
+        self.size = 0
+
+    def write(self, data):
+        self.sha256.update(data)
+        self.size += len(data)
+        return self.f.write(data)
+
+    def tell(self):
+        return self.size
+
+
+class TarShardSink:
+    """
+    Streams encoded captures into rolling WebDataset-style tar shards.
+
+    Each sample is stored as "<key>.<fmt>" plus "<key>.json" holding its
+    metadata, where key follows the usual "<prefix><index>" naming. A
+    shard is written as a hidden temp file and renamed to
+    {prefix}shard-NNNNNN.tar once it reaches `max_samples` samples or
+    `max_bytes`, or when the sink is closed, so readers never see a
+    partial shard. Every finalized shard is recorded in
+    {prefix}shards.json with its sample count, size, key range and
+    SHA-256. write_sample() is thread-safe.
+    """
+
+    # Samples arrive encoded by a CaptureWriter (see ShardSink for raw)
+    encoded = True
+
+    def __init__(
+        self,
+        directory,
+        prefix="",
+        max_samples=TAR_CONF["max_samples"],
+        max_bytes=TAR_CONF["max_bytes"],
+    ):
+        """Open the sink, continuing numbering from an existing manifest."""
+        self.directory = directory
+        self.prefix = prefix
+        self.max_samples = max_samples
+        self.max_bytes = max_bytes
+        self.manifest_path = os.path.join(directory, f"{prefix}shards.json")
+        self._lock = threading.Lock()
+        self._tar = None
+        self._file = None
+        self._manifest = self._load_manifest()
+        self._next_index = self._manifest["next_index"]
+        self._next_shard = len(self._manifest["shards"])
+        self.samples = 0
+
+    def _load_manifest(self):
+        try:
+            with open(self.manifest_path) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {"prefix": self.prefix, "next_index": 1, "shards": []}
+
+    def reserve_key(self):
+        """Return the next sample key, e.g. "data_0042"."""
+        with self._lock:
+            idx = self._next_index
+            self._next_index += 1
+        return f"{self.prefix}{idx:04d}"
+
+    def describe_next(self):
+        """Where the next sample will go, for the UI."""
+        return (
+            f"{self.prefix}{self._next_index:04d} in "
+            f"{self._shard_name(self._next_shard)}"
+        )
+
+    def _shard_name(self, number):
+        return f"{self.prefix}shard-{number:06d}.tar"
+
+    def _open_shard(self):
+        name = self._shard_name(self._next_shard)
+        tmp_path = os.path.join(self.directory, f".{name}.tmp")
+        self._file = _HashingFile(open(tmp_path, "wb"))
+        self._tar = tarfile.open(fileobj=self._file, mode="w|")
+        self._shard = {
+            "name": name,
+            "tmp_path": tmp_path,
+            "samples": 0,
+            "first_key": None,
+            "last_key": None,
+            "created": time.time(),
+        }
+
+    def _add(self, name, data, mtime):
+        info = tarfile.TarInfo(name)
+        info.size = len(data)
+        info.mtime = int(mtime)
+        self._tar.addfile(info, io.BytesIO(data))
+
+    def write_sample(self, key, fmt, data, metadata=None):
+        """Append one encoded sample and its metadata JSON."""
+        metadata = dict(metadata or {}, key=key)
+        mtime = metadata.get("timestamp", time.time())
+        with self._lock:
+            if self._tar is None:
+                self._open_shard()
+            self._add(f"{key}.{fmt}", bytes(data), mtime)
+            self._add(f"{key}.json", json.dumps(metadata).encode(), mtime)
+            shard = self._shard
+            shard["samples"] += 1
+            shard["first_key"] = shard["first_key"] or key
+            shard["last_key"] = key
+            self.samples += 1
+            if (shard["samples"] >= self.max_samples
+                    or self._file.tell() >= self.max_bytes):
+                self._finalize()
+
+    def _finalize(self):
+        """Close the current shard, rename it into place, update manifest."""
+        self._tar.close()
+        f = self._file.f
+        f.flush()
+        os.fsync(f.fileno())
+        f.close()
+        shard = self._shard
+        os.replace(
+            shard.pop("tmp_path"), os.path.join(self.directory, shard["name"])
+        )
+        fsync_directory(self.directory)
+        shard["bytes"] = self._file.size
+        shard["sha256"] = self._file.sha256.hexdigest()
+        self._manifest["shards"].append(shard)
+        self._manifest["next_index"] = self._next_index
+        write_atomic(
+            self.manifest_path,
+            json.dumps(self._manifest, indent=2).encode(),
+            fsync=True,
+        )
+        self._tar = None
+        self._file = None
+        self._next_shard += 1
+
+    def close(self):
+        """Finalize the shard in progress, if any."""
+        with self._lock:
+            if self._tar is not None:
+                self._finalize()
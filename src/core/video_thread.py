@@ -1,26 +1,71 @@
+import threading
 import time
 
 import cv2
-import numpy as np
 from PyQt5.QtCore import QThread, pyqtSignal
 
 from src.config import (
+    BUS_CONF,
     CAM_CONF,
     DEFAULT_HEIGHT,
     DEFAULT_WIDTH,
-    DISPLAY_HEIGHT,
-    DISPLAY_WIDTH,
+    RING_CONF,
+    SETTINGS_CONF,
+    SOURCE_CONF,
 )
+from src.core.backend_cache import BackendCache
+from src.core.buffer_pool import BufferPool
+from src.core.frame_bus import FrameBusPublisher
+from src.core.mailbox import FrameMailbox
+from src.core.metrics import METRICS
+from src.core.imaging import roi_within
+from src.core.pipelines import (
+    align_crop,
+    dual_pipeline,
+    flip_method,
+    roi_pipeline,
+    single_pipeline,
+)
+from src.core.ring_buffer import FrameRingBuffer
+from src.core.sources import open_source
+
+
+# Settings that can be applied to frames in software without a restart
+HOT_SETTINGS = {"h_flip", "v_flip"}
+if SETTINGS_CONF["software_saturation"]:
+    HOT_SETTINGS.add("saturation")
+
+# Settings holding (min, max) ranges or rects; stored as tuples
+RANGE_SETTINGS = ("exposure_range", "gain_range", "capture_roi")
+
+
+def parse_framerate(text):
+    """Convert a GStreamer fraction such as "30/1" to frames per second."""
+    num, _, den = str(text).partition("/")
+    return float(num) / float(den or 1)
 
 
 class VideoThread(QThread):
     """Thread for capturing video from the camera."""
 
-    change_pixmap_signal = pyqtSignal(np.ndarray)
+    # Emitted when the preview mailbox goes from empty to non-empty; the
+    # GUI then pulls the newest frame from self.mailbox.
+    frame_ready = pyqtSignal()
 
-    def __init__(self):
-        """Initialize the video thread."""
+    def __init__(self, source_type=None, source_options=None,
+                 sensor_id=None):
+        """
+        Initialize the video thread.
+
+        source_type overrides source.type from the config ("auto",
+        "argus", "webcam", "synthetic" or "replay"); source_options
+        override the synthetic/replay settings (and the webcam device).
+        sensor_id picks the CSI camera for the Argus pipelines.
+        """
         super().__init__()
+        self.source_type = source_type
+        self.source_options = source_options
+        self.sensor_id = sensor_id
         self._run_flag = True
         self.exposure_range = None
         self.gain_range = None
@@ -34,123 +79,498 @@ class VideoThread(QThread):
         self.ee_strength = 0.5
         self.h_flip = False
         self.v_flip = False
+        # Sensor-space (x, y, w, h) to crop in the pipeline, if it can
+        self.capture_roi = None
+        # Sensor region the full-resolution frames cover (None: all of it)
+        self.frame_roi = None
         self.cap = None
+        self.mailbox = FrameMailbox(CAM_CONF["preview_slots"])
+        self.buffer_pool = BufferPool(CAM_CONF["buffer_pool_size"])
+        # Last frame shape per stream, used to size pooled buffers
+        self._frame_shapes = {}
+        # Callbacks that must see every frame (bursts, recordings)
+        self._frame_listeners = []
+        self._oneshot_listeners = []
+        self._listener_lock = threading.Lock()
+        # True while a dual-stream pipeline feeds the preview separately
+        # from the full-resolution frames
+        self.dual_stream = False
+        self.frame_count = 0
+        # time.monotonic() when the frame being delivered was read
+        self.frame_time = None
+        self.read_failures = 0
+        self.ring_buffer = None
+        # Shared-memory publisher for other processes (see enable_frame_bus)
+        self.frame_bus = None
+        self._bus_preview = False
+        # What the running pipeline applies itself; anything else is done
+        # on the frames in software (see _apply_software_settings)
+        self._pipeline_flip = (False, False)
+        self._pipeline_saturation = 1.0
+        self.restarts = 0
+        self.restarts_avoided = 0
+        self.last_restart_latency = None
+        self._restart_started = None
+        # Backend that opened last; restarts try it first
+        self.backend_cache = BackendCache()
+        self._uncached_backend = None
+        self.source_name = None
+        self.last_open_time = None
+        self.last_first_frame_latency = None
+        self._run_started = None
 
-    def build_pipeline(self):
-        """Build the GStreamer pipeline string."""
-        pipeline = "nvarguscamerasrc "
-        if self.exposure_range:
-            pipeline += (
-                f'exposuretimerange="{self.exposure_range[0]} '
-                f'{self.exposure_range[1]}" '
-            )
-        if self.gain_range:
-            pipeline += (
-                f'gainrange="{self.gain_range[0]} {self.gain_range[1]}" '
-                'ispdigitalgainrange="1 1" '
+    def add_frame_listener(self, callback):
+        """
+        Call callback(frame) from the capture thread for every new frame.
+
+        Unlike the preview mailbox, listeners are invoked synchronously so
+        they never miss a frame; they must return quickly.
+        """
+        with self._listener_lock:
+            self._frame_listeners.append(callback)
+
+    def remove_frame_listener(self, callback):
+        """Stop delivering frames to a callback."""
+        with self._listener_lock:
+            if callback in self._frame_listeners:
+                self._frame_listeners.remove(callback)
+
+    def request_full_frame(self, callback):
+        """Call callback(frame) once with the next full-resolution frame."""
+        with self._listener_lock:
+            self._oneshot_listeners.append(callback)
+
+    def wants_full_frames(self):
+        """True if any listener currently needs full-resolution frames."""
+        with self._listener_lock:
+            return bool(self._frame_listeners or self._oneshot_listeners)
+
+    def enable_ring_buffer(self, enabled):
+        """Start or stop keeping the last few seconds of frames in memory."""
+        if enabled and self.ring_buffer is None:
+            self.ring_buffer = FrameRingBuffer(
+                RING_CONF["max_bytes"],
+                RING_CONF["seconds"],
+                parse_framerate(CAM_CONF["framerate"]),
+                RING_CONF["post_seconds"],
             )
-        if self.ae_lock:
-            pipeline += "aelock=true "
-        if self.awb_lock:
-            pipeline += "awblock=true "
-
-        pipeline += (
-            f"saturation={self.saturation} "
-            f"wbmode={self.wb_mode} "
-            f"tnr-mode={self.tnr_mode} "
-            f"tnr-strength={self.tnr_strength} "
-            f"ee-mode={self.ee_mode} "
-            f"ee-strength={self.ee_strength} "
+            self.add_frame_listener(self._push_to_ring)
+        elif not enabled and self.ring_buffer is not None:
+            self.remove_frame_listener(self._push_to_ring)
+            self.ring_buffer.clear()
+            self.ring_buffer = None
+
+    def _push_to_ring(self, frame):
+        """Frame listener: buffer a frame under the time it was read."""
+        ring = self.ring_buffer
+        if ring is not None:
+            ring.push(frame, self.frame_time)
+
+    def enable_frame_bus(self, enabled):
+        """
+        Start or stop publishing frames to a shared-memory frame bus.
+
+        frame_bus.stream picks the frames: "full" (every full-resolution
+        frame; keeps the dual-stream full branch running) or "preview".
+        Returns whether the bus is running.
+        """
+        if enabled and self.frame_bus is None:
+            self._bus_preview = BUS_CONF["stream"] == "preview"
+            # Single pipelines preview at full resolution too
+            size = DEFAULT_WIDTH * DEFAULT_HEIGHT * 3
+            try:
+                self.frame_bus = FrameBusPublisher(
+                    BUS_CONF["name"],
+                    BUS_CONF["slots"],
+                    BUS_CONF["max_frame_bytes"] or size,
+                    BUS_CONF["max_readers"],
+                    BUS_CONF["reader_timeout_s"],
+                )
+            except (RuntimeError, OSError) as e:
+                print(f"Frame bus disabled: {e}")
+                return False
+            if not self._bus_preview:
+                self.add_frame_listener(self._publish_to_bus)
+            print(f"Publishing frames on frame bus {BUS_CONF['name']!r}")
+        elif not enabled and self.frame_bus is not None:
+            self.remove_frame_listener(self._publish_to_bus)
+            bus = self.frame_bus
+            self.frame_bus = None
+            self._bus_preview = False
+            bus.close()
+        return self.frame_bus is not None
+
+    def _publish_to_bus(self, frame, timestamp=None):
+        bus = self.frame_bus
+        if bus is None:
+            return
+        timed = METRICS.enabled
+        if timed:
+            t0 = time.perf_counter()
+        oversized = bus.frames_oversized
+        bus.publish(
+            frame,
+            self.frame_time if timestamp is None else timestamp,
+            self.get_settings(),
         )
+        if bus.frames_oversized == 1 and not oversized:
+            print(
+                f"Frame bus: {frame.shape} frames exceed the slot size "
+                "(frame_bus.max_frame_bytes) and are not published"
+            )
+        if timed:
+            METRICS.observe("bus.publish", time.perf_counter() - t0)
+
+    def _apply_software_settings(self, frame):
+        """Apply settings the running pipeline doesn't (hot-applied ones)."""
+        h_flip = self.h_flip != self._pipeline_flip[0]
+        v_flip = self.v_flip != self._pipeline_flip[1]
+        if h_flip and v_flip:
+            frame = cv2.flip(frame, -1)
+        elif h_flip:
+            frame = cv2.flip(frame, 1)
+        elif v_flip:
+            frame = cv2.flip(frame, 0)
+
+        if "saturation" in HOT_SETTINGS and self._pipeline_saturation > 0:
+            factor = self.saturation / self._pipeline_saturation
+            if abs(factor - 1.0) > 1e-3:
+                # Blend with the luma image: a cheap saturation scale
+                gray = cv2.cvtColor(
+                    cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY),
+                    cv2.COLOR_GRAY2BGR,
+                )
+                frame = cv2.addWeighted(frame, factor, gray, 1.0 - factor, 0)
+        return frame
+
+    def _mark_first_frame(self):
+        if self._run_started is not None:
+            latency = time.monotonic() - self._run_started
+            self._run_started = None
+            self.last_first_frame_latency = latency
+            print(
+                f"First frame from {self.cap.name} after "
+                f"{latency * 1000:.0f} ms "
+                f"(open {self.last_open_time * 1000:.0f} ms)"
+            )
+            if METRICS.enabled:
+                METRICS.observe("capture.first_frame", latency)
+            if self._uncached_backend is not None:
+                self.backend_cache.store(*self._uncached_backend)
+                self._uncached_backend = None
+        if self._restart_started is not None:
+            self.last_restart_latency = (
+                time.monotonic() - self._restart_started
+            )
+            self._restart_started = None
+
+    def _notify_listeners(self, frame):
+        """Hand a full-resolution frame to the listeners."""
+        with self._listener_lock:
+            listeners = self._frame_listeners + self._oneshot_listeners
+            self._oneshot_listeners = []
+        for callback in listeners:
+            try:
+                callback(frame)
+            except Exception as e:
+                print(f"Frame listener failed: {e}")
+
+    def _publish_preview(self, frame, buffer=None, timestamp=None):
+        """
+        Post a frame to the GUI mailbox, waking the GUI if needed.
+
+        timestamp is when the frame was read (defaults to frame_time), so
+        the preview latency includes the listeners and software settings.
+        """
+        if timestamp is None:
+            timestamp = self.frame_time
+        if self._bus_preview:
+            self._publish_to_bus(frame, timestamp)
+        if self.mailbox.put(frame, timestamp, buffer):
+            self.frame_ready.emit()
+
+    def _adjust_pooled(self, frame, buffer):
+        """Apply software settings, dropping the buffer if frame is copied."""
+        adjusted = self._apply_software_settings(frame)
+        if adjusted is not frame and buffer is not None:
+            buffer.release()
+            buffer = None
+        return adjusted, buffer
+
+    def _dispatch_frame(self, frame, buffer=None):
+        """
+        Hand a frame to the listeners and the GUI.
+
+        buffer is the pooled FrameBuffer holding frame, if any; the caller's
+        reference is released here once the mailbox has taken its own.
+        """
+        self._mark_first_frame()
+        timed = METRICS.enabled
+        if timed:
+            t0 = time.perf_counter()
+        frame, buffer = self._adjust_pooled(frame, buffer)
+        self.frame_count += 1
+        if timed:
+            t1 = time.perf_counter()
+        self._notify_listeners(frame)
+        self._publish_preview(frame, buffer)
+        if buffer is not None:
+            buffer.release()
+        if timed:
+            METRICS.observe("capture.process", t1 - t0)
+            METRICS.observe("capture.listeners", time.perf_counter() - t1)
+            METRICS.inc("frames_captured")
+
+    def _pooled_buffer(self, key):
+        """A pool buffer shaped like the last frame read for key, if known."""
+        shape = self._frame_shapes.get(key)
+        return self.buffer_pool.get(shape) if shape else None
+
+    def _read_pooled(self, read, key):
+        """
+        Call read(out) with a pooled destination array.
 
-        pipeline += (
-            f"! video/x-raw(memory:NVMM), width={DEFAULT_WIDTH}, "
-            f"height={DEFAULT_HEIGHT}, format=NV12, "
-            f"framerate={CAM_CONF['framerate']} ! "
-            f"nvvidconv flip-method={self.get_flip_method()} ! "
-            f"video/x-raw, width={DEFAULT_WIDTH}, "
-            f"height={DEFAULT_HEIGHT}, format=BGRx ! "
-            f"videoconvert ! video/x-raw, format=BGR ! appsink drop=1"
+        Returns (ret, frame, buffer). buffer is None if the reader had to
+        allocate (first frame or a resolution change).
+        """
+        buffer = self._pooled_buffer(key)
+        timed = METRICS.enabled
+        if timed:
+            t0 = time.perf_counter()
+        ret, frame = read(buffer.array if buffer is not None else None)
+        self.frame_time = time.monotonic()
+        if timed:
+            METRICS.observe("capture.read", time.perf_counter() - t0)
+        if not ret:
+            if buffer is not None:
+                buffer.release()
+            if timed:
+                METRICS.inc("read_failures")
+            return False, None, None
+        if buffer is not None and frame is not buffer.array:
+            buffer.release()
+            buffer = None
+        self._frame_shapes[key] = frame.shape
+        return True, frame, buffer
+
+    def build_pipeline(self):
+        """Build the GStreamer pipeline string."""
+        return single_pipeline(self.get_settings(), self.sensor_id)
+
+    def build_dual_pipeline(self):
+        """Build a pipeline with a preview branch and a gated full-res one."""
+        return dual_pipeline(self.get_settings(), self.sensor_id)
+
+    def build_roi_pipeline(self):
+        """Build a dual pipeline whose full-res branch is the capture ROI."""
+        return roi_pipeline(
+            self.get_settings(), self.pipeline_roi(), self.sensor_id
         )
-        return pipeline
+
+    def pipeline_roi(self):
+        """The capture ROI as nvvidconv will crop it, or None."""
+        if self.capture_roi is None:
+            return None
+        return align_crop(self.capture_roi)
+
+    def frame_rect(self, rect):
+        """
+        Map a sensor-space crop rect onto the frames listeners receive.
+
+        With a sensor ROI pipeline running, full-resolution frames only
+        cover frame_roi, so rects are shifted (and clipped) into it.
+        """
+        return roi_within(rect, self.frame_roi)
 
     def get_flip_method(self):
+        """nvvidconv flip-method for the current flip settings."""
+        return flip_method(self.h_flip, self.v_flip)
+
+    def _run_dual_stream(self):
+        """Capture loop for a DualStreamCapture."""
+        while self._run_flag:
+            self.cap.set_full_enabled(self.wants_full_frames())
+            ret, preview, preview_buf = self._read_pooled(
+                lambda out: self.cap.read_preview(out=out), "preview"
+            )
+            if not ret:
+                self.read_failures += 1
+                continue
+            # Reading the full-res frames below moves frame_time on
+            preview_time = self.frame_time
+            self._mark_first_frame()
+            self.frame_count += 1
+            if METRICS.enabled:
+                METRICS.inc("frames_captured")
+            # Drain every full-resolution frame that is ready
+            while True:
+                ret, frame, buf = self._read_pooled(
+                    lambda out: self.cap.read_full(out=out), "full"
+                )
+                if not ret:
+                    break
+                frame, buf = self._adjust_pooled(frame, buf)
+                self._notify_listeners(frame)
+                if buf is not None:
+                    buf.release()
+            preview, preview_buf = self._adjust_pooled(preview, preview_buf)
+            self._publish_preview(preview, preview_buf, preview_time)
+            if preview_buf is not None:
+                preview_buf.release()
+
+    def _open_source(self):
         """
-        Calculate flip-method for nvvidconv.
-        0: identity
-        1: counterclockwise
-        2: rotate-180
-        3: clockwise
-        4: horizontal-flip
-        5: upper-right-diagonal
-        6: vertical-flip
-        7: upper-left-diagonal
-        
-        We only care about H and V flips combined with 0 rotation.
-        H=False, V=False -> 0
-        H=True,  V=False -> 4
-        H=False, V=True  -> 6
-        H=True,  V=True  -> 2 (rotate-180 is equivalent to H+V flip)
-        """
-        if self.h_flip and self.v_flip:
-            return 2
-        elif self.h_flip:
-            return 4
-        elif self.v_flip:
-            return 6
-        return 0
+        Open a frame source, trying the known-good backend first.
 
-    def run(self):
-        """Run the video capture loop."""
-        gst_str = self.build_pipeline()
-        self.cap = cv2.VideoCapture(gst_str, cv2.CAP_GSTREAMER)
+        After the first run the backend that worked is reused directly;
+        at launch the on-disk BackendCache supplies it.
+        """
+        source_type = self.source_type or SOURCE_CONF["type"]
+        preferred = self.source_name
+        if preferred is None:
+            cached = self.backend_cache.lookup(source_type)
+            if cached is not None:
+                preferred = cached["backend"]
+                print(f"Using cached camera backend: {preferred}")
 
-        # Fallback for non-Jetson environments (e.g., macOS/Windows)
-        if not self.cap.isOpened():
-            print("GStreamer pipeline failed. Trying default webcam...")
-            self.cap = cv2.VideoCapture(0)
+        started = time.monotonic()
+        cap = open_source(
+            self, self.source_type, self.source_options, preferred
+        )
+        self.last_open_time = time.monotonic() - started
+        if cap is None:
+            self.backend_cache.forget(source_type)
+            return None
 
-        # If still not opened, we will generate dummy frames in the loop
-        using_dummy = not (self.cap and self.cap.isOpened())
-        if using_dummy:
+        if cap.name != self.source_name:
+            # First open in this process, or the backend changed; it is
+            # cached once it has delivered a frame (see _mark_first_frame)
+            try:
+                caps = cap.capabilities()
+            except Exception as e:
+                caps = {"error": str(e)}
+            self._uncached_backend = (
+                source_type, cap.name, caps, self.last_open_time
+            )
+            self.source_name = cap.name
+        return cap
+
+    def run(self):
+        """Run the video capture loop."""
+        self._run_started = time.monotonic()
+        self.cap = self._open_source()
+        if self.cap is None:
+            self._run_started = None
+            print("No frame source could be opened.")
+            return
+        if self.cap.name == "synthetic" and self.source_type in (None, "auto"):
             print("Camera not found. Using dummy frame generator.")
 
-        while self._run_flag:
-            if not using_dummy:
-                ret, frame = self.cap.read()
+        if self.cap.applies_isp:
+            self._pipeline_flip = (self.h_flip, self.v_flip)
+            self._pipeline_saturation = self.saturation
+        else:
+            # Other sources ignore the ISP flip and saturation
+            self._pipeline_flip = (False, False)
+            self._pipeline_saturation = 1.0
+
+        if self.cap.crop_rect != self.frame_roi:
+            if self.ring_buffer is not None:
+                # Buffered frames cover a different sensor region
+                self.ring_buffer.clear()
+            self.frame_roi = self.cap.crop_rect
+        self.dual_stream = self.cap.dual
+        if self.dual_stream:
+            self._run_dual_stream()
+        else:
+            while self._run_flag:
+                ret, frame, buf = self._read_pooled(self.cap.read, "frame")
                 if ret:
-                    # Resize to match expected display size if needed,
-                    # or just let the GUI handle the frame size.
-                    # For consistency with the pipeline, we might want to resize
-                    # but the GUI adapts to the frame size.
-                    self.change_pixmap_signal.emit(frame)
+                    self._dispatch_frame(frame, buf)
                 else:
+                    self.read_failures += 1
                     time.sleep(0.1)
-            else:
-                # Generate dummy noise frame
-                frame = np.random.randint(
-                    0, 256, (DISPLAY_HEIGHT, DISPLAY_WIDTH, 3), dtype=np.uint8
-                )
-                cv2.putText(
-                    frame,
-                    "NO CAMERA - DUMMY MODE",
-                    (50, 270),
-                    cv2.FONT_HERSHEY_SIMPLEX,
-                    1,
-                    (255, 255, 255),
-                    2,
-                )
-                self.change_pixmap_signal.emit(frame)
-                time.sleep(0.1)
 
-        if self.cap:
-            self.cap.release()
+        self.cap.release()
+        self.dual_stream = False
 
     def stop(self):
         """Stop the video capture thread."""
         self._run_flag = False
         self.wait()
 
+    def get_settings(self):
+        """Return the current ISP settings as a JSON-serializable dict."""
+        return {
+            "exposure_range": list(self.exposure_range)
+            if self.exposure_range else None,
+            "gain_range": list(self.gain_range) if self.gain_range else None,
+            "ae_lock": self.ae_lock,
+            "awb_lock": self.awb_lock,
+            "saturation": self.saturation,
+            "wb_mode": self.wb_mode,
+            "tnr_mode": self.tnr_mode,
+            "tnr_strength": self.tnr_strength,
+            "ee_mode": self.ee_mode,
+            "ee_strength": self.ee_strength,
+            "h_flip": self.h_flip,
+            "v_flip": self.v_flip,
+            "capture_roi": list(self.capture_roi)
+            if self.capture_roi else None,
+        }
+
+    def seed_settings(self, settings):
+        """Set the settings (see get_settings) to start with, before start()."""
+        for key, value in settings.items():
+            if key in RANGE_SETTINGS and value is not None:
+                value = tuple(value)
+            setattr(self, key, value)
+
+    def apply_settings(self, settings):
+        """
+        Apply a dict of settings (see get_settings), restarting only if needed.
+
+        Returns "unchanged" if nothing differs from the current settings,
+        "hot" if every change could be applied to the frames downstream,
+        or "restart" if the pipeline had to be rebuilt.
+        """
+        current = self.get_settings()
+        changed = {}
+        for key, value in settings.items():
+            if key in RANGE_SETTINGS and value is not None:
+                value = tuple(value)
+            compare = list(value) if isinstance(value, tuple) else value
+            if current.get(key) != compare:
+                changed[key] = value
+
+        if not changed:
+            self.restarts_avoided += 1
+            return "unchanged"
+
+        hot = HOT_SETTINGS
+        if self.cap is not None and not self.cap.crops:
+            # The running source can't crop; callers crop in Python
+            hot = hot | {"capture_roi"}
+        elif self.cap is not None and self.cap.crop_rect is not None:
+            # The pipeline crops a sensor region picked for the current
+            # flip (see unflipped_crop); a new flip needs a new crop
+            hot = hot - {"h_flip", "v_flip"}
+        if set(changed) <= hot:
+            for key, value in changed.items():
+                setattr(self, key, value)
+            self.restarts_avoided += 1
+            return "hot"
+
+        self._run_flag = False
+        self.wait()
+        self._restart_started = time.monotonic()
+        for key, value in changed.items():
+            setattr(self, key, value)
+        self.restarts += 1
+        self._run_flag = True
+        self.start()
+        return "restart"
+
     def update_settings(
         self,
         exposure,
@@ -166,20 +586,20 @@ class VideoThread(QThread):
         h_flip,
         v_flip,
     ):
-        """Update camera settings and restart the pipeline."""
-        self._run_flag = False
-        self.wait()
-        self.exposure_range = exposure
-        self.gain_range = gain
-        self.ae_lock = ae_lock
-        self.awb_lock = awb_lock
-        self.saturation = saturation
-        self.wb_mode = wb_mode
-        self.tnr_mode = tnr_mode
-        self.tnr_strength = tnr_strength
-        self.ee_mode = ee_mode
-        self.ee_strength = ee_strength
-        self.h_flip = h_flip
-        self.v_flip = v_flip
-        self._run_flag = True
-        self.start()
+        """Update camera settings, restarting the pipeline if required."""
+        return self.apply_settings(
+            {
+                "exposure_range": exposure,
+                "gain_range": gain,
+                "ae_lock": ae_lock,
+                "awb_lock": awb_lock,
+                "saturation": saturation,
+                "wb_mode": wb_mode,
+                "tnr_mode": tnr_mode,
+                "tnr_strength": tnr_strength,
+                "ee_mode": ee_mode,
+                "ee_strength": ee_strength,
+                "h_flip": h_flip,
+                "v_flip": v_flip,
+            }
+        )
@@ -0,0 +1,296 @@
+import os
+import queue
+import threading
+import time
+
+from PyQt5.QtCore import QObject, pyqtSignal
+
+from src.config import WRITER_CONF
+from src.core.dedupe import phash
+from src.core.imaging import crop_frame, encode_image, get_write_params
+from src.core.metrics import METRICS
+
+
+def fsync_directory(directory):
+    """Flush a directory entry so renames inside it survive a crash."""
+    try:
+        fd = os.open(directory, os.O_RDONLY)
+    except OSError:
+        return  # Not supported on this platform (e.g. Windows)
+    try:
+        os.fsync(fd)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
+
+
+def write_atomic(path, data, fsync=False):
+    """
+    Write bytes to path via a temporary file and a rename.
+
+    A crash mid-write leaves at most a hidden temp file behind, never a
+    truncated image under the final name.
+    """
+    directory, name = os.path.split(path)
+    tmp_path = os.path.join(directory, f".{name}.tmp")
+    try:
+        with open(tmp_path, "wb") as f:
+            f.write(data)
+            if fsync:
+                f.flush()
+                os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+    if fsync:
+        fsync_directory(directory or ".")
+
+
+class WriteJob:
+    """
+    A single pending image write.
+
+    With a sink (e.g. a TarShardSink) path is the sample key and the
+    encoded image goes to sink.write_sample() instead of a file.
+    """
+
+    def __init__(self, image, path, fmt, params, sink=None, metadata=None):
+        self.image = image
+        self.path = path
+        self.fmt = fmt
+        self.params = params
+        self.sink = sink
+        self.metadata = metadata
+
+
+class CaptureWriter(QObject):
+    """
+    Background image writer fed by a bounded queue.
+
+    Encoding and disk I/O run in a small pool of worker threads so the GUI
+    thread only pays for copying the ROI out of the frame. When the queue
+    is full, submit() either waits or reports the frame as rejected.
+
+    With a DuplicateIndex set as `dedupe`, every image is hashed before it
+    is encoded; near-duplicates of an indexed capture are dropped (and
+    reported through write_skipped), or saved with "duplicate_of" in
+    their metadata if keep_duplicates is set.
+    """
+
+    write_finished = pyqtSignal(str)
+    write_failed = pyqtSignal(str, str)
+    write_skipped = pyqtSignal(str, str)
+    pending_changed = pyqtSignal(int)
+
+    def __init__(
+        self,
+        workers=WRITER_CONF["workers"],
+        queue_size=WRITER_CONF["queue_size"],
+        fsync_batch_size=WRITER_CONF["fsync_batch_size"],
+    ):
+        """Initialize the writer. Call start() before submitting jobs."""
+        super().__init__()
+        self.num_workers = max(1, workers)
+        self.fsync_batch_size = fsync_batch_size
+        self._queue = queue.Queue(maxsize=max(1, queue_size))
+        self._workers = []
+        self._pending = 0
+        self._pending_cond = threading.Condition()
+        self._unsynced = []
+        self._sync_lock = threading.Lock()
+        self.dedupe = None
+        self.keep_duplicates = False
+
+    @property
+    def pending(self):
+        """Number of jobs submitted but not yet written."""
+        with self._pending_cond:
+            return self._pending
+
+    def start(self):
+        """Start the worker threads."""
+        if self._workers:
+            return
+        for i in range(self.num_workers):
+            worker = threading.Thread(
+                target=self._worker_loop, name=f"CaptureWriter-{i}", daemon=True
+            )
+            worker.start()
+            self._workers.append(worker)
+
+    def submit(self, frame, rect, path, fmt, params=None, block=False,
+               timeout=None, sink=None, metadata=None, copy=True):
+        """
+        Queue the ROI of a frame to be written to path.
+
+        Only the cropped region is copied, so the caller may reuse the frame
+        immediately. Returns False if the queue is full (and block is False
+        or the timeout expires). If sink is given, path is a sample key and
+        the encoded image and metadata are handed to the sink instead.
+        copy=False skips the copy for frames the caller won't touch again.
+        """
+        return self.submit_batch(
+            frame, [(rect, path, metadata)], fmt, params, block, timeout, sink,
+            copy,
+        )
+
+    def submit_batch(self, frame, regions, fmt, params=None, block=False,
+                     timeout=None, sink=None, copy=True):
+        """
+        Queue several crops of one frame as a single batch.
+
+        regions is a list of (rect, path, metadata). The crops are copied
+        out of the frame here and travel through the queue as one item, so
+        either every region is queued or (queue full) none is.
+        """
+        if params is None:
+            params = get_write_params(fmt)
+        batch = []
+        for rect, path, metadata in regions:
+            image = crop_frame(frame, rect)
+            if copy:
+                image = image.copy()
+            batch.append(WriteJob(image, path, fmt, params, sink, metadata))
+
+        with self._pending_cond:
+            self._pending += len(batch)
+        try:
+            self._queue.put(batch, block=block, timeout=timeout)
+        except queue.Full:
+            self._finish_job(len(batch))
+            if METRICS.enabled:
+                METRICS.inc("writer_rejected", len(batch))
+            return False
+        self.pending_changed.emit(self.pending)
+        return True
+
+    def flush(self, timeout=None):
+        """Wait until all queued jobs are written. Returns True if drained."""
+        with self._pending_cond:
+            drained = self._pending_cond.wait_for(
+                lambda: self._pending == 0, timeout
+            )
+        self._sync_unsynced()
+        return drained
+
+    def stop(self):
+        """Write everything still queued, then stop the worker threads."""
+        self.flush()
+        for _ in self._workers:
+            self._queue.put(None)
+        for worker in self._workers:
+            worker.join()
+        self._workers = []
+
+    def _finish_job(self, count=1):
+        with self._pending_cond:
+            self._pending -= count
+            self._pending_cond.notify_all()
+
+    def _worker_loop(self):
+        while True:
+            batch = self._queue.get()
+            if batch is None:
+                break
+            for job in batch:
+                self._write_job(job)
+            self.pending_changed.emit(self.pending)
+
+    def _check_duplicate(self, index, job):
+        """
+        Hash a job's image and admit it to the duplicate index.
+
+        Returns (indexed name or None, duplicate name or None).
+        """
+        if index is None:
+            return None, None
+        timed = METRICS.enabled
+        if timed:
+            t0 = time.perf_counter()
+        h = phash(job.image)
+        is_file = job.sink is None
+        name = os.path.basename(job.path) if is_file else job.path
+        match = index.admit(name, h, is_file, self.keep_duplicates)
+        if timed:
+            METRICS.observe("dedupe.lookup", time.perf_counter() - t0)
+        if job.metadata is not None:
+            job.metadata["phash"] = f"{h:016x}"
+        if match is None:
+            return name, None
+        if timed:
+            METRICS.inc("duplicates")
+        if not self.keep_duplicates:
+            return None, match[0]
+        if job.metadata is not None:
+            job.metadata["duplicate_of"] = match[0]
+            job.metadata["hash_distance"] = match[1]
+        return name, None
+
+    def _write_job(self, job):
+        timed = METRICS.enabled
+        index = self.dedupe
+        indexed = None
+        try:
+            indexed, duplicate = self._check_duplicate(index, job)
+            if duplicate is not None:
+                print(f"Skipped {job.path}: near-duplicate of {duplicate}")
+                self._finish_job()
+                self.write_skipped.emit(job.path, duplicate)
+                return
+            if timed:
+                t0 = time.perf_counter()
+            data = encode_image(job.image, job.fmt, job.params)
+            if timed:
+                t1 = time.perf_counter()
+            if job.sink is not None:
+                job.sink.write_sample(job.path, job.fmt, data, job.metadata)
+            else:
+                write_atomic(
+                    job.path, data, fsync=self.fsync_batch_size == 1
+                )
+                if self.fsync_batch_size > 1:
+                    self._record_unsynced(job.path)
+        except Exception as e:
+            print(f"Failed to save {job.path}: {e}")
+            if indexed is not None:
+                index.discard(indexed)
+            if timed:
+                METRICS.inc("write_failures")
+            self._finish_job()
+            self.write_failed.emit(job.path, str(e))
+        else:
+            if timed:
+                METRICS.observe("writer.encode", t1 - t0)
+                METRICS.observe("writer.write", time.perf_counter() - t1)
+                METRICS.inc("writes")
+            print(f"Saved: {job.path}")
+            self._finish_job()
+            self.write_finished.emit(job.path)
+
+    def _record_unsynced(self, path):
+        with self._sync_lock:
+            self._unsynced.append(path)
+            if len(self._unsynced) < self.fsync_batch_size:
+                return
+        self._sync_unsynced()
+
+    def _sync_unsynced(self):
+        """fsync a batch of written files and their directories."""
+        with self._sync_lock:
+            paths, self._unsynced = self._unsynced, []
+        directories = set()
+        for path in paths:
+            try:
+                fd = os.open(path, os.O_RDONLY)
+                try:
+                    os.fsync(fd)
+                finally:
+                    os.close(fd)
+            except OSError as e:
+                print(f"fsync failed for {path}: {e}")
+            directories.add(os.path.dirname(path) or ".")
+        for directory in directories:
+            fsync_directory(directory)
@@ -0,0 +1,352 @@
+"""
+Headless benchmarks for the capture, display and save hot paths.
+
+Run with:  python -m src.tools.benchmark --output bench.json
+
+Everything runs against the synthetic frame source with the offscreen Qt
+platform, so no camera or display is needed. Results are written as JSON
+for comparison across Jetson models and between commits.
+"""
+import argparse
+import json
+import os
+import platform
+import shutil
+import socket
+import statistics
+import sys
+import tempfile
+import threading
+import time
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+import cv2  # noqa: E402
+import numpy as np  # noqa: E402
+
+from src.config import DEFAULT_HEIGHT, DEFAULT_WIDTH  # noqa: E402
+from src.core.catalog import CaptureCatalog  # noqa: E402
+from src.core.imaging import (  # noqa: E402
+    crop_frame,
+    display_roi_to_sensor,
+    encode_image,
+    get_write_params,
+)
+from src.core.shards import NPY_FORMAT, ShardSink  # noqa: E402
+from src.core.video_thread import VideoThread  # noqa: E402
+from src.core.writer import write_atomic  # noqa: E402
+
+
+def summarize(samples):
+    """Summary statistics (in milliseconds) for a list of durations."""
+    ms = sorted(s * 1000.0 for s in samples)
+    return {
+        "n": len(ms),
+        "mean_ms": statistics.mean(ms),
+        "median_ms": statistics.median(ms),
+        "p95_ms": ms[min(len(ms) - 1, int(round(0.95 * (len(ms) - 1))))],
+        "min_ms": ms[0],
+        "max_ms": ms[-1],
+    }
+
+
+def time_calls(fn, repeat, warmup=2):
+    """Call fn repeatedly and return the per-call durations."""
+    for _ in range(warmup):
+        fn()
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - start)
+    return samples
+
+
+def machine_info():
+    """Host details used to tell results from different boards apart."""
+    info = {
+        "host": socket.gethostname(),
+        "platform": platform.platform(),
+        "machine": platform.machine(),
+        "python": platform.python_version(),
+        "opencv": cv2.__version__,
+        "numpy": np.__version__,
+        "cpu_count": os.cpu_count(),
+        "timestamp": time.time(),
+    }
+    try:
+        # e.g. "NVIDIA Jetson Nano Developer Kit"
+        with open("/proc/device-tree/model") as f:
+            info["model"] = f.read().strip("\x00\n ")
+    except OSError:
+        pass
+    return info
+
+
+def bench_video_thread(duration, width, height):
+    """Sustained frames/sec through VideoThread with an unpaced source."""
+    thread = VideoThread(
+        source_type="synthetic",
+        source_options={"width": width, "height": height, "fps": 0},
+    )
+    times = []
+    thread.add_frame_listener(lambda frame: times.append(time.perf_counter()))
+    thread.start()
+    # Skip start-up so only the steady state is measured
+    deadline = time.perf_counter() + 10.0
+    while not times and time.perf_counter() < deadline:
+        time.sleep(0.01)
+    start_count = len(times)
+    start = time.perf_counter()
+    time.sleep(duration)
+    frames = len(times) - start_count
+    elapsed = time.perf_counter() - start
+    thread.stop()
+    intervals = [b - a for a, b in zip(times[start_count:], times[start_count + 1:])]
+    return {
+        "resolution": [width, height],
+        "frames": frames,
+        "fps": frames / elapsed,
+        "frame_interval": summarize(intervals) if intervals else None,
+        "mailbox": thread.mailbox.stats(),
+        "buffer_pool": thread.buffer_pool.stats(),
+    }
+
+
+def bench_restart(repeat):
+    """Blackout between a settings change and the next frame."""
+    thread = VideoThread(source_type="synthetic")
+    first_frame = threading.Event()
+    thread.add_frame_listener(lambda frame: first_frame.set())
+    thread.start()
+    first_frame.wait(10.0)
+
+    samples, reported = [], []
+    for i in range(repeat):
+        first_frame.clear()
+        start = time.perf_counter()
+        # Alternate a setting that always requires a pipeline rebuild
+        result = thread.apply_settings({"wb_mode": 2 + (i % 2)})
+        if result != "restart" or not first_frame.wait(10.0):
+            continue
+        samples.append(time.perf_counter() - start)
+        if thread.last_restart_latency is not None:
+            reported.append(thread.last_restart_latency)
+    thread.stop()
+    return {
+        "blackout": summarize(samples) if samples else None,
+        # VideoThread's own measurement: close to the first new frame
+        "reported": summarize(reported) if reported else None,
+    }
+
+
+def bench_update_image(window, frame, repeat):
+    """Cost of DataCollectorApp.update_image for one frame."""
+    return summarize(time_calls(lambda: window.update_image(frame), repeat))
+
+
+def bench_save(window, frame, repeat, directory):
+    """
+    ROI crop + encode + write for each format and ROI preset.
+
+    For npy, "write" is the append into a memory-mapped shard (there is
+    no encode step).
+    """
+    results = {}
+    formats = [
+        window.combo_format.itemText(i)
+        for i in range(window.combo_format.count())
+    ]
+    roi_presets = [
+        window.combo_roi_size.itemText(i)
+        for i in range(window.combo_roi_size.count())
+    ]
+    for fmt in formats:
+        params = get_write_params(fmt)
+        for preset in roi_presets:
+            if preset == "Free Select":
+                rect = None  # Full frame
+            else:
+                w, h = map(int, preset.split("x"))
+                # A display ROI centred in the preview, as set_fixed_roi does
+                window.image_label.set_fixed_roi(w, h)
+                rect = display_roi_to_sensor(
+                    window.image_label.get_roi(), (w, h)
+                )
+            path = os.path.join(directory, f"bench.{fmt}")
+            crop_samples, encode_samples, write_samples = [], [], []
+            sizes = []
+            if fmt == NPY_FORMAT:
+                sink = ShardSink(directory, f"bench_{len(results)}_")
+                for _ in range(repeat):
+                    t0 = time.perf_counter()
+                    sink.append(frame, rect)
+                    write_samples.append(time.perf_counter() - t0)
+                sink.close()
+                results[f"{fmt}/{preset}"] = {
+                    "params": [],
+                    "bytes": crop_frame(frame, rect).nbytes,
+                    "write": summarize(write_samples),
+                    "total": summarize(write_samples),
+                }
+                continue
+            for _ in range(repeat):
+                t0 = time.perf_counter()
+                img = crop_frame(frame, rect).copy()
+                t1 = time.perf_counter()
+                data = encode_image(img, fmt, params)
+                t2 = time.perf_counter()
+                write_atomic(path, data)
+                t3 = time.perf_counter()
+                crop_samples.append(t1 - t0)
+                encode_samples.append(t2 - t1)
+                write_samples.append(t3 - t2)
+                sizes.append(len(data))
+            results[f"{fmt}/{preset}"] = {
+                "params": params,
+                "bytes": int(statistics.mean(sizes)),
+                "crop": summarize(crop_samples),
+                "encode": summarize(encode_samples),
+                "write": summarize(write_samples),
+                "total": summarize(
+                    [a + b + c for a, b, c in
+                     zip(crop_samples, encode_samples, write_samples)]
+                ),
+            }
+        window.image_label.clear_roi()
+    return results
+
+
+def bench_next_index(sizes, repeat, directory):
+    """Catalog open and next-index latency as the save directory grows."""
+    results = {}
+    count = 0
+    for size in sorted(sizes):
+        # Grow the directory with empty placeholder captures
+        for i in range(count, size):
+            open(os.path.join(directory, f"{i + 1:04d}.png"), "wb").close()
+        count = size
+        catalog_path = os.path.join(directory, ".capture_catalog.db")
+        for name in (catalog_path, catalog_path + "-wal",
+                     catalog_path + "-shm"):
+            if os.path.exists(name):
+                os.remove(name)
+
+        start = time.perf_counter()
+        catalog = CaptureCatalog(directory)
+        cold = time.perf_counter() - start
+        warm = time_calls(lambda: catalog.next_index("", "png"), repeat)
+        reserve = time_calls(lambda: catalog.reserve("", "png"), repeat)
+        # Simulate a file added outside the app to force a rescan
+        open(os.path.join(directory, "external_0001.png"), "wb").close()
+        start = time.perf_counter()
+        catalog.next_index("", "png")
+        rescan = time.perf_counter() - start
+        os.remove(os.path.join(directory, "external_0001.png"))
+        catalog.close()
+        results[str(size)] = {
+            "cold_open_ms": cold * 1000.0,
+            "next_index": summarize(warm),
+            "reserve": summarize(reserve),
+            "rescan_ms": rescan * 1000.0,
+        }
+    return results
+
+
+def run(args):
+    """Run the selected benchmarks and return the results dict."""
+    from PyQt5.QtWidgets import QApplication
+
+    app = QApplication.instance() or QApplication(sys.argv[:1])
+    workdir = tempfile.mkdtemp(prefix="dc_bench_")
+    cwd = os.getcwd()
+    results = {"meta": machine_info(), "results": {}}
+    try:
+        # The window creates its save directory relative to the cwd
+        os.chdir(workdir)
+        frame = np.random.RandomState(0).randint(
+            0, 256, (DEFAULT_HEIGHT, DEFAULT_WIDTH, 3), dtype=np.uint8
+        )
+
+        if "thread" in args.only:
+            print("Benchmarking VideoThread throughput...")
+            results["results"]["video_thread"] = bench_video_thread(
+                args.duration, DEFAULT_WIDTH, DEFAULT_HEIGHT
+            )
+        if "restart" in args.only:
+            print("Benchmarking settings restart blackout...")
+            results["results"]["restart"] = bench_restart(args.restarts)
+
+        if "display" in args.only or "save" in args.only:
+            from src.ui.main_window import DataCollectorApp
+
+            window = DataCollectorApp(source_type="synthetic")
+            # Only the window's methods are measured, not its camera
+            window.thread.stop()
+            if "display" in args.only:
+                print("Benchmarking update_image...")
+                results["results"]["update_image"] = bench_update_image(
+                    window, frame, args.repeat
+                )
+            if "save" in args.only:
+                print("Benchmarking ROI crop and image writes...")
+                save_dir = os.path.join(workdir, "save")
+                os.makedirs(save_dir)
+                results["results"]["save"] = bench_save(
+                    window, frame, args.repeat, save_dir
+                )
+            window.close()
+            app.processEvents()
+
+        if "index" in args.only:
+            print("Benchmarking next-index lookup...")
+            index_dir = os.path.join(workdir, "index")
+            os.makedirs(index_dir)
+            results["results"]["next_index"] = bench_next_index(
+                args.dir_sizes, args.repeat, index_dir
+            )
+    finally:
+        os.chdir(cwd)
+        shutil.rmtree(workdir, ignore_errors=True)
+    return results
+
+
+def main(argv=None):
+    """Command-line entry point."""
+    parser = argparse.ArgumentParser(description=__doc__.strip().split("\n")[0])
+    parser.add_argument(
+        "--output", default="benchmark_results.json",
+        help="JSON file to write (default: %(default)s)",
+    )
+    parser.add_argument(
+        "--only", nargs="+",
+        default=["thread", "display", "save", "index", "restart"],
+        choices=["thread", "display", "save", "index", "restart"],
+        help="benchmarks to run (default: all)",
+    )
+    parser.add_argument(
+        "--duration", type=float, default=5.0,
+        help="seconds to measure VideoThread throughput",
+    )
+    parser.add_argument(
+        "--repeat", type=int, default=30,
+        help="iterations per timed operation",
+    )
+    parser.add_argument(
+        "--restarts", type=int, default=5,
+        help="number of settings restarts to time",
+    )
+    parser.add_argument(
+        "--dir-sizes", type=int, nargs="+", default=[100, 1000, 10000],
+        help="save-directory sizes for the next-index benchmark",
+    )
+    args = parser.parse_args(argv)
+
+    results = run(args)
+    with open(args.output, "w") as f:
+        json.dump(results, f, indent=2)
+    print(f"Results written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
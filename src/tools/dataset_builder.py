@@ -0,0 +1,453 @@
+"""
+Build a dataset from captures or recordings on every CPU core.
+
+Run with:  python -m src.tools.dataset_builder captured_data -o dataset \\
+               --size 224x224 --size 448x448
+      or:  python -m src.tools.dataset_builder session_0001.avi -o frames \\
+               --format png --every 5
+
+Sources are folders of captures (with their catalog metadata, if the
+folder has a catalog) and video segments written by the recorder (with
+their .jsonl sidecars); a folder's recordings are included too. Crops use
+the app's own ROI math: each --size preset is centred on the capture's
+sensor ROI (or on --roi / --display-roi), kept at exactly that size and
+moved inside the source image if it overlaps an edge; images smaller
+than the preset are skipped. Crops are encoded with the app's encoder
+settings. Outputs are named after their source: "<prefix><folder>_<name>"
+for captures (the folder they were found in) and "<prefix><recording>_
+<frame>" for recording frames; two inputs that would write the same file
+are reported before anything is written. Input folders are only read.
+
+Inputs are split into tasks of --chunk images that a process pool runs
+in parallel, each worker writing its images straight to disk. Finished
+tasks are appended to manifest.jsonl in the output directory along with
+the metadata of every image written (source, sensor ROI, ISP settings,
+timestamp). Running the same command again skips everything the manifest
+lists, so an interrupted build resumes where it stopped.
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import signal
+import sys
+import time
+
+import cv2
+
+from src.core.catalog import read_metadata
+from src.core.imaging import (
+    crop_frame,
+    display_roi_to_sensor,
+    encode_image,
+    get_write_params,
+    parse_roi_size,
+)
+from src.core.recorder import PARTIAL, read_sidecar, sidecar_path
+from src.core.sources import IMAGE_EXTENSIONS
+from src.core.writer import write_atomic
+
+FORMATS = ("jpg", "png", "tiff", "bmp")
+VIDEO_EXTENSIONS = (".avi", ".mkv", ".mp4")
+MANIFEST_NAME = "manifest.jsonl"
+
+# Set in each pool worker by _init_worker
+_OPTIONS = None
+
+
+def parse_rect(text):
+    """Parse "x,y,w,h" into a tuple of ints."""
+    try:
+        x, y, w, h = (int(v) for v in text.split(","))
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"expected x,y,w,h, got {text!r}")
+    return (x, y, w, h)
+
+
+def parse_size(text):
+    size = parse_roi_size(text)
+    if size is None:
+        raise argparse.ArgumentTypeError(f"expected WxH, got {text!r}")
+    return size
+
+
+def target_rect(outer, roi, size):
+    """
+    The sensor-space rect to cut for one output.
+
+    outer is the sensor region the source image covers; the crop is
+    centred on roi (default: outer) and given exactly `size`, the same
+    way the app enforces ROI presets.
+    """
+    x, y, w, h = roi or outer
+    if size is None:
+        return (x, y, w, h)
+    center_x = x + w / 2.0
+    center_y = y + h / 2.0
+    return (
+        int(round(center_x - size[0] / 2.0)),
+        int(round(center_y - size[1] / 2.0)),
+        size[0],
+        size[1],
+    )
+
+
+def fit_rect(rect, outer):
+    """Move rect inside outer, or None if it is larger than outer."""
+    x, y, w, h = rect
+    ox, oy, ow, oh = outer
+    if w > ow or h > oh:
+        return None
+    x = min(max(x, ox), ox + ow - w)
+    y = min(max(y, oy), oy + oh - h)
+    return (x, y, w, h)
+
+
+# --- Inputs ---
+def _list_files(directory, extensions):
+    return sorted(
+        entry.path for entry in os.scandir(directory)
+        if entry.is_file()
+        and entry.name.lower().endswith(extensions)
+        and not entry.name.startswith(".")
+        and PARTIAL not in entry.name
+    )
+
+
+def _is_recording(path):
+    return os.path.exists(sidecar_path(path))
+
+
+def _stem(path):
+    return os.path.splitext(os.path.basename(path))[0]
+
+
+def image_inputs(directory, paths):
+    """
+    (input id, path, output stem, metadata) for captures in one folder.
+
+    Sessions all number their captures from 0001, so the stem starts
+    with the folder name.
+    """
+    metadata = read_metadata(directory)
+    folder = os.path.basename(os.path.abspath(directory))
+    for path in paths:
+        name = os.path.basename(path)
+        yield (
+            os.path.abspath(path),
+            path,
+            f"{folder}_{_stem(name)}",
+            metadata.get(name) or {},
+        )
+
+
+def video_inputs(path, every):
+    """
+    (input id, frame index, output stem, metadata) for every kept frame
+    of a video.
+    """
+    if _is_recording(path):
+        header, records = read_sidecar(sidecar_path(path))
+        count = len(records)
+    else:
+        cap = cv2.VideoCapture(path)
+        count = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+        cap.release()
+        header, records = {}, None
+    for index in range(0, count, every):
+        metadata = dict(records[index]) if records else {"frame": index}
+        metadata["roi"] = header.get("roi")
+        yield (
+            f"{os.path.abspath(path)}#{index}",
+            index,
+            f"{_stem(path)}_{index:06d}",
+            metadata,
+        )
+
+
+def build_tasks(sources, every, chunk, done):
+    """
+    Split the inputs not yet in `done` into tasks for the pool.
+
+    Returns (tasks, inputs already done). A task is ("images", items)
+    with (input id, path, stem, metadata) items, or ("video", path,
+    items) with (input id, frame index, stem, metadata) items. Raises
+    ValueError if two inputs would be written under the same name.
+    """
+    tasks = []
+    skipped = 0
+    stems = {}
+
+    def add(kind, items, *args):
+        nonlocal skipped
+        for item in items:
+            other = stems.setdefault(item[2], item[0])
+            if other != item[0]:
+                raise ValueError(
+                    f"{item[0]} and {other} would both be written as "
+                    f"{item[2]}; rename one of the folders or recordings"
+                )
+        pending = [item for item in items if item[0] not in done]
+        skipped += len(items) - len(pending)
+        for start in range(0, len(pending), chunk):
+            tasks.append((kind, *args, pending[start : start + chunk]))
+
+    for source in sources:
+        if os.path.isdir(source):
+            images = _list_files(source, IMAGE_EXTENSIONS)
+            add("images", list(image_inputs(source, images)))
+            videos = [
+                p for p in _list_files(source, VIDEO_EXTENSIONS)
+                if _is_recording(p)
+            ]
+        elif source.lower().endswith(IMAGE_EXTENSIONS):
+            directory = os.path.dirname(source) or "."
+            add("images", list(image_inputs(directory, [source])))
+            videos = []
+        else:
+            videos = [source]
+        for video in videos:
+            add("video", list(video_inputs(video, every)), video)
+    return tasks, skipped
+
+
+# --- Workers ---
+def _init_worker(options):
+    global _OPTIONS
+    _OPTIONS = options
+    # The parent handles Ctrl+C; one OpenCV thread per process
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    cv2.setNumThreads(1)
+
+
+def _write_outputs(image, input_id, stem, metadata, result):
+    """Crop, encode and write every size of one source image."""
+    try:
+        records, skipped = _crop_and_write(image, input_id, stem, metadata)
+    except (OSError, cv2.error) as e:
+        print(f"Failed {input_id}: {e}")
+        result["failed"].append(input_id)
+        return
+    result["outputs"] += records
+    result["skipped"] += skipped
+    result["done"].append(input_id)
+
+
+def _crop_and_write(image, input_id, stem, metadata):
+    options = _OPTIONS
+    records = []
+    skipped = 0
+    height, width = image.shape[:2]
+    roi = metadata.get("roi")
+    if roi and tuple(roi[2:]) == (width, height):
+        outer = tuple(roi)
+    else:
+        outer = (0, 0, width, height)
+    for size in options["sizes"] or [None]:
+        rect = fit_rect(target_rect(outer, options["roi"], size), outer)
+        if rect is None:
+            skipped += 1
+            continue
+        x, y, w, h = rect
+        crop = crop_frame(image, (x - outer[0], y - outer[1], w, h))
+        name = os.path.join(
+            f"{w}x{h}" if size else "",
+            f"{options['prefix']}{stem}.{options['format']}",
+        )
+        data = encode_image(crop, options["format"], options["params"])
+        write_atomic(os.path.join(options["output"], name), data)
+        record = dict(metadata)
+        record.update(file=name, source=input_id, roi=list(rect))
+        records.append(record)
+    return records, skipped
+
+
+def run_task(task):
+    """Process one task in a pool worker; returns its manifest record."""
+    result = {"done": [], "failed": [], "skipped": 0, "outputs": []}
+    kind, items = task[0], task[-1]
+    if kind == "images":
+        for input_id, path, stem, metadata in items:
+            image = cv2.imread(path, cv2.IMREAD_UNCHANGED)
+            if image is None:
+                result["failed"].append(input_id)
+                continue
+            _write_outputs(image, input_id, stem, metadata, result)
+        return result
+
+    path = task[1]
+    cap = cv2.VideoCapture(path)
+    try:
+        position = items[0][1]
+        cap.set(cv2.CAP_PROP_POS_FRAMES, position)
+        if int(cap.get(cv2.CAP_PROP_POS_FRAMES)) != position:
+            # Not seekable: decode from the start
+            cap.release()
+            cap = cv2.VideoCapture(path)
+            position = 0
+        for input_id, index, stem, metadata in items:
+            while position < index and cap.grab():
+                position += 1
+            ok, frame = cap.read()
+            position += 1
+            if not ok:
+                result["failed"].append(input_id)
+                continue
+            _write_outputs(frame, input_id, stem, metadata, result)
+    finally:
+        cap.release()
+    return result
+
+
+# --- Manifest ---
+def open_manifest(output, options):
+    """
+    Open the manifest for appending and return (file, done input ids).
+
+    Raises ValueError if the output was built with different options.
+    """
+    path = os.path.join(output, MANIFEST_NAME)
+    done = set()
+    if os.path.exists(path):
+        with open(path) as f:
+            header = json.loads(f.readline())
+            if header["options"] != options:
+                raise ValueError(
+                    f"{output} was built with {header['options']}; "
+                    "use another output directory"
+                )
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    # Cut off by an interruption
+                    continue
+                done.update(record["done"])
+        return open(path, "a"), done
+    manifest = open(path, "w")
+    manifest.write(json.dumps({"options": options, "created": time.time()}))
+    manifest.write("\n")
+    manifest.flush()
+    return manifest, done
+
+
+def main(argv=None):
+    """Command-line entry point."""
+    parser = argparse.ArgumentParser(description=__doc__.strip().split("\n")[0])
+    parser.add_argument("sources", nargs="+",
+                        help="capture folders and/or video segments")
+    parser.add_argument("-o", "--output", required=True,
+                        help="output directory")
+    parser.add_argument("--size", type=parse_size, action="append",
+                        metavar="WxH",
+                        help="crop preset; repeat for several (default: "
+                             "the whole image or ROI)")
+    roi = parser.add_mutually_exclusive_group()
+    roi.add_argument("--roi", type=parse_rect, metavar="X,Y,W,H",
+                     help="centre crops on this region (sensor pixels)")
+    roi.add_argument("--display-roi", type=parse_rect, metavar="X,Y,W,H",
+                     help="centre crops on this region (preview pixels)")
+    parser.add_argument("--format", choices=FORMATS, default="png")
+    parser.add_argument("--prefix", default="")
+    parser.add_argument("--every", type=int, default=1,
+                        help="keep every Nth frame of recordings")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--chunk", type=int, default=32,
+                        help="images per task")
+    args = parser.parse_args(argv)
+    if args.every < 1 or args.chunk < 1 or args.workers < 1:
+        parser.error("--every, --chunk and --workers must be at least 1")
+
+    rect = args.roi
+    if args.display_roi:
+        rect = display_roi_to_sensor(args.display_roi)
+        if rect is None:
+            parser.error("--display-roi is outside the preview")
+    options = {
+        "sizes": [list(size) for size in args.size or []],
+        "roi": list(rect) if rect else None,
+        "format": args.format,
+        "prefix": args.prefix,
+        "every": args.every,
+    }
+    os.makedirs(args.output, exist_ok=True)
+    for size in args.size or []:
+        os.makedirs(os.path.join(args.output, f"{size[0]}x{size[1]}"),
+                    exist_ok=True)
+    try:
+        manifest, done = open_manifest(args.output, options)
+    except ValueError as e:
+        print(e)
+        return 2
+    for source in args.sources:
+        if not os.path.exists(source):
+            print(f"No such file or folder: {source}")
+            return 2
+
+    try:
+        tasks, already_done = build_tasks(
+            args.sources, args.every, args.chunk, done
+        )
+    except ValueError as e:
+        print(e)
+        manifest.close()
+        return 2
+    total = sum(len(task[-1]) for task in tasks)
+    if already_done:
+        print(f"Resuming: {already_done} inputs already done")
+    print(f"{total} inputs in {len(tasks)} tasks on {args.workers} workers")
+
+    worker_options = dict(
+        options,
+        output=args.output,
+        sizes=args.size or [],
+        roi=rect,
+        params=get_write_params(args.format),
+    )
+    images = inputs = skipped = 0
+    failed = []
+    interrupted = False
+    start = last_report = time.monotonic()
+    pool = multiprocessing.Pool(
+        args.workers, initializer=_init_worker, initargs=(worker_options,)
+    )
+    try:
+        for result in pool.imap_unordered(run_task, tasks):
+            manifest.write(json.dumps(result) + "\n")
+            manifest.flush()
+            images += len(result["outputs"])
+            inputs += len(result["done"])
+            skipped += result["skipped"]
+            failed += result["failed"]
+            now = time.monotonic()
+            if now - last_report >= 2.0:
+                last_report = now
+                print(
+                    f"  {inputs}/{total} inputs, {images} images, "
+                    f"{images / (now - start):.1f} images/s"
+                )
+        pool.close()
+    except KeyboardInterrupt:
+        interrupted = True
+        pool.terminate()
+    finally:
+        pool.join()
+        manifest.close()
+
+    elapsed = max(time.monotonic() - start, 1e-6)
+    print(
+        f"Wrote {images} images from {inputs} inputs in {elapsed:.1f} s "
+        f"({images / elapsed:.1f} images/s)"
+    )
+    if skipped:
+        print(f"  skipped {skipped} crops larger than their source image")
+    if failed:
+        print(f"  could not read {len(failed)} inputs, e.g. {failed[0]}")
+    if interrupted:
+        print("Interrupted; run the same command again to resume.")
+        return 1
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,74 @@
+"""
+Read frames from the collector's shared-memory frame bus.
+
+Run with:  python -m src.tools.frame_bus_reader --seconds 10
+
+A minimal consumer, and a way to check a running collector: it attaches
+to the bus (see src/core/frame_bus.py), reads the newest frame (or every
+frame with --every-frame), optionally simulates --work-ms of processing
+per frame, and prints the read rate, frame age and lost frames. Start
+several to see how the bus behaves with more readers.
+"""
+import argparse
+import statistics
+import sys
+import time
+
+from src.core.frame_bus import DEFAULT_NAME, FrameBusReader
+
+
+def main(argv=None):
+    """Command-line entry point."""
+    parser = argparse.ArgumentParser(description=__doc__.strip().split("\n")[0])
+    parser.add_argument("--name", default=DEFAULT_NAME,
+                        help="frame bus name (frame_bus.name)")
+    parser.add_argument("--seconds", type=float, default=10.0)
+    parser.add_argument("--every-frame", action="store_true",
+                        help="read frames in order instead of the newest")
+    parser.add_argument("--work-ms", type=float, default=0.0,
+                        help="simulated processing time per frame")
+    args = parser.parse_args(argv)
+
+    try:
+        reader = FrameBusReader(args.name)
+    except FileNotFoundError:
+        print(f"No frame bus {args.name!r}; is the collector publishing?")
+        return 1
+    read = reader.wait_next if args.every_frame else reader.wait_latest
+    ages = []
+    overwritten = 0
+    shape = None
+    start = time.monotonic()
+    with reader:
+        while time.monotonic() - start < args.seconds:
+            frame = read(timeout=0.5)
+            if frame is None:
+                if not reader.producer_alive:
+                    print("The collector stopped publishing.")
+                    break
+                continue
+            ages.append(frame.age)
+            shape = frame.array.shape
+            if args.work_ms:
+                time.sleep(args.work_ms / 1000.0)
+            if not frame.valid():
+                overwritten += 1
+            del frame
+        elapsed = time.monotonic() - start
+        lost = reader.lost
+
+    if not ages:
+        print("No frames received.")
+        return 1
+    print(
+        f"Read {len(ages)} frames {shape} in {elapsed:.1f} s "
+        f"({len(ages) / elapsed:.1f} fps)\n"
+        f"Age at read: median {statistics.median(ages) * 1000:.2f} ms, "
+        f"max {max(ages) * 1000:.2f} ms\n"
+        f"Lost: {lost}, overwritten while in use: {overwritten}"
+    )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,11 +1,14 @@
 import os
+import re
+import time
 
 import cv2
-from PyQt5.QtCore import Qt
+from PyQt5.QtCore import Qt, QTimer
 from PyQt5.QtGui import QImage, QKeySequence, QPixmap
 from PyQt5.QtWidgets import (
     QCheckBox,
     QComboBox,
+    QDoubleSpinBox,
     QFileDialog,
     QGroupBox,
     QHBoxLayout,
@@ -15,45 +18,218 @@ from PyQt5.QtWidgets import (
     QPushButton,
     QShortcut,
     QSlider,
+    QSpinBox,
     QVBoxLayout,
     QWidget,
 )
 
 from src.config import (
     APP_CONF,
+    AUTO_CONF,
+    BUS_CONF,
     CAM_CONF,
+    DEDUPE_CONF,
+    METRICS_CONF,
+    REC_CONF,
+    REMOTE_CONF,
+    RING_CONF,
+    SCOPES_CONF,
     DEFAULT_HEIGHT,
     DEFAULT_WIDTH,
     DISPLAY_HEIGHT,
     DISPLAY_WIDTH,
 )
-from src.core.video_thread import VideoThread
-from src.ui.widgets import VideoLabel
+from src.core.auto_capture import AutoCapture
+from src.core.burst import BurstCapture
+from src.core.catalog import CaptureCatalog
+from src.core.dedupe import DuplicateIndex
+from src.core.imaging import bounding_roi, display_rois_to_sensor
+from src.core.metrics import METRICS, MetricsExporter
+from src.core.pretrigger import PreTriggerCapture
+from src.core.recorder import CODECS, VideoRecorder
+from src.core.remote import RemoteServer
+from src.core.ring_buffer import ring_capacity, ring_window
+from src.core.scopes import ScopeWorker
+from src.core.settings import SettingsTransaction
+from src.core.shards import NPY_FORMAT, ShardSink
+from src.core.tar_shards import TarShardSink
+from src.core.video_thread import VideoThread, parse_framerate
+from src.core.writer import CaptureWriter
+from src.ui.remote_control import WindowController
+from src.ui.widgets import HistogramWidget, VideoLabel
+
+
+# Stages shown on the performance HUD, in pipeline order
+HUD_STAGES = (
+    "capture.read",
+    "capture.process",
+    "capture.listeners",
+    "preview.delivery",
+    "display.resize",
+    "display.cvtcolor",
+    "display.pixmap",
+    "save.submit",
+    "save.shard",
+    "writer.encode",
+    "writer.write",
+    "auto.metrics",
+    "dedupe.lookup",
+    "scopes.update",
+    "remote.encode",
+    "bus.publish",
+    "record.encode",
+)
+
+# Near-duplicate handling: (combo text, dedupe mode)
+DEDUPE_MODES = (("Keep", "off"), ("Flag", "flag"), ("Skip", "skip"))
+
+# Initial positions of the ISP controls; the camera is opened with the
+# matching settings before the controls are built
+CONTROL_DEFAULTS = {
+    "exposure": 5,
+    "gain": 10,
+    "saturation": 10,
+    "wb_mode": 1,  # auto
+    "tnr_mode": 1,  # fast
+    "tnr_strength": 5,
+    "ee_mode": 1,  # fast
+    "ee_strength": 5,
+    "ae_lock": False,
+    "awb_lock": False,
+    "h_flip": False,
+    "v_flip": False,
+}
+
+
+def control_isp_settings(controls, capture_roi=None):
+    """ISP settings (see VideoThread.get_settings) for control positions."""
+    min_exp = CAM_CONF["exposure_min"]
+    max_exp = int(
+        min_exp + controls["exposure"] * CAM_CONF["exposure_multiplier"]
+    )
+    gain = controls["gain"] / 10.0
+    return {
+        "exposure_range": (min_exp, max_exp),
+        "gain_range": (gain, gain),
+        "ae_lock": controls["ae_lock"],
+        "awb_lock": controls["awb_lock"],
+        "saturation": controls["saturation"] / 10.0,
+        "wb_mode": controls["wb_mode"],
+        "tnr_mode": controls["tnr_mode"],
+        "tnr_strength": controls["tnr_strength"] / 10.0,
+        "ee_mode": controls["ee_mode"],
+        "ee_strength": controls["ee_strength"] / 10.0,
+        "h_flip": controls["h_flip"],
+        "v_flip": controls["v_flip"],
+        "capture_roi": capture_roi,
+    }
 
 
 class DataCollectorApp(QMainWindow):
     """Main application window for data collection."""
 
-    def __init__(self):
-        """Initialize the main window."""
+    def __init__(self, source_type=None, remote=None):
+        """
+        Initialize the main window.
+
+        source_type and remote (serve the remote-control API) override
+        the config.
+        """
         super().__init__()
         self.setWindowTitle(APP_CONF["window_title"])
         geom = APP_CONF["window_geometry"]
         self.setGeometry(geom[0], geom[1], geom[2], geom[3])
 
+        # Open the camera first so it comes up while the window is built;
+        # frames are only delivered once the event loop runs. It starts
+        # with the settings the controls will show.
+        self.thread = VideoThread(source_type=source_type)
+        self.thread.frame_ready.connect(self.on_frame_ready)
+        self.thread.seed_settings(control_isp_settings(CONTROL_DEFAULTS))
+        self.thread.start()
+
         self.save_dir = os.path.join(os.getcwd(), APP_CONF["save_directory"])
         if not os.path.exists(self.save_dir):
             os.makedirs(self.save_dir)
+        self.catalog = CaptureCatalog(self.save_dir)
+        # Created on first use of the npy format / tar shards
+        self.shard_sink = None
+        self.tar_sink = None
+        # Opened when near-duplicate checks are switched on
+        self.dedupe_index = None
 
         self.current_frame = None
+        self.current_frame_seq = 0
+        self.current_frame_time = None
+        self._current_packet = None
+        self._display_buf = None
+        self._rgb_buf = None
         self.capture_count = 0
+        # path -> (catalog, metadata) of captures not yet on disk
+        self.pending_writes = {}
+
+        self.writer = CaptureWriter()
+        self.writer.write_finished.connect(self.on_write_finished)
+        self.writer.write_failed.connect(self.on_write_failed)
+        self.writer.write_skipped.connect(self.on_write_skipped)
+        self.writer.pending_changed.connect(self.update_pending_label)
+        self.writer.start()
 
         self.init_ui()
         self.update_filename_counter()
 
-        self.thread = VideoThread()
-        self.thread.change_pixmap_signal.connect(self.update_image)
-        self.thread.start()
+        self._awaiting_restart_frame = False
+        self.settings_txn = SettingsTransaction(self.thread)
+        self.settings_txn.applied.connect(self.on_settings_applied)
+        # Anything the controls start with beyond the defaults (e.g. a
+        # sensor ROI) goes through the usual path
+        self.settings_txn.request(self.control_settings())
+
+        self.burst = BurstCapture(self.thread)
+        self.burst.stats_updated.connect(self.update_burst_stats)
+        self.burst.finished.connect(self.on_burst_finished)
+
+        self.recorder = VideoRecorder(self.thread)
+        self.recorder.stats_updated.connect(self.update_record_stats)
+        self.recorder.finished.connect(self.on_record_finished)
+
+        self.pretrigger = PreTriggerCapture(self.thread)
+        self.pretrigger.finished.connect(self.on_event_captured)
+
+        self.auto_capture = AutoCapture()
+        self.auto_capture.video_thread = self.thread
+        self.auto_capture.triggered.connect(self.on_auto_triggered)
+        self.auto_capture.stats_updated.connect(self.update_auto_stats)
+        self.update_dedupe()
+
+        self.scopes = ScopeWorker()
+        self.scopes.updated.connect(self.on_scopes_updated)
+        self.chk_scopes.setChecked(SCOPES_CONF["enabled"])
+        self.toggle_scopes()
+
+        self._bus_timer = QTimer(self)
+        self._bus_timer.setInterval(1000)
+        self._bus_timer.timeout.connect(self.update_frame_bus_stats)
+        self.chk_frame_bus.setChecked(BUS_CONF["enabled"])
+
+        self._register_gauges()
+        self.metrics_exporter = None
+        if METRICS_CONF["export_path"]:
+            self.metrics_exporter = MetricsExporter(METRICS)
+            self.metrics_exporter.start()
+        self._hud_timer = QTimer(self)
+        self._hud_timer.setInterval(500)
+        self._hud_timer.timeout.connect(self.update_hud)
+        self.chk_hud.setChecked(METRICS_CONF["hud"])
+
+        self.remote = None
+        if REMOTE_CONF["enabled"] if remote is None else remote:
+            self.remote = RemoteServer(WindowController(self))
+            try:
+                self.remote.start()
+            except OSError as e:
+                print(f"Remote control disabled: {e}")
+                self.remote = None
         
         # Ensure the window has focus initially so shortcuts work immediately
         self.setFocus()
@@ -74,9 +250,11 @@ class DataCollectorApp(QMainWindow):
         cam_group = QGroupBox("ISP Control")
         cam_layout = QVBoxLayout()
         self.chk_ae_lock = QCheckBox("Lock Auto Exposure")
+        self.chk_ae_lock.setChecked(CONTROL_DEFAULTS["ae_lock"])
         self.chk_ae_lock.stateChanged.connect(self.trigger_restart)
         cam_layout.addWidget(self.chk_ae_lock)
         self.chk_awb_lock = QCheckBox("Lock White Balance")
+        self.chk_awb_lock.setChecked(CONTROL_DEFAULTS["awb_lock"])
         self.chk_awb_lock.stateChanged.connect(self.trigger_restart)
         cam_layout.addWidget(self.chk_awb_lock)
 
@@ -86,7 +264,7 @@ class DataCollectorApp(QMainWindow):
         self.exp_slider = QSlider(Qt.Horizontal)
         self.exp_slider.setMinimum(1)
         self.exp_slider.setMaximum(10)
-        self.exp_slider.setValue(5)
+        self.exp_slider.setValue(CONTROL_DEFAULTS["exposure"])
         self.exp_slider.sliderReleased.connect(self.trigger_restart)
         self.lbl_exp_val = QLabel(str(self.exp_slider.value()))
         self.exp_slider.valueChanged.connect(
@@ -101,7 +279,7 @@ class DataCollectorApp(QMainWindow):
         self.gain_slider = QSlider(Qt.Horizontal)
         self.gain_slider.setMinimum(10)
         self.gain_slider.setMaximum(100)  # 1.0 to 10.0
-        self.gain_slider.setValue(10)
+        self.gain_slider.setValue(CONTROL_DEFAULTS["gain"])
         self.gain_slider.sliderReleased.connect(self.trigger_restart)
         self.lbl_gain_val = QLabel(str(self.gain_slider.value() / 10.0))
         self.gain_slider.valueChanged.connect(
@@ -116,7 +294,7 @@ class DataCollectorApp(QMainWindow):
         self.sat_slider = QSlider(Qt.Horizontal)
         self.sat_slider.setMinimum(0)
         self.sat_slider.setMaximum(20)  # 0.0 to 2.0
-        self.sat_slider.setValue(10)
+        self.sat_slider.setValue(CONTROL_DEFAULTS["saturation"])
         self.sat_slider.sliderReleased.connect(self.trigger_restart)
         self.lbl_sat_val = QLabel(str(self.sat_slider.value() / 10.0))
         self.sat_slider.valueChanged.connect(
@@ -142,7 +320,7 @@ class DataCollectorApp(QMainWindow):
                 "manual",
             ]
         )
-        self.combo_wb.setCurrentIndex(1)  # auto
+        self.combo_wb.setCurrentIndex(CONTROL_DEFAULTS["wb_mode"])
         self.combo_wb.currentIndexChanged.connect(self.trigger_restart)
         cam_layout.addWidget(self.combo_wb)
 
@@ -150,7 +328,7 @@ class DataCollectorApp(QMainWindow):
         cam_layout.addWidget(QLabel("TNR Mode:"))
         self.combo_tnr = QComboBox()
         self.combo_tnr.addItems(["off", "fast", "high-quality"])
-        self.combo_tnr.setCurrentIndex(1)  # fast
+        self.combo_tnr.setCurrentIndex(CONTROL_DEFAULTS["tnr_mode"])
         self.combo_tnr.currentIndexChanged.connect(self.trigger_restart)
         cam_layout.addWidget(self.combo_tnr)
 
@@ -160,7 +338,7 @@ class DataCollectorApp(QMainWindow):
         self.tnr_str_slider = QSlider(Qt.Horizontal)
         self.tnr_str_slider.setMinimum(0)
         self.tnr_str_slider.setMaximum(10)  # 0.0 to 1.0
-        self.tnr_str_slider.setValue(5)
+        self.tnr_str_slider.setValue(CONTROL_DEFAULTS["tnr_strength"])
         self.tnr_str_slider.sliderReleased.connect(self.trigger_restart)
         self.lbl_tnr_val = QLabel(str(self.tnr_str_slider.value() / 10.0))
         self.tnr_str_slider.valueChanged.connect(
@@ -173,7 +351,7 @@ class DataCollectorApp(QMainWindow):
         cam_layout.addWidget(QLabel("Edge Enhancement Mode:"))
         self.combo_ee = QComboBox()
         self.combo_ee.addItems(["off", "fast", "high-quality"])
-        self.combo_ee.setCurrentIndex(1)  # fast
+        self.combo_ee.setCurrentIndex(CONTROL_DEFAULTS["ee_mode"])
         self.combo_ee.currentIndexChanged.connect(self.trigger_restart)
         cam_layout.addWidget(self.combo_ee)
 
@@ -183,7 +361,7 @@ class DataCollectorApp(QMainWindow):
         self.ee_str_slider = QSlider(Qt.Horizontal)
         self.ee_str_slider.setMinimum(0)
         self.ee_str_slider.setMaximum(10)  # 0.0 to 1.0
-        self.ee_str_slider.setValue(5)
+        self.ee_str_slider.setValue(CONTROL_DEFAULTS["ee_strength"])
         self.ee_str_slider.sliderReleased.connect(self.trigger_restart)
         self.lbl_ee_val = QLabel(str(self.ee_str_slider.value() / 10.0))
         self.ee_str_slider.valueChanged.connect(
@@ -195,16 +373,58 @@ class DataCollectorApp(QMainWindow):
         # Flip Controls
         flip_layout = QHBoxLayout()
         self.chk_h_flip = QCheckBox("Horizontal Flip")
+        self.chk_h_flip.setChecked(CONTROL_DEFAULTS["h_flip"])
         self.chk_h_flip.stateChanged.connect(self.trigger_restart)
         flip_layout.addWidget(self.chk_h_flip)
 
         self.chk_v_flip = QCheckBox("Vertical Flip")
+        self.chk_v_flip.setChecked(CONTROL_DEFAULTS["v_flip"])
         self.chk_v_flip.stateChanged.connect(self.trigger_restart)
         flip_layout.addWidget(self.chk_v_flip)
         cam_layout.addLayout(flip_layout)
 
+        self.lbl_restart_stats = QLabel("Restarts: 0")
+        self.lbl_restart_stats.setStyleSheet("font-size: 10px; color: gray;")
+        cam_layout.addWidget(self.lbl_restart_stats)
+
+        self.chk_hud = QCheckBox("Performance HUD")
+        self.chk_hud.stateChanged.connect(self.toggle_hud)
+        cam_layout.addWidget(self.chk_hud)
+
         cam_group.setLayout(cam_layout)
         left_panel.addWidget(cam_group)
+
+        scope_group = QGroupBox("Scopes")
+        scope_layout = QVBoxLayout()
+        self.chk_scopes = QCheckBox("Live scopes")
+        self.chk_scopes.setToolTip(
+            f"Histogram, clipping and sharpness of the preview, computed "
+            f"in the background at up to {SCOPES_CONF['rate_hz']:g} Hz."
+        )
+        self.chk_scopes.stateChanged.connect(self.toggle_scopes)
+        scope_layout.addWidget(self.chk_scopes)
+
+        overlay_layout = QHBoxLayout()
+        self.chk_clipping = QCheckBox("Clipping")
+        self.chk_clipping.setToolTip(
+            "Mark clipped highlights (red) and shadows (blue) on the preview"
+        )
+        self.chk_clipping.stateChanged.connect(self.update_scope_overlays)
+        overlay_layout.addWidget(self.chk_clipping)
+        self.chk_peaking = QCheckBox("Focus peaking")
+        self.chk_peaking.setToolTip("Mark sharp edges (green) on the preview")
+        self.chk_peaking.stateChanged.connect(self.update_scope_overlays)
+        overlay_layout.addWidget(self.chk_peaking)
+        scope_layout.addLayout(overlay_layout)
+
+        self.histogram = HistogramWidget()
+        scope_layout.addWidget(self.histogram)
+
+        self.lbl_scopes = QLabel("")
+        self.lbl_scopes.setStyleSheet("font-size: 10px; color: gray;")
+        scope_layout.addWidget(self.lbl_scopes)
+        scope_group.setLayout(scope_layout)
+        left_panel.addWidget(scope_group)
         left_panel.addStretch()
 
         # --- CENTER: Video Feed ---
@@ -255,13 +475,51 @@ class DataCollectorApp(QMainWindow):
         data_layout.addWidget(QLabel("Image Format:"))
         self.combo_format = QComboBox()
         # Added tiff and bmp. Note: png is lossless by default.
-        self.combo_format.addItems(["jpg", "png", "tiff", "bmp"])
+        # npy appends raw crops to memory-mapped shards (no encoding).
+        self.combo_format.addItems(["jpg", "png", "tiff", "bmp", NPY_FORMAT])
         self.combo_format.setCurrentText("png")
         self.combo_format.currentTextChanged.connect(
             self.update_filename_counter
         )
         data_layout.addWidget(self.combo_format)
 
+        self.chk_tar = QCheckBox("Stream into tar shards")
+        self.chk_tar.setToolTip(
+            "Write encoded images and JSON metadata into rolling .tar "
+            "shards instead of one file per capture"
+        )
+        self.chk_tar.stateChanged.connect(self.update_filename_counter)
+        data_layout.addWidget(self.chk_tar)
+
+        dedupe_layout = QHBoxLayout()
+        dedupe_layout.addWidget(QLabel("Near-duplicates:"))
+        self.combo_dedupe = QComboBox()
+        self.combo_dedupe.setToolTip(
+            "Compare a perceptual hash of every capture with the images "
+            "already in the save directory; flag near-duplicates in their "
+            "metadata or skip them (npy shards are not checked)."
+        )
+        for text, mode in DEDUPE_MODES:
+            self.combo_dedupe.addItem(text, mode)
+        self.combo_dedupe.setCurrentIndex(
+            max(0, self.combo_dedupe.findData(DEDUPE_CONF["mode"]))
+        )
+        self.combo_dedupe.currentIndexChanged.connect(self.update_dedupe)
+        dedupe_layout.addWidget(self.combo_dedupe)
+        data_layout.addLayout(dedupe_layout)
+
+        self.chk_frame_bus = QCheckBox("Share frames with other processes")
+        self.chk_frame_bus.setToolTip(
+            f"Publish {BUS_CONF['stream']} frames to the shared-memory "
+            f"frame bus {BUS_CONF['name']!r} for inference or labelling "
+            "processes (see src/core/frame_bus.py)"
+        )
+        self.chk_frame_bus.stateChanged.connect(self.toggle_frame_bus)
+        data_layout.addWidget(self.chk_frame_bus)
+        self.lbl_frame_bus = QLabel("")
+        self.lbl_frame_bus.setStyleSheet("font-size: 10px; color: gray;")
+        data_layout.addWidget(self.lbl_frame_bus)
+
         data_group.setLayout(data_layout)
         right_panel.addWidget(data_group)
 
@@ -277,9 +535,54 @@ class DataCollectorApp(QMainWindow):
         self.btn_capture.clicked.connect(self.save_image)
         cap_layout.addWidget(self.btn_capture)
 
-        self.btn_reset_roi = QPushButton("Reset ROI")
+        # --- PRE-TRIGGER EVENT CAPTURE ---
+        self.chk_pretrigger = QCheckBox(
+            f"Pre-trigger buffer ({self._pretrigger_seconds():.1f} s)")
+        self.chk_pretrigger.stateChanged.connect(self.toggle_pretrigger)
+        cap_layout.addWidget(self.chk_pretrigger)
+
+        self.btn_event = QPushButton("CAPTURE EVENT")
+        self.btn_event.setEnabled(False)
+        self.btn_event.clicked.connect(self.capture_event)
+        cap_layout.addWidget(self.btn_event)
+
+        # --- REGIONS ---
+        roi_buttons = QHBoxLayout()
+        self.btn_delete_roi = QPushButton("Delete ROI")
+        self.btn_delete_roi.clicked.connect(self.image_label.delete_selected)
+        roi_buttons.addWidget(self.btn_delete_roi)
+        self.btn_reset_roi = QPushButton("Reset ROIs")
         self.btn_reset_roi.clicked.connect(self.reset_roi)
-        cap_layout.addWidget(self.btn_reset_roi)
+        roi_buttons.addWidget(self.btn_reset_roi)
+        cap_layout.addLayout(roi_buttons)
+
+        roi_label_layout = QHBoxLayout()
+        roi_label_layout.addWidget(QLabel("ROI Label:"))
+        self.txt_roi_label = QLineEdit()
+        self.txt_roi_label.setPlaceholderText("selected ROI, optional")
+        self.txt_roi_label.setEnabled(False)
+        self.txt_roi_label.textEdited.connect(self.update_roi_label)
+        self.txt_roi_label.returnPressed.connect(self.txt_roi_label.clearFocus)
+        roi_label_layout.addWidget(self.txt_roi_label)
+        cap_layout.addLayout(roi_label_layout)
+
+        self.chk_sensor_roi = QCheckBox("Crop ROIs on the sensor")
+        self.chk_sensor_roi.setToolTip(
+            "Crop to the ROIs in the camera pipeline so only that region "
+            "is converted and copied (Argus dual-stream only; other "
+            "sources crop in software)."
+        )
+        self.chk_sensor_roi.setChecked(CAM_CONF["sensor_roi"])
+        self.chk_sensor_roi.stateChanged.connect(self.trigger_restart)
+        cap_layout.addWidget(self.chk_sensor_roi)
+
+        self.lbl_roi_count = QLabel("ROIs: 0 (full frame)")
+        self.lbl_roi_count.setStyleSheet("font-size: 10px; color: gray;")
+        cap_layout.addWidget(self.lbl_roi_count)
+        self.image_label.regions_changed.connect(self.on_regions_changed)
+        self.image_label.selection_changed.connect(self._sync_roi_controls)
+        self.image_label.selection_changed.connect(self._update_scope_region)
+        self._sync_roi_controls()
 
         # --- ROI SIZE SELECTOR ---
         cap_layout.addWidget(QLabel("ROI Size:"))
@@ -293,55 +596,349 @@ class DataCollectorApp(QMainWindow):
         self.lbl_counter = QLabel("Next Filename: ...")
         self.lbl_counter.setAlignment(Qt.AlignCenter)
         cap_layout.addWidget(self.lbl_counter)
+
+        self.lbl_pending = QLabel("Pending writes: 0")
+        self.lbl_pending.setAlignment(Qt.AlignCenter)
+        self.lbl_pending.setStyleSheet("font-size: 10px; color: gray;")
+        cap_layout.addWidget(self.lbl_pending)
         cap_group.setLayout(cap_layout)
         right_panel.addWidget(cap_group)
 
+        # 4. Burst Capture
+        burst_group = QGroupBox("Burst")
+        burst_layout = QVBoxLayout()
+        self.combo_burst_mode = QComboBox()
+        self.combo_burst_mode.addItems(
+            ["Frame Count", "Duration (s)", "Continuous"]
+        )
+        self.combo_burst_mode.currentIndexChanged.connect(
+            lambda i: self.spin_burst_value.setEnabled(i != 2))
+        burst_layout.addWidget(self.combo_burst_mode)
+
+        self.spin_burst_value = QSpinBox()
+        self.spin_burst_value.setRange(1, 100000)
+        self.spin_burst_value.setValue(30)
+        burst_layout.addWidget(self.spin_burst_value)
+
+        stride_layout = QHBoxLayout()
+        stride_layout.addWidget(QLabel("Every Kth frame:"))
+        self.spin_burst_stride = QSpinBox()
+        self.spin_burst_stride.setRange(1, 1000)
+        stride_layout.addWidget(self.spin_burst_stride)
+        burst_layout.addLayout(stride_layout)
+
+        self.btn_burst = QPushButton("START BURST")
+        self.btn_burst.clicked.connect(self.toggle_burst)
+        burst_layout.addWidget(self.btn_burst)
+
+        self.lbl_burst_stats = QLabel("")
+        self.lbl_burst_stats.setStyleSheet("font-size: 10px; color: gray;")
+        burst_layout.addWidget(self.lbl_burst_stats)
+        burst_group.setLayout(burst_layout)
+        right_panel.addWidget(burst_group)
+
+        # 5. Video Recording
+        rec_group = QGroupBox("Record Video")
+        rec_layout = QVBoxLayout()
+        self.combo_codec = QComboBox()
+        for codec, (_, _, description) in CODECS.items():
+            self.combo_codec.addItem(codec, codec)
+            self.combo_codec.setItemData(
+                self.combo_codec.count() - 1, description, Qt.ToolTipRole
+            )
+        self.combo_codec.setCurrentIndex(
+            max(self.combo_codec.findData(REC_CONF["codec"]), 0)
+        )
+        rec_layout.addWidget(self.combo_codec)
+
+        segment_layout = QHBoxLayout()
+        segment_layout.addWidget(QLabel("Segment (s):"))
+        self.spin_segment = QSpinBox()
+        self.spin_segment.setRange(1, 3600)
+        self.spin_segment.setValue(REC_CONF["segment_seconds"])
+        segment_layout.addWidget(self.spin_segment)
+        rec_layout.addLayout(segment_layout)
+
+        self.chk_record_roi = QCheckBox("Selected ROI only")
+        rec_layout.addWidget(self.chk_record_roi)
+
+        self.btn_record = QPushButton("START RECORDING")
+        self.btn_record.clicked.connect(self.toggle_recording)
+        rec_layout.addWidget(self.btn_record)
+
+        self.lbl_record_stats = QLabel("")
+        self.lbl_record_stats.setStyleSheet("font-size: 10px; color: gray;")
+        rec_layout.addWidget(self.lbl_record_stats)
+        rec_group.setLayout(rec_layout)
+        right_panel.addWidget(rec_group)
+
+        # 6. Auto Capture
+        auto_group = QGroupBox("Auto Capture")
+        auto_layout = QVBoxLayout()
+        self.chk_auto = QCheckBox("Capture sharp, still frames")
+        self.chk_auto.setToolTip(
+            "Score every preview frame (sharpness, motion, clipping) in the "
+            "background and save it like a manual capture when it passes."
+        )
+        self.chk_auto.stateChanged.connect(self.toggle_auto_capture)
+        auto_layout.addWidget(self.chk_auto)
+
+        focus_layout = QHBoxLayout()
+        focus_layout.addWidget(QLabel("Min sharpness:"))
+        self.spin_auto_focus = QDoubleSpinBox()
+        self.spin_auto_focus.setRange(0.0, 100000.0)
+        self.spin_auto_focus.setDecimals(0)
+        self.spin_auto_focus.setSingleStep(10.0)
+        self.spin_auto_focus.setValue(AUTO_CONF["min_focus"])
+        self.spin_auto_focus.valueChanged.connect(self.update_auto_thresholds)
+        focus_layout.addWidget(self.spin_auto_focus)
+        auto_layout.addLayout(focus_layout)
+
+        interval_layout = QHBoxLayout()
+        interval_layout.addWidget(QLabel("Min interval (s):"))
+        self.spin_auto_interval = QDoubleSpinBox()
+        self.spin_auto_interval.setRange(0.0, 3600.0)
+        self.spin_auto_interval.setSingleStep(0.5)
+        self.spin_auto_interval.setValue(AUTO_CONF["min_interval"])
+        self.spin_auto_interval.valueChanged.connect(
+            self.update_auto_thresholds
+        )
+        interval_layout.addWidget(self.spin_auto_interval)
+        auto_layout.addLayout(interval_layout)
+
+        self.lbl_auto_stats = QLabel("")
+        self.lbl_auto_stats.setStyleSheet("font-size: 10px; color: gray;")
+        auto_layout.addWidget(self.lbl_auto_stats)
+        auto_group.setLayout(auto_layout)
+        right_panel.addWidget(auto_group)
+
         right_panel.addStretch()
 
+    def on_frame_ready(self):
+        """Pull the newest preview frame from the VideoThread mailbox."""
+        packet = self.thread.mailbox.take_latest()
+        if packet is None:
+            return
+        # Hand the previous frame's pooled buffer back to the camera thread
+        if self._current_packet is not None:
+            self._current_packet.release()
+        self._current_packet = packet
+        self.current_frame_seq = packet.seq
+        self.current_frame_time = packet.timestamp
+        # Scored in the auto-capture and scope workers, never on this thread
+        self.auto_capture.submit(packet)
+        self.scopes.submit(packet)
+        if self.remote is not None:
+            self.remote.submit(packet)
+        if METRICS.enabled:
+            # Capture to GUI: signal delivery plus any event-loop backlog
+            METRICS.observe(
+                "preview.delivery", time.monotonic() - packet.timestamp
+            )
+            METRICS.inc("frames_displayed")
+        self.update_image(packet.frame)
+
     def update_image(self, cv_img):
         """Update the image label with the new frame."""
         self.current_frame = cv_img
-        
-        # Resize for display (DISPLAY_WIDTH, DISPLAY_HEIGHT)
-        display_frame = cv2.resize(cv_img, (DISPLAY_WIDTH, DISPLAY_HEIGHT))
-        
-        rgb_img = cv2.cvtColor(display_frame, cv2.COLOR_BGR2RGB)
+        if self._awaiting_restart_frame:
+            self._awaiting_restart_frame = False
+            self.update_restart_stats()
+
+        # Resize for display (DISPLAY_WIDTH, DISPLAY_HEIGHT), unless the
+        # dual-stream pipeline already delivered a display-sized frame
+        # Both destination arrays are reused between frames; QPixmap makes
+        # its own copy of the pixels.
+        timed = METRICS.enabled
+        if timed:
+            t0 = time.perf_counter()
+        display_frame = cv_img
+        if cv_img.shape[:2] != (DISPLAY_HEIGHT, DISPLAY_WIDTH):
+            display_frame = cv2.resize(
+                cv_img, (DISPLAY_WIDTH, DISPLAY_HEIGHT), dst=self._display_buf
+            )
+            self._display_buf = display_frame
+        if timed:
+            t1 = time.perf_counter()
+
+        rgb_img = cv2.cvtColor(
+            display_frame, cv2.COLOR_BGR2RGB, dst=self._rgb_buf
+        )
+        self._rgb_buf = rgb_img
+        if timed:
+            t2 = time.perf_counter()
         h, w, ch = rgb_img.shape
         qt_img = QImage(rgb_img.data, w, h, ch * w, QImage.Format_RGB888)
         self.image_label.setPixmap(QPixmap.fromImage(qt_img))
+        if timed:
+            METRICS.observe("display.resize", t1 - t0)
+            METRICS.observe("display.cvtcolor", t2 - t1)
+            METRICS.observe("display.pixmap", time.perf_counter() - t2)
 
     def trigger_restart(self):
-        """Restart the video thread with new settings."""
-        val = self.exp_slider.value()
-        min_exp = CAM_CONF["exposure_min"]
-        max_exp = int(min_exp + (val * CAM_CONF["exposure_multiplier"]))
-
-        gain_val = self.gain_slider.value() / 10.0
-        saturation = self.sat_slider.value() / 10.0
-        wb_mode = self.combo_wb.currentIndex()
-        tnr_mode = self.combo_tnr.currentIndex()
-        tnr_strength = self.tnr_str_slider.value() / 10.0
-        ee_mode = self.combo_ee.currentIndex()
-        ee_strength = self.ee_str_slider.value() / 10.0
-        h_flip = self.chk_h_flip.isChecked()
-        v_flip = self.chk_v_flip.isChecked()
-
-        self.image_label.setText("Applying Settings...")
-        self.thread.update_settings(
-            (min_exp, max_exp),
-            (gain_val, gain_val),
-            self.chk_ae_lock.isChecked(),
-            self.chk_awb_lock.isChecked(),
-            saturation,
-            wb_mode,
-            tnr_mode,
-            tnr_strength,
-            ee_mode,
-            ee_strength,
-            h_flip,
-            v_flip,
+        """Queue the current control values to be applied to the camera."""
+        self.settings_txn.request(self.control_settings())
+
+    def control_settings(self):
+        """The ISP settings the controls currently ask for."""
+        controls = {
+            "exposure": self.exp_slider.value(),
+            "gain": self.gain_slider.value(),
+            "saturation": self.sat_slider.value(),
+            "wb_mode": self.combo_wb.currentIndex(),
+            "tnr_mode": self.combo_tnr.currentIndex(),
+            "tnr_strength": self.tnr_str_slider.value(),
+            "ee_mode": self.combo_ee.currentIndex(),
+            "ee_strength": self.ee_str_slider.value(),
+            "ae_lock": self.chk_ae_lock.isChecked(),
+            "awb_lock": self.chk_awb_lock.isChecked(),
+            "h_flip": self.chk_h_flip.isChecked(),
+            "v_flip": self.chk_v_flip.isChecked(),
+        }
+        return control_isp_settings(controls, self._capture_roi())
+
+    def _capture_roi(self):
+        """Sensor region for the pipeline to crop to, or None."""
+        if not self.chk_sensor_roi.isChecked():
+            return None
+        rects = [rect for rect, _ in self._get_sensor_regions()]
+        return bounding_roi(rects)
+
+    def on_settings_applied(self, result):
+        """Reflect the outcome of a settings change in the UI."""
+        if result == "restart":
+            self.image_label.setText("Applying Settings...")
+            self._awaiting_restart_frame = True
+        self.update_restart_stats()
+
+    def update_restart_stats(self):
+        """Show how many pipeline restarts were made or avoided."""
+        stats = self.settings_txn.get_stats()
+        text = (
+            f"Restarts: {stats['restarts']} "
+            f"(avoided {stats['restarts_avoided']})"
+        )
+        if stats["last_restart_latency"] is not None:
+            text += f", last {stats['last_restart_latency'] * 1000:.0f} ms"
+        self.lbl_restart_stats.setText(text)
+
+    def _register_gauges(self):
+        """Expose queue depths, drops and buffer usage to METRICS."""
+        METRICS.register_gauge("writer_pending", lambda: self.writer.pending)
+        METRICS.register_gauge(
+            "burst_queue_depth", lambda: self.burst.writer.pending
+        )
+        METRICS.register_gauge(
+            "mailbox_dropped", lambda: self.thread.mailbox.dropped
+        )
+        METRICS.register_gauge(
+            "buffer_pool_in_use",
+            lambda: self.thread.buffer_pool.stats()["in_use"],
+        )
+        METRICS.register_gauge(
+            "ring_buffer_bytes",
+            lambda: self.thread.ring_buffer.nbytes
+            if self.thread.ring_buffer else 0,
+        )
+
+    def toggle_hud(self):
+        """Show or hide the performance HUD on the preview."""
+        if self.chk_hud.isChecked():
+            METRICS.enabled = True
+            self._hud_timer.start()
+            self.update_hud()
+        else:
+            self._hud_timer.stop()
+            self.image_label.set_hud(None)
+            # Keep collecting only if configured or exporting
+            METRICS.enabled = (
+                METRICS_CONF["enabled"] or self.metrics_exporter is not None
+            )
+
+    def toggle_scopes(self):
+        """Start or stop the live scopes."""
+        enabled = self.chk_scopes.isChecked()
+        self.chk_clipping.setEnabled(enabled)
+        self.chk_peaking.setEnabled(enabled)
+        if enabled:
+            self._update_scope_region()
+            self.update_scope_overlays()
+            self.scopes.start()
+            return
+        self.scopes.stop()
+        self.histogram.set_histogram(None)
+        self.image_label.set_overlay(None)
+        self.lbl_scopes.setText("")
+
+    def update_scope_overlays(self):
+        """Choose which overlays the scopes draw on the preview."""
+        self.scopes.clipping = self.chk_clipping.isChecked()
+        self.scopes.peaking = self.chk_peaking.isChecked()
+        if not (self.scopes.clipping or self.scopes.peaking):
+            self.image_label.set_overlay(None)
+
+    def _update_scope_region(self):
+        """Measure sharpness in the selected ROI (or the whole frame)."""
+        self.scopes.set_region(self._get_sensor_roi())
+
+    def on_scopes_updated(self, scopes):
+        """Show a scope update from the worker."""
+        if not self.scopes.is_running:
+            return
+        self.histogram.set_histogram(scopes["hist"])
+        overlay = scopes.get("overlay")
+        if overlay is not None and (
+            self.scopes.clipping or self.scopes.peaking
+        ):
+            h, w = overlay.shape[:2]
+            image = QImage(overlay.data, w, h, 4 * w, QImage.Format_RGBA8888)
+            # QImage doesn't own the array; keep a deep copy
+            self.image_label.set_overlay(image.copy())
+        region = "ROI" if self.scopes.region else "frame"
+        self.lbl_scopes.setText(
+            f"Sharpness ({region}): {scopes['focus']:.0f}\n"
+            f"Clipped: highlights {scopes['highlights'] * 100:.1f}%, "
+            f"shadows {scopes['shadows'] * 100:.1f}%\n"
+            f"Cost: {scopes['cost_ms']:.2f} ms per update "
+            f"(max {self.scopes.rate_hz:g} Hz)"
         )
 
+    def update_hud(self):
+        """Refresh the HUD text from a metrics snapshot."""
+        snap = METRICS.snapshot()
+        rates = snap["rates"]
+        gauges = snap["gauges"]
+        lines = [
+            f"fps  capture {rates.get('frames_captured', 0.0):5.1f}  "
+            f"display {rates.get('frames_displayed', 0.0):5.1f}",
+            "stage              mean    p95  (ms)",
+        ]
+        for stage in HUD_STAGES:
+            s = snap["stages"].get(stage)
+            if s is None:
+                continue
+            lines.append(
+                f"{stage:<17}{s['mean'] * 1000:6.2f} {s['p95'] * 1000:6.2f}"
+            )
+        lines.append(
+            f"drops  preview {gauges.get('mailbox_dropped', 0)}  "
+            f"writer {snap['counters'].get('writer_rejected', 0)}"
+        )
+        lines.append(
+            f"queue  writer {gauges.get('writer_pending', 0)}  "
+            f"burst {gauges.get('burst_queue_depth', 0)}  "
+            f"buffers {gauges.get('buffer_pool_in_use', 0)}"
+        )
+        proc = snap["process"]
+        text = ""
+        if proc["rss_bytes"] is not None:
+            text += f"RSS {proc['rss_bytes'] / 2**20:.0f} MB  "
+        if proc["cpu_percent"] is not None:
+            text += f"CPU {proc['cpu_percent']:.0f}%"
+        if text:
+            lines.append(text.strip())
+        self.image_label.set_hud(lines)
+
     def select_directory(self):
         """Open a dialog to select the save directory."""
         directory = QFileDialog.getExistingDirectory(
@@ -349,61 +946,55 @@ class DataCollectorApp(QMainWindow):
         )
         if directory:
             self.save_dir = directory
+            # Pending writes keep a reference to the old catalog
+            self.catalog = CaptureCatalog(self.save_dir)
             self.lbl_dir.setText(f"Save Path:\n{self.save_dir}")
+            self.update_dedupe()
             self.update_filename_counter()
 
-    def get_next_index(self, directory, prefix, fmt):
-        """Helper to find the next available index in a directory."""
-        if not os.path.exists(directory):
-            return 1
-            
-        existing_files = os.listdir(directory)
-        max_idx = 0
-
-        for f in existing_files:
-            if f.endswith(f".{fmt}"):
-                name_part = f[: -len(fmt) - 1]  # remove extension and dot
-
-                if prefix:
-                    if name_part.startswith(prefix):
-                        # Check if the rest is a number
-                        suffix = name_part[len(prefix) :]
-                        if suffix.isdigit():
-                            try:
-                                idx = int(suffix)
-                                if idx > max_idx:
-                                    max_idx = idx
-                            except ValueError:
-                                pass
-                else:
-                    # No prefix, check if the whole name is a number
-                    if name_part.isdigit():
-                        try:
-                            idx = int(name_part)
-                            if idx > max_idx:
-                                max_idx = idx
-                        except ValueError:
-                            pass
-        return max_idx + 1
+    def update_dedupe(self):
+        """Point every writer at the duplicate index for the save directory."""
+        mode = self.combo_dedupe.currentData()
+        index = None
+        if mode != "off":
+            index = self.dedupe_index
+            if index is None or index.directory != self.save_dir:
+                # Writes still in flight keep a reference to the old index
+                index = self.dedupe_index = DuplicateIndex(self.save_dir)
+        for writer in (self.writer, self.burst.writer,
+                       self.pretrigger.writer):
+            writer.dedupe = index
+            writer.keep_duplicates = mode == "flag"
 
     def update_filename_counter(self):
         """Recalculate the next index based on SELECTED extensionn & prefix."""
         fmt = self.combo_format.currentText()
         prefix = self.txt_prefix.text().strip()
-        idx = self.get_next_index(self.save_dir, prefix, fmt)
+        if fmt == NPY_FORMAT:
+            self.lbl_counter.setText(
+                f"Next: {self._shard_sink().describe_next()}"
+            )
+            return
+        if self.chk_tar.isChecked():
+            self.lbl_counter.setText(
+                f"Next: {self._tar_sink().describe_next()}"
+            )
+            return
+        idx = self.catalog.next_index(prefix, fmt)
         self.capture_count = idx
         self.lbl_counter.setText(
             f"Next: {prefix}{self.capture_count:04d}.{fmt}"
         )
 
     def reset_roi(self):
-        """Reset the ROI selection."""
+        """Remove every ROI."""
         self.image_label.clear_roi()
         self.combo_roi_size.setCurrentIndex(0)  # Reset to Free Select
 
     def update_roi_size(self, text):
         """Update ROI size based on selection."""
         if text == "Free Select":
+            self.image_label.set_free_size()
             return
         try:
             w, h = map(int, text.split("x"))
@@ -411,83 +1002,465 @@ class DataCollectorApp(QMainWindow):
         except ValueError:
             pass
 
-    def _save_frame_to_path(self, path):
-        """Internal method to save the frame to the given path."""
-        fmt = self.combo_format.currentText()
-        img_to_save = self.current_frame
-        
-        # --- ROI CROP LOGIC ---
+    def update_roi_label(self, text):
+        """Rename the selected ROI; the label becomes part of file names."""
+        self.image_label.set_selected_label(
+            re.sub(r"[^\w-]+", "_", text.strip())
+        )
+
+    def on_regions_changed(self):
+        """ROIs were added, moved or removed."""
+        self._sync_roi_controls()
+        self.auto_capture.set_region(self._auto_region())
+        self._update_scope_region()
+        if self.chk_sensor_roi.isChecked():
+            # Re-crop the pipeline (debounced with the other settings)
+            self.trigger_restart()
+
+    def _sync_roi_controls(self):
+        """Sync the ROI controls with the regions on the preview."""
+        count = len(self.image_label.regions)
+        self.lbl_roi_count.setText(
+            f"ROIs: {count}" if count else "ROIs: 0 (full frame)"
+        )
+        has_selection = self.image_label.selected is not None
+        self.txt_roi_label.setEnabled(has_selection)
+        self.btn_delete_roi.setEnabled(has_selection)
+        if self.txt_roi_label.text() != self.image_label.selected_label():
+            self.txt_roi_label.setText(self.image_label.selected_label())
+
+    def _get_sensor_roi(self):
+        """Return the selected ROI in sensor coordinates, or None."""
         roi = self.image_label.get_roi()
-        if roi:
-            x, y, w, h = roi
-            # Scale coordinates
-            # current_frame is DEFAULT_WIDTH x DEFAULT_HEIGHT (1280x720)
-            # display is DISPLAY_WIDTH x DISPLAY_HEIGHT (960x540)
-            scale_x = DEFAULT_WIDTH / DISPLAY_WIDTH
-            scale_y = DEFAULT_HEIGHT / DISPLAY_HEIGHT
-
-            real_x = int(round(x * scale_x))
-            real_y = int(round(y * scale_y))
-            real_w = int(round(w * scale_x))
-            real_h = int(round(h * scale_y))
-
-            # If a strict ROI size is selected, enforce it exactly (ignoring rounding drift)
-            # unless it goes out of bounds.
-            current_roi_selection = self.combo_roi_size.currentText()
-            if current_roi_selection != "Free Select":
-                try:
-                    target_w, target_h = map(int, current_roi_selection.split("x"))
-                    
-                    # Calculate center of the current rounded ROI
-                    center_x = real_x + (real_w / 2.0)
-                    center_y = real_y + (real_h / 2.0)
-
-                    # Update dimensions
-                    real_w = target_w
-                    real_h = target_h
-
-                    # Recalculate top-left to keep centered
-                    real_x = int(round(center_x - (real_w / 2.0)))
-                    real_y = int(round(center_y - (real_h / 2.0)))
-
-                except ValueError:
-                    pass
-
-            # Clamp
-            real_x = max(0, real_x)
-            real_y = max(0, real_y)
-            real_w = min(DEFAULT_WIDTH - real_x, real_w)
-            real_h = min(DEFAULT_HEIGHT - real_y, real_h)
-
-            if real_w > 0 and real_h > 0:
-                img_to_save = img_to_save[
-                    real_y : real_y + real_h, real_x : real_x + real_w
-                ]
-
-        # --- HIGH QUALITY SAVING LOGIC ---
-        params = []
-        if fmt == "jpg":
-            # Quality 0-100 (Default is 95). We set 100 for AI Data.
-            params = [cv2.IMWRITE_JPEG_QUALITY, 100]
-        elif fmt == "png":
-            # Compression 0-9 (Default is 3). 0 is faster/larger.
-            # PNG is lossless, so quality isn't lost, just size.
-            params = [cv2.IMWRITE_PNG_COMPRESSION, 3]
-
-        cv2.imwrite(path, img_to_save, params)
-        print(f"Saved: {path}")
+        if not roi:
+            return None
+        region = self.image_label.regions[self.image_label.selected]
+        # Regions placed from a size preset keep that size exactly
+        return display_rois_to_sensor([(roi, region.fixed_size)])[0]
+
+    def _get_sensor_regions(self):
+        """
+        Every ROI as (sensor rect, label), in one transform.
+
+        With no ROIs this is a single full-frame region.
+        """
+        regions = self.image_label.get_regions()
+        if not regions:
+            return [(None, "")]
+        rects = display_rois_to_sensor(
+            [(roi, fixed_size) for roi, fixed_size, _ in regions]
+        )
+        return [
+            (rect, label)
+            for rect, (_, _, label) in zip(rects, regions)
+            if rect is not None
+        ]
+
+    def _shard_sink(self):
+        """The ShardSink for the current save directory and prefix."""
+        prefix = self.txt_prefix.text().strip()
+        sink = self.shard_sink
+        if sink is None or (sink.directory, sink.prefix) != (
+            self.save_dir, prefix
+        ):
+            if sink is not None:
+                sink.close()
+            sink = self.shard_sink = ShardSink(self.save_dir, prefix)
+        return sink
+
+    def _tar_sink(self):
+        """The TarShardSink for the current save directory and prefix."""
+        prefix = self.txt_prefix.text().strip()
+        sink = self.tar_sink
+        if sink is None or (sink.directory, sink.prefix) != (
+            self.save_dir, prefix
+        ):
+            if sink is not None:
+                sink.close()
+            sink = self.tar_sink = TarShardSink(self.save_dir, prefix)
+        return sink
+
+    def _output_sink(self):
+        """The sink captures go to, or None for one file per capture."""
+        if self.combo_format.currentText() == NPY_FORMAT:
+            return self._shard_sink()
+        if self.chk_tar.isChecked():
+            return self._tar_sink()
+        return None
+
+    def _save_to_shard(self, samples, frame=None):
+        """Append the current frame's crops to the npy shards.
 
+        samples is a list of (rect, metadata), all cut from one frame;
+        frame (full resolution) replaces the current frame if given.
+        """
+        sink = self._shard_sink()
+
+        def append(frame):
+            for rect, metadata in samples:
+                sink.append(frame, self.thread.frame_rect(rect), metadata)
+
+        if frame is None and self.thread.dual_stream:
+            # Appended from the capture thread with the next full-res frame
+            self.thread.request_full_frame(append)
+            return
+        start = time.perf_counter()
+        try:
+            append(frame if frame is not None else self.current_frame)
+        except OSError as e:
+            print(f"Failed to append to shard: {e}")
+            self.lbl_pending.setText("Save failed: shard write error")
+        if METRICS.enabled:
+            METRICS.observe("save.shard", time.perf_counter() - start)
+
+    def _save_regions(self, regions, sink=None, frame=None):
+        """
+        Queue crops of the current frame as one writer batch.
+
+        regions is a list of (rect, path, metadata); with a sink (tar
+        shards) each path is a sample key. frame (full resolution)
+        replaces the current frame if given. Returns False if the writer
+        queue was full, in which case nothing was queued.
+        """
+        fmt = self.combo_format.currentText()
+
+        def cropped(regions):
+            # Full-res frames may already be cropped to a sensor ROI
+            return [
+                (self.thread.frame_rect(rect), path, metadata)
+                for rect, path, metadata in regions
+            ]
+
+        if frame is None and self.thread.dual_stream:
+            # The preview is display-sized; save the next full-res frame
+            def save(frame):
+                if not self.writer.submit_batch(frame, cropped(regions), fmt,
+                                                sink=sink):
+                    for _, path, _ in regions:
+                        self.writer.write_failed.emit(
+                            path, "writer queue full"
+                        )
+
+            self.thread.request_full_frame(save)
+            return True
+        start = time.perf_counter()
+        submitted = self.writer.submit_batch(
+            frame if frame is not None else self.current_frame,
+            cropped(regions), fmt, sink=sink,
+        )
+        if METRICS.enabled:
+            METRICS.observe("save.submit", time.perf_counter() - start)
+        if not submitted:
+            print(f"Writer queue full, capture skipped: {regions[0][1]}")
+            self.lbl_pending.setText("Writer busy - capture skipped")
+            return False
+        return True
 
     def save_image(self):
-        """Save the current frame to the selected directory."""
-        if self.current_frame is None:
+        """Save every ROI of the current frame to the selected directory."""
+        self._save_current()
+
+    def _save_current(self, extra_metadata=None, frame=None):
+        """
+        Save the current frame's ROIs, adding extra_metadata to each.
+
+        frame is a full-resolution frame to save instead of the current
+        (or, with a dual-stream pipeline, the next) frame.
+        """
+        if frame is None and self.current_frame is None:
             return
 
         fmt = self.combo_format.currentText()
         prefix = self.txt_prefix.text().strip()
-        idx = self.get_next_index(self.save_dir, prefix, fmt)
-        filename = f"{prefix}{idx:04d}.{fmt}"
-        path = os.path.join(self.save_dir, filename)
+        regions = self._get_sensor_regions()
+        timestamp = time.time()
+        settings = self.thread.get_settings()
+        samples = []
+        for i, (rect, label) in enumerate(regions):
+            metadata = {
+                "timestamp": timestamp,
+                "roi": list(rect) if rect else None,
+                "settings": settings,
+            }
+            if extra_metadata:
+                metadata.update(extra_metadata)
+            if len(regions) > 1 or label:
+                metadata["region"] = i
+                metadata["label"] = label
+            samples.append((rect, metadata))
+
+        if fmt == NPY_FORMAT:
+            self._save_to_shard(samples, frame)
+            self.update_filename_counter()
+            return
+        if self.chk_tar.isChecked():
+            sink = self._tar_sink()
+            self._save_regions(
+                [(rect, sink.reserve_key(), metadata)
+                 for rect, metadata in samples],
+                sink=sink,
+                frame=frame,
+            )
+            self.update_filename_counter()
+            return
+
+        jobs = []
+        for (rect, metadata), (_, label) in zip(samples, regions):
+            # Labelled regions are numbered separately: data_cat_0001.png
+            region_prefix = f"{prefix}{label}_" if label else prefix
+            _, filename = self.catalog.reserve(region_prefix, fmt)
+            jobs.append((rect, os.path.join(self.save_dir, filename), metadata))
+        if self._save_regions(jobs, frame=frame):
+            for _, path, metadata in jobs:
+                self.pending_writes[path] = (self.catalog, metadata)
+        else:
+            for _, path, _ in jobs:
+                self.catalog.release(os.path.basename(path))
+        self.update_filename_counter()
 
-        self._save_frame_to_path(path)
+    def on_write_finished(self, path):
+        """Record a capture that has been written to disk."""
+        catalog, metadata = self.pending_writes.pop(path, (None, None))
+        if catalog is not None:
+            catalog.commit(os.path.basename(path), metadata)
         self.update_filename_counter()
+
+    def on_write_failed(self, path, error):
+        """Handle a capture that could not be written."""
+        catalog, _ = self.pending_writes.pop(path, (None, None))
+        if catalog is not None:
+            catalog.release(os.path.basename(path))
+        self.update_filename_counter()
+        self.lbl_pending.setText(f"Save failed: {os.path.basename(path)}")
+
+    def on_write_skipped(self, path, duplicate):
+        """Handle a capture dropped as a near-duplicate."""
+        catalog, _ = self.pending_writes.pop(path, (None, None))
+        if catalog is not None:
+            catalog.release(os.path.basename(path))
+        self.update_filename_counter()
+        self.lbl_pending.setText(f"Skipped: near-duplicate of {duplicate}")
+
+    def _pretrigger_seconds(self):
+        """Seconds kept before a trigger for full-resolution frames."""
+        fps = parse_framerate(CAM_CONF["framerate"])
+        capacity = ring_capacity(
+            RING_CONF["max_bytes"], RING_CONF["seconds"],
+            RING_CONF["post_seconds"], fps,
+            DEFAULT_WIDTH * DEFAULT_HEIGHT * 3,
+        )
+        pre, _ = ring_window(
+            capacity, RING_CONF["seconds"], RING_CONF["post_seconds"], fps
+        )
+        return pre
+
+    def toggle_pretrigger(self):
+        """Enable or disable the VideoThread pre-trigger ring buffer."""
+        enabled = self.chk_pretrigger.isChecked()
+        if not enabled and self.pretrigger.is_busy:
+            # The ring is still being written out; keep it until done
+            self.chk_pretrigger.setChecked(True)
+            return
+        self.thread.enable_ring_buffer(enabled)
+        self.btn_event.setEnabled(enabled)
+
+    def capture_event(self):
+        """Save the buffered seconds before (and just after) this press."""
+        started = self.pretrigger.trigger(
+            self.catalog,
+            self.txt_prefix.text().strip(),
+            self.combo_format.currentText(),
+            self._get_sensor_roi(),
+            sink=self._output_sink(),
+        )
+        if started:
+            self.btn_event.setEnabled(False)
+            self.lbl_pending.setText("Capturing event...")
+
+    def on_event_captured(self, count):
+        """Re-arm the event button once the window has been queued."""
+        self.btn_event.setEnabled(self.chk_pretrigger.isChecked())
+        self.lbl_pending.setText(f"Event: {count} frames saved")
+        self.update_filename_counter()
+
+    def toggle_burst(self):
+        """Start a burst with the current settings, or stop the running one."""
+        if self.burst.is_running:
+            self.burst.stop()
+            return
+
+        mode = self.combo_burst_mode.currentIndex()
+        value = self.spin_burst_value.value()
+        self.burst.start(
+            self.catalog,
+            self.txt_prefix.text().strip(),
+            self.combo_format.currentText(),
+            self._get_sensor_roi(),
+            count=value if mode == 0 else 0,
+            stride=self.spin_burst_stride.value(),
+            duration=value if mode == 1 else 0,
+            sink=self._output_sink(),
+        )
+        self.btn_burst.setText("STOP BURST")
+
+    def update_burst_stats(self, stats):
+        """Show live burst throughput, drops and queue depth."""
+        dropped = stats["dropped"]
+        self.lbl_burst_stats.setText(
+            f"Captured: {stats['frames_queued']} "
+            f"({stats['capture_fps']:.1f} fps)\n"
+            f"Written: {stats['frames_written']} "
+            f"({stats['write_fps']:.1f} fps)\n"
+            f"Dropped: {dropped['total']} (camera {dropped['camera']}, "
+            f"queue {dropped['queue']}, write {dropped['write']}, "
+            f"duplicate {dropped['duplicate']})\n"
+            f"Queue depth: {stats['queue_depth']}"
+        )
+
+    def on_burst_finished(self, stats):
+        """Reset the burst controls once all frames are written."""
+        self.btn_burst.setText("START BURST")
+        self.update_filename_counter()
+
+    def toggle_recording(self):
+        """Start recording video segments, or stop the running recording."""
+        if self.recorder.is_running:
+            self.recorder.stop()
+            return
+
+        rect = self._get_sensor_roi() if self.chk_record_roi.isChecked() else None
+        self.recorder.start(
+            self.save_dir,
+            self.txt_prefix.text().strip(),
+            self.combo_codec.currentData(),
+            rect,
+            segment_seconds=self.spin_segment.value(),
+        )
+        self.btn_record.setText("STOP RECORDING")
+
+    def update_record_stats(self, stats):
+        """Show live recording throughput, drops and the current segment."""
+        dropped = stats["dropped"]
+        self.lbl_record_stats.setText(
+            f"Segment {stats['segments']}: {stats['segment'] or '-'}\n"
+            f"Encoded: {stats['frames_encoded']} "
+            f"({stats['encode_fps']:.1f} fps, {stats['encode_ms']:.1f} ms)\n"
+            f"Disk: {stats['disk_mb_s']:.1f} MB/s\n"
+            f"Dropped: camera {dropped['camera']}, "
+            f"queue {dropped['queue']}, write {dropped['write']}"
+        )
+
+    def on_record_finished(self, stats):
+        """Reset the recording controls once every segment is closed."""
+        self.btn_record.setText("START RECORDING")
+        if stats["error"]:
+            self.lbl_record_stats.setText(f"Recording failed:\n{stats['error']}")
+
+    def _auto_region(self):
+        """Sensor region auto capture scores: the ROIs' bounding box."""
+        return bounding_roi([rect for rect, _ in self._get_sensor_regions()])
+
+    def toggle_auto_capture(self):
+        """Start or stop scoring preview frames for auto capture."""
+        if self.chk_auto.isChecked():
+            self.update_auto_thresholds()
+            self.auto_capture.set_region(self._auto_region())
+            self.auto_capture.start()
+        else:
+            self.auto_capture.stop()
+
+    def update_auto_thresholds(self):
+        """Apply the sharpness and interval controls to auto capture."""
+        self.auto_capture.min_focus = self.spin_auto_focus.value()
+        self.auto_capture.min_interval = self.spin_auto_interval.value()
+
+    def on_auto_triggered(self, frame, quality):
+        """A frame passed the auto-capture gate; save that frame."""
+        if not self.auto_capture.is_running:
+            return
+        self._save_current({"auto_capture": quality}, frame)
+
+    def update_auto_stats(self, stats):
+        """Show the latest metrics, scoring rate and metric cost."""
+        metrics = stats["metrics"]
+        text = (
+            f"Scored: {stats['frames_scored']} "
+            f"({stats['score_fps']:.1f} fps), "
+            f"skipped {stats['frames_skipped']}\n"
+            f"Metric cost: {stats['cost_ms']:.2f} ms avg, "
+            f"{stats['cost_max_ms']:.2f} ms max\n"
+            f"Auto captures: {stats['captures']}"
+        )
+        if stats["rejected"]:
+            text += f", {stats['rejected']} rejected at full resolution"
+        if metrics:
+            motion = metrics["motion"]
+            text += (
+                f"\nSharpness {metrics['focus']:.0f}, "
+                f"motion {motion if motion is not None else 0:.1f}, "
+                f"clipped {metrics['clipped'] * 100:.1f}%"
+            )
+        self.lbl_auto_stats.setText(text)
+
+    def toggle_frame_bus(self):
+        """Start or stop publishing frames to the shared-memory bus."""
+        wanted = self.chk_frame_bus.isChecked()
+        enabled = self.thread.enable_frame_bus(wanted)
+        if enabled != wanted:
+            # Could not create the segment; the reason was printed
+            self.chk_frame_bus.blockSignals(True)
+            self.chk_frame_bus.setChecked(enabled)
+            self.chk_frame_bus.blockSignals(False)
+            self.lbl_frame_bus.setText("Frame bus unavailable (see log)")
+            return
+        if enabled:
+            self._bus_timer.start()
+            self.update_frame_bus_stats()
+        else:
+            self._bus_timer.stop()
+            self.lbl_frame_bus.setText("")
+
+    def update_frame_bus_stats(self):
+        """Show the frame bus readers and any that fall behind."""
+        bus = self.thread.frame_bus
+        if bus is None:
+            return
+        readers = bus.readers()
+        text = f"Published: {bus.seq}, readers: {len(readers)}"
+        for reader in readers:
+            if reader["stalled"]:
+                text += f"\nReader {reader['pid']} stalled"
+            elif reader["lost"]:
+                text += f"\nReader {reader['pid']} lost {reader['lost']}"
+        if bus.frames_oversized:
+            text += f"\nToo large to publish: {bus.frames_oversized}"
+        self.lbl_frame_bus.setText(text)
+
+    def update_pending_label(self, count):
+        """Show how many captures are still being written."""
+        self.lbl_pending.setText(f"Pending writes: {count}")
+
+    def closeEvent(self, event):
+        """Stop the camera and finish outstanding writes before closing."""
+        self._hud_timer.stop()
+        if self.remote is not None:
+            self.remote.stop()
+        self.auto_capture.shutdown()
+        self.scopes.stop()
+        self.burst.shutdown()
+        self.recorder.shutdown()
+        self.pretrigger.shutdown()
+        self._bus_timer.stop()
+        self.thread.stop()
+        self.thread.enable_frame_bus(False)
+        self.writer.stop()
+        self.catalog.close()
+        if self.shard_sink is not None:
+            self.shard_sink.close()
+        if self.tar_sink is not None:
+            self.tar_sink.close()
+        if self.dedupe_index is not None:
+            self.dedupe_index.close()
+        if self.metrics_exporter is not None:
+            self.metrics_exporter.stop()
+        super().closeEvent(event)
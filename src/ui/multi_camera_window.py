@@ -0,0 +1,234 @@
+import math
+import os
+
+import cv2
+from PyQt5.QtCore import Qt
+from PyQt5.QtGui import QImage, QKeySequence, QPixmap
+from PyQt5.QtWidgets import (
+    QComboBox,
+    QFileDialog,
+    QGridLayout,
+    QGroupBox,
+    QHBoxLayout,
+    QLabel,
+    QLineEdit,
+    QMainWindow,
+    QPushButton,
+    QShortcut,
+    QVBoxLayout,
+    QWidget,
+)
+
+from src.config import (
+    APP_CONF,
+    DISPLAY_HEIGHT,
+    DISPLAY_WIDTH,
+    MULTI_CONF,
+)
+from src.core.catalog import CaptureCatalog
+from src.core.multi_camera import CameraRig, SyncCapture
+
+FORMATS = ("jpg", "png", "tiff", "bmp")
+
+
+class CameraTile:
+    """Preview of one camera: a label plus reusable display buffers."""
+
+    def __init__(self, name, width, height):
+        self.name = name
+        self.size = (width, height)
+        self.label = QLabel(f"{name}: starting...")
+        self.label.setFixedSize(width, height)
+        self.label.setAlignment(Qt.AlignCenter)
+        self.label.setStyleSheet(
+            "border: 1px solid #555; background-color: #000; color: #fff;"
+        )
+        self.caption = QLabel(name)
+        self.caption.setAlignment(Qt.AlignCenter)
+        self.caption.setStyleSheet("font-size: 10px; color: gray;")
+        self._resize_buf = None
+        self._rgb_buf = None
+
+    def show_frame(self, frame):
+        """Scale a BGR frame into the tile."""
+        small = cv2.resize(
+            frame, self.size, dst=self._resize_buf,
+            interpolation=cv2.INTER_NEAREST,
+        )
+        self._resize_buf = small
+        rgb = cv2.cvtColor(small, cv2.COLOR_BGR2RGB, dst=self._rgb_buf)
+        self._rgb_buf = rgb
+        h, w, ch = rgb.shape
+        image = QImage(rgb.data, w, h, ch * w, QImage.Format_RGB888)
+        self.label.setPixmap(QPixmap.fromImage(image))
+
+
+class MultiCameraWindow(QMainWindow):
+    """
+    Tiled preview of every camera of a rig with synchronized capture.
+
+    Each tile pulls the newest frame from its camera's mailbox when woken,
+    and is scaled down with nearest-neighbour sampling, so a slow tile
+    never queues frames up. CAPTURE ALL (or Space) saves one frame per
+    camera under a shared index and shows the inter-camera skew.
+    """
+
+    def __init__(self, source_type=None, cameras=None):
+        """Open the cameras; source_type overrides their configured source."""
+        super().__init__()
+        self.setWindowTitle(f"{APP_CONF['window_title']} - Multi-camera")
+
+        self.rig = CameraRig(cameras, source_type)
+        tile_w = MULTI_CONF["tile_width"]
+        tile_h = int(round(tile_w * DISPLAY_HEIGHT / DISPLAY_WIDTH))
+        self.tiles = [
+            CameraTile(name, tile_w, tile_h) for name in self.rig.names
+        ]
+        for i, thread in enumerate(self.rig.threads):
+            thread.frame_ready.connect(
+                lambda i=i: self.on_frame_ready(i)
+            )
+        self.rig.start()
+
+        self.save_dir = os.path.join(os.getcwd(), APP_CONF["save_directory"])
+        os.makedirs(self.save_dir, exist_ok=True)
+        self.catalog = CaptureCatalog(self.save_dir)
+
+        self.sync = SyncCapture(self.rig)
+        self.sync.captured.connect(self.on_captured)
+        self.sync.failed.connect(self.on_capture_failed)
+
+        self.init_ui()
+        self.update_filename_counter()
+
+    def init_ui(self):
+        """Build the tile grid and the capture controls."""
+        central = QWidget()
+        self.setCentralWidget(central)
+        layout = QHBoxLayout(central)
+
+        grid = QGridLayout()
+        cols = max(1, math.ceil(math.sqrt(len(self.tiles))))
+        for i, tile in enumerate(self.tiles):
+            row, col = divmod(i, cols)
+            grid.addWidget(tile.label, row * 2, col)
+            grid.addWidget(tile.caption, row * 2 + 1, col)
+        layout.addLayout(grid)
+
+        panel = QVBoxLayout()
+        layout.addLayout(panel)
+
+        data_group = QGroupBox("Data")
+        data_layout = QVBoxLayout()
+        self.lbl_dir = QLabel(f"Save Path:\n{self.save_dir}")
+        self.lbl_dir.setWordWrap(True)
+        data_layout.addWidget(self.lbl_dir)
+        btn_dir = QPushButton("Change Directory")
+        btn_dir.clicked.connect(self.select_directory)
+        data_layout.addWidget(btn_dir)
+
+        data_layout.addWidget(QLabel("Filename Prefix:"))
+        self.txt_prefix = QLineEdit()
+        self.txt_prefix.setPlaceholderText("e.g. rig_ or leave empty")
+        self.txt_prefix.textChanged.connect(self.update_filename_counter)
+        self.txt_prefix.returnPressed.connect(self.txt_prefix.clearFocus)
+        data_layout.addWidget(self.txt_prefix)
+
+        data_layout.addWidget(QLabel("Format:"))
+        self.combo_format = QComboBox()
+        self.combo_format.addItems(FORMATS)
+        self.combo_format.currentTextChanged.connect(
+            self.update_filename_counter
+        )
+        data_layout.addWidget(self.combo_format)
+        data_group.setLayout(data_layout)
+        panel.addWidget(data_group)
+
+        cap_group = QGroupBox("Synchronized Capture")
+        cap_layout = QVBoxLayout()
+        self.btn_capture = QPushButton("CAPTURE ALL")
+        self.btn_capture.setMinimumHeight(60)
+        self.btn_capture.setStyleSheet(
+            "background-color: #2e7d32; color: white; "
+            "font-weight: bold; font-size: 14px;"
+        )
+        self.btn_capture.clicked.connect(self.capture)
+        cap_layout.addWidget(self.btn_capture)
+        QShortcut(QKeySequence(Qt.Key_Space), self, self.capture)
+
+        self.lbl_counter = QLabel("Next: ...")
+        self.lbl_counter.setAlignment(Qt.AlignCenter)
+        cap_layout.addWidget(self.lbl_counter)
+
+        self.lbl_skew = QLabel("Skew: -")
+        self.lbl_skew.setAlignment(Qt.AlignCenter)
+        self.lbl_skew.setStyleSheet("font-size: 10px; color: gray;")
+        cap_layout.addWidget(self.lbl_skew)
+        cap_group.setLayout(cap_layout)
+        panel.addWidget(cap_group)
+        panel.addStretch()
+
+    def on_frame_ready(self, i):
+        """Pull camera i's newest preview frame into its tile."""
+        packet = self.rig.threads[i].mailbox.take_latest()
+        if packet is None:
+            return
+        self.tiles[i].show_frame(packet.frame)
+        # The tile keeps its own scaled copy; free the pooled buffer
+        packet.release()
+
+    def select_directory(self):
+        """Open a dialog to select the save directory."""
+        directory = QFileDialog.getExistingDirectory(
+            self, "Select Save Directory"
+        )
+        if directory:
+            self.save_dir = directory
+            self.catalog = CaptureCatalog(self.save_dir)
+            self.lbl_dir.setText(f"Save Path:\n{self.save_dir}")
+            self.update_filename_counter()
+
+    def _prefixes(self):
+        prefix = self.txt_prefix.text().strip()
+        return [f"{prefix}{name}_" for name in self.rig.names]
+
+    def update_filename_counter(self):
+        """Show the shared index the next capture will use."""
+        fmt = self.combo_format.currentText()
+        prefixes = self._prefixes()
+        idx = max(self.catalog.next_index(p, fmt) for p in prefixes)
+        self.lbl_counter.setText(f"Next: {prefixes[0]}{idx:04d}.{fmt}")
+
+    def capture(self):
+        """Take one frame from every camera."""
+        if self.sync.capture(
+            self.catalog,
+            self.txt_prefix.text().strip(),
+            self.combo_format.currentText(),
+        ):
+            self.btn_capture.setEnabled(False)
+
+    def on_captured(self, result):
+        """Show the skew of the capture that was just queued."""
+        self.btn_capture.setEnabled(True)
+        offsets = ", ".join(
+            f"{name} +{ms:.1f}" for name, ms in result["offsets_ms"].items()
+        )
+        text = f"#{result['index']:04d} skew {result['skew_ms']:.1f} ms"
+        if result["over_limit"]:
+            text += " (over limit)"
+        if result["dropped"]:
+            text += f", {result['dropped']} dropped (writer busy)"
+        self.lbl_skew.setText(f"{text}\n{offsets}")
+        self.update_filename_counter()
+
+    def on_capture_failed(self, error):
+        self.btn_capture.setEnabled(True)
+        self.lbl_skew.setText(f"Capture failed: {error}")
+
+    def closeEvent(self, event):
+        """Stop the cameras and finish outstanding writes before closing."""
+        self.sync.shutdown()
+        self.rig.stop()
+        self.catalog.close()
+        super().closeEvent(event)
@@ -0,0 +1,330 @@
+import re
+
+from PyQt5.QtCore import QRect
+
+from src.config import CAM_CONF
+from src.core.imaging import clamp_roi, sensor_roi_to_display
+from src.core.recorder import CODECS
+
+# Burst modes by API name, in combo_burst_mode order
+BURST_MODES = ("count", "duration", "continuous")
+
+# Slider settings: key -> (slider attribute, slider steps per unit)
+_SLIDERS = {
+    "saturation": ("sat_slider", 10),
+    "tnr_strength": ("tnr_str_slider", 10),
+    "ee_strength": ("ee_str_slider", 10),
+}
+_COMBOS = {
+    "wb_mode": "combo_wb",
+    "tnr_mode": "combo_tnr",
+    "ee_mode": "combo_ee",
+}
+_CHECKBOXES = {
+    "ae_lock": "chk_ae_lock",
+    "awb_lock": "chk_awb_lock",
+    "h_flip": "chk_h_flip",
+    "v_flip": "chk_v_flip",
+    "sensor_roi": "chk_sensor_roi",
+}
+
+
+def _slider_value(slider, value):
+    """value rounded and clamped to a slider's range."""
+    return min(max(int(round(value)), slider.minimum()), slider.maximum())
+
+
+def _combo_index(combo, key, value):
+    """Index of a combo entry given by index or by its text."""
+    if isinstance(value, str):
+        index = combo.findText(value)
+    else:
+        index = int(value)
+    if not 0 <= index < combo.count():
+        raise ValueError(f"{key}: invalid value {value!r}")
+    return index
+
+
+def _range_max(key, value):
+    """The upper end of a [min, max] setting, or a single number."""
+    if isinstance(value, (list, tuple)):
+        if len(value) != 2:
+            raise ValueError(f"{key}: expected [min, max]")
+        value = value[1]
+    return float(value)
+
+
+class WindowController:
+    """
+    Remote-control operations on a DataCollectorApp.
+
+    Every change goes through the window's own controls, so the GUI
+    (when there is a screen) shows the same state as the API and the
+    usual paths apply: settings are debounced by the SettingsTransaction,
+    captures are saved by save_image(), bursts by toggle_burst(). Slider
+    values are rounded to the slider steps. Must be called on the GUI
+    thread (RemoteServer takes care of that).
+    """
+
+    def __init__(self, window):
+        self.window = window
+
+    def status(self):
+        """Camera, output, ROI, burst and recording state."""
+        w = self.window
+        status = {
+            "source": w.thread.source_name,
+            "frame_count": w.thread.frame_count,
+            "settings": w.thread.get_settings(),
+            "rois": self.rois(),
+            "output": self._output(),
+            "pending_writes": w.writer.pending,
+            "burst": None,
+            "recording": None,
+            "frame_bus": None,
+        }
+        if w.thread.frame_bus is not None:
+            status["frame_bus"] = {
+                "published": w.thread.frame_bus.seq,
+                "readers": w.thread.frame_bus.readers(),
+            }
+        if w.burst.is_running:
+            status["burst"] = w.burst.get_stats()
+        if w.recorder.is_running:
+            status["recording"] = w.recorder.get_stats()
+        return status
+
+    def settings(self):
+        """Applied settings, and those requested by the controls."""
+        return {
+            "applied": self.window.thread.get_settings(),
+            "requested": self.window.control_settings(),
+        }
+
+    def set_settings(self, changes):
+        """
+        Change ISP settings, e.g. {"gain_range": [2, 2], "wb_mode": "auto"}.
+
+        Keys are those of VideoThread.get_settings() (except capture_roi)
+        plus "sensor_roi". Everything is validated before any control
+        changes.
+        """
+        if not isinstance(changes, dict):
+            raise ValueError("expected a JSON object")
+        w = self.window
+        unknown = set(changes) - (
+            set(_SLIDERS) | set(_COMBOS) | set(_CHECKBOXES)
+            | {"exposure_range", "gain_range"}
+        )
+        if unknown:
+            raise ValueError(f"unknown settings: {', '.join(sorted(unknown))}")
+
+        # (setter, value) pairs, applied once everything is valid
+        updates = []
+        for key, value in changes.items():
+            if key == "exposure_range":
+                steps = (
+                    _range_max(key, value) - CAM_CONF["exposure_min"]
+                ) / CAM_CONF["exposure_multiplier"]
+                slider = w.exp_slider
+                updates.append((slider.setValue, _slider_value(slider, steps)))
+            elif key == "gain_range":
+                slider = w.gain_slider
+                updates.append((
+                    slider.setValue,
+                    _slider_value(slider, _range_max(key, value) * 10),
+                ))
+            elif key in _SLIDERS:
+                name, scale = _SLIDERS[key]
+                slider = getattr(w, name)
+                updates.append((
+                    slider.setValue,
+                    _slider_value(slider, float(value) * scale),
+                ))
+            elif key in _COMBOS:
+                combo = getattr(w, _COMBOS[key])
+                updates.append(
+                    (combo.setCurrentIndex, _combo_index(combo, key, value))
+                )
+            else:
+                if not isinstance(value, bool):
+                    raise ValueError(f"{key}: expected true or false")
+                updates.append(
+                    (getattr(w, _CHECKBOXES[key]).setChecked, value)
+                )
+        for setter, value in updates:
+            setter(value)
+        # Combos and checkboxes already queued this; sliders only do so
+        # when released. Requests are debounced into one change.
+        w.trigger_restart()
+        return self.settings()
+
+    def rois(self):
+        """ROIs in sensor pixels, as [{"rect": [x, y, w, h], "label": ...}]."""
+        if not self.window.image_label.regions:
+            return []
+        return [
+            {"rect": list(rect), "label": label}
+            for rect, label in self.window._get_sensor_regions()
+        ]
+
+    def set_rois(self, rois):
+        """
+        Replace the ROIs with sensor-space rects.
+
+        Items are [x, y, w, h] or {"rect": [x, y, w, h], "label": "cat"};
+        an empty list means the full frame. The size is kept exactly; the
+        position snaps to the nearest preview pixel.
+        """
+        if not isinstance(rois, list):
+            raise ValueError("expected a list of ROIs")
+        regions = []
+        for item in rois:
+            label = ""
+            if isinstance(item, dict):
+                label = re.sub(
+                    r"[^\w-]+", "_", str(item.get("label", "")).strip()
+                )
+                item = item.get("rect")
+            if not isinstance(item, list) or len(item) != 4:
+                raise ValueError(f"invalid ROI {item!r}")
+            rect = clamp_roi(tuple(int(v) for v in item))
+            if rect is None:
+                raise ValueError(f"ROI {item!r} is outside the frame")
+            regions.append((rect, label))
+
+        label_widget = self.window.image_label
+        label_widget.clear_roi()
+        for rect, label in regions:
+            label_widget.add_region(
+                QRect(*sensor_roi_to_display(rect)), label, fixed_size=rect[2:]
+            )
+        return self.rois()
+
+    def clear_rois(self):
+        """Remove every ROI (capture the full frame)."""
+        self.window.reset_roi()
+        return self.rois()
+
+    def _output(self):
+        w = self.window
+        return {
+            "directory": w.save_dir,
+            "format": w.combo_format.currentText(),
+            "prefix": w.txt_prefix.text().strip(),
+            "tar": w.chk_tar.isChecked(),
+            "dedupe": w.combo_dedupe.currentData(),
+            "next": w.lbl_counter.text(),
+        }
+
+    def set_output(self, changes):
+        """Change {"format", "prefix", "tar", "dedupe"}."""
+        if not isinstance(changes, dict):
+            raise ValueError("expected a JSON object")
+        w = self.window
+        unknown = set(changes) - {"format", "prefix", "tar", "dedupe"}
+        if unknown:
+            raise ValueError(
+                f"unknown output keys: {', '.join(sorted(unknown))}"
+            )
+        fmt = changes.get("format")
+        if fmt is not None and w.combo_format.findText(fmt) < 0:
+            raise ValueError(f"unknown format {fmt!r}")
+        dedupe = changes.get("dedupe")
+        if dedupe is not None and w.combo_dedupe.findData(dedupe) < 0:
+            combo = w.combo_dedupe
+            modes = [combo.itemData(i) for i in range(combo.count())]
+            raise ValueError(f"dedupe must be one of {', '.join(modes)}")
+
+        if fmt is not None:
+            w.combo_format.setCurrentText(fmt)
+        if "prefix" in changes:
+            w.txt_prefix.setText(str(changes["prefix"]))
+        if "tar" in changes:
+            w.chk_tar.setChecked(bool(changes["tar"]))
+        if dedupe is not None:
+            w.combo_dedupe.setCurrentIndex(w.combo_dedupe.findData(dedupe))
+        return self._output()
+
+    def capture(self):
+        """Save every ROI of the current frame, like the capture button."""
+        w = self.window
+        if w.current_frame is None:
+            raise ValueError("no frame yet")
+        next_name = w.lbl_counter.text()
+        w.save_image()
+        return {"saved": next_name, "pending_writes": w.writer.pending}
+
+    def start_burst(self, options=None):
+        """
+        Start a burst of the selected ROI.
+
+        options: {"mode": "count" | "duration" | "continuous",
+        "value": frames or seconds, "stride": keep every Kth frame}.
+        """
+        options = options or {}
+        if not isinstance(options, dict):
+            raise ValueError("expected a JSON object")
+        w = self.window
+        if w.burst.is_running:
+            raise ValueError("a burst is already running")
+        mode = options.get(
+            "mode", BURST_MODES[w.combo_burst_mode.currentIndex()]
+        )
+        if mode not in BURST_MODES:
+            raise ValueError(f"mode must be one of {', '.join(BURST_MODES)}")
+        value = int(options.get("value", w.spin_burst_value.value()))
+        stride = int(options.get("stride", w.spin_burst_stride.value()))
+        if value < 1 or stride < 1:
+            raise ValueError("value and stride must be at least 1")
+        w.combo_burst_mode.setCurrentIndex(BURST_MODES.index(mode))
+        w.spin_burst_value.setValue(value)
+        w.spin_burst_stride.setValue(stride)
+        w.toggle_burst()
+        return {"mode": mode, "value": value, "stride": stride}
+
+    def stop_burst(self, options=None):
+        """Stop the running burst; queued frames are still written."""
+        w = self.window
+        if not w.burst.is_running:
+            raise ValueError("no burst is running")
+        w.toggle_burst()
+        return w.burst.get_stats()
+
+    def start_recording(self, options=None):
+        """
+        Start recording video segments.
+
+        options: {"codec": see CODECS, "segment_seconds": seconds per
+        file, "roi": true to record only the selected ROI}.
+        """
+        options = options or {}
+        if not isinstance(options, dict):
+            raise ValueError("expected a JSON object")
+        w = self.window
+        if w.recorder.is_running:
+            raise ValueError("already recording")
+        codec = options.get("codec", w.combo_codec.currentData())
+        if codec not in CODECS:
+            raise ValueError(f"codec must be one of {', '.join(CODECS)}")
+        seconds = int(options.get("segment_seconds", w.spin_segment.value()))
+        if seconds < 1:
+            raise ValueError("segment_seconds must be at least 1")
+        w.combo_codec.setCurrentIndex(w.combo_codec.findData(codec))
+        w.spin_segment.setValue(seconds)
+        if "roi" in options:
+            w.chk_record_roi.setChecked(bool(options["roi"]))
+        w.toggle_recording()
+        return {
+            "codec": codec,
+            "segment_seconds": seconds,
+            "roi": w.chk_record_roi.isChecked(),
+        }
+
+    def stop_recording(self, options=None):
+        """Stop recording; queued frames are still encoded."""
+        w = self.window
+        if not w.recorder.is_running:
+            raise ValueError("not recording")
+        w.toggle_recording()
+        return w.recorder.get_stats()
@@ -1,40 +1,147 @@
-from PyQt5.QtCore import QPoint, QRect, Qt
-from PyQt5.QtGui import QPainter, QPen
-from PyQt5.QtWidgets import QLabel
+import numpy as np
+from PyQt5.QtCore import QPoint, QPointF, QRect, Qt, pyqtSignal
+from PyQt5.QtGui import QColor, QFont, QPainter, QPen, QPolygonF
+from PyQt5.QtWidgets import QLabel, QWidget
 
-from src.config import (
-    DEFAULT_HEIGHT,
-    DEFAULT_WIDTH,
-    DISPLAY_HEIGHT,
-    DISPLAY_WIDTH,
-)
+from src.core.imaging import display_to_sensor_scale, sensor_size_to_display
+
+
+class Region:
+    """One ROI on the preview: a display-space QRect and a label."""
+
+    def __init__(self, rect, label="", fixed_size=None):
+        self.rect = rect
+        self.label = label
+        # Exact sensor size (w, h) when placed from a size preset
+        self.fixed_size = fixed_size
+
+    def size_text(self):
+        if self.fixed_size:
+            w, h = self.fixed_size
+        else:
+            scale_x, scale_y = display_to_sensor_scale()
+            w = int(round(self.rect.width() * scale_x))
+            h = int(round(self.rect.height() * scale_y))
+        return f"{w}x{h} px"
 
 
 class VideoLabel(QLabel):
-    """Custom QLabel to handle ROI selection."""
+    """
+    Custom QLabel to handle ROI selection.
+
+    Any number of regions can be placed: drag on empty space to draw a
+    square (or click to place one of the preset size, see
+    set_fixed_roi), drag a region to move it, and right-click it or
+    press Delete to remove it. The selected region is drawn highlighted
+    and is the one get_roi() returns.
+    """
+
+    regions_changed = pyqtSignal()
+    selection_changed = pyqtSignal()
 
     def __init__(self, text, parent=None):
         super().__init__(text, parent)
+        self.regions = []
+        self.selected = None
+        # Sensor size of newly placed regions, or None to draw freely
+        self.fixed_size = None
         self.roi_start = QPoint(0, 0)
         self.roi_end = QPoint(0, 0)
         self.is_selecting = False
-        self.has_roi = False
+        self._move_offset = None
+        # Lines of the performance HUD, or None when it is hidden
+        self.hud_lines = None
+        # Scope overlay (QImage) stretched over the preview, or None
+        self.overlay = None
         # Enable mouse tracking if needed, though press/drag works without it
         self.setMouseTracking(True)
+        # Needed for the Delete key
+        self.setFocusPolicy(Qt.ClickFocus)
+
+    @property
+    def has_roi(self):
+        return bool(self.regions)
+
+    def region_at(self, pos):
+        """Index of the topmost region containing pos, or None."""
+        for i in reversed(range(len(self.regions))):
+            if self.regions[i].rect.contains(pos):
+                return i
+        return None
+
+    def _select(self, index):
+        if index != self.selected:
+            self.selected = index
+            self.selection_changed.emit()
+
+    def _clamp(self, rect):
+        """Move rect so it lies inside the label where possible."""
+        x = max(0, min(rect.x(), self.width() - rect.width()))
+        y = max(0, min(rect.y(), self.height() - rect.height()))
+        rect.moveTo(x, y)
+        return rect
+
+    def _sized_rect(self, center, w, h):
+        disp_w, disp_h = sensor_size_to_display(w, h)
+        rect = QRect(0, 0, disp_w, disp_h)
+        rect.moveCenter(center)
+        return self._clamp(rect)
+
+    def add_region(self, rect, label="", fixed_size=None):
+        """Append a region and select it."""
+        self.regions.append(Region(rect, label, fixed_size))
+        self._select(len(self.regions) - 1)
+        self.regions_changed.emit()
+        self.update()
+
+    def delete_region(self, index):
+        del self.regions[index]
+        if self.selected is not None and self.selected >= index:
+            selected = self.selected - 1 if self.selected > index else None
+            if selected is None and self.regions:
+                selected = len(self.regions) - 1
+            self.selected = selected
+            self.selection_changed.emit()
+        self.regions_changed.emit()
+        self.update()
+
+    def delete_selected(self):
+        if self.selected is not None:
+            self.delete_region(self.selected)
 
     def mousePressEvent(self, event):
-        if self.has_roi:
+        pos = event.pos()
+        index = self.region_at(pos)
+        if event.button() == Qt.RightButton:
+            if index is not None:
+                self.delete_region(index)
+            return
+        if event.button() != Qt.LeftButton:
             return
-        if event.button() == Qt.LeftButton:
-            self.roi_start = event.pos()
-            self.roi_end = event.pos()
-            self.is_selecting = True
-            self.has_roi = False
-            self.fixed_roi_text = None
+        if index is None and self.fixed_size:
+            w, h = self.fixed_size
+            self.add_region(
+                self._sized_rect(pos, w, h), fixed_size=self.fixed_size
+            )
+            index = self.selected
+        if index is not None:
+            # Drag to move the region
+            self._select(index)
+            self._move_offset = pos - self.regions[index].rect.topLeft()
             self.update()
+            return
+        self.roi_start = pos
+        self.roi_end = pos
+        self.is_selecting = True
+        self.update()
 
     def mouseMoveEvent(self, event):
-        if self.is_selecting:
+        if self._move_offset is not None:
+            rect = self.regions[self.selected].rect
+            rect.moveTo(event.pos() - self._move_offset)
+            self._clamp(rect)
+            self.update()
+        elif self.is_selecting:
             # Enforce square aspect ratio
             curr_pos = event.pos()
             dx = curr_pos.x() - self.roi_start.x()
@@ -58,13 +165,17 @@ class VideoLabel(QLabel):
             self.update()
 
     def mouseReleaseEvent(self, event):
-        if event.button() == Qt.LeftButton:
+        if event.button() != Qt.LeftButton:
+            return
+        if self._move_offset is not None:
+            self._move_offset = None
+            self.regions_changed.emit()
+        elif self.is_selecting:
             self.is_selecting = False
             # Finalize square
             rect = QRect(self.roi_start, self.roi_end).normalized()
             side = max(rect.width(), rect.height())
-            # Center the square on the dragged area or just force it?
-            # Let's force the square based on start point and direction
+            # Force the square based on start point and direction
             dx = self.roi_end.x() - self.roi_start.x()
             dy = self.roi_end.y() - self.roi_start.y()
             sign_x = 1 if dx >= 0 else -1
@@ -77,62 +188,175 @@ class VideoLabel(QLabel):
 
             rect = QRect(self.roi_start, self.roi_end).normalized()
             if rect.width() > 10:
-                self.has_roi = True
-            else:
-                self.has_roi = False
-            self.update()
+                self.add_region(rect)
+        self.update()
+
+    def keyPressEvent(self, event):
+        if event.key() in (Qt.Key_Delete, Qt.Key_Backspace):
+            self.delete_selected()
+        else:
+            super().keyPressEvent(event)
 
     def paintEvent(self, event):
         super().paintEvent(event)
-        if self.is_selecting or self.has_roi:
+        if self.overlay is not None:
             painter = QPainter(self)
-            painter.setPen(QPen(Qt.red, 2, Qt.SolidLine))
-            rect = QRect(self.roi_start, self.roi_end).normalized()
+            painter.drawImage(self.rect(), self.overlay)
+            painter.end()
+        if self.regions or self.is_selecting:
+            painter = QPainter(self)
+            for i, region in enumerate(self.regions):
+                selected = i == self.selected
+                painter.setPen(
+                    QPen(Qt.red, 3 if selected else 1,
+                         Qt.SolidLine if selected else Qt.DashLine)
+                )
+                painter.drawRect(region.rect)
 
-            painter.drawRect(rect)
+                # Draw label and dimensions
+                text = region.size_text()
+                if region.label:
+                    text = f"{region.label}  {text}"
+                painter.setPen(QPen(Qt.yellow, 1, Qt.SolidLine))
+                painter.drawText(region.rect.topLeft() + QPoint(5, -5), text)
 
-            # Draw dimensions
-            if hasattr(self, 'fixed_roi_text') and self.fixed_roi_text:
-                text = self.fixed_roi_text
-            else:
-                scale_x = DEFAULT_WIDTH / DISPLAY_WIDTH
-                scale_y = DEFAULT_HEIGHT / DISPLAY_HEIGHT
-                
-                real_w = int(round(rect.width() * scale_x))
-                real_h = int(round(rect.height() * scale_y))
+            if self.is_selecting:
+                rect = QRect(self.roi_start, self.roi_end).normalized()
+                painter.setPen(QPen(Qt.red, 2, Qt.SolidLine))
+                painter.drawRect(rect)
+                painter.setPen(QPen(Qt.yellow, 1, Qt.SolidLine))
+                painter.drawText(
+                    rect.topLeft() + QPoint(5, -5), Region(rect).size_text()
+                )
+            painter.end()
 
-                text = f"{real_w}x{real_h} px"
-            
-            painter.setPen(QPen(Qt.yellow, 1, Qt.SolidLine))
-            painter.drawText(rect.topLeft() + QPoint(5, -5), text)
+        if self.hud_lines:
+            self._draw_hud()
 
-    def set_fixed_roi(self, w, h):
-        """Set a fixed ROI centered in the view."""
-        scale_x = DISPLAY_WIDTH / DEFAULT_WIDTH
-        scale_y = DISPLAY_HEIGHT / DEFAULT_HEIGHT
-        
-        disp_w = int(round(w * scale_x))
-        disp_h = int(round(h * scale_y))
-
-        center_x = self.width() // 2
-        center_y = self.height() // 2
-
-        self.roi_start = QPoint(center_x - disp_w // 2, center_y - disp_h // 2)
-        # Subtract 1 to ensure QRect(start, end).width() == disp_w
-        self.roi_end = QPoint(
-            self.roi_start.x() + disp_w - 1, self.roi_start.y() + disp_h - 1
+    def _draw_hud(self):
+        """Draw the performance HUD in the top-left corner."""
+        painter = QPainter(self)
+        font = QFont("Monospace", 8)
+        font.setStyleHint(QFont.TypeWriter)
+        painter.setFont(font)
+        metrics = painter.fontMetrics()
+        line_h = metrics.height()
+        width = max(metrics.width(line) for line in self.hud_lines) + 10
+        painter.fillRect(
+            4, 4, width, line_h * len(self.hud_lines) + 6,
+            QColor(0, 0, 0, 160),
         )
-        self.has_roi = True
-        self.fixed_roi_text = f"{w}x{h} px"
+        painter.setPen(QPen(Qt.green, 1, Qt.SolidLine))
+        for i, line in enumerate(self.hud_lines):
+            painter.drawText(9, 6 + metrics.ascent() + i * line_h, line)
+        painter.end()
+
+    def set_hud(self, lines):
+        """Show the given HUD text lines, or hide the HUD with None."""
+        self.hud_lines = lines
+        self.update()
+
+    def set_overlay(self, image):
+        """Draw a QImage over the whole preview, or remove it with None."""
+        self.overlay = image
+        self.update()
+
+    def set_fixed_roi(self, w, h):
+        """
+        Use a fixed ROI size of w x h sensor pixels.
+
+        The selected region is resized to it around its centre; with no
+        regions, one is placed centred in the view. Clicking empty space
+        places further regions of this size.
+        """
+        self.fixed_size = (w, h)
+        if self.selected is None:
+            center = QPoint(self.width() // 2, self.height() // 2)
+            self.add_region(
+                self._sized_rect(center, w, h), fixed_size=(w, h)
+            )
+            return
+        region = self.regions[self.selected]
+        region.rect = self._sized_rect(region.rect.center(), w, h)
+        region.fixed_size = (w, h)
+        self.regions_changed.emit()
         self.update()
 
+    def set_free_size(self):
+        """Draw new regions freely instead of at a fixed size."""
+        self.fixed_size = None
+
+    def set_selected_label(self, label):
+        if self.selected is not None:
+            self.regions[self.selected].label = label
+            self.update()
+
+    def selected_label(self):
+        if self.selected is None:
+            return ""
+        return self.regions[self.selected].label
+
     def get_roi(self):
-        if self.has_roi:
-            rect = QRect(self.roi_start, self.roi_end).normalized()
-            return (rect.x(), rect.y(), rect.width(), rect.height())
-        return None
+        """The selected region as (x, y, w, h), or None."""
+        if self.selected is None:
+            return None
+        rect = self.regions[self.selected].rect
+        return (rect.x(), rect.y(), rect.width(), rect.height())
+
+    def get_regions(self):
+        """Every region as ((x, y, w, h), fixed_size, label)."""
+        return [
+            (
+                (r.rect.x(), r.rect.y(), r.rect.width(), r.rect.height()),
+                r.fixed_size,
+                r.label,
+            )
+            for r in self.regions
+        ]
 
     def clear_roi(self):
-        self.has_roi = False
-        self.fixed_roi_text = None
+        """Remove every region."""
+        self.regions = []
+        self.is_selecting = False
+        self._move_offset = None
+        self._select(None)
+        self.regions_changed.emit()
+        self.update()
+
+
+class HistogramWidget(QWidget):
+    """
+    RGB histogram scope.
+
+    set_histogram() takes a (3, bins) array of B, G, R bin fractions (see
+    ScopeAnalyzer); counts are drawn on a square-root scale so the
+    midtones stay visible next to a clipped spike.
+    """
+
+    COLOURS = (QColor(80, 140, 255), QColor(80, 220, 80), QColor(255, 80, 80))
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.hist = None
+        self.setMinimumSize(200, 80)
+
+    def set_histogram(self, hist):
+        self.hist = hist
         self.update()
+
+    def paintEvent(self, event):
+        painter = QPainter(self)
+        painter.fillRect(self.rect(), QColor(20, 20, 20))
+        if self.hist is not None:
+            levels = np.sqrt(self.hist)
+            top = levels.max() or 1.0
+            w, h = self.width(), self.height()
+            xs = np.linspace(0, w - 1, levels.shape[1])
+            painter.setRenderHint(QPainter.Antialiasing)
+            for colour, row in zip(self.COLOURS, levels):
+                ys = (h - 1) - row / top * (h - 4)
+                painter.setPen(QPen(colour, 1))
+                painter.drawPolyline(QPolygonF(
+                    [QPointF(x, y) for x, y in zip(xs, ys)]
+                ))
+        painter.end()
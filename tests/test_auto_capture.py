@@ -0,0 +1,101 @@
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+
+from src.core.auto_capture import AutoCapture
+
+
+def textured(seed, shape=(120, 160, 3)):
+    """A sharp, well-exposed frame (mid-grey noise)."""
+    rng = np.random.RandomState(seed)
+    return rng.randint(60, 200, shape).astype(np.uint8)
+
+
+def flat(value, shape=(120, 160, 3)):
+    return np.full(shape, value, np.uint8)
+
+
+@pytest.fixture
+def gate(qapp):
+    auto = AutoCapture(
+        min_focus=100.0, max_motion=5.0, max_clipped=0.2, min_change=10.0,
+        min_interval=0.0,
+    )
+    fired = []
+    auto.triggered.connect(lambda frame, metrics: fired.append(metrics))
+    auto.start()
+    yield auto, fired
+    auto.stop()
+
+
+def score(auto, frames):
+    for frame in frames:
+        auto.process(frame)
+
+
+def test_fires_on_still_sharp_new_scenes(gate):
+    auto, fired = gate
+    first = textured(1)
+    # No motion estimate for the very first frame
+    score(auto, [first])
+    assert fired == []
+    score(auto, [first])
+    assert len(fired) == 1 and fired[0]["motion"] == 0.0
+    # Nothing changed since the last capture
+    score(auto, [first, first])
+    assert len(fired) == 1
+
+    second = textured(2)
+    score(auto, [second])  # moving
+    assert len(fired) == 1
+    score(auto, [second])
+    assert len(fired) == 2 and fired[1]["change"] >= 10.0
+    stats = auto.get_stats()
+    assert (stats["frames_scored"], stats["captures"]) == (6, 2)
+
+
+@pytest.mark.parametrize("frame", [flat(128), flat(255), flat(0)])
+def test_blurred_or_clipped_frames_never_fire(gate, frame):
+    auto, fired = gate
+    score(auto, [frame] * 3)
+    assert fired == []
+    metrics = auto.get_stats()["metrics"]
+    assert metrics["focus"] < 100.0 or metrics["clipped"] > 0.2
+
+
+def test_min_interval(gate):
+    auto, fired = gate
+    auto.min_interval = 60.0
+    score(auto, [textured(1)] * 2 + [textured(2)] * 2)
+    assert len(fired) == 1
+
+
+def test_region_limits_scoring(gate):
+    auto, fired = gate
+    # Sharp on the left, flat where the region is
+    frame = textured(1)
+    frame[:, 80:] = 128
+    auto.set_region((1200, 0, 400, 1000))
+    score(auto, [frame] * 2)
+    assert fired == []
+    auto.set_region(None)
+    score(auto, [frame] * 2)
+    assert len(fired) == 1
+
+
+def test_dual_stream_rescores_the_full_frame(gate):
+    auto, fired = gate
+    requests = []
+    auto.video_thread = SimpleNamespace(
+        dual_stream=True, request_full_frame=requests.append
+    )
+    score(auto, [textured(1)] * 2)
+    assert fired == [] and len(requests) == 1
+    # The full-resolution frame came out blurred: not saved
+    requests.pop()(flat(128, (480, 640, 3)))
+    assert fired == [] and auto.get_stats()["rejected"] == 1
+
+    score(auto, [textured(2)] * 2)
+    requests.pop()(textured(3, (480, 640, 3)))
+    assert len(fired) == 1 and fired[0]["full_focus"] >= 100.0
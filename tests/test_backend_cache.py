@@ -0,0 +1,37 @@
+from src.core.backend_cache import BackendCache
+
+
+def test_camera_backend_is_cached(tmp_path):
+    cache = BackendCache(str(tmp_path / "cache.json"), max_age=3600)
+    cache.store("auto", "webcam", {"width": 640}, 0.2)
+    entry = BackendCache(str(tmp_path / "cache.json")).lookup("auto")
+    assert entry["backend"] == "webcam"
+    assert entry["capabilities"] == {"width": 640}
+
+
+def test_fallback_backends_are_not_cached(tmp_path):
+    path = tmp_path / "cache.json"
+    cache = BackendCache(str(path), max_age=3600)
+    cache.store("auto", "synthetic", {}, 0.1)
+    assert cache.lookup("auto") is None
+    assert not path.exists()
+
+
+def test_old_synthetic_entries_are_ignored(tmp_path):
+    cache = BackendCache(str(tmp_path / "cache.json"), max_age=3600)
+    cache.store("auto", "webcam", {}, 0.1)
+    # An entry written before synthetic backends were excluded
+    cache._load()[cache.key("auto")]["backend"] = "synthetic"
+    assert cache.lookup("auto") is None
+
+
+def test_expired_and_uncached_types(tmp_path):
+    cache = BackendCache(str(tmp_path / "cache.json"), max_age=-1)
+    cache.store("auto", "argus", {}, 0.1)
+    assert cache.lookup("auto") is None
+    cache.max_age = 3600
+    cache.store("synthetic", "synthetic", {}, 0.1)
+    assert cache.lookup("synthetic") is None
+    assert cache.lookup("auto")["backend"] == "argus"
+    cache.forget("auto")
+    assert cache.lookup("auto") is None
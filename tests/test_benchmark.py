@@ -0,0 +1,42 @@
+import json
+
+from src.tools import benchmark
+
+
+def test_summarize():
+    stats = benchmark.summarize([0.004, 0.001, 0.002, 0.003])
+    assert stats["n"] == 4
+    assert stats["min_ms"] == 1.0 and stats["max_ms"] == 4.0
+    assert stats["mean_ms"] == stats["median_ms"] == 2.5
+    assert stats["p95_ms"] == 4.0
+
+
+def test_time_calls_warms_up_first():
+    calls = []
+    samples = benchmark.time_calls(lambda: calls.append(1), 3, warmup=2)
+    assert len(samples) == 3 and len(calls) == 5
+
+
+def test_main_writes_json(qapp, tmp_path):
+    output = tmp_path / "bench.json"
+    benchmark.main([
+        "--output", str(output),
+        "--only", "thread", "index", "restart", "display", "save",
+        "--duration", "0.3",
+        "--repeat", "2",
+        "--restarts", "1",
+        "--dir-sizes", "5", "20",
+    ])
+    data = json.loads(output.read_text())
+    assert data["meta"]["cpu_count"]
+    results = data["results"]
+    assert results["video_thread"]["frames"] > 0
+    assert results["restart"]["blackout"]["n"] == 1
+    assert results["update_image"]["n"] == 2
+    assert set(results["next_index"]) == {"5", "20"}
+    assert results["next_index"]["20"]["next_index"]["n"] == 2
+    assert {key.split("/")[0] for key in results["save"]} == {
+        "jpg", "png", "tiff", "bmp", "npy"
+    }
+    for result in results["save"].values():
+        assert result["bytes"] > 0 and result["total"]["n"] == 2
@@ -0,0 +1,78 @@
+import numpy as np
+
+from src.core.buffer_pool import BufferPool
+from src.core.mailbox import FrameMailbox
+
+SHAPE = (4, 6, 3)
+
+
+def test_released_buffer_is_reused():
+    pool = BufferPool(max_buffers=2)
+    buf = pool.get(SHAPE)
+    array = buf.array
+    buf.release()
+    again = pool.get(SHAPE)
+    assert again is buf and again.array is array
+    assert (pool.hits, pool.misses) == (1, 1)
+    # Other shapes and dtypes get their own arrays
+    assert pool.get((4, 6)).array is not array
+    assert pool.get(SHAPE, np.float32).array.dtype == np.float32
+
+
+def test_buffer_returns_only_when_every_reference_is_released():
+    pool = BufferPool(max_buffers=2)
+    buf = pool.get(SHAPE)
+    buf.acquire()
+    buf.release()
+    assert pool.stats()["in_use"] == 1
+    assert pool.get(SHAPE) is not buf
+    buf.release()
+    assert pool.get(SHAPE) is buf
+
+
+def test_overflow_buffers_are_not_pooled():
+    pool = BufferPool(max_buffers=1)
+    first = pool.get(SHAPE)
+    extra = pool.get(SHAPE)
+    assert pool.overflow == 1
+    extra.release()
+    first.release()
+    stats = pool.stats()
+    assert (stats["owned"], stats["free"]) == (1, 1)
+    assert pool.get(SHAPE) is first
+
+
+def test_resolution_change_evicts_old_buffers():
+    pool = BufferPool(max_buffers=1)
+    pool.get(SHAPE).release()
+    big = pool.get((8, 12, 3))
+    # The wrong-sized leftover made room instead of overflowing
+    assert pool.overflow == 0
+    assert pool.stats()["owned"] == 1
+    big.release()
+    pool.clear()
+    assert pool.stats()["owned"] == 0
+
+
+def test_mailbox_holds_a_reference_until_released():
+    pool = BufferPool(max_buffers=2)
+    mailbox = FrameMailbox(slots=1)
+    buf = pool.get(SHAPE)
+    mailbox.put(buf.array, buffer=buf)
+    # The producer is done with it; the mailbox still holds it
+    buf.release()
+    assert pool.stats()["in_use"] == 1
+
+    # A newer frame overwrites it and drops the mailbox's reference
+    newer = pool.get(SHAPE)
+    assert newer is not buf
+    mailbox.put(newer.array, buffer=newer)
+    newer.release()
+    assert mailbox.dropped == 1
+    assert pool.stats()["free"] == 1
+
+    packet = mailbox.take_latest()
+    assert packet.buffer is newer
+    packet.release()
+    packet.release()
+    assert pool.stats()["in_use"] == 0
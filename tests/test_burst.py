@@ -0,0 +1,59 @@
+import threading
+from types import SimpleNamespace
+
+import numpy as np
+
+from conftest import wait_until
+from src.core.burst import BurstCapture
+from src.core.catalog import CaptureCatalog
+
+
+def stub_thread():
+    listeners = []
+    return SimpleNamespace(
+        read_failures=0,
+        listeners=listeners,
+        add_frame_listener=listeners.append,
+        remove_frame_listener=listeners.remove,
+        get_settings=lambda: {"gain_range": [1.0, 1.0]},
+        frame_rect=lambda rect: rect,
+    )
+
+
+def test_full_writer_queue_counts_as_dropped(qapp, tmp_path):
+    thread = stub_thread()
+    burst = BurstCapture(thread, workers=1, queue_size=1)
+    # Hold the only worker so the queue fills up
+    release = threading.Event()
+    write_job = burst.writer._write_job
+
+    def slow_write(job):
+        release.wait(10.0)
+        write_job(job)
+
+    burst.writer._write_job = slow_write
+    catalog = CaptureCatalog(str(tmp_path))
+    burst.start(catalog, "b_", "png")
+    frame = np.zeros((16, 16, 3), np.uint8)
+    try:
+        # One frame being written, one queued; the writer is now full
+        for _ in range(2):
+            thread.listeners[0](frame)
+        assert wait_until(qapp, lambda: burst.writer._queue.full())
+        for _ in range(3):
+            thread.listeners[0](frame)
+
+        stats = burst.get_stats()
+        assert stats["frames_queued"] == 2
+        assert stats["dropped"]["queue"] == 3
+        assert stats["dropped"]["total"] == 3
+    finally:
+        release.set()
+        burst.stop()
+        assert wait_until(qapp, lambda: not burst.is_running)
+        burst.shutdown()
+        catalog.close()
+    assert burst.frames_written == 2
+    assert sorted(p.name for p in tmp_path.glob("*.png")) == [
+        "b_0001.png", "b_0002.png"
+    ]
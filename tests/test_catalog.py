@@ -0,0 +1,109 @@
+import os
+import threading
+
+from src.core.catalog import CATALOG_NAME, CaptureCatalog, parse_capture_name
+
+
+def touch(directory, name):
+    with open(os.path.join(directory, name), "wb") as f:
+        f.write(b"x")
+
+
+def write(catalog, prefix="data_", fmt="png", metadata=None):
+    """Reserve, write and commit one capture like the writer does."""
+    _, name = catalog.reserve(prefix, fmt)
+    touch(catalog.directory, name)
+    catalog.commit(name, metadata)
+    return name
+
+
+def test_parse_capture_name():
+    assert parse_capture_name("data_0012.png") == ("data_", 12, "png")
+    assert parse_capture_name("cam1_0003.jpg") == ("cam1_", 3, "jpg")
+    for name in (
+        "20260101-120000_0001.avi",
+        "20260101-120000_0001.jsonl",
+        "data_shard_0001_224x224.npy",
+        "shard-000000.tar",
+        "data_0001.png.tmp",
+        CATALOG_NAME,
+        CATALOG_NAME + "-wal",
+        ".phash_index.db",
+    ):
+        assert parse_capture_name(name) is None, name
+
+
+def test_next_index_continues_from_disk(tmp_path):
+    directory = str(tmp_path)
+    touch(directory, "data_0007.png")
+    touch(directory, "data_0002.jpg")
+    # Not captures: they must not move the counter
+    touch(directory, "data_0099.jsonl")
+    touch(directory, "shard-000050.tar")
+    catalog = CaptureCatalog(directory)
+    assert catalog.next_index("data_", "png") == 8
+    assert catalog.next_index("data_", "jpg") == 3
+    assert catalog.next_index("other_", "png") == 1
+    assert write(catalog, metadata={"iso": 100}) == "data_0008.png"
+    assert catalog.get_metadata("data_0008.png") == {"iso": 100}
+    assert catalog.next_index("data_", "png") == 9
+    catalog.close()
+
+
+def test_reconcile_picks_up_external_changes(tmp_path):
+    directory = str(tmp_path)
+    catalog = CaptureCatalog(directory)
+    write(catalog)
+    touch(directory, "data_0010.png")
+    os.remove(os.path.join(directory, "data_0001.png"))
+    assert catalog.reconcile() == (1, 1)
+    assert catalog.next_index("data_", "png") == 11
+    assert catalog.reconcile() == (0, 0)
+    catalog.close()
+
+
+def test_commit_does_not_hide_external_changes(tmp_path):
+    directory = str(tmp_path)
+    catalog = CaptureCatalog(directory)
+    # Added outside the app after the last scan, then one of ours
+    touch(directory, "data_0042.png")
+    os.utime(directory, ns=(0, 123456789))
+    write(catalog, prefix="cam_")
+    assert catalog.next_index("data_", "png") == 43
+    catalog.close()
+
+
+def test_commit_after_scan_skips_rescan(tmp_path):
+    directory = str(tmp_path)
+    catalog = CaptureCatalog(directory)
+    write(catalog)
+    assert catalog.reconcile() == (0, 0)
+    catalog.close()
+
+
+def test_concurrent_reservations_are_unique(tmp_path):
+    directory = str(tmp_path)
+    catalogs = [CaptureCatalog(directory) for _ in range(2)]
+    names = []
+    lock = threading.Lock()
+
+    def reserve(catalog):
+        for _ in range(25):
+            _, name = catalog.reserve("data_", "png")
+            with lock:
+                names.append(name)
+
+    threads = [
+        threading.Thread(target=reserve, args=(catalog,))
+        for catalog in catalogs for _ in range(2)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len(names) == len(set(names)) == 100
+
+    _, shared = catalogs[0].reserve_shared(["cam0_", "data_"], "png")
+    assert shared == ["cam0_0101.png", "data_0101.png"]
+    for catalog in catalogs:
+        catalog.close()
@@ -0,0 +1,52 @@
+import os
+
+import cv2
+import numpy as np
+
+from src.core.catalog import CATALOG_NAME, CaptureCatalog
+from src.tools import dataset_builder
+
+
+def write_session(directory, value):
+    os.makedirs(directory)
+    image = np.full((40, 60, 3), value, np.uint8)
+    cv2.imwrite(os.path.join(directory, "0001.png"), image)
+    catalog = CaptureCatalog(directory)
+    catalog.commit("0001.png", {"session": value})
+    catalog.close()
+
+
+def listing(directory):
+    return sorted(os.listdir(directory))
+
+
+def test_same_names_in_two_folders_do_not_collide(tmp_path):
+    first, second = str(tmp_path / "s1"), str(tmp_path / "s2")
+    write_session(first, 10)
+    write_session(second, 200)
+    before = {d: listing(d) for d in (first, second)}
+    output = str(tmp_path / "out")
+
+    assert dataset_builder.main(
+        [first, second, "-o", output, "--format", "png", "--workers", "1"]
+    ) == 0
+    assert sorted(
+        name for name in os.listdir(output) if name.endswith(".png")
+    ) == ["s1_0001.png", "s2_0001.png"]
+    assert cv2.imread(os.path.join(output, "s2_0001.png"))[0, 0, 0] == 200
+    # The inputs and their catalogs were only read
+    assert {d: listing(d) for d in (first, second)} == before
+    assert CATALOG_NAME in before[first]
+
+
+def test_colliding_outputs_fail_before_writing(tmp_path):
+    first = str(tmp_path / "a" / "s1")
+    second = str(tmp_path / "b" / "s1")
+    write_session(first, 10)
+    write_session(second, 200)
+    output = str(tmp_path / "out")
+
+    assert dataset_builder.main(
+        [first, second, "-o", output, "--workers", "1"]
+    ) == 2
+    assert not [n for n in os.listdir(output) if n.endswith(".jpg")]
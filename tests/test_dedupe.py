@@ -0,0 +1,125 @@
+import os
+
+import cv2
+import numpy as np
+
+from conftest import wait_until
+from src.core.dedupe import (
+    CHUNK_BITS,
+    INDEX_NAME,
+    DuplicateIndex,
+    hamming,
+    phash,
+)
+from src.core.writer import CaptureWriter
+
+BASE = 0x0123456789ABCDEF
+
+
+def flip(h, count):
+    """Flip `count` bits of h, spread evenly over the four chunks."""
+    for i in range(count):
+        chunk, offset = i % 4, i // 4
+        h ^= 1 << (chunk * CHUNK_BITS + offset)
+    return h
+
+
+def open_index(directory, max_distance=8):
+    index = DuplicateIndex(str(directory), max_distance)
+    index._backfill.join()
+    return index
+
+
+def scene(seed):
+    rng = np.random.default_rng(seed)
+    small = rng.integers(0, 256, (8, 8, 3), dtype=np.uint8)
+    return cv2.resize(small, (128, 96), interpolation=cv2.INTER_LINEAR)
+
+
+def test_phash_ignores_noise_but_not_content():
+    image = scene(1)
+    noisy = cv2.add(image, np.full_like(image, 6))
+    assert hamming(phash(image), phash(noisy)) <= 4
+    assert hamming(phash(image), phash(scene(2))) > 16
+
+
+def test_admit_threshold(tmp_path):
+    index = open_index(tmp_path, max_distance=8)
+    try:
+        assert index.admit("a", BASE, is_file=False) is None
+        # Within max_distance: a duplicate, not added
+        assert index.admit("b", flip(BASE, 8), is_file=False) == ("a", 8)
+        assert len(index) == 1
+        # One bit further: a new capture
+        assert index.admit("c", flip(BASE, 9), is_file=False) is None
+        assert len(index) == 2
+    finally:
+        index.close()
+
+
+def test_admit_keeps_duplicate_on_request(tmp_path):
+    index = open_index(tmp_path)
+    try:
+        index.admit("a", BASE, is_file=False)
+        match = index.admit("b", flip(BASE, 1), False, keep_duplicates=True)
+        assert match == ("a", 1)
+        assert len(index) == 2
+        index.discard("b")
+        assert len(index) == 1
+    finally:
+        index.close()
+
+
+def test_missing_files_are_dropped(tmp_path):
+    index = open_index(tmp_path)
+    try:
+        index.add("gone.png", BASE)
+        assert index.find(BASE) is None
+        assert len(index) == 0
+    finally:
+        index.close()
+
+
+def test_index_persists_and_backfills(tmp_path):
+    image = scene(3)
+    cv2.imwrite(str(tmp_path / "old.png"), image)
+    index = open_index(tmp_path)
+    try:
+        assert len(index) == 1
+        index.add("sample-0", BASE, is_file=False)
+    finally:
+        index.close()
+    assert os.path.exists(tmp_path / INDEX_NAME)
+    index = open_index(tmp_path)
+    try:
+        assert len(index) == 2
+        assert index.find(phash(image))[0] == "old.png"
+    finally:
+        index.close()
+
+
+def test_writer_skips_and_flags_duplicates(qapp, tmp_path):
+    index = open_index(tmp_path)
+    writer = CaptureWriter(workers=1, queue_size=4, fsync_batch_size=0)
+    writer.dedupe = index
+    writer.start()
+    skipped = []
+    writer.write_skipped.connect(lambda path, match: skipped.append(match))
+    image = scene(4)
+    paths = [str(tmp_path / f"{i}.png") for i in range(3)]
+    metadata = {}
+    try:
+        assert writer.submit(image, None, paths[0], "png")
+        assert writer.submit(image, None, paths[1], "png")
+        # keep_duplicates is read by the worker, so wait for the skip first
+        assert wait_until(qapp, lambda: skipped == ["0.png"])
+        writer.keep_duplicates = True
+        assert writer.submit(image, None, paths[2], "png",
+                             metadata=metadata)
+    finally:
+        writer.stop()
+        index.close()
+    assert os.path.exists(paths[0]) and os.path.exists(paths[2])
+    assert not os.path.exists(paths[1])
+    assert metadata["duplicate_of"] == "0.png"
+    assert metadata["hash_distance"] == 0
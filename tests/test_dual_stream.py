@@ -0,0 +1,107 @@
+import threading
+import time
+
+import numpy as np
+
+from src.config import CAM_CONF
+from src.core import video_thread
+from src.core.gst_dual import DualStreamCapture
+from src.core.sources import FrameSource, source_candidates
+from src.core.video_thread import VideoThread
+
+
+class FakeDualSource(FrameSource):
+    """Preview and full-resolution branches without GStreamer."""
+
+    name = "fake-dual"
+    dual = True
+
+    def __init__(self):
+        self.full_enabled = False
+        self.enabled_history = []
+        self.full_reads = 0
+
+    def open(self):
+        return True
+
+    def isOpened(self):
+        return True
+
+    def capabilities(self):
+        return {}
+
+    def set_full_enabled(self, enabled):
+        self.full_enabled = enabled
+        self.enabled_history.append(enabled)
+        self._full_ready = enabled
+
+    def read_preview(self, out=None):
+        time.sleep(0.005)
+        return True, np.zeros((24, 32, 3), np.uint8)
+
+    def read_full(self, out=None):
+        # One full-resolution frame per preview frame, while enabled
+        if not (self.full_enabled and self._full_ready):
+            return False, None
+        self._full_ready = False
+        self.full_reads += 1
+        return True, np.zeros((96, 128, 3), np.uint8)
+
+
+def candidate_names(monkeypatch, available, source_type):
+    monkeypatch.setitem(CAM_CONF, "pipeline_mode", "dual")
+    monkeypatch.setattr(
+        DualStreamCapture, "available", staticmethod(lambda: available)
+    )
+    thread = VideoThread(source_type=source_type)
+    return [name for name, _ in source_candidates(thread, source_type)]
+
+
+def test_dual_mode_falls_back_without_bindings(monkeypatch):
+    assert candidate_names(monkeypatch, True, "argus") == [
+        "argus-dual", "argus"
+    ]
+    assert candidate_names(monkeypatch, False, "auto") == [
+        "argus", "webcam", "synthetic"
+    ]
+    # Webcam and synthetic sources never use the dual pipeline
+    assert candidate_names(monkeypatch, True, "webcam") == ["webcam"]
+    assert candidate_names(monkeypatch, True, "synthetic") == ["synthetic"]
+
+
+def test_full_branch_only_runs_when_needed(monkeypatch):
+    source = FakeDualSource()
+    monkeypatch.setattr(
+        video_thread, "open_source", lambda *args, **kwargs: source
+    )
+    thread = VideoThread(source_type="argus")
+    full_frames = []
+    got_full = threading.Event()
+
+    def on_full(frame):
+        full_frames.append(frame.shape)
+        got_full.set()
+
+    thread.start()
+    try:
+        deadline = time.monotonic() + 10.0
+        while thread.frame_count < 5 and time.monotonic() < deadline:
+            time.sleep(0.01)
+        assert thread.dual_stream
+        # Previews flow with the full-resolution branch closed
+        assert not any(source.enabled_history)
+        packet = thread.mailbox.take_latest()
+        assert packet.frame.shape == (24, 32, 3)
+        packet.release()
+
+        thread.request_full_frame(on_full)
+        assert got_full.wait(10.0)
+        deadline = time.monotonic() + 10.0
+        while source.full_enabled and time.monotonic() < deadline:
+            time.sleep(0.01)
+    finally:
+        thread.stop()
+    assert full_frames == [(96, 128, 3)]
+    # Closed again once the one-shot request was served
+    assert not source.full_enabled
+    assert not thread.dual_stream
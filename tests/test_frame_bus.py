@@ -0,0 +1,129 @@
+import os
+import time
+
+import numpy as np
+import pytest
+
+from src.core import frame_bus
+from src.core.frame_bus import FrameBusPublisher, FrameBusReader
+
+SHAPE = (8, 16, 3)
+
+
+@pytest.fixture
+def bus(request):
+    name = f"test_bus_{os.getpid()}_{request.node.name}"[:60]
+    publisher = FrameBusPublisher(
+        name=name, slots=4, slot_bytes=int(np.prod(SHAPE)),
+        reader_timeout=0.05,
+    )
+    reader = FrameBusReader(name)
+    if not hasattr(frame_bus.shared_memory.SharedMemory, "_track"):
+        # The reader's attach dropped this process's tracking of the
+        # segment, which the publisher still unlinks (Python < 3.13)
+        frame_bus.resource_tracker.register(
+            publisher._shm._name, "shared_memory"
+        )
+    yield publisher, reader
+    reader.close()
+    publisher.close()
+
+
+def publish(publisher, count):
+    for _ in range(count):
+        value = (publisher.seq + 1) % 256
+        publisher.publish(
+            np.full(SHAPE, value, np.uint8), time.monotonic(), {"gain": 1}
+        )
+
+
+def test_latest_reader_loses_nothing(bus):
+    publisher, reader = bus
+    assert reader.latest() is None
+    for _ in range(6):
+        publish(publisher, 1)
+        frame = reader.latest()
+        assert frame.seq == publisher.seq
+        assert frame.array[0, 0, 0] == frame.seq and frame.valid()
+        assert frame.settings == {"gain": 1}
+    # Skipping to the newest frame is what latest() is for, and the
+    # slot of a frame the reader is done with may be reused meanwhile
+    for _ in range(3):
+        publish(publisher, 4)
+        assert reader.latest().seq == publisher.seq
+    assert reader.latest() is None
+    assert (reader.frames_read, reader.lost) == (9, 0)
+    assert publisher.readers()[0]["lost"] == 0
+
+
+def test_next_frame_in_order_and_skip(bus):
+    publisher, reader = bus
+    publish(publisher, 2)
+    assert reader.next_frame().seq == 2
+    publish(publisher, 2)
+    assert [reader.next_frame().seq for _ in range(2)] == [3, 4]
+    assert reader.next_frame() is None and reader.lost == 0
+
+    # 5..13 published and 5 overwritten: skip to 13, never seeing 5..12
+    publish(publisher, 9)
+    frame = reader.next_frame()
+    assert frame.seq == 13
+    assert reader.lost == 8
+    assert publisher.readers()[0]["lost"] == 8
+    publish(publisher, 1)
+    assert reader.next_frame().seq == 14 and reader.lost == 8
+
+
+def test_overwrite_during_read_retries(bus):
+    publisher, reader = bus
+    publish(publisher, 1)
+    read = reader._frame
+    calls = []
+
+    def overwritten(seq):
+        # The whole ring is rewritten between reading write_seq and the slot
+        if not calls:
+            publish(publisher, 4)
+        calls.append(seq)
+        return read(seq)
+
+    reader._frame = overwritten
+    frame = reader.latest()
+    assert calls == [1, 5]
+    assert frame.seq == 5 and reader.lost == 0
+
+
+def test_overwritten_frame_is_invalid(bus):
+    publisher, reader = bus
+    publish(publisher, 1)
+    frame = reader.latest()
+    assert frame.copy() is not None
+    publish(publisher, 4)
+    assert not frame.valid()
+    assert frame.copy() is None
+
+
+def test_registration_and_stall_report(bus, capsys):
+    publisher, reader = bus
+    publish(publisher, 1)
+    reader.latest()
+    (entry,) = publisher.readers()
+    assert entry["pid"] == os.getpid() and entry["alive"]
+    assert (entry["frames_read"], entry["lag"], entry["stalled"]) == (
+        1, 0, False
+    )
+
+    publish(publisher, 2)
+    time.sleep(0.1)
+    (entry,) = publisher.readers()
+    assert entry["lag"] == 2 and entry["stalled"]
+    publisher._check_readers()
+    assert "stalled 2 frames behind" in capsys.readouterr().out
+    # Reported once, not on every check
+    publisher._check_readers()
+    assert capsys.readouterr().out == ""
+
+    reader.latest()
+    assert not publisher.readers()[0]["stalled"]
+    reader.close()
+    assert publisher.readers() == []
@@ -0,0 +1,58 @@
+import threading
+import time
+
+import numpy as np
+
+from src.core.frame_worker import FrameWorker
+from src.core.mailbox import FramePacket
+
+
+class FlakyWorker(FrameWorker):
+    """Fails on every other frame."""
+
+    def __init__(self):
+        super().__init__()
+        self.processed = []
+        self.done = threading.Event()
+
+    def process(self, frame):
+        value = int(frame[0, 0])
+        if value % 2:
+            raise RuntimeError(f"bad frame {value}")
+        self.processed.append(value)
+        if value >= 4:
+            self.done.set()
+
+
+def submit_and_wait(worker, value):
+    worker.submit(FramePacket(value, 0.0, np.full((2, 2), value, np.uint8)))
+    # Wait for the worker to take it, so no frame is skipped
+    deadline = time.monotonic() + 5.0
+    while worker._inbox.stats()["delivered"] < value + 1:
+        assert time.monotonic() < deadline, "worker stopped taking frames"
+        time.sleep(0.001)
+
+
+def test_worker_survives_exceptions(capsys):
+    worker = FlakyWorker()
+    worker.start()
+    try:
+        for value in range(5):
+            submit_and_wait(worker, value)
+        assert worker.done.wait(5.0)
+        assert worker.is_running
+        assert worker._worker.is_alive()
+    finally:
+        worker.stop()
+    assert worker.processed[-1] == 4
+    out = capsys.readouterr().out
+    assert (
+        "FlakyWorker: failed to process frame: RuntimeError: bad frame"
+        in out
+    )
+
+
+def test_submit_ignored_when_stopped():
+    worker = FlakyWorker()
+    worker.submit(FramePacket(1, 0.0, np.zeros((2, 2), np.uint8)))
+    assert worker._inbox.take_latest() is None
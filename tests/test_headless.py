@@ -0,0 +1,59 @@
+import signal
+
+import cv2
+import pytest
+
+from src.cli import headless
+from src.core.catalog import CaptureCatalog
+
+
+@pytest.fixture
+def run_headless(qapp, tmp_path):
+    """Run the headless CLI on the synthetic source; returns its exit code."""
+    signals = (signal.SIGINT, signal.SIGTERM)
+    handlers = {s: signal.getsignal(s) for s in signals}
+
+    def run(*args):
+        return headless.main([
+            "--source", "synthetic", "--output-dir", str(tmp_path),
+            "--dedupe", "off", *args,
+        ])
+
+    yield run
+    for sig, handler in handlers.items():
+        signal.signal(sig, handler)
+
+
+def test_parse_rect_and_size():
+    assert headless.parse_rect("1,2,3,4") == (1, 2, 3, 4)
+    assert headless.parse_size("448x448") == (448, 448)
+    with pytest.raises(SystemExit):
+        headless.build_parser().parse_args(["--roi", "1,2"])
+
+
+def test_saves_count_frames_with_settings(run_headless, tmp_path, capsys):
+    code = run_headless(
+        "--count", "5", "--format", "png", "--prefix", "h_",
+        "--roi-size", "64x48", "--gain", "2", "2", "--wb-mode", "3",
+    )
+    assert code == 0
+    names = sorted(p.name for p in tmp_path.glob("*.png"))
+    assert names == [f"h_{i:04d}.png" for i in range(1, 6)]
+    assert cv2.imread(str(tmp_path / names[0])).shape == (48, 64, 3)
+
+    catalog = CaptureCatalog(str(tmp_path))
+    metadata = catalog.get_metadata("h_0005.png")
+    catalog.close()
+    assert metadata["settings"]["gain_range"] == [2.0, 2.0]
+    assert metadata["settings"]["wb_mode"] == 3
+    assert len(metadata["roi"]) == 4
+
+    out = capsys.readouterr().out
+    assert "Wrote 5 frames" in out
+    assert "dropped: 0 (" in out
+
+
+def test_next_run_continues_numbering(run_headless, tmp_path):
+    assert run_headless("--count", "2", "--format", "jpg") == 0
+    assert run_headless("--count", "2", "--format", "jpg") == 0
+    assert len(list(tmp_path.glob("*.jpg"))) == 4
@@ -0,0 +1,42 @@
+import pytest
+
+from src.ui.main_window import CONTROL_DEFAULTS, DataCollectorApp
+
+
+@pytest.fixture
+def open_window(qapp, tmp_path, monkeypatch):
+    """Build main windows on the synthetic source, saving to a temp dir."""
+    # The window creates its save directory relative to the cwd
+    monkeypatch.chdir(tmp_path)
+    windows = []
+
+    def open_window():
+        windows.append(DataCollectorApp(source_type="synthetic", remote=False))
+        return windows[-1]
+
+    yield open_window
+    for win in windows:
+        win.close()
+    qapp.processEvents()
+
+
+def test_camera_starts_with_the_control_settings(open_window):
+    win = open_window()
+    assert win.exp_slider.value() == CONTROL_DEFAULTS["exposure"]
+    # Nothing to restart once the controls exist
+    assert win.thread.apply_settings(win.control_settings()) == "unchanged"
+    win.settings_txn.flush()
+    assert win.thread.restarts == 0
+
+
+def test_camera_opens_while_the_window_is_built(open_window, monkeypatch):
+    running = []
+    init_ui = DataCollectorApp.init_ui
+
+    def record(self):
+        init_ui(self)
+        running.append(self.thread.isRunning())
+
+    monkeypatch.setattr(DataCollectorApp, "init_ui", record)
+    open_window()
+    assert running == [True]
@@ -0,0 +1,56 @@
+import time
+
+from src.core.metrics import Metrics, csv_rows, format_prometheus
+
+
+def test_first_snapshot_has_no_rates():
+    metrics = Metrics(enabled=True)
+    metrics.inc("frames_captured")
+    snap = metrics.snapshot("export")
+    assert snap["rates"] == {}
+    assert snap["process"]["cpu_percent"] is None
+
+
+def test_rates_since_previous_snapshot_of_each_consumer(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(time, "monotonic", lambda: now[0])
+    metrics = Metrics(enabled=True)
+    metrics.snapshot("export")
+    metrics.snapshot("hud")
+
+    # The HUD polls often; the exporter only every 10 s
+    for _ in range(40):
+        now[0] += 0.25
+        metrics.inc("frames_captured", 5)
+        hud = metrics.snapshot("hud")
+    assert hud["rates"]["frames_captured"] == 20.0
+
+    export = metrics.snapshot("export")
+    assert export["rates"]["frames_captured"] == 20.0
+    assert export["process"]["cpu_percent"] is not None
+    text = format_prometheus(export)
+    assert "datacollector_frames_captured_per_second 20.0" in text
+    assert "datacollector_process_cpu_percent" in text
+    assert any(row[1] == "rate.frames_captured" for row in csv_rows(export))
+
+
+def test_export_rates_over_long_interval(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(time, "monotonic", lambda: now[0])
+    metrics = Metrics(enabled=True)
+    metrics.snapshot("export")
+    now[0] += 10.0
+    metrics.inc("frames_captured", 300)
+    snap = metrics.snapshot("export")
+    assert snap["rates"]["frames_captured"] == 30.0
+    assert snap["process"]["cpu_percent"] is not None
+
+
+def test_observe_and_reset():
+    metrics = Metrics(enabled=True)
+    metrics.observe("save.submit", 0.002)
+    metrics.observe("save.submit", 0.004)
+    stage = metrics.snapshot()["stages"]["save.submit"]
+    assert stage["count"] == 2 and stage["max"] == 0.004
+    metrics.reset()
+    assert metrics.snapshot()["stages"] == {}
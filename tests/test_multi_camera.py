@@ -0,0 +1,70 @@
+import pytest
+
+from conftest import wait_until
+from src.core.catalog import CaptureCatalog
+from src.core.multi_camera import CameraRig, SyncCapture, align_frames
+
+
+def history(*stamps):
+    return [(ts, None) for ts in stamps]
+
+
+def test_align_single_camera():
+    indices, skew = align_frames([history(1.0, 2.0)])
+    assert skew == 0
+    assert indices in ([0], [1])
+
+
+def test_align_picks_closest_set():
+    histories = [
+        history(0.00, 0.10, 0.20),
+        history(0.03, 0.12, 0.24),
+        history(0.08, 0.115, 0.30),
+    ]
+    indices, skew = align_frames(histories)
+    assert indices == [1, 1, 1]
+    assert skew == pytest.approx(0.02)
+
+
+def test_align_uses_every_camera_as_reference():
+    # Only the lagging camera's frame 1 lines up with the others' frame 0
+    histories = [history(5.0, 6.0), history(5.001, 9.0), history(1.0, 5.002)]
+    indices, skew = align_frames(histories)
+    assert indices == [0, 0, 1]
+    assert skew == pytest.approx(0.002)
+
+
+def test_align_uneven_histories():
+    indices, skew = align_frames([history(1.0), history(0.2, 0.9, 1.5)])
+    assert indices == [0, 1]
+    assert skew == pytest.approx(0.1)
+
+
+def test_sync_capture_with_synthetic_rig(qapp, tmp_path):
+    cameras = [
+        {"name": "left", "options": {"width": 64, "height": 48, "fps": 60}},
+        {"name": "right", "options": {"width": 32, "height": 24, "fps": 60}},
+    ]
+    rig = CameraRig(cameras, source_type="synthetic")
+    sync = SyncCapture(rig, window=3, timeout_ms=5000)
+    catalog = CaptureCatalog(str(tmp_path))
+    results = []
+    sync.captured.connect(results.append)
+    sync.failed.connect(results.append)
+    rig.start()
+    try:
+        assert sync.capture(catalog, "set_", "png")
+        assert not sync.capture(catalog, "set_", "png")
+        assert wait_until(qapp, lambda: results)
+    finally:
+        rig.stop()
+        sync.writer.stop()
+        catalog.close()
+    result = results[0]
+    assert isinstance(result, dict), result
+    assert result["index"] == 1
+    assert result["files"] == ["set_left_0001.png", "set_right_0001.png"]
+    assert result["skew_ms"] == max(result["offsets_ms"].values())
+    # The writer has been stopped, so every file is on disk
+    names = sorted(p.name for p in tmp_path.glob("set_*.png"))
+    assert names == ["set_left_0001.png", "set_right_0001.png"]
@@ -0,0 +1,86 @@
+from PyQt5.QtCore import QRect
+
+from src.config import (
+    DEFAULT_HEIGHT,
+    DEFAULT_WIDTH,
+    DISPLAY_HEIGHT,
+    DISPLAY_WIDTH,
+)
+from src.core.imaging import (
+    bounding_roi,
+    clamp_roi,
+    display_rois_to_sensor,
+    roi_within,
+    sensor_rect_on_frame,
+)
+from src.ui.widgets import VideoLabel
+
+
+def test_clamp_roi():
+    assert clamp_roi((10, 20, 30, 40)) == (10, 20, 30, 40)
+    assert clamp_roi((-10, -5, 30, 40)) == (0, 0, 30, 40)
+    assert clamp_roi((DEFAULT_WIDTH - 10, 0, 30, 40)) == (
+        DEFAULT_WIDTH - 10, 0, 10, 40
+    )
+    assert clamp_roi((DEFAULT_WIDTH + 5, 0, 30, 40)) is None
+
+
+def test_display_rois_map_in_one_pass():
+    sx = DEFAULT_WIDTH / DISPLAY_WIDTH
+    sy = DEFAULT_HEIGHT / DISPLAY_HEIGHT
+    rects = display_rois_to_sensor([
+        ((100, 50, 40, 30), None),
+        # A fixed size is kept exactly around the scaled centre
+        ((200, 100, 80, 80), (224, 224)),
+        # Past the bottom-right corner: clipped to the sensor
+        ((DISPLAY_WIDTH - 10, DISPLAY_HEIGHT - 10, 40, 40), None),
+        ((DISPLAY_WIDTH + 50, 0, 10, 10), None),
+    ])
+    assert rects[0] == (
+        round(100 * sx), round(50 * sy), round(40 * sx), round(30 * sy)
+    )
+    assert rects[1][2:] == (224, 224)
+    x, y, w, h = rects[2]
+    assert x + w == DEFAULT_WIDTH and y + h == DEFAULT_HEIGHT
+    assert rects[3] is None
+
+
+def test_rects_on_cropped_and_scaled_frames():
+    assert bounding_roi([(10, 10, 20, 20), None, (50, 0, 10, 5)]) == (
+        10, 0, 50, 30
+    )
+    outer = (100, 100, 200, 100)
+    assert roi_within((150, 120, 20, 20), outer) == (50, 20, 20, 20)
+    # Partly outside the sensor-cropped frame: clipped
+    assert roi_within((280, 180, 50, 50), outer) == (180, 80, 20, 20)
+    assert roi_within(None, outer) is None
+    half = (DEFAULT_HEIGHT // 2, DEFAULT_WIDTH // 2, 3)
+    assert sensor_rect_on_frame((100, 100, 50, 50), half) == (50, 50, 25, 25)
+    assert sensor_rect_on_frame((DEFAULT_WIDTH, 0, 10, 10), half) is None
+
+
+def test_video_label_regions(qapp):
+    label = VideoLabel("")
+    label.resize(DISPLAY_WIDTH, DISPLAY_HEIGHT)
+    label.add_region(QRect(10, 10, 50, 50), "cat")
+    # Resized to a preset around its centre, it is kept inside the preview
+    label.set_fixed_roi(448, 448)
+    x, y, w, h = label.get_roi()
+    assert (x, y) == (0, 0) and w > 50
+    # With nothing selected, a preset places a new region in the centre
+    label.selected = None
+    label.set_fixed_roi(224, 224)
+    label.set_selected_label("dog")
+
+    regions = label.get_regions()
+    assert [r[2] for r in regions] == ["cat", "dog"]
+    assert [r[1] for r in regions] == [(448, 448), (224, 224)]
+    rects = display_rois_to_sensor(
+        [(rect, fixed) for rect, fixed, _ in regions]
+    )
+    assert [r[2:] for r in rects] == [(448, 448), (224, 224)]
+
+    label.delete_region(0)
+    assert label.selected == 0 and label.selected_label() == "dog"
+    label.clear_roi()
+    assert not label.has_roi and label.get_roi() is None
@@ -0,0 +1,124 @@
+from src.config import (
+    CAM_CONF,
+    DEFAULT_HEIGHT,
+    DEFAULT_WIDTH,
+    DISPLAY_HEIGHT,
+    DISPLAY_WIDTH,
+)
+from src.core.pipelines import (
+    align_crop,
+    dual_pipeline,
+    flip_method,
+    roi_pipeline,
+    single_pipeline,
+    unflipped_crop,
+)
+
+SETTINGS = {
+    "exposure_range": (13000, 15013000),
+    "gain_range": (1.0, 1.0),
+    "ae_lock": False,
+    "awb_lock": True,
+    "saturation": 1.0,
+    "wb_mode": 1,
+    "tnr_mode": 1,
+    "tnr_strength": 0.5,
+    "ee_mode": 1,
+    "ee_strength": 0.5,
+    "h_flip": False,
+    "v_flip": False,
+}
+
+
+def settings(**changes):
+    return dict(SETTINGS, **changes)
+
+
+def test_flip_method():
+    assert flip_method(False, False) == 0
+    assert flip_method(True, False) == 4
+    assert flip_method(False, True) == 6
+    assert flip_method(True, True) == 2
+
+
+def test_single_pipeline():
+    pipeline = single_pipeline(SETTINGS)
+    assert pipeline.startswith("nvarguscamerasrc ")
+    assert "sensor-id" not in pipeline
+    assert 'exposuretimerange="13000 15013000"' in pipeline
+    assert 'gainrange="1.0 1.0"' in pipeline
+    assert "aelock" not in pipeline
+    assert "awblock=true" in pipeline
+    assert "wbmode=1 tnr-mode=1 tnr-strength=0.5" in pipeline
+    assert (
+        f"width={DEFAULT_WIDTH}, height={DEFAULT_HEIGHT}, format=NV12, "
+        f"framerate={CAM_CONF['framerate']}" in pipeline
+    )
+    assert "nvvidconv flip-method=0 !" in pipeline
+    assert pipeline.endswith("appsink drop=1")
+    assert "tee" not in pipeline
+
+
+def test_single_pipeline_options():
+    pipeline = single_pipeline(
+        settings(exposure_range=None, gain_range=None, h_flip=True),
+        sensor_id=1,
+    )
+    assert pipeline.startswith("nvarguscamerasrc sensor-id=1 ")
+    assert "exposuretimerange" not in pipeline
+    assert "gainrange" not in pipeline
+    assert "flip-method=4" in pipeline
+
+
+def test_dual_pipeline():
+    pipeline = dual_pipeline(settings(v_flip=True))
+    assert "tee name=t" in pipeline
+    assert pipeline.count("nvvidconv flip-method=6") == 2
+    assert (
+        f"width={DISPLAY_WIDTH}, height={DISPLAY_HEIGHT}, format=BGRx"
+        in pipeline
+    )
+    assert "appsink name=preview" in pipeline
+    # The full-resolution branch starts closed
+    assert "valve name=fullvalve drop=true" in pipeline
+    full = pipeline.split("valve name=fullvalve")[1]
+    assert f"width={DEFAULT_WIDTH}, height={DEFAULT_HEIGHT}" in full
+    assert full.endswith(
+        "appsink name=full drop=true max-buffers=4 sync=false"
+    )
+
+
+def test_roi_pipeline_crops_full_branch_only():
+    roi = (100, 50, 200, 120)
+    pipeline = roi_pipeline(SETTINGS, roi)
+    preview, full = pipeline.split("valve name=fullvalve")
+    assert "left=" not in preview
+    assert "left=100 top=50 right=300 bottom=170" in full
+    assert "width=200, height=120, format=BGRx" in full
+
+
+def test_roi_pipeline_maps_crop_through_flip():
+    roi = (100, 50, 200, 120)
+    pipeline = roi_pipeline(settings(h_flip=True, v_flip=True), roi)
+    x = DEFAULT_WIDTH - 300
+    y = DEFAULT_HEIGHT - 170
+    assert f"left={x} top={y} right={x + 200} bottom={y + 120}" in pipeline
+    assert "flip-method=2 left=" in pipeline
+
+
+def test_align_crop():
+    assert align_crop((101, 51, 200, 120)) == (100, 50, 202, 122)
+    assert align_crop((0, 0, DEFAULT_WIDTH, DEFAULT_HEIGHT)) == (
+        0, 0, DEFAULT_WIDTH, DEFAULT_HEIGHT
+    )
+    # Never grows past the sensor edge
+    x, y, w, h = align_crop((DEFAULT_WIDTH - 11, DEFAULT_HEIGHT - 11, 11, 11))
+    assert x + w == DEFAULT_WIDTH and y + h == DEFAULT_HEIGHT
+
+
+def test_unflipped_crop_round_trips():
+    rect = (10, 20, 30, 40)
+    for h_flip in (False, True):
+        for v_flip in (False, True):
+            camera = unflipped_crop(rect, h_flip, v_flip)
+            assert unflipped_crop(camera, h_flip, v_flip) == rect
@@ -0,0 +1,118 @@
+import os
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+
+from conftest import wait_until
+from src.core.recorder import (
+    PARTIAL,
+    VideoRecorder,
+    iter_segment,
+    read_sidecar,
+    sidecar_path,
+)
+
+
+class FakeThread(SimpleNamespace):
+    """The parts of VideoThread the recorder uses, driven by the test."""
+
+    def __init__(self):
+        super().__init__(
+            read_failures=0, frame_count=0, frame_time=0.0, listeners=[],
+            settings={"exposure": 5},
+        )
+
+    def add_frame_listener(self, listener):
+        self.listeners.append(listener)
+
+    def remove_frame_listener(self, listener):
+        self.listeners.remove(listener)
+
+    def frame_rect(self, rect):
+        return rect
+
+    def get_settings(self):
+        return dict(self.settings)
+
+    def emit(self, frame, frame_time):
+        self.frame_count += 1
+        self.frame_time = frame_time
+        for listener in list(self.listeners):
+            listener(frame)
+
+
+@pytest.fixture
+def recorder(qapp):
+    thread = FakeThread()
+    recorder = VideoRecorder(thread, queue_frames=16)
+    finished = []
+    recorder.finished.connect(finished.append)
+    yield recorder, thread
+    recorder.shutdown()
+    # The final stats are emitted from the writer thread
+    assert wait_until(qapp, lambda: finished)
+
+
+def frame(value, shape=(48, 64, 3)):
+    return np.full(shape, value, np.uint8)
+
+
+def segments(directory):
+    return sorted(
+        os.path.join(directory, name) for name in os.listdir(directory)
+        if name.endswith(".avi")
+    )
+
+
+def test_segments_roll_over_on_frame_time(recorder, tmp_path):
+    recorder, thread = recorder
+    recorder.start(str(tmp_path), prefix="rec_", codec="mjpg",
+                   rect=(2, 2, 9, 7), segment_seconds=1.0)
+    for i, t in enumerate([10.0, 10.5, 11.0, 11.5, 12.0]):
+        if i == 3:
+            thread.settings["exposure"] = 20
+        thread.emit(frame(40 * i), t)
+    recorder.shutdown()
+    assert recorder.segments == 3
+    assert not any(PARTIAL in name for name in os.listdir(tmp_path))
+    paths = segments(str(tmp_path))
+    assert [os.path.basename(p)[-9:] for p in paths] == [
+        "_0001.avi", "_0002.avi", "_0003.avi"
+    ]
+    rows = []
+    for path in paths:
+        header, frames = read_sidecar(sidecar_path(path))
+        assert header["video"] == os.path.basename(path)
+        # Odd crop sizes are trimmed to even ones
+        assert header["roi"] == [2, 2, 8, 6]
+        assert [f["frame"] for f in frames] == list(range(len(frames)))
+        rows.append(frames)
+    # One sidecar row per frame, split at each full second
+    assert [len(frames) for frames in rows] == [2, 2, 1]
+    flat = [f for frames in rows for f in frames]
+    assert [f["seq"] for f in flat] == [1, 2, 3, 4, 5]
+    assert [f["timestamp"] for f in flat] == [10.0, 10.5, 11.0, 11.5, 12.0]
+    # Settings are stored on change but read back for every frame
+    assert [f["settings"]["exposure"] for f in flat] == [5, 5, 5, 20, 20]
+    decoded = list(iter_segment(paths[0]))
+    assert len(decoded) == 2
+    assert decoded[1][1].shape == (6, 8, 3)
+
+
+def test_size_change_starts_a_segment(recorder, tmp_path):
+    recorder, thread = recorder
+    recorder.start(str(tmp_path), codec="mjpg", segment_seconds=0)
+    thread.emit(frame(0), 1.0)
+    thread.emit(frame(0), 2.0)
+    thread.emit(frame(0, (24, 32, 3)), 3.0)
+    recorder.shutdown()
+    headers = [
+        read_sidecar(sidecar_path(path))[0]
+        for path in segments(str(tmp_path))
+    ]
+    sizes = [(h["width"], h["height"]) for h in headers]
+    assert sizes == [(64, 48), (32, 24)]
+    stats = recorder.get_stats()
+    assert stats["frames_encoded"] == 3
+    assert stats["dropped"] == {"camera": 0, "queue": 0, "write": 0}
@@ -0,0 +1,231 @@
+import http.client
+import json
+import os
+import threading
+
+import pytest
+
+from conftest import wait_until
+from src.core.remote import RemoteServer
+from src.ui.remote_control import WindowController
+
+TOKEN = "s3cret"
+
+
+@pytest.fixture(scope="module")
+def window(qapp, tmp_path_factory):
+    """The main window on the synthetic source, saving to a temp dir."""
+    from src.ui.main_window import DataCollectorApp
+
+    cwd = os.getcwd()
+    # The window creates its save directory relative to the cwd
+    os.chdir(tmp_path_factory.mktemp("remote"))
+    try:
+        win = DataCollectorApp(source_type="synthetic", remote=False)
+        assert wait_until(qapp, lambda: win.current_frame is not None)
+        yield win
+        win.close()
+        qapp.processEvents()
+    finally:
+        os.chdir(cwd)
+
+
+@pytest.fixture(scope="module")
+def server(window):
+    remote = RemoteServer(
+        WindowController(window), host="127.0.0.1", port=0, token=TOKEN,
+        max_kbps=0, call_timeout=5.0,
+    )
+    remote.start()
+    window.remote = remote
+    yield remote
+    window.remote = None
+    remote.stop()
+
+
+def request(app, server, method, path, body=None, token=TOKEN):
+    """
+    Send one request from a client thread while the GUI thread runs.
+
+    Returns (status, content type, body); JSON bodies are decoded.
+    """
+    result = {}
+
+    def send():
+        conn = http.client.HTTPConnection("127.0.0.1", server.port, timeout=10)
+        headers = {"Authorization": f"Bearer {token}"} if token else {}
+        data = None
+        if body is not None:
+            data = body if isinstance(body, bytes) else json.dumps(body)
+            headers["Content-Type"] = "application/json"
+        try:
+            conn.request(method, path, data, headers)
+            response = conn.getresponse()
+            result["response"] = (
+                response.status,
+                response.getheader("Content-Type"),
+                response.read(),
+            )
+        finally:
+            conn.close()
+
+    client = threading.Thread(target=send)
+    client.start()
+    assert wait_until(app, lambda: not client.is_alive())
+    status, content_type, data = result["response"]
+    if content_type == "application/json":
+        data = json.loads(data)
+    return status, content_type, data
+
+
+def test_status(qapp, server):
+    status, _, data = request(qapp, server, "GET", "/api/status")
+    assert status == 200
+    assert data["source"] == "synthetic"
+    assert data["frame_count"] > 0
+    # Seeded from the controls, not unset
+    assert data["settings"]["exposure_range"] is not None
+    assert data["rois"] == []
+    assert {"clients", "frames_sent"} <= set(data["stream"])
+
+
+def test_token_required(qapp, server):
+    assert request(qapp, server, "GET", "/api/status", token=None)[0] == 401
+    assert request(qapp, server, "GET", "/api/status", token="x")[0] == 401
+    status, _, _ = request(
+        qapp, server, "GET", f"/api/status?token={TOKEN}", token=None
+    )
+    assert status == 200
+
+
+def test_unknown_route(qapp, server):
+    status, _, data = request(qapp, server, "GET", "/api/nothing")
+    assert status == 404 and "error" in data
+
+
+def test_settings(qapp, server):
+    status, _, data = request(
+        qapp, server, "POST", "/api/settings",
+        {"gain_range": [2, 2], "wb_mode": 2, "h_flip": True},
+    )
+    assert status == 200
+    requested = data["requested"]
+    assert requested["gain_range"] == [2.0, 2.0]
+    assert requested["wb_mode"] == 2 and requested["h_flip"] is True
+    status, _, data = request(qapp, server, "GET", "/api/settings")
+    assert status == 200 and data["requested"]["wb_mode"] == 2
+
+
+@pytest.mark.parametrize(
+    "body",
+    [
+        {"bogus": 1},
+        {"wb_mode": 99},
+        {"h_flip": "yes"},
+        {"exposure_range": [1, 2, 3]},
+        [1, 2],
+        b"{not json",
+    ],
+)
+def test_settings_errors(qapp, server, body):
+    status, _, data = request(qapp, server, "POST", "/api/settings", body)
+    assert status == 400 and data["error"]
+
+
+def test_rois(qapp, server):
+    status, _, data = request(
+        qapp, server, "POST", "/api/rois",
+        [{"rect": [100, 100, 200, 150], "label": "cat dog"}, [0, 0, 64, 64]],
+    )
+    assert status == 200
+    assert [roi["label"] for roi in data] == ["cat_dog", ""]
+    assert [roi["rect"][2:] for roi in data] == [[200, 150], [64, 64]]
+    assert request(qapp, server, "GET", "/api/rois")[2] == data
+
+    status, _, data = request(qapp, server, "DELETE", "/api/rois")
+    assert status == 200 and data == []
+
+
+@pytest.mark.parametrize(
+    "body", [{"rect": [1, 2]}, [[1, 2, 3]], [[5000, 5000, 10, 10]], {}]
+)
+def test_roi_errors(qapp, server, body):
+    status, _, data = request(qapp, server, "POST", "/api/rois", body)
+    assert status == 400 and data["error"]
+
+
+@pytest.mark.parametrize(
+    "body",
+    [{"format": "gif"}, {"dedupe": "sometimes"}, {"folder": "x"}, []],
+)
+def test_output_errors(qapp, server, window, body):
+    before = window.combo_format.currentText()
+    status, _, data = request(qapp, server, "POST", "/api/output", body)
+    assert status == 400 and data["error"]
+    assert window.combo_format.currentText() == before
+
+
+def test_output_and_capture(qapp, server, window):
+    status, _, data = request(
+        qapp, server, "POST", "/api/output",
+        {"format": "jpg", "prefix": "remote_"},
+    )
+    assert status == 200
+    assert data["format"] == "jpg" and data["prefix"] == "remote_"
+
+    status, _, data = request(qapp, server, "POST", "/api/capture")
+    assert status == 200
+    assert data["saved"].endswith("remote_0001.jpg")
+    path = os.path.join(window.save_dir, "remote_0001.jpg")
+    assert wait_until(qapp, lambda: os.path.exists(path))
+
+
+def test_snapshot(qapp, server):
+    status, content_type, data = request(qapp, server, "GET", "/snapshot.jpg")
+    assert status == 200
+    assert content_type == "image/jpeg"
+    assert data[:2] == b"\xff\xd8"
+
+
+def test_stream(qapp, server):
+    parts = []
+
+    def watch():
+        conn = http.client.HTTPConnection("127.0.0.1", server.port, timeout=10)
+        conn.request("GET", f"/stream.mjpg?token={TOKEN}")
+        response = conn.getresponse()
+        parts.append(response.getheader("Content-Type"))
+        for _ in range(2):
+            assert response.fp.readline() == b"--frame\r\n"
+            assert response.fp.readline() == b"Content-Type: image/jpeg\r\n"
+            length = int(response.fp.readline().split(b":")[1])
+            response.fp.readline()
+            parts.append(response.fp.read(length + 2))
+        conn.close()
+
+    client = threading.Thread(target=watch)
+    client.start()
+    assert wait_until(qapp, lambda: not client.is_alive())
+    assert parts[0] == "multipart/x-mixed-replace; boundary=frame"
+    assert len(parts) == 3
+    for jpeg in parts[1:]:
+        assert jpeg[:2] == b"\xff\xd8" and jpeg.endswith(b"\r\n")
+
+
+def test_timed_out_call_never_runs(qapp):
+    remote = RemoteServer(None, call_timeout=0.1)
+    calls, errors = [], []
+
+    def client():
+        try:
+            remote.call(calls.append, "late")
+        except TimeoutError as e:
+            errors.append(e)
+
+    # The GUI thread is busy (not running the event loop) meanwhile
+    thread = threading.Thread(target=client)
+    thread.start()
+    thread.join()
+    assert len(errors) == 1
+    qapp.processEvents()
+    assert calls == []
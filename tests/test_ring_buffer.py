@@ -0,0 +1,42 @@
+import numpy as np
+import pytest
+
+from src.core.ring_buffer import FrameRingBuffer, ring_capacity, ring_window
+
+FRAME_BYTES = 4 * 4 * 3
+
+
+def frame(value):
+    return np.full((4, 4, 3), value, np.uint8)
+
+
+def test_capacity_covers_pre_and_post_seconds():
+    assert ring_capacity(10**9, 3.0, 1.0, 30, FRAME_BYTES) == 120
+    # Capped by the byte budget
+    assert ring_capacity(44 * FRAME_BYTES, 3.0, 1.0, 30, FRAME_BYTES) == 44
+
+
+def test_window_shrinks_in_proportion():
+    assert ring_window(120, 3.0, 1.0, 30) == (3.0, 1.0)
+    pre, post = ring_window(60, 3.0, 1.0, 30)
+    assert pre == pytest.approx(1.5) and post == pytest.approx(0.5)
+
+
+def test_hold_keeps_pre_trigger_frames():
+    ring = FrameRingBuffer(10 * FRAME_BYTES, 1.0, 10, post_seconds=0.0)
+    for i in range(10):
+        ring.push(frame(i), 100.0 + i * 0.1)
+    assert ring.capacity == 10
+    ring.hold(100.5)
+    for i in range(10, 15):
+        ring.push(frame(i), 100.0 + i * 0.1)
+    kept = [int(f[0, 0, 0]) for f, _ in ring.frames_between(100.5, 102.0)]
+    # Frames older than the hold were overwritten, the held ones were not
+    assert kept == [5, 6, 7, 8, 9, 10, 11, 12, 13, 14]
+    ring.push(frame(15), 101.5)
+    assert ring.frames_skipped == 1
+
+    ring.release()
+    ring.push(frame(16), 101.6)
+    kept = [int(f[0, 0, 0]) for f, _ in ring.frames_between(0, 200)]
+    assert kept[0] == 6 and kept[-1] == 16
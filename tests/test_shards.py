@@ -0,0 +1,75 @@
+import functools
+
+import numpy as np
+
+from src.core import shards
+from src.core.shards import (
+    NpyShard,
+    ShardSink,
+    list_shards,
+    open_shard,
+    read_header_shape,
+)
+
+
+def frame(value, h=12, w=16):
+    return np.full((h, w, 3), value, np.uint8)
+
+
+def test_shard_grows_and_is_readable_while_open(tmp_path):
+    path = str(tmp_path / "shard_0000_4x4.npy")
+    shard = NpyShard(path, (4, 4, 3), capacity=1, max_samples=10)
+    for i in range(3):
+        shard.append(frame(i, 4, 4), {"n": i, "settings": {"gain": 1}})
+    assert shard.capacity == 4
+    assert read_header_shape(path) == (3, 4, 4, 3)
+
+    samples, index = open_shard(path)
+    assert samples.shape == (3, 4, 4, 3)
+    assert [int(s[0, 0, 0]) for s in samples] == [0, 1, 2]
+    assert [entry["n"] for entry in index] == [0, 1, 2]
+    # Settings are stored once and filled back in for every entry
+    assert [entry["settings"] for entry in index] == [{"gain": 1}] * 3
+    with open(path[: -len(".npy")] + ".index.jsonl") as f:
+        assert sum('"settings"' in line for line in f) == 1
+
+    shard.close()
+    samples, _ = open_shard(path)
+    assert samples.shape[0] == 3
+    # The preallocated tail is trimmed on close
+    assert len(np.load(path)) == 3
+
+
+def test_sink_rolls_over_full_shards(tmp_path, monkeypatch):
+    monkeypatch.setattr(
+        shards, "NpyShard", functools.partial(NpyShard, max_samples=3)
+    )
+    sink = ShardSink(str(tmp_path), "s_")
+    for i in range(7):
+        sink.append(frame(i), (0, 0, 8, 6), {"n": i})
+    sink.close()
+
+    paths = list_shards(str(tmp_path), "s_")
+    assert [p.rsplit("/", 1)[1] for p in paths] == [
+        "s_shard_0000_6x8.npy", "s_shard_0001_6x8.npy", "s_shard_0002_6x8.npy"
+    ]
+    counts = [len(open_shard(p)[0]) for p in paths]
+    assert counts == [3, 3, 1]
+    assert [e["n"] for p in paths for e in open_shard(p)[1]] == list(range(7))
+
+    # A new sink continues the numbering
+    again = ShardSink(str(tmp_path), "s_")
+    assert again.describe_next() == "s_shard_0003 (new)"
+
+
+def test_sink_keeps_one_shard_per_crop_size(tmp_path):
+    sink = ShardSink(str(tmp_path))
+    sink.append(frame(1), (0, 0, 8, 6))
+    sink.append(frame(2), (0, 0, 4, 4))
+    path, index = sink.append(frame(3), (2, 2, 8, 6))
+    assert path.endswith("shard_0000_6x8.npy") and index == 1
+    assert sink.describe_next() == "shard_0000_6x8.npy[2]"
+    sink.close()
+    assert [len(open_shard(p)[0]) for p in list_shards(str(tmp_path))] == [
+        2, 1
+    ]
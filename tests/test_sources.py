@@ -0,0 +1,85 @@
+import time
+
+import numpy as np
+import pytest
+
+from src.core.sources import (
+    FrameSource,
+    ReplaySource,
+    SyntheticSource,
+    open_source,
+    source_candidates,
+    synthetic_source,
+)
+from src.core.video_thread import VideoThread
+
+
+@pytest.mark.parametrize("pattern", ["noise", "gradient", "bars"])
+def test_synthetic_contract(pattern):
+    source = SyntheticSource(64, 48, fps=0, pattern=pattern, frames=3)
+    assert isinstance(source, FrameSource)
+    assert not source.dual and not source.applies_isp and not source.crops
+    assert source.open()
+    assert source.isOpened()
+    caps = source.capabilities()
+    assert (caps["width"], caps["height"], caps["format"]) == (64, 48, "BGR")
+    ret, frame = source.read()
+    assert ret
+    assert frame.shape == (48, 64, 3) and frame.dtype == np.uint8
+    source.release()
+
+
+def test_synthetic_reads_into_out():
+    source = SyntheticSource(32, 16, fps=0, frames=2, label="")
+    source.open()
+    out = np.zeros((16, 32, 3), np.uint8)
+    ret, frame = source.read(out)
+    assert ret and frame is out
+    # A buffer of the wrong shape is replaced, not written into
+    wrong = np.zeros((8, 8, 3), np.uint8)
+    ret, frame = source.read(wrong)
+    assert ret and frame is not wrong and frame.shape == (16, 32, 3)
+
+
+def test_synthetic_is_deterministic_and_cycles():
+    first = SyntheticSource(32, 16, fps=0, frames=2, label="")
+    second = SyntheticSource(32, 16, fps=0, frames=2, label="")
+    first.open()
+    frames = [first.read()[1] for _ in range(3)]
+    second.open()
+    assert np.array_equal(second.read()[1], frames[0])
+    assert not np.array_equal(frames[0], frames[1])
+    assert np.array_equal(frames[0], frames[2])
+
+
+def test_synthetic_paces_frames():
+    source = SyntheticSource(8, 8, fps=50.0, frames=1)
+    source.open()
+    source.read()
+    start = time.monotonic()
+    for _ in range(5):
+        source.read()
+    assert time.monotonic() - start >= 5 / 50.0 * 0.8
+
+
+def test_synthetic_source_options():
+    source = synthetic_source(
+        {"width": 40, "height": 30, "fps": 0, "pattern": "bars"}
+    )
+    assert (source.width, source.height, source.fps) == (40, 30, 0)
+    assert source.pattern == "bars"
+
+
+def test_open_source_synthetic():
+    thread = VideoThread(source_type="synthetic")
+    names = [name for name, _ in source_candidates(thread, "synthetic")]
+    assert names == ["synthetic"]
+    source = open_source(thread, "synthetic", {"width": 16, "height": 8})
+    assert source.name == "synthetic"
+    assert source.read()[1].shape == (8, 16, 3)
+
+
+def test_replay_missing_path_fails_to_open(tmp_path):
+    assert not ReplaySource(str(tmp_path / "missing.mp4")).open()
+    # An empty folder has nothing to play either
+    assert not ReplaySource(str(tmp_path)).open()
@@ -0,0 +1,78 @@
+import hashlib
+import json
+import os
+import tarfile
+
+from src.core.tar_shards import TarShardSink
+
+
+def write(sink, count, size=10):
+    keys = []
+    for i in range(count):
+        key = sink.reserve_key()
+        sink.write_sample(key, "jpg", bytes([i]) * size, {"n": i})
+        keys.append(key)
+    return keys
+
+
+def visible(directory):
+    return sorted(n for n in os.listdir(directory) if not n.startswith("."))
+
+
+def test_rollover_and_manifest(tmp_path):
+    directory = str(tmp_path)
+    sink = TarShardSink(directory, "d_", max_samples=3)
+    keys = write(sink, 7)
+    assert keys[0] == "d_0001" and keys[-1] == "d_0007"
+    # Two full shards are in place; the third is still a hidden temp file
+    assert visible(directory) == [
+        "d_shard-000000.tar", "d_shard-000001.tar", "d_shards.json"
+    ]
+    sink.close()
+    assert "d_shard-000002.tar" in visible(directory)
+    assert not [n for n in os.listdir(directory) if n.endswith(".tmp")]
+
+    with open(tmp_path / "d_shards.json") as f:
+        manifest = json.load(f)
+    assert manifest["next_index"] == 8
+    shards = manifest["shards"]
+    assert [s["samples"] for s in shards] == [3, 3, 1]
+    assert [(s["first_key"], s["last_key"]) for s in shards] == [
+        ("d_0001", "d_0003"), ("d_0004", "d_0006"), ("d_0007", "d_0007")
+    ]
+    for shard in shards:
+        path = tmp_path / shard["name"]
+        data = path.read_bytes()
+        assert shard["bytes"] == len(data)
+        assert shard["sha256"] == hashlib.sha256(data).hexdigest()
+
+    with tarfile.open(tmp_path / "d_shard-000000.tar") as tar:
+        assert tar.getnames() == [
+            "d_0001.jpg", "d_0001.json", "d_0002.jpg", "d_0002.json",
+            "d_0003.jpg", "d_0003.json",
+        ]
+        meta = json.load(tar.extractfile("d_0002.json"))
+        assert meta == {"n": 1, "key": "d_0002"}
+        assert tar.extractfile("d_0002.jpg").read() == b"\x01" * 10
+
+
+def test_rollover_on_size(tmp_path):
+    # The tar stream writes in 10 KiB records, so sizes are checked
+    # to within one record
+    sink = TarShardSink(str(tmp_path), max_samples=100, max_bytes=16384)
+    write(sink, 3, size=20000)
+    sink.close()
+    with open(tmp_path / "shards.json") as f:
+        shards = json.load(f)["shards"]
+    assert [s["samples"] for s in shards] == [1, 1, 1]
+
+
+def test_numbering_continues_from_manifest(tmp_path):
+    sink = TarShardSink(str(tmp_path), max_samples=2)
+    write(sink, 3)
+    sink.close()
+    again = TarShardSink(str(tmp_path), max_samples=2)
+    assert again.describe_next() == "0004 in shard-000002.tar"
+    assert write(again, 1) == ["0004"]
+    again.close()
+    assert "shard-000002.tar" in visible(str(tmp_path))
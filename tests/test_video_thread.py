@@ -0,0 +1,115 @@
+import threading
+import time
+from types import SimpleNamespace
+
+from src.core.video_thread import VideoThread
+
+
+def test_flip_is_hot_without_pipeline_crop():
+    thread = VideoThread(source_type="synthetic")
+    thread.cap = SimpleNamespace(crops=True, crop_rect=None)
+    assert thread.apply_settings({"h_flip": True}) == "hot"
+    assert thread.h_flip and thread.restarts == 0
+
+
+def test_flip_restarts_with_pipeline_crop():
+    thread = VideoThread(source_type="synthetic")
+    thread.capture_roi = (0, 0, 64, 64)
+    thread.cap = SimpleNamespace(crops=True, crop_rect=(0, 0, 64, 64))
+    try:
+        assert thread.apply_settings({"v_flip": True}) == "restart"
+    finally:
+        thread.stop()
+    assert thread.v_flip and thread.restarts == 1
+
+
+def test_seed_settings_is_not_a_change():
+    thread = VideoThread(source_type="synthetic")
+    settings = dict(
+        thread.get_settings(),
+        exposure_range=[13000, 15013000],
+        gain_range=[1.0, 1.0],
+    )
+    thread.seed_settings(settings)
+    assert thread.exposure_range == (13000, 15013000)
+    assert thread.apply_settings(settings) == "unchanged"
+
+
+def test_synthetic_frames_reach_listeners_and_mailbox():
+    thread = VideoThread(
+        source_type="synthetic",
+        source_options={"width": 64, "height": 48, "fps": 100},
+    )
+    frames = []
+    done = threading.Event()
+
+    def listener(frame):
+        frames.append(frame.shape)
+        if len(frames) >= 5:
+            done.set()
+
+    thread.add_frame_listener(listener)
+    thread.start()
+    try:
+        assert done.wait(10.0)
+    finally:
+        thread.stop()
+    assert frames[0] == (48, 64, 3)
+    assert thread.cap.name == "synthetic"
+    packet = thread.mailbox.take_latest()
+    assert packet is not None and packet.frame.shape == (48, 64, 3)
+    packet.release()
+
+
+def test_preview_packet_carries_capture_time():
+    thread = VideoThread(
+        source_type="synthetic",
+        source_options={"width": 32, "height": 24, "fps": 100},
+    )
+    read_times = []
+    done = threading.Event()
+
+    def slow_listener(frame):
+        read_times.append(thread.frame_time)
+        time.sleep(0.02)
+        done.set()
+
+    thread.add_frame_listener(slow_listener)
+    thread.start()
+    try:
+        assert done.wait(10.0)
+        packet = None
+        while packet is None:
+            packet = thread.mailbox.take_latest()
+    finally:
+        thread.stop()
+    assert packet.timestamp in read_times
+    packet.release()
+
+
+def test_ring_buffer_keeps_capture_time():
+    thread = VideoThread(
+        source_type="synthetic",
+        source_options={"width": 32, "height": 24, "fps": 100},
+    )
+    read_times = []
+    done = threading.Event()
+
+    def slow_listener(frame):
+        # Runs before the ring's listener, delaying its push
+        read_times.append(thread.frame_time)
+        time.sleep(0.02)
+        if len(read_times) >= 3:
+            done.set()
+
+    thread.add_frame_listener(slow_listener)
+    thread.enable_ring_buffer(True)
+    thread.start()
+    try:
+        assert done.wait(10.0)
+    finally:
+        thread.stop()
+    ring = thread.ring_buffer
+    ring.freeze()
+    stamps = [ts for _, ts in ring.frames_between(0.0, time.monotonic())]
+    assert stamps and set(stamps) <= set(read_times)
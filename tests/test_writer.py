@@ -0,0 +1,103 @@
+import os
+import threading
+
+import cv2
+import numpy as np
+import pytest
+
+from conftest import wait_until
+from src.core.writer import CaptureWriter, write_atomic
+
+
+def test_write_atomic_replaces_in_one_step(tmp_path):
+    path = str(tmp_path / "a.bin")
+    write_atomic(path, b"old")
+    write_atomic(path, b"new", fsync=True)
+    with open(path, "rb") as f:
+        assert f.read() == b"new"
+    assert os.listdir(tmp_path) == ["a.bin"]
+
+
+def test_write_atomic_leaves_no_partial_file(tmp_path, monkeypatch):
+    path = str(tmp_path / "a.bin")
+    write_atomic(path, b"old")
+
+    def fail(src, dst):
+        raise OSError("disk full")
+
+    monkeypatch.setattr(os, "replace", fail)
+    with pytest.raises(OSError):
+        write_atomic(path, b"new")
+    # The old file is untouched and the temp file is gone
+    with open(path, "rb") as f:
+        assert f.read() == b"old"
+    assert os.listdir(tmp_path) == ["a.bin"]
+
+
+def test_queue_is_bounded(qapp, tmp_path):
+    writer = CaptureWriter(workers=1, queue_size=2, fsync_batch_size=0)
+    release = threading.Event()
+    write_job = writer._write_job
+
+    def held(job):
+        release.wait(10.0)
+        write_job(job)
+
+    writer._write_job = held
+    writer.start()
+    finished = []
+    writer.write_finished.connect(finished.append)
+    frame = np.full((20, 30, 3), 128, np.uint8)
+    paths = [str(tmp_path / f"{i}.png") for i in range(5)]
+    try:
+        # One job taken by the worker, two queued, the rest refused
+        assert writer.submit(frame, None, paths[0], "png")
+        assert wait_until(qapp, lambda: writer._queue.empty())
+        assert writer.submit(frame, (0, 0, 10, 5), paths[1], "png")
+        assert writer.submit(frame, None, paths[2], "png")
+        assert not writer.submit(frame, None, paths[3], "png")
+        assert not writer.submit_batch(
+            frame, [(None, paths[4], None)], "png"
+        )
+        assert writer.pending == 3
+    finally:
+        release.set()
+        writer.stop()
+    assert writer.pending == 0
+    assert wait_until(qapp, lambda: len(finished) == 3)
+    assert sorted(finished) == paths[:3]
+    assert not os.path.exists(paths[3])
+    assert cv2.imread(paths[1]).shape == (5, 10, 3)
+
+
+def test_submit_copies_the_crop(qapp, tmp_path):
+    writer = CaptureWriter(workers=1, queue_size=4, fsync_batch_size=0)
+    release = threading.Event()
+    write_job = writer._write_job
+
+    def held(job):
+        release.wait(10.0)
+        write_job(job)
+
+    writer._write_job = held
+    writer.start()
+    frame = np.zeros((8, 8, 3), np.uint8)
+    path = str(tmp_path / "copy.png")
+    assert writer.submit(frame, None, path, "png")
+    # The caller may reuse its frame right away
+    frame[:] = 255
+    release.set()
+    writer.stop()
+    assert cv2.imread(path).max() == 0
+
+
+def test_failed_write_is_reported(qapp, tmp_path):
+    writer = CaptureWriter(workers=1, queue_size=4, fsync_batch_size=0)
+    writer.start()
+    failed = []
+    writer.write_failed.connect(lambda path, error: failed.append(path))
+    path = str(tmp_path / "missing" / "x.png")
+    assert writer.submit(np.zeros((4, 4, 3), np.uint8), None, path, "png")
+    writer.stop()
+    assert wait_until(qapp, lambda: failed == [path])
+    assert writer.pending == 0